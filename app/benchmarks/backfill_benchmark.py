@@ -0,0 +1,104 @@
+"""
+Backfill benchmark: replaying daily runs vs the parallel backfill scheduler, for a year-long silver/gold rebuild
+
+Both variants run `utils/backfill.py`'s scheduler against a simulated BigQuery, where each job sleeps for a modelled
+duration (scaled down by `--speedup`) and reports the slots it used:
+  - replay:   one run date after another, each with the DAG's own parallelism (what `catchup` would do), gold MERGEs
+              recomputing their lookback window every day
+  - backfill: `backfill.plan_backfill` over the whole range, `--concurrency` units at a time within `--slot-budget`
+
+A job takes `--job-seconds` (queueing, startup and a daily partition's worth of work), plus `--merge-seconds-per-date`
+for every date a gold MERGE recomputes. Reported times are scaled back up to real time.
+
+Usage:
+    python benchmarks/backfill_benchmark.py --days 365 --concurrency 32 --slot-budget 2000
+"""
+import argparse
+import datetime
+import os
+import sys
+import time
+
+APP_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(os.path.join(APP_DIR, "utils"))
+
+import backfill                 # noqa: E402
+import specs                    # noqa: E402
+
+END_DATE = datetime.date(2025, 12, 31)
+
+
+class SimulatedBigQuery:
+    """
+    Stand-in for `backfill.BigQueryRunner`: sleeps for each job of a unit and returns the slot milliseconds it used
+    """
+
+    def __init__(self, job_seconds, merge_seconds_per_date, job_slots, speedup):
+        self.job_seconds = job_seconds
+        self.merge_seconds_per_date = merge_seconds_per_date
+        self.job_slots = job_slots
+        self.speedup = speedup
+        self.jobs = 0
+
+    def unit_seconds(self, unit):
+        seconds = 0
+        for step in specs.rebuild_tasks(unit.spec):
+            seconds += self.job_seconds
+            if step.kind == specs.SCRIPT_TASK and unit.params and unit.params.get("backfill_start_date"):
+                dates = (unit.run_date - datetime.date.fromisoformat(unit.params["backfill_start_date"])).days + 1
+                seconds += self.merge_seconds_per_date * dates
+        return seconds
+
+    def __call__(self, unit):
+        seconds = self.unit_seconds(unit)
+        self.jobs += len(specs.rebuild_tasks(unit.spec))
+        time.sleep(seconds / self.speedup)
+        # In scaled time, so the scheduler's slots = slot ms / elapsed ms estimate stays `job_slots`
+        return int(seconds / self.speedup * self.job_slots * 1000)
+
+
+def replay_units(run_date):
+    """
+    Returns the units of one daily DAG run: every gold MERGE recomputes its lookback window
+    """
+    return backfill.plan_backfill(run_date, run_date)
+
+
+def run(days, concurrency, slot_budget, job_seconds, merge_seconds_per_date, job_slots, speedup):
+    start_date = END_DATE - datetime.timedelta(days=days - 1)
+    print("{} run dates, {:.0f} s per job (+{} s per MERGEd date), {} slots per job, time scaled x{}".format(
+        days, job_seconds, merge_seconds_per_date, job_slots, speedup))
+    print("{:<10} {:>7} {:>8} {:>14} {:>11}".format("variant", "units", "jobs", "wall clock", "peak slots"))
+
+    simulated = SimulatedBigQuery(job_seconds, merge_seconds_per_date, job_slots, speedup)
+    replay = backfill.BackfillScheduler(simulated, concurrency=concurrency)
+    start, units = time.perf_counter(), 0
+    run_date = start_date
+    while run_date <= END_DATE:
+        day_units = replay_units(run_date)
+        replay.run(day_units)
+        units += len(day_units)
+        run_date += datetime.timedelta(days=1)
+    replay_hours = (time.perf_counter() - start) * speedup / 3600
+    print("{:<10} {:>7,} {:>8,} {:>12.1f} h {:>11}".format("replay", units, simulated.jobs, replay_hours, "-"))
+
+    simulated = SimulatedBigQuery(job_seconds, merge_seconds_per_date, job_slots, speedup)
+    scheduler = backfill.BackfillScheduler(simulated, concurrency=concurrency, slot_budget=slot_budget)
+    plan = backfill.plan_backfill(start_date, END_DATE)
+    summary = scheduler.run(plan)
+    backfill_hours = summary["seconds"] * speedup / 3600
+    print("{:<10} {:>7,} {:>8,} {:>12.1f} h {:>11,.0f}".format("backfill", len(plan), simulated.jobs, backfill_hours, scheduler.peak_slots))
+    print("speedup {:.1f}x".format(replay_hours / backfill_hours))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--days", type=int, default=365, help="run dates rebuilt, ending on {}".format(END_DATE))
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--slot-budget", type=int, default=2000)
+    parser.add_argument("--job-seconds", type=float, default=30)
+    parser.add_argument("--merge-seconds-per-date", type=float, default=0.5)
+    parser.add_argument("--job-slots", type=int, default=100, help="average slots a job uses while it runs")
+    parser.add_argument("--speedup", type=float, default=2000, help="simulated seconds per real second")
+    args = parser.parse_args()
+    run(args.days, args.concurrency, args.slot_budget, args.job_seconds, args.merge_seconds_per_date, args.job_slots, args.speedup)
@@ -0,0 +1,101 @@
+"""
+DAG parse-time benchmark
+
+Imports `dags/dag.py` (or `--dag-file`) the same way the scheduler's DAG processor does, against a stubbed Airflow connection.
+Any connection lookup, credential load, or outbound socket made during the import is counted, and the run fails if one occurs.
+
+Usage:
+    python benchmarks/dag_parse_benchmark.py --runs 20
+    python benchmarks/dag_parse_benchmark.py --dag-file dags/microbatch_dag.py
+"""
+import argparse
+import importlib.util
+import json
+import os
+import socket
+import statistics
+import sys
+import tempfile
+import time
+from unittest import mock
+
+APP_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+DAG_FILE = os.path.join(APP_DIR, "dags", "dag.py")
+UTILS_DIR = os.path.join(APP_DIR, "utils")
+
+
+def stub_environment():
+    """
+    Points Airflow at a throwaway home and registers the GCP connection as an environment variable,
+    so nothing has to be read from the metastore
+    """
+    os.environ.setdefault("AIRFLOW_HOME", tempfile.mkdtemp(prefix="airflow_parse_bench_"))
+    os.environ.setdefault("AIRFLOW__CORE__LOAD_EXAMPLES", "False")
+    os.environ.setdefault("AIRFLOW__CORE__UNIT_TEST_MODE", "True")
+    sys.path.insert(0, UTILS_DIR)
+
+    import common
+
+    conn_env = "AIRFLOW_CONN_" + common.GCP_SERVICE_ACCT.upper()
+    os.environ.setdefault(conn_env, json.dumps({
+        "conn_type": "google_cloud_platform",
+        "extra": {"project": common.BQ_PROJECT_ID},
+    }))
+
+
+def parse_dag_file(module_name, dag_file=DAG_FILE):
+    """
+    Executes the DAG file as a fresh module and returns it
+    """
+    spec = importlib.util.spec_from_file_location(module_name, dag_file)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def run(runs, dag_file=DAG_FILE):
+    stub_environment()
+
+    from airflow.hooks.base import BaseHook
+    from airflow.providers.google.common.hooks.base_google import GoogleBaseHook
+
+    # Warm-up parse absorbs one-time Airflow/provider import cost, which is shared by every DAG file on the box
+    parse_dag_file("dag_parse_bench_warmup", dag_file)
+
+    calls = {"get_connection": 0, "get_credentials": 0, "socket": 0}
+
+    def count(name, original):
+        def wrapper(*args, **kwargs):
+            calls[name] += 1
+            return original(*args, **kwargs)
+        return wrapper
+
+    timings_ms = []
+    with mock.patch.object(BaseHook, "get_connection", side_effect=count("get_connection", BaseHook.get_connection)), \
+            mock.patch.object(GoogleBaseHook, "get_credentials", side_effect=count("get_credentials", GoogleBaseHook.get_credentials)), \
+            mock.patch.object(socket, "create_connection", side_effect=count("socket", socket.create_connection)):
+        for i in range(runs):
+            start = time.perf_counter()
+            module = parse_dag_file("dag_parse_bench_{}".format(i), dag_file)
+            timings_ms.append((time.perf_counter() - start) * 1000)
+
+    print("dag file:            {}".format(dag_file))
+    print("tasks per parse:     {}".format(len(module.dag.tasks)))
+    print("parses:              {}".format(runs))
+    print("parse time min (ms): {:.2f}".format(min(timings_ms)))
+    print("parse time p50 (ms): {:.2f}".format(statistics.median(timings_ms)))
+    print("parse time max (ms): {:.2f}".format(max(timings_ms)))
+    print("connection lookups:  {}".format(calls["get_connection"]))
+    print("credential loads:    {}".format(calls["get_credentials"]))
+    print("outbound sockets:    {}".format(calls["socket"]))
+
+    if any(calls.values()):
+        raise SystemExit("DAG parse touched the metastore or network: {}".format(calls))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=20, help="number of timed parses")
+    parser.add_argument("--dag-file", default=DAG_FILE, help="DAG file to parse")
+    args = parser.parse_args()
+    run(args.runs, os.path.abspath(args.dag_file))
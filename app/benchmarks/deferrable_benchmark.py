@@ -0,0 +1,213 @@
+"""
+Deferrable benchmark: how many concurrent daily DAG runs a fixed pool of worker slots sustains
+
+Builds the task graph of `dags/dag.py` with `pipeline.build_pipeline` in three variants, and runs 1 to `--max-runs`
+DAG runs of it at once on an asyncio event loop, against a fake BigQuery job backend where each job takes a modelled
+duration (scaled down by `--speedup`):
+  - sync:       every BigQuery task holds its worker slot until its job has finished (`AIRFLOW_DEFERRABLE = False`)
+  - deferrable: BigQuery tasks take a slot to submit their job and again to evaluate it once the triggerer, polling
+                every `AIRFLOW_POLL_SECONDS`, has seen it finish. The slot is free in between
+  - batched:    deferrable, with the bronze loads without a fingerprint branch submitted as one script job
+                (`BRONZE_BATCHED_LOADS = True`), whose statements run one after another
+
+Every task start costs `--task-seconds` of worker time. Python tasks (conversions, fingerprints) and external table
+creation hold their slot throughout. Fingerprints are taken as changed, so carry-forwards are skipped. Reported times
+are scaled back up.
+
+Reports the makespan of each number of concurrent runs on `--workers` slots, the worker time one run uses, and the
+most runs each variant finishes within `--sla-minutes`.
+
+Usage:
+    python benchmarks/deferrable_benchmark.py --workers 4 --max-runs 8 --sla-minutes 30
+"""
+import argparse
+import asyncio
+import datetime
+import os
+import sys
+
+APP_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+DAGS_DIR = os.path.join(APP_DIR, "dags")
+sys.path.append(os.path.join(APP_DIR, "utils"))
+
+from airflow import DAG         # noqa: E402
+
+import common                   # noqa: E402
+import pipeline                 # noqa: E402
+import specs                    # noqa: E402
+
+# Modelled BigQuery job time per task, by task ID suffix
+JOB_SECONDS = {
+    "_load": 45,
+    "_quality_check": 15,
+    "_latest_view": 3,
+    "_fingerprint_update": 3,
+    "_watermark_update": 5,
+}
+# Modelled worker time of tasks that run on the worker itself, by task ID suffix
+WORKER_SECONDS = {
+    "_convert": 20,
+    "_fingerprint": 5,
+    "_external": 3,
+}
+SKIPPED_SUFFIX = "_carry_forward"
+
+VARIANTS = (
+    ("sync", False, False),
+    ("deferrable", True, False),
+    ("batched", True, True),
+)
+
+
+def modelled_seconds(task_id, durations):
+    for suffix, seconds in durations.items():
+        if task_id.endswith(suffix):
+            return seconds
+    return None
+
+
+def job_seconds(task):
+    """
+    Returns the modelled time of the task's BigQuery job, None for tasks that do not submit one
+    """
+    if task.task_id == specs.BATCHED_LOAD_TASK_ID:
+        return JOB_SECONDS["_load"] * len(task.params)
+    return modelled_seconds(task.task_id, JOB_SECONDS)
+
+
+def build_tasks(deferrable, batch_bronze_loads):
+    """
+    Returns the task_id -> task dict of the daily DAG built with the given options
+    """
+    with DAG(dag_id="deferrable_benchmark", start_date=datetime.datetime(2025, 1, 1), schedule=None) as dag:
+        return pipeline.build_pipeline(dag, DAGS_DIR, deferrable=deferrable, batch_bronze_loads=batch_bronze_loads)
+
+
+class WorkerPool:
+    """
+    Stand-in for the Celery worker slots: at most `workers` tasks hold one at a time. Tracks the scaled time they are held
+    """
+
+    def __init__(self, workers, speedup):
+        self.slots = asyncio.Semaphore(workers)
+        self.speedup = speedup
+        self.busy_seconds = 0.0
+
+    async def hold(self, seconds, backend=None, submitted_seconds=None):
+        """
+        Holds a slot for `seconds`, then, given a `backend`, submits a job of `submitted_seconds` and returns it
+        """
+        async with self.slots:
+            started = asyncio.get_running_loop().time()
+            await asyncio.sleep(seconds / self.speedup)
+            job = backend.submit(submitted_seconds) if backend else None
+            self.busy_seconds += (asyncio.get_running_loop().time() - started) * self.speedup
+            return job
+
+    async def hold_until_done(self, seconds, backend, submitted_seconds):
+        """
+        Holds a slot for `seconds`, then submits a job of `submitted_seconds` and keeps the slot until it has finished
+        """
+        async with self.slots:
+            started = asyncio.get_running_loop().time()
+            await asyncio.sleep(seconds / self.speedup)
+            await backend.submit(submitted_seconds)
+            self.busy_seconds += (asyncio.get_running_loop().time() - started) * self.speedup
+
+
+class FakeJobBackend:
+    """
+    Stand-in for BigQuery: a submitted job finishes its modelled time later, without using a worker slot
+    """
+
+    def __init__(self, speedup, poll_seconds):
+        self.speedup = speedup
+        self.poll_seconds = poll_seconds
+        self.jobs = 0
+
+    def submit(self, seconds):
+        self.jobs += 1
+        return asyncio.ensure_future(asyncio.sleep(seconds / self.speedup))
+
+    async def poll(self, job):
+        """
+        Returns once the triggerer's polling has seen `job` finish, see `BigQueryInsertJobTrigger`
+        """
+        while not job.done():
+            await asyncio.sleep(self.poll_seconds / self.speedup)
+
+
+async def run_task(task, pool, backend, task_seconds):
+    """
+    Runs one task on `pool`: a deferrable BigQuery task gives its slot back between submitting its job and
+    evaluating it
+    """
+    seconds = job_seconds(task)
+    if seconds is None:
+        await pool.hold(task_seconds + (modelled_seconds(task.task_id, WORKER_SECONDS) or 0))
+    elif not task.deferrable:
+        await pool.hold_until_done(task_seconds, backend, seconds)
+    else:
+        job = await pool.hold(task_seconds, backend, seconds)
+        await backend.poll(job)
+        await pool.hold(task_seconds)
+
+
+async def run_dag(tasks, pool, backend, task_seconds):
+    """
+    Runs one DAG run, each task starting once all of its upstream tasks have finished or been skipped
+    """
+    finished = {task_id: asyncio.Event() for task_id in tasks}
+
+    async def run_one(task):
+        for upstream_id in task.upstream_task_ids:
+            await finished[upstream_id].wait()
+        if not task.task_id.endswith(SKIPPED_SUFFIX):
+            await run_task(task, pool, backend, task_seconds)
+        finished[task.task_id].set()
+
+    await asyncio.gather(*(run_one(task) for task in tasks.values()))
+
+
+async def run_concurrent(tasks, runs, workers, task_seconds, poll_seconds, speedup):
+    """
+    Returns (makespan, worker seconds per run, jobs per run) of `runs` concurrent DAG runs, in scaled-up seconds
+    """
+    pool, backend = WorkerPool(workers, speedup), FakeJobBackend(speedup, poll_seconds)
+    started = asyncio.get_running_loop().time()
+    await asyncio.gather(*(run_dag(tasks, pool, backend, task_seconds) for _ in range(runs)))
+    makespan = (asyncio.get_running_loop().time() - started) * speedup
+    return makespan, pool.busy_seconds / runs, backend.jobs / runs
+
+
+def run(workers, max_runs, sla_minutes, task_seconds, poll_seconds, speedup):
+    print("{} worker slots, {} s per task start, triggerer polling every {} s, time scaled x{}".format(
+        workers, task_seconds, poll_seconds, speedup))
+    results = {}
+    for name, deferrable, batch_bronze_loads in VARIANTS:
+        tasks = build_tasks(deferrable, batch_bronze_loads)
+        results[name] = [asyncio.run(run_concurrent(tasks, runs, workers, task_seconds, poll_seconds, speedup))
+                         for runs in range(1, max_runs + 1)]
+        _, busy_seconds, jobs = results[name][0]
+        print("{:<10} {:>3} tasks, {:>3.0f} jobs, {:>6.1f} worker minutes per run".format(
+            name, len(tasks), jobs, busy_seconds / 60))
+
+    print("{:<6}".format("runs") + "".join("{:>14}".format(name) for name, _, _ in VARIANTS) + "   (makespan, minutes)")
+    for runs in range(1, max_runs + 1):
+        print("{:<6}".format(runs) + "".join("{:>14.1f}".format(results[name][runs - 1][0] / 60) for name, _, _ in VARIANTS))
+    for name, _, _ in VARIANTS:
+        sustained = [runs for runs in range(1, max_runs + 1) if results[name][runs - 1][0] <= sla_minutes * 60]
+        print("{:<10} runs finished within {} minutes: {}".format(
+            name, sla_minutes, max(sustained) if sustained else 0) + ("+" if len(sustained) == max_runs else ""))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=4, help="Celery worker slots shared by the runs")
+    parser.add_argument("--max-runs", type=int, default=8, help="concurrent DAG runs, 1 to this many")
+    parser.add_argument("--sla-minutes", type=float, default=30, help="time every concurrent run must finish within")
+    parser.add_argument("--task-seconds", type=float, default=2, help="worker time to start a task, or resume a deferred one")
+    parser.add_argument("--poll-seconds", type=float, default=common.AIRFLOW_POLL_SECONDS, help="triggerer polling interval")
+    parser.add_argument("--speedup", type=float, default=600, help="modelled seconds per real second")
+    args = parser.parse_args()
+    run(args.workers, args.max_runs, args.sla_minutes, args.task_seconds, args.poll_seconds, args.speedup)
@@ -0,0 +1,126 @@
+"""
+Gold build benchmark: full date spine vs incremental MERGE
+
+Loads the bundled `data/` exports into DuckDB, scales them up by replicating entities and sales under new IDs, and
+compares the rows written and runtime of one daily gold run for each approach:
+  - spine:        every entity x every date since 2017-06-01, rewritten each day (`*_daily_insert.sql`)
+  - incremental:  every entity x (lookback + 1) dates, merged into the date-partitioned table (`*_incremental_merge.sql`)
+
+The queries mirror the shape of the gold SQL (cross-joined spine, channel aggregates, left join) on a reduced set of
+measures, so relative cost is representative without needing BigQuery.
+
+Usage:
+    python benchmarks/gold_incremental_benchmark.py --scale 10 --run-date 2025-06-30 --lookback-days 7
+"""
+import argparse
+import os
+import time
+
+import duckdb
+
+APP_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+DATA_DIR = os.path.join(APP_DIR, "..", "data")
+SPINE_START_DATE = "2017-06-01"
+
+
+def load_scaled_fact(con, scale):
+    """
+    Builds `customers` and a line-item sales `fact` table, replicated `scale` times under offset IDs
+    """
+    def csv(name):
+        return os.path.join(DATA_DIR, "{} - Export.csv".format(name)).replace("'", "''")
+
+    con.execute("CREATE TABLE copies AS SELECT range AS copy FROM range({})".format(scale))
+    con.execute("""
+        CREATE TABLE customers AS
+        SELECT cust_id + copy * 1000000 AS customer_id, comp_nm AS customer_company_name
+        FROM read_csv_auto('{}') CROSS JOIN copies
+    """.format(csv("customers")))
+    con.execute("""
+        CREATE TABLE fact AS
+        SELECT
+            line.crt_dt                                         AS line_created_date,
+            orders.cust_id + copies.copy * 1000000              AS customer_id,
+            COALESCE(orders.sales_ch = 'Direct', FALSE)         AS is_order_direct_sale,
+            COALESCE(orders.sales_ch = 'Distributor', FALSE)    AS is_order_distributor_sale,
+            COALESCE(orders.sales_ch = 'Online', FALSE)         AS is_order_online_sale,
+            line.quan                                           AS line_quantity_sold,
+            line.quan * line.u_price                            AS line_revenue_amount_total,
+        FROM read_csv_auto('{}') AS line
+        LEFT JOIN read_csv_auto('{}') AS orders
+            ON  orders.ord_id = line.ord_id
+        CROSS JOIN copies
+        WHERE line.ord_type = 'SO'
+    """.format(csv("order_line_items"), csv("sales_orders")))
+
+
+def gold_query(range_start, run_date):
+    return """
+        WITH
+        component_date_generator AS
+        (
+            SELECT
+                CAST(date AS DATE)                      AS date,
+                date_trunc('month', CAST(date AS DATE)) AS month_start_date,
+            FROM generate_series(DATE '{start}', DATE '{end}', INTERVAL 1 DAY) AS t(date)
+        ),
+        module_sales_by_customer AS
+        (
+            SELECT
+                line_created_date   AS date_of_sale,
+                customer_id,
+                SUM(line_quantity_sold)                                                     AS quantity_sold_total,
+                SUM(CASE WHEN is_order_direct_sale THEN line_quantity_sold END)             AS quantity_sold_direct,
+                SUM(CASE WHEN is_order_distributor_sale THEN line_quantity_sold END)        AS quantity_sold_distributor,
+                SUM(CASE WHEN is_order_online_sale THEN line_quantity_sold END)             AS quantity_sold_online,
+                SUM(line_revenue_amount_total)                                              AS revenue_total,
+                SUM(CASE WHEN is_order_direct_sale THEN line_revenue_amount_total END)      AS revenue_direct,
+                SUM(CASE WHEN is_order_distributor_sale THEN line_revenue_amount_total END) AS revenue_distributor,
+                SUM(CASE WHEN is_order_online_sale THEN line_revenue_amount_total END)      AS revenue_online,
+            FROM fact
+            WHERE line_created_date BETWEEN DATE '{start}' AND DATE '{end}'
+            GROUP BY ALL
+        )
+        SELECT
+            component_date_generator.*,
+            customers.*,
+            module_sales_by_customer.* EXCLUDE (date_of_sale, customer_id),
+        FROM customers
+        CROSS JOIN component_date_generator
+        LEFT JOIN module_sales_by_customer
+            ON  module_sales_by_customer.customer_id = customers.customer_id
+            AND module_sales_by_customer.date_of_sale = component_date_generator.date
+    """.format(start=range_start, end=run_date)
+
+
+def time_build(con, label, range_start, run_date):
+    con.execute("DROP TABLE IF EXISTS gold_output")
+    start = time.perf_counter()
+    con.execute("CREATE TABLE gold_output AS " + gold_query(range_start, run_date))
+    elapsed = time.perf_counter() - start
+    rows = con.execute("SELECT COUNT(*) FROM gold_output").fetchone()[0]
+    print("{:<12} range {} .. {} | rows written {:>12,} | runtime {:>8.3f} s".format(label, range_start, run_date, rows, elapsed))
+    return rows, elapsed
+
+
+def run(scale, run_date, lookback_days):
+    con = duckdb.connect()
+    load_scaled_fact(con, scale)
+    customers, fact_rows = con.execute("SELECT (SELECT COUNT(*) FROM customers), (SELECT COUNT(*) FROM fact)").fetchone()
+    print("scale x{}: {:,} customers, {:,} fact rows".format(scale, customers, fact_rows))
+
+    incremental_start = con.execute("SELECT CAST(DATE '{}' - INTERVAL {} DAY AS DATE)".format(run_date, lookback_days)).fetchone()[0]
+    spine_rows, spine_seconds = time_build(con, "spine", SPINE_START_DATE, run_date)
+    incremental_rows, incremental_seconds = time_build(con, "incremental", incremental_start, run_date)
+
+    print("rows written reduction: {:,.0f}x | runtime reduction: {:,.1f}x".format(
+        spine_rows / max(incremental_rows, 1), spine_seconds / max(incremental_seconds, 1e-9)))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", type=int, default=10, help="number of copies of the bundled data")
+    parser.add_argument("--run-date", default="2025-06-30", help="logical date (ds) of the simulated run")
+    parser.add_argument("--lookback-days", type=int, default=7, help="matches the gold specs' lookback_days")
+    args = parser.parse_args()
+    run(args.scale, args.run_date, args.lookback_days)
@@ -0,0 +1,107 @@
+"""
+Gold shared-scan benchmark: one channel pivot read per gold table vs one per run
+
+Generates a synthetic data set and runs `--days` daily builds through `utils/local_engine.py` twice:
+  - per-table: every gold MERGE reads its dates of `fact_sales_channel_daily_wide` itself
+  - shared:    `utils/gold_scan.py` reads them once into a temporary table, which every gold MERGE reads
+
+`--extra-marts` adds copies of the gold tables to both variants, standing in for future marts built from the pivot.
+A copy MERGEs the same rows into the same table again, so the tables are unchanged while each copy adds its reads.
+
+Reports the bytes BigQuery would bill the gold loads per run, estimated from DuckDB's plans the same way as the
+`bytes_budget` checks (see `utils/budget.py`), and checks both variants leave the same gold rows.
+
+Usage:
+    python benchmarks/gold_shared_scan_benchmark.py --scale 5 --days 3 --extra-marts 4
+"""
+import argparse
+import dataclasses
+import datetime
+import os
+import sys
+import tempfile
+
+APP_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(os.path.join(APP_DIR, "utils"))
+
+import data_generator           # noqa: E402
+import gold_scan                # noqa: E402
+import local_engine             # noqa: E402
+import specs                    # noqa: E402
+
+START_DATE = datetime.date(2025, 6, 1)
+
+
+def pivot_marts(table_specs=specs.TABLE_SPECS):
+    """
+    Returns the gold specs built from the channel pivot, i.e. not the rollups, which are built from them
+    """
+    return [spec for spec in table_specs if spec.layer == specs.GOLD and not spec.rollup_grain]
+
+
+def with_extra_marts(extra_marts):
+    """
+    Returns the table specs with `extra_marts` copies of the pivot marts appended, alternating between them
+    """
+    marts, copies = pivot_marts(), []
+    for index in range(extra_marts):
+        spec = marts[index % len(marts)]
+        copies.append(dataclasses.replace(spec, key="{}_copy{}".format(spec.key, index), task_prefix="{}_copy{}".format(spec.task_prefix, index)))
+    return specs.TABLE_SPECS + tuple(copies)
+
+
+def run_variant(work_dir, days, table_specs, gold_shared_scan):
+    engine = local_engine.LocalEngine(landing_dir=work_dir, table_specs=table_specs, gold_shared_scan=gold_shared_scan)
+    engine.init_tables()
+    engine.run_range(START_DATE, START_DATE + datetime.timedelta(days=days - 1))
+    return engine
+
+
+def gold_load_bytes(engine, table_specs):
+    """
+    Returns the estimated bytes of the gold loads, or of the shared scan standing in for them, over every run
+    """
+    task_ids = {spec.load_task_id for spec in pivot_marts(table_specs)} | {gold_scan.SHARED_SCAN_TASK_ID}
+    return sum(estimate["estimated_bytes"] for estimate in engine.budget_estimates if estimate["task_id"] in task_ids)
+
+
+def table_digest(engine, spec):
+    """
+    Returns (rows, digest) of the table, with measures rounded: the order of floating point sums differs between runs
+    """
+    table = "{}.{}".format(spec.dataset_id, spec.checked_table_id)
+    columns = []
+    for column, column_type in engine.con.execute("SELECT column_name, column_type FROM (DESCRIBE {})".format(table)).fetchall():
+        columns.append("ROUND({0}, 6) AS {0}".format(column) if column_type == "DOUBLE" else column)
+    return engine.con.execute("SELECT COUNT(*), BIT_XOR(HASH(t)) FROM (SELECT {} FROM {}) AS t".format(", ".join(columns), table)).fetchone()
+
+
+def run(scale, days, extra_marts):
+    table_specs = with_extra_marts(extra_marts)
+    with tempfile.TemporaryDirectory() as work_dir:
+        data_generator.generate(data_generator.GeneratorConfig(scale=scale, output_dir=work_dir))
+        print("scale x{}: {} daily runs from {}, {} gold marts".format(scale, days, START_DATE, len(pivot_marts(table_specs))))
+        print("{:<10} {:>10} {:>18}".format("variant", "gold jobs", "gold MB per run"))
+
+        results = {}
+        for name, gold_shared_scan in (("per-table", False), ("shared", True)):
+            engine = run_variant(work_dir, days, table_specs, gold_shared_scan)
+            jobs = 1 if gold_shared_scan else len(pivot_marts(table_specs))
+            results[name] = (engine, gold_load_bytes(engine, table_specs) / days)
+            print("{:<10} {:>10} {:>18,.2f}".format(name, jobs, results[name][1] / 1e6))
+        print("gold bytes reduced {:.1f}x".format(results["per-table"][1] / max(results["shared"][1], 1)))
+
+        mismatched = [spec.key for spec in specs.GOLD_TABLES
+                      if table_digest(results["per-table"][0], spec) != table_digest(results["shared"][0], spec)]
+        print("gold tables differing between variants: {}".format(", ".join(mismatched) or "none"))
+        if mismatched:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", type=float, default=5, help="data_generator scale, ~5,700 rows per unit")
+    parser.add_argument("--days", type=int, default=3, help="daily runs from {}".format(START_DATE))
+    parser.add_argument("--extra-marts", type=int, default=0, help="copies of the gold tables added to both variants")
+    args = parser.parse_args()
+    run(args.scale, args.days, args.extra_marts)
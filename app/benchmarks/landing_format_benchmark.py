@@ -0,0 +1,101 @@
+"""
+Landing format benchmark: autodetected CSV vs typed, date-partitioned Parquet
+
+Generates a synthetic data set with `utils/data_generator.py`, then for each landing format:
+  - runs one day of bronze loads through `utils/local_engine.py` and reports the load time
+  - reports the bytes an external table scan reads, for the full bronze load (every column) and for a column-pruned
+    query (`crt_dt`, `quan`, `u_price` of the line items)
+
+CSV external tables always read whole files. For Parquet, bytes read are the compressed column chunks of the selected
+columns in the run's `landing_date` partition, taken from the Parquet footers; the conversion time is reported
+separately since it happens once per landing file.
+
+Usage:
+    python benchmarks/landing_format_benchmark.py --scale 100 --run-date 2025-06-30
+"""
+import argparse
+import dataclasses
+import datetime
+import os
+import sys
+import tempfile
+import time
+
+APP_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(os.path.join(APP_DIR, "utils"))
+
+import common                   # noqa: E402
+import data_generator           # noqa: E402
+import landing                  # noqa: E402
+import local_engine             # noqa: E402
+import specs                    # noqa: E402
+
+PRUNED_COLUMNS = ("crt_dt", "quan", "u_price")
+
+
+def bronze_specs(landing_format):
+    return tuple(dataclasses.replace(spec, landing_format=landing_format) for spec in specs.BRONZE_TABLES)
+
+
+def parquet_bytes(path, columns=None):
+    """
+    Returns the compressed size of `columns` (all when None) across every row group of a Parquet file
+    """
+    import pyarrow.parquet as pq
+
+    metadata = pq.ParquetFile(path).metadata
+    total = 0
+    for row_group in range(metadata.num_row_groups):
+        for column in range(metadata.num_columns):
+            chunk = metadata.row_group(row_group).column(column)
+            if columns is None or chunk.path_in_schema in columns:
+                total += chunk.total_compressed_size
+    return total
+
+
+def csv_bytes(landing_dir, entity):
+    pattern = local_engine.resolve_landing_file(landing_dir, entity)
+    directory = os.path.dirname(pattern)
+    if "*" in pattern:
+        return sum(os.path.getsize(os.path.join(directory, name)) for name in os.listdir(directory))
+    return os.path.getsize(pattern)
+
+
+def time_bronze(landing_dir, landing_format, run_date, parquet_dir):
+    engine = local_engine.LocalEngine(landing_dir=landing_dir, table_specs=bronze_specs(landing_format), parquet_dir=parquet_dir)
+    engine.init_tables()
+    engine.run_day(run_date)
+    convert = sum(run["seconds"] for run in engine.task_runs if run["task_id"].endswith("_convert"))
+    load = sum(run["seconds"] for run in engine.task_runs if not run["task_id"].endswith("_convert"))
+    return convert, load
+
+
+def run(scale, run_date):
+    with tempfile.TemporaryDirectory() as work_dir:
+        landing_dir = os.path.join(work_dir, "landing")
+        parquet_dir = os.path.join(work_dir, "parquet")
+        config = data_generator.GeneratorConfig(scale=scale, output_dir=landing_dir)
+        totals = data_generator.generate(config)
+        print("scale x{}: {:,} rows generated".format(scale, sum(totals.values())))
+
+        _, csv_load = time_bronze(landing_dir, common.LANDING_FORMAT_CSV, run_date, parquet_dir)
+        convert, parquet_load = time_bronze(landing_dir, common.LANDING_FORMAT_PARQUET, run_date, parquet_dir)
+        print("bronze load time  | csv {:>8.3f} s | parquet {:>8.3f} s (+ {:.3f} s one-off conversion) | {:.1f}x".format(
+            csv_load, parquet_load, convert, csv_load / max(parquet_load, 1e-9)))
+
+        print("{:<18} {:>14} {:>14} {:>16}".format("bytes scanned", "csv", "parquet", "parquet pruned"))
+        for entity in (spec.key for spec in specs.BRONZE_TABLES):
+            path = os.path.join(parquet_dir, *landing.partition_path(entity, run_date.isoformat()).split("/"))
+            pruned = parquet_bytes(path, PRUNED_COLUMNS) if entity == common.ORDER_LINE_ITEMS else None
+            print("{:<18} {:>14,} {:>14,} {:>16}".format(
+                entity, csv_bytes(landing_dir, entity), parquet_bytes(path), "{:,}".format(pruned) if pruned else "-"))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", type=float, default=100, help="data_generator scale, ~5,700 rows per unit")
+    parser.add_argument("--run-date", type=datetime.date.fromisoformat, default=datetime.date(2025, 6, 30))
+    args = parser.parse_args()
+    start = time.perf_counter()
+    run(args.scale, args.run_date)
+    print("total benchmark time {:.1f} s".format(time.perf_counter() - start))
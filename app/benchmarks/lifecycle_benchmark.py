@@ -0,0 +1,145 @@
+"""
+Partition lifecycle benchmark: hot storage before and after `lifecycle` tiers expired partitions to the archive
+
+Runs `--days` daily builds of a synthetic data set through `utils/local_engine.py`, the first one backfilling gold from
+2025-01-01, then the lifecycle run of the last day with every retention shortened to `--keep-days` (the real ones are
+weeks to years), with a temporary directory standing in for the archive bucket. Runs repeat until nothing is left to
+archive, each archiving at most `common.ARCHIVE_MAX_PARTITIONS_PER_RUN` partitions per table.
+
+Reports, per table, the bytes a full scan of the hot table would bill before and after, estimated from DuckDB's plans
+the same way as the `bytes_budget` checks (see `utils/budget.py`), and the Parquet bytes archived. Then checks:
+  - `<table>_all` returns exactly the rows the table held before archiving
+  - restoring every archived partition of a table gives back exactly those rows
+  - the next lifecycle run drops the restored partitions again without exporting them a second time
+
+Usage:
+    python benchmarks/lifecycle_benchmark.py --scale 2 --days 5 --keep-days 2
+"""
+import argparse
+import dataclasses
+import datetime
+import os
+import sys
+import tempfile
+import time
+
+APP_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(os.path.join(APP_DIR, "utils"))
+
+import budget                   # noqa: E402
+import common                   # noqa: E402
+import data_generator           # noqa: E402
+import lifecycle                # noqa: E402
+import local_engine             # noqa: E402
+import specs                    # noqa: E402
+
+END_DATE = datetime.date(2025, 6, 30)
+HISTORY_START_DATE = datetime.date(2025, 1, 1)
+RESTORED_KEY = common.BQ_FACT_SALES_CHANNEL
+
+
+def build(work_dir, scale, days):
+    data_generator.generate(data_generator.GeneratorConfig(scale=scale, output_dir=work_dir))
+    start_date = END_DATE - datetime.timedelta(days=days - 1)
+    engine = local_engine.LocalEngine(landing_dir=work_dir)
+    engine.init_tables()
+    engine.run_day(start_date, {"backfill_start_date": HISTORY_START_DATE.isoformat()})
+    engine.run_range(start_date + datetime.timedelta(days=1), END_DATE)
+    return engine
+
+
+def table_path(spec, table_id):
+    return "`{}.{}.{}`".format(common.BQ_PROJECT_ID, spec.dataset_id, table_id)
+
+
+def rows_digest(engine, spec, table_id):
+    """
+    Returns (rows, order-independent hash of the rows) of a table or view
+    """
+    return engine.execute("SELECT COUNT(*), BIT_XOR(HASH(t)) FROM {} AS t".format(table_path(spec, table_id))).fetchone()
+
+
+def hot_bytes(engine, spec):
+    return budget.LocalDryRun(engine.con)(local_engine.translate("SELECT * FROM {}".format(table_path(spec, spec.checked_table_id))))
+
+
+def archive_bytes(archive_dir, spec):
+    root = os.path.join(archive_dir, lifecycle.archive_prefix(spec))
+    return sum(os.path.getsize(os.path.join(path, name)) for path, _, names in os.walk(root) for name in names)
+
+
+def manifest_exports(engine, spec):
+    return engine.execute('SELECT partition_date, execution_ts FROM {} WHERE source_table = "{}"'.format(
+        lifecycle.MANIFEST_TABLE, spec.checked_table_id)).fetchall()
+
+
+def archive_all(engine, archive_dir, run_date, table_specs):
+    """
+    Runs the lifecycle of `run_date` until nothing is left to archive, returning ({table: partitions dropped}, runs)
+    """
+    dropped, runs = {}, 0
+    while True:
+        result = lifecycle.archive_local(engine, archive_dir, run_date, table_specs)
+        runs += 1
+        for table, count in result.items():
+            dropped[table] = dropped.get(table, 0) + count
+        if not any(result.values()):
+            return dropped, runs
+
+
+def run(scale, days, keep_days):
+    table_specs = tuple(
+        dataclasses.replace(spec, archive_after_days=keep_days) if spec.archive_after_days is not None else spec
+        for spec in specs.TABLE_SPECS
+    )
+    archived = lifecycle.archived_specs(table_specs)
+    with tempfile.TemporaryDirectory() as work_dir:
+        archive_dir = os.path.join(work_dir, "archive_bucket")
+        start = time.perf_counter()
+        engine = build(work_dir, scale, days)
+        print("scale x{}: {} daily runs built in {:.1f} s, gold history from {}".format(scale, days, time.perf_counter() - start, HISTORY_START_DATE))
+
+        before = {spec.key: (hot_bytes(engine, spec), rows_digest(engine, spec, spec.checked_table_id)) for spec in archived}
+        start = time.perf_counter()
+        dropped, runs = archive_all(engine, archive_dir, END_DATE, table_specs)
+        print("lifecycle of {}, keeping {} days hot: {} runs in {:.1f} s".format(END_DATE, keep_days, runs, time.perf_counter() - start))
+
+        print("{:<54} {:>10} {:>14} {:>14} {:>14}".format("table", "archived", "hot bytes", "hot after", "archive bytes"))
+        totals = [0, 0, 0]
+        mismatched = []
+        for spec in archived:
+            after = hot_bytes(engine, spec)
+            stored = archive_bytes(archive_dir, spec)
+            print("{:<54} {:>10} {:>14,} {:>14,} {:>14,}".format(
+                spec.checked_table_id, dropped[spec.checked_table_id], before[spec.key][0], after, stored))
+            totals = [totals[0] + before[spec.key][0], totals[1] + after, totals[2] + stored]
+            if dropped[spec.checked_table_id] and rows_digest(engine, spec, lifecycle.all_view_id(spec)) != before[spec.key][1]:
+                mismatched.append(lifecycle.all_view_id(spec))
+        print("{:<54} {:>10} {:>14,} {:>14,} {:>14,}".format("total", "", *totals))
+
+        spec = specs.get_spec(RESTORED_KEY, table_specs)
+        exports = manifest_exports(engine, spec)
+        days_archived = sorted(day for day, _ in exports)
+        restored = lifecycle.restore(spec, days_archived, lifecycle.LocalArchive(engine, archive_dir))
+        print("{}: {:,} rows of {} partitions restored".format(spec.checked_table_id, restored, len(days_archived)))
+        if rows_digest(engine, spec, spec.checked_table_id) != before[spec.key][1]:
+            mismatched.append("{} restored".format(spec.checked_table_id))
+
+        redropped, _ = archive_all(engine, archive_dir, END_DATE, table_specs)
+        print("rerun: {} partitions dropped again, {} exported again".format(
+            sum(redropped.values()), len(set(manifest_exports(engine, spec)) - set(exports))))
+        if redropped[spec.checked_table_id] != len(days_archived) or set(manifest_exports(engine, spec)) != set(exports):
+            mismatched.append("{} rerun".format(spec.checked_table_id))
+
+        print("tables differing from their pre-archive rows: {}".format(", ".join(mismatched) or "none"))
+        if mismatched:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", type=float, default=2, help="data_generator scale, ~5,700 rows per unit")
+    parser.add_argument("--days", type=int, default=5, help="daily runs ending on {}".format(END_DATE))
+    parser.add_argument("--keep-days", type=int, default=2, help="retention of every archived table, in days")
+    args = parser.parse_args()
+    run(args.scale, args.days, args.keep_days)
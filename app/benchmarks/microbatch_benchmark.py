@@ -0,0 +1,113 @@
+"""
+Micro-batch benchmark: intraday batches vs the next daily run
+
+Generates a synthetic data set, loads the daily run of the day before `--date` through `utils/local_engine.py`, then
+feeds the new and changed orders and line items of `--date` into a watched directory in `--batches` chunks and runs a
+micro-batch after each (see `utils/microbatch.py`). Finally the daily run of `--date` itself is loaded on top.
+
+Reports the time of each batch against the daily run, i.e. how fresh today's gold rows can be kept, and compares what
+the batches left in the latest snapshot with what the daily run computes from the full export:
+  - the line item fact, every line up to `--date`
+  - the channel fact and the gold tables, the rows of `--date`
+  - the gold rollups, the rows of the buckets holding `--date`
+
+DOUBLE measures match within a relative `RELATIVE_TOLERANCE`, the order of floating point sums differs between the
+two.
+
+Usage:
+    python benchmarks/microbatch_benchmark.py --scale 20 --date 2025-06-10 --batches 12
+"""
+import argparse
+import datetime
+import os
+import statistics
+import sys
+import tempfile
+
+APP_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(os.path.join(APP_DIR, "utils"))
+
+import common                   # noqa: E402
+import data_generator           # noqa: E402
+import microbatch               # noqa: E402
+import rollups                  # noqa: E402
+
+
+RELATIVE_TOLERANCE = 1e-9
+
+
+def snapshot_rows(engine, spec, snapshot_date, run_date):
+    """
+    Returns the table's rows in the daily snapshot of `snapshot_date`: every row for the line item fact, the rows of
+    `run_date`'s bucket for rollups, those of `run_date` otherwise. `execution_ts` is left out, and rows are sorted on
+    every column but the DOUBLE measures
+    """
+    table = "{}.{}".format(spec.dataset_id, spec.checked_table_id)
+    columns, key_indexes = [], []
+    for column, column_type in engine.con.execute("SELECT column_name, column_type FROM (DESCRIBE {})".format(table)).fetchall():
+        if column != "execution_ts":
+            if column_type != "DOUBLE":
+                key_indexes.append(len(columns))
+            columns.append(column)
+    date_filter = "date = DATE '{}'".format(rollups.bucket_start(run_date, spec.rollup_grain).isoformat())
+    if spec.key == common.BQ_FACT_LINE_ITEM_SALES:
+        date_filter = "TRUE"
+    rows = engine.con.execute("SELECT {} FROM {} WHERE execution_ts = TIMESTAMP '{}' AND {}".format(
+        ", ".join(columns), table, snapshot_date.isoformat(), date_filter)).fetchall()
+    return sorted(rows, key=lambda row: [(row[index] is None, row[index]) for index in key_indexes])
+
+
+def _values_match(value, expected):
+    if isinstance(value, float) and isinstance(expected, float):
+        return abs(value - expected) <= RELATIVE_TOLERANCE * max(1, abs(expected))
+    return value == expected
+
+
+def rows_match(rows, expected):
+    """
+    Whether both sorted row lists hold the same values, DOUBLE measures within `RELATIVE_TOLERANCE`
+    """
+    return len(rows) == len(expected) and all(
+        _values_match(value, expected_value) for row, expected_row in zip(rows, expected) for value, expected_value in zip(row, expected_row))
+
+
+def run(scale, run_date, batches):
+    with tempfile.TemporaryDirectory() as work_dir:
+        landing_dir, watch_dir = os.path.join(work_dir, "landing"), os.path.join(work_dir, "watched")
+        data_generator.generate(data_generator.GeneratorConfig(scale=scale, output_dir=landing_dir))
+        print("scale x{}: {} micro-batches on {}, after the daily run of the day before".format(scale, batches, run_date))
+
+        engine = microbatch.simulate_local(run_date, batches, landing_dir, watch_dir, progress=print)
+        refreshed = microbatch.refreshed_specs()
+        previous_date = run_date - datetime.timedelta(days=1)
+        batched = {spec.key: snapshot_rows(engine, spec, previous_date, run_date) for spec in refreshed}
+
+        batch_seconds = {}
+        for task_run in engine.task_runs:
+            if task_run["task_id"].startswith("microbatch_"):
+                batch_seconds[task_run["run_date"]] = batch_seconds.get(task_run["run_date"], 0.0) + task_run["seconds"]
+        first_task = len(engine.task_runs)
+        engine.run_day(run_date)
+        daily_seconds = sum(task_run["seconds"] for task_run in engine.task_runs[first_task:])
+        daily = {spec.key: snapshot_rows(engine, spec, run_date, run_date) for spec in refreshed}
+
+        print("micro-batch median {:.3f} s, max {:.3f} s | daily run {:.3f} s".format(
+            statistics.median(batch_seconds.values()), max(batch_seconds.values()), daily_seconds))
+        print("{:<48} {:>12} {:>12}".format("table", "batched rows", "daily rows"))
+        mismatched = []
+        for spec in refreshed:
+            print("{:<48} {:>12,} {:>12,}".format(spec.checked_table_id, len(batched[spec.key]), len(daily[spec.key])))
+            if not rows_match(batched[spec.key], daily[spec.key]):
+                mismatched.append(spec.checked_table_id)
+        print("tables differing from the daily run: {}".format(", ".join(mismatched) or "none"))
+        if mismatched:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", type=float, default=20, help="data_generator scale, ~5,700 rows per unit")
+    parser.add_argument("--date", type=datetime.date.fromisoformat, default=datetime.date(2025, 6, 10), help="day the batches run on")
+    parser.add_argument("--batches", type=int, default=12, help="micro-batches, each fed one chunk of the day's rows")
+    args = parser.parse_args()
+    run(args.scale, args.date, args.batches)
@@ -0,0 +1,120 @@
+"""
+Data-quality check benchmark: one job per check vs a fused single-scan check
+
+Loads a synthetic `order_line_items_raw_daily` partition through `utils/local_engine.py`, then times:
+  - legacy:  the former `_partition_check` (COUNT) and `_granularity_check` (COUNT(*) OVER per line_id) as two queries
+  - fused:   `quality.compile_check` with 2, 5, 10 and 20 assertions in one query
+
+Reports wall time and the number of scans of the checked partition, which is what BigQuery bills for.
+
+Usage:
+    python benchmarks/quality_check_benchmark.py --scale 100 --repeat 5
+"""
+import argparse
+import dataclasses
+import datetime
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+APP_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(os.path.join(APP_DIR, "utils"))
+
+import common                   # noqa: E402
+import data_generator           # noqa: E402
+import local_engine             # noqa: E402
+import quality                  # noqa: E402
+import specs                    # noqa: E402
+
+# Full snapshot day of the incremental line items, so the partition holds every line up to the run date
+RUN_DATE = datetime.date(2025, 12, 1)
+
+LEGACY_CHECKS = (
+    """
+    SELECT CASE WHEN COUNT(*) = 0 THEN FALSE ELSE TRUE END
+    FROM sales_bronze.order_line_items_raw_daily
+    WHERE execution_ts = TIMESTAMP '{ts}'
+    """,
+    """
+    WITH component_grain_count AS
+    (
+        SELECT COUNT(*) OVER (PARTITION BY line_id) AS __number_of_grain
+        FROM sales_bronze.order_line_items_raw_daily
+        WHERE execution_ts = TIMESTAMP '{ts}'
+    )
+    SELECT CASE WHEN MAX(__number_of_grain) > 1 THEN FALSE ELSE TRUE END
+    FROM component_grain_count
+    """,
+)
+
+EXTRA_ASSERTIONS = (
+    quality.not_null("ord_id"),
+    quality.not_null("prod_id"),
+    quality.not_null("crt_dt"),
+    quality.in_range("quan", min_value=0),
+    quality.in_range("disc_pct", min_value=0, max_value=1),
+    quality.in_range("u_price", min_value=0),
+    quality.references("prod_id", common.PRODUCTS),
+    quality.not_null("status"),
+    quality.not_null("ord_type"),
+    quality.in_range("ret_q", min_value=0),
+    quality.in_range("rcv_q", min_value=0),
+    quality.in_range("qual_rt", min_value=1, max_value=5),
+    quality.not_null("line_id", "ord_id"),
+    quality.in_range("quan", max_value=1000000),
+    quality.in_range("u_price", max_value=1000000),
+    quality.in_range("disc_pct", max_value=0.99, severity=quality.WARN),
+    quality.not_null("u_price"),
+    quality.not_null("disc_pct"),
+)
+
+
+def assertions(count):
+    """
+    Returns `count` assertions, starting with the two the legacy checks cover
+    """
+    return ((quality.not_empty(), quality.unique("line_id")) + EXTRA_ASSERTIONS)[:count]
+
+
+def time_queries(engine, queries, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for query in queries:
+            engine.con.execute(query).fetchall()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def run(scale, repeat):
+    with tempfile.TemporaryDirectory() as work_dir:
+        totals = data_generator.generate(data_generator.GeneratorConfig(scale=scale, output_dir=work_dir))
+        print("scale x{}: {:,} rows generated".format(scale, sum(totals.values())))
+
+        engine = local_engine.LocalEngine(landing_dir=work_dir, table_specs=specs.BRONZE_TABLES)
+        engine.init_tables()
+        engine.run_day(RUN_DATE)
+        context = specs.render_context(RUN_DATE)
+        rows = engine.con.execute("SELECT COUNT(*) FROM sales_bronze.order_line_items_raw_daily").fetchone()[0]
+        print("checked partition: {:,} rows".format(rows))
+
+        legacy = [query.format(ts=context["logical_date"].strftime("%Y-%m-%d %H:%M:%S")) for query in LEGACY_CHECKS]
+        print("{:<22} {:>6} {:>12} {:>10}".format("variant", "rules", "scans", "median s"))
+        print("{:<22} {:>6} {:>12} {:>10.4f}".format("legacy (2 jobs)", 2, len(legacy), time_queries(engine, legacy, repeat)))
+
+        spec = specs.get_spec(common.ORDER_LINE_ITEMS)
+        for count in (2, 5, 10, 20):
+            fused_spec = dataclasses.replace(spec, assertions=assertions(count))
+            sql = quality.compile_check(fused_spec, specs.BRONZE_TABLES)
+            query = local_engine.translate(engine.registry.render_string(sql, **context))
+            print("{:<22} {:>6} {:>12} {:>10.4f}".format("fused (1 job)", count, 1, time_queries(engine, [query], repeat)))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", type=float, default=100, help="data_generator scale, ~5,700 rows per unit")
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per variant, the median is reported")
+    args = parser.parse_args()
+    run(args.scale, args.repeat)
@@ -0,0 +1,112 @@
+"""
+Rollup benchmark: dashboard queries against the daily gold tables vs the table `rollups.route` picks
+
+Runs `--days` daily builds of a synthetic data set through `utils/local_engine.py`, the first one backfilling gold (and
+so its rollups) from 2025-01-01. Each query in `QUERIES` is then written by `rollups.routed_query` twice:
+  - daily:  against the `_latest` view of the daily gold table
+  - routed: against that of the coarsest table answering it, a monthly, quarterly or yearly rollup when its buckets
+            tile the query's range
+
+Reports the bytes BigQuery would bill each, estimated from DuckDB's plans the same way as the `bytes_budget` checks
+(see `utils/budget.py`), with their local runtimes, and checks both return the same rows. Sums are compared to a
+relative tolerance of 1e-9, the order of floating point sums differs between the two.
+
+Usage:
+    python benchmarks/rollup_benchmark.py --scale 2 --days 3
+"""
+import argparse
+import datetime
+import math
+import os
+import sys
+import tempfile
+import time
+
+APP_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(os.path.join(APP_DIR, "utils"))
+
+import budget                   # noqa: E402
+import common                   # noqa: E402
+import data_generator           # noqa: E402
+import local_engine             # noqa: E402
+import rollups                  # noqa: E402
+import specs                    # noqa: E402
+
+END_DATE = datetime.date(2025, 6, 30)
+HISTORY_START_DATE = datetime.date(2025, 1, 1)
+
+# name, gold spec key, first date, last date, grain (None: totalled over the range)
+QUERIES = (
+    ("customers, by month, H1", common.BQ_GOLD_CUSTOMERS_SALES, datetime.date(2025, 1, 1), END_DATE, "MONTH"),
+    ("customers, by quarter, H1", common.BQ_GOLD_CUSTOMERS_SALES, datetime.date(2025, 1, 1), END_DATE, "QUARTER"),
+    ("customers, total, Q2", common.BQ_GOLD_CUSTOMERS_SALES, datetime.date(2025, 4, 1), END_DATE, None),
+    ("products, by month, Q2", common.BQ_GOLD_PRODUCTS_SALES, datetime.date(2025, 4, 1), END_DATE, "MONTH"),
+    ("products, total, June", common.BQ_GOLD_PRODUCTS_SALES, datetime.date(2025, 6, 1), END_DATE, None),
+    ("products, total, June 15-30", common.BQ_GOLD_PRODUCTS_SALES, datetime.date(2025, 6, 15), END_DATE, None),
+)
+
+DAILY_SPECS = tuple(spec for spec in specs.TABLE_SPECS if not spec.rollup_grain)
+
+
+def build(work_dir, scale, days):
+    data_generator.generate(data_generator.GeneratorConfig(scale=scale, output_dir=work_dir))
+    start_date = END_DATE - datetime.timedelta(days=days - 1)
+    engine = local_engine.LocalEngine(landing_dir=work_dir)
+    engine.init_tables()
+    engine.run_day(start_date, {"backfill_start_date": HISTORY_START_DATE.isoformat()})
+    engine.run_range(start_date + datetime.timedelta(days=1), END_DATE)
+    return engine
+
+
+def run_query(engine, sql):
+    """
+    Returns (estimated bytes, seconds, sorted rows) of the routed query `sql`
+    """
+    translated = local_engine.translate(sql)
+    estimated_bytes = budget.LocalDryRun(engine.con)(translated)
+    start = time.perf_counter()
+    rows = engine.con.execute(translated).fetchall()
+    seconds = time.perf_counter() - start
+    return estimated_bytes, seconds, sorted(rows)
+
+
+def same_rows(rows, other_rows):
+    if len(rows) != len(other_rows):
+        return False
+    for row, other_row in zip(rows, other_rows):
+        for value, other_value in zip(row, other_row):
+            if isinstance(value, float) and not math.isclose(value, other_value, rel_tol=1e-9):
+                return False
+            if not isinstance(value, float) and value != other_value:
+                return False
+    return True
+
+
+def run(scale, days):
+    with tempfile.TemporaryDirectory() as work_dir:
+        start = time.perf_counter()
+        engine = build(work_dir, scale, days)
+        print("scale x{}: {} daily runs built in {:.1f} s, gold history from {}".format(scale, days, time.perf_counter() - start, HISTORY_START_DATE))
+
+        print("{:<28} {:<44} {:>12} {:>12} {:>8} {:>10} {:>10}".format(
+            "query", "routed table", "daily bytes", "routed bytes", "ratio", "daily ms", "routed ms"))
+        mismatched = []
+        for name, key, start_date, end_date, grain in QUERIES:
+            daily = run_query(engine, rollups.routed_query(key, start_date, end_date, grain, table_specs=DAILY_SPECS))
+            routed = run_query(engine, rollups.routed_query(key, start_date, end_date, grain))
+            print("{:<28} {:<44} {:>12,} {:>12,} {:>7.1f}x {:>10.1f} {:>10.1f}".format(
+                name, rollups.route(key, start_date, end_date, grain).latest_view_id, daily[0], routed[0],
+                daily[0] / max(routed[0], 1), daily[1] * 1000, routed[1] * 1000))
+            if not same_rows(daily[2], routed[2]):
+                mismatched.append(name)
+        print("queries differing between the daily and routed tables: {}".format(", ".join(mismatched) or "none"))
+        if mismatched:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", type=float, default=2, help="data_generator scale, ~5,700 rows per unit")
+    parser.add_argument("--days", type=int, default=3, help="daily runs ending on {}".format(END_DATE))
+    args = parser.parse_args()
+    run(args.scale, args.days)
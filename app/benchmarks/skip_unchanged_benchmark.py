@@ -0,0 +1,117 @@
+"""
+Skip-unchanged benchmark: daily runs rebuilding static dimensions vs carrying their unchanged partitions forward
+
+Generates a synthetic data set and runs `--days` daily builds through `utils/local_engine.py` twice, with the same
+landing files every day (exports that did not change):
+  - rebuild: every table converts, loads and checks its partition on every run (`skip_unchanged` off)
+  - skip:    the `skip_unchanged` tables fingerprint their inputs and copy the previous run's partition instead
+
+Reports, for the `skip_unchanged` tables only, the tasks run, their time, and the rows read from landing files or
+other tables, which is what BigQuery bills slots for. A carry-forward reads its own previous partition instead.
+Every table is then compared between the two variants, which must hold the same rows.
+
+Usage:
+    python benchmarks/skip_unchanged_benchmark.py --scale 20 --days 7
+"""
+import argparse
+import dataclasses
+import datetime
+import os
+import sys
+import tempfile
+
+APP_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(os.path.join(APP_DIR, "utils"))
+
+import data_generator           # noqa: E402
+import local_engine             # noqa: E402
+import quality                  # noqa: E402
+import specs                    # noqa: E402
+
+START_DATE = datetime.date(2025, 6, 1)
+
+
+def run_variant(work_dir, days, skip_unchanged):
+    """
+    Returns the engine after `days` daily runs, with `skip_unchanged` kept on the specs declaring it or turned off
+    """
+    table_specs = tuple(dataclasses.replace(spec, skip_unchanged=spec.skip_unchanged and skip_unchanged) for spec in specs.TABLE_SPECS)
+    engine = local_engine.LocalEngine(landing_dir=work_dir, table_specs=table_specs)
+    engine.init_tables()
+    engine.run_range(START_DATE, START_DATE + datetime.timedelta(days=days - 1))
+    return engine
+
+
+def partition_rows(engine, spec):
+    """
+    Returns the rows of a table's latest partition; every run writes the same rows when the landing files are unchanged
+    """
+    return engine.con.execute("SELECT COUNT(*) FROM {0}.{1} WHERE execution_ts = (SELECT MAX(execution_ts) FROM {0}.{1})".format(
+        spec.dataset_id, spec.table_id)).fetchone()[0]
+
+
+def rows_read(engine, spec, step):
+    """
+    Returns the rows a task reads: the landing export for a conversion or bronze load, the upstream partitions for a
+    silver load, the checked and referenced partitions for a check, and the previous partition for a carry-forward.
+    Fingerprint tasks only read `load_fingerprints`
+    """
+    if step.kind == specs.CONVERT_TASK or (step.kind == specs.QUERY_TASK and spec.layer == specs.BRONZE):
+        return engine.con.execute("SELECT COUNT(*) FROM read_csv('{}', header = true)".format(
+            local_engine.resolve_landing_file(engine.landing_dir, spec.key))).fetchone()[0]
+    if step.kind == specs.QUERY_TASK:
+        return sum(partition_rows(engine, specs.get_spec(key)) for key in spec.upstream)
+    if step.kind == specs.CHECK_TASK:
+        return partition_rows(engine, spec) + sum(partition_rows(engine, specs.get_spec(key)) for key in quality.reference_keys(spec))
+    if step.kind == specs.CARRY_FORWARD_TASK:
+        return partition_rows(engine, spec)
+    return 0
+
+
+def summarise(engine):
+    """
+    Returns (tasks, seconds, rows read) of the `skip_unchanged` tables' task runs
+    """
+    skipping = {spec.task_prefix: spec for spec in specs.TABLE_SPECS if spec.skip_unchanged}
+    steps = {step.task_id: (spec, step) for spec in skipping.values() for step in specs.plan_tasks(spec)}
+    tasks, seconds, rows = 0, 0.0, 0
+    for task_run in engine.task_runs:
+        if task_run["task_id"] in steps:
+            spec, step = steps[task_run["task_id"]]
+            tasks += 1
+            seconds += task_run["seconds"]
+            rows += rows_read(engine, spec, step)
+    return tasks, seconds, rows
+
+
+def table_digest(engine, spec):
+    return engine.con.execute("SELECT COUNT(*), BIT_XOR(HASH(t)) FROM {}.{} AS t".format(spec.dataset_id, spec.checked_table_id)).fetchone()
+
+
+def run(scale, days):
+    with tempfile.TemporaryDirectory() as work_dir:
+        data_generator.generate(data_generator.GeneratorConfig(scale=scale, output_dir=work_dir))
+        print("scale x{}: {} daily runs from {}, landing files unchanged".format(scale, days, START_DATE))
+        print("{:<8} {:>7} {:>10} {:>12}".format("variant", "tasks", "seconds", "rows read"))
+
+        results = {}
+        for name, skip_unchanged in (("rebuild", False), ("skip", True)):
+            engine = run_variant(work_dir, days, skip_unchanged)
+            tasks, seconds, rows = summarise(engine)
+            results[name] = (engine, rows)
+            print("{:<8} {:>7,} {:>10.3f} {:>12,}".format(name, tasks, seconds, rows))
+        print("rows read reduced {:.1f}x".format(results["rebuild"][1] / max(results["skip"][1], 1)))
+
+        mismatched = [spec.key for spec in specs.TABLE_SPECS
+                      if table_digest(results["rebuild"][0], spec) != table_digest(results["skip"][0], spec)]
+        print("tables differing between variants: {}".format(", ".join(mismatched) or "none"))
+        if mismatched:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", type=float, default=20, help="data_generator scale, ~5,700 rows per unit")
+    parser.add_argument("--days", type=int, default=7, help="daily runs from {}".format(START_DATE))
+    args = parser.parse_args()
+    run(args.scale, args.days)
@@ -0,0 +1,81 @@
+"""
+SQL registry micro-benchmark
+
+Compares DAG parse time and SQL file reads between the legacy `open(path).read()` lookup and `sql_registry.REGISTRY`.
+
+The registry removes every `.sql` read from the parse. Parse time itself stays within noise of the legacy lookup: the
+reads are a small share of a parse, which is dominated by building the operators, and no Jinja is compiled at parse
+time either way (Airflow renders the operators' SQL when their task runs).
+
+Usage:
+    python benchmarks/sql_registry_benchmark.py --runs 50
+"""
+import argparse
+import builtins
+import statistics
+import time
+from unittest import mock
+
+from dag_parse_benchmark import parse_dag_file, stub_environment
+
+
+def legacy_get_query(input_list):
+    """
+    The pre-registry implementation of `services.get_query`
+    """
+    import services
+
+    return open(services.build_path(input_list), "r").read()
+
+
+def time_parses(label, runs):
+    """
+    Parses the DAG `runs` times, returning per-parse timings (ms) and the number of `.sql` files opened
+    """
+    sql_opens = [0]
+    real_open = builtins.open
+
+    def counting_open(file, *args, **kwargs):
+        if str(file).endswith(".sql"):
+            sql_opens[0] += 1
+        return real_open(file, *args, **kwargs)
+
+    timings_ms = []
+    with mock.patch.object(builtins, "open", side_effect=counting_open):
+        for i in range(runs):
+            start = time.perf_counter()
+            parse_dag_file("sql_registry_bench_{}_{}".format(label, i))
+            timings_ms.append((time.perf_counter() - start) * 1000)
+    return timings_ms, sql_opens[0]
+
+
+def report(label, timings_ms, sql_opens, runs):
+    print("{:<9} parse p50 {:>7.2f} ms | min {:>7.2f} ms | sql files opened per parse {:>5.1f}".format(
+        label, statistics.median(timings_ms), min(timings_ms), sql_opens / runs))
+
+
+def run(runs):
+    stub_environment()
+
+    import services
+    import sql_registry
+
+    # Warm-up parse: loads Airflow, the providers and indexes the SQL tree once
+    parse_dag_file("sql_registry_bench_warmup")
+
+    with mock.patch.object(services, "get_query", side_effect=legacy_get_query):
+        legacy_timings, legacy_opens = time_parses("legacy", runs)
+
+    reads_before = sql_registry.REGISTRY.reads
+    cached_timings, cached_opens = time_parses("registry", runs)
+
+    report("legacy", legacy_timings, legacy_opens, runs)
+    report("registry", cached_timings, cached_opens, runs)
+    print("registry re-reads during timed parses: {}".format(sql_registry.REGISTRY.reads - reads_before))
+    print("indexed SQL files: {}".format(len(sql_registry.REGISTRY.paths())))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=50, help="number of timed parses per variant")
+    run(parser.parse_args().runs)
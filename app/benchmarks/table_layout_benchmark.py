@@ -0,0 +1,172 @@
+"""
+Table layout benchmark: bytes scanned by typical analyst queries before and after clustering and `_latest` views
+
+Runs `--days` daily builds of a synthetic data set through `utils/local_engine.py`, then estimates the bytes BigQuery
+would bill for each query in `QUERIES` under two layouts:
+  - before: tables partitioned by day only. Analysts don't know the latest `execution_ts`, so they read the base table
+    across every run's partition. Gold is the full-rewrite table, where every run's partition holds the whole history
+  - after:  the `<table_id>_latest` view (one partition for silver, the date-partitioned MERGE table for gold), with
+    storage blocks pruned on the tables' `cluster_fields`
+
+Bytes follow BigQuery's logical sizes over the selected columns, see `budget.byte_expression`. Clustering is modelled
+as blocks of `--block-kb` within each partition, sorted on the cluster columns; a block is skipped when the min/max of
+the filtered column misses the filter. BigQuery does not expose its block size, and a partition smaller than one block
+gains nothing from clustering. The 10 MB BigQuery bills at minimum per table read is left out.
+
+Usage:
+    python benchmarks/table_layout_benchmark.py --scale 2 --days 7 --block-kb 256
+"""
+import argparse
+import dataclasses
+import datetime
+import os
+import sys
+import tempfile
+import time
+
+APP_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(os.path.join(APP_DIR, "utils"))
+
+import budget                   # noqa: E402
+import common                   # noqa: E402
+import data_generator           # noqa: E402
+import local_engine             # noqa: E402
+import specs                    # noqa: E402
+
+END_DATE = datetime.date(2025, 6, 30)
+HISTORY_START_DATE = datetime.date(2025, 1, 1)
+
+def date_literal(days_before_end):
+    return "DATE '{}'".format(END_DATE - datetime.timedelta(days=days_before_end))
+
+
+# name, spec key, selected columns, gold date window in days (None: no date filter), (cluster column, low, high) filter
+QUERIES = (
+    ("current customers", common.BQ_DIM_CUSTOMERS,
+     ("customer_id", "customer_company_name", "customer_region_id", "is_customer_active"), None, None),
+    ("current product catalogue", common.BQ_DIM_PRODUCTS,
+     ("product_id", "product_name", "product_category_id", "product_unit_cost"), None, None),
+    ("line sales, last 7 days", common.BQ_FACT_LINE_ITEM_SALES,
+     ("line_created_date", "order_sales_channel", "line_revenue_amount_total"), None,
+     ("line_created_date", date_literal(6), date_literal(0))),
+    ("one customer's line items", common.BQ_FACT_LINE_ITEM_SALES,
+     ("line_id", "order_id", "line_created_date", "line_revenue_amount_total"), None, ("customer_id", "1", "1")),
+    ("one customer, last quarter", common.BQ_GOLD_CUSTOMERS_SALES,
+     ("date", "customer_id", "revenue_total", "gross_profit_total"), 90, ("customer_id", "1", "1")),
+    ("product revenue, last 30 days", common.BQ_GOLD_PRODUCTS_SALES,
+     ("date", "product_id", "revenue_total"), 30, None),
+)
+
+
+def scanned_bytes(con, relation, columns, partition_key, partition_filter="TRUE", cluster_fields=(), prune=None, block_bytes=1):
+    """
+    Returns (partitions read, bytes billed) for selecting `columns` from `relation`
+
+    Rows are read from the partitions passing `partition_filter`. With `cluster_fields` and a `prune` filter, only the
+    blocks whose min/max of the filtered column overlap it are read.
+    """
+    column_types = {row[0]: row[1] for row in con.execute("DESCRIBE {}".format(relation)).fetchall()}
+    selected_bytes = " + ".join(budget.byte_expression(column, column_types[column]) for column in columns)
+    if not (cluster_fields and prune):
+        return con.execute("SELECT COUNT(DISTINCT {}), COALESCE(SUM({}), 0) FROM {} WHERE {}".format(
+            partition_key, selected_bytes, relation, partition_filter)).fetchone()
+
+    row_bytes = " + ".join(budget.byte_expression(column, column_type) for column, column_type in column_types.items())
+    return con.execute("""
+        WITH component_rows AS
+        (
+            SELECT
+                {partition_key}     AS __partition,
+                {selected_bytes}    AS __bytes,
+                {row_bytes}         AS __row_bytes,
+                {key}               AS __key,
+                SUM({row_bytes}) OVER (PARTITION BY {partition_key} ORDER BY {order} ROWS UNBOUNDED PRECEDING)  AS __offset,
+            FROM {relation}
+            WHERE {partition_filter}
+        ),
+
+        component_blocks AS
+        (
+            SELECT
+                __partition,
+                (__offset - __row_bytes) // {block_bytes}   AS __block,
+                SUM(__bytes)    AS __bytes,
+                MIN(__key)      AS __low,
+                MAX(__key)      AS __high,
+            FROM component_rows
+            GROUP BY ALL
+        )
+
+        SELECT
+            COUNT(DISTINCT __partition),
+            COALESCE(SUM(__bytes), 0),
+        FROM component_blocks
+        WHERE 1=1
+            AND __high >= {low}
+            AND __low <= {high}
+    """.format(
+        partition_key=partition_key, selected_bytes=selected_bytes, row_bytes=row_bytes, key=prune[0],
+        order=", ".join(cluster_fields), relation=relation, partition_filter=partition_filter, block_bytes=block_bytes,
+        low=prune[1], high=prune[2],
+    )).fetchone()
+
+
+def run_partition_key(spec):
+    return "date_trunc('{}', {})".format(spec.partition_type.lower(), spec.partition_field)
+
+
+def build(work_dir, scale, days):
+    """
+    Returns a local engine holding `days` runs of the pipeline, plus the full-rewrite gold tables of the former layout
+    """
+    data_generator.generate(data_generator.GeneratorConfig(scale=scale, output_dir=work_dir))
+    start_date = END_DATE - datetime.timedelta(days=days - 1)
+    engine = local_engine.LocalEngine(landing_dir=work_dir)
+    engine.init_tables()
+    # The first run backfills gold from the start of the data, so the MERGE tables hold the history they would in production
+    engine.run_day(start_date, {"backfill_start_date": HISTORY_START_DATE.isoformat()})
+    engine.run_range(start_date + datetime.timedelta(days=1), END_DATE)
+
+    # Rollups and the bridge were never full rewrites, the bridge has no full-rewrite script to run
+    full_gold = tuple(dataclasses.replace(spec, load_mode=specs.FULL_LOAD, cluster_fields=()) for spec in specs.GOLD_TABLES
+                      if not spec.rollup_grain and spec.sql_file != spec.incremental_sql_file)
+    run_date = start_date
+    while run_date <= END_DATE:
+        for spec in full_gold:
+            context = specs.render_context(run_date, spec, specs.SILVER_TABLES + full_gold)
+            engine.run_step(specs.plan_tasks(spec)[0], context)
+        run_date += datetime.timedelta(days=1)
+    return engine
+
+
+def run(scale, days, block_kb):
+    with tempfile.TemporaryDirectory() as work_dir:
+        start = time.perf_counter()
+        engine = build(work_dir, scale, days)
+        print("scale x{}: {} daily runs built in {:.1f} s, blocks of {} KB".format(scale, days, time.perf_counter() - start, block_kb))
+
+        print("{:<30} {:>17} {:>17} {:>8}".format("query", "before", "after", "ratio"))
+        for name, key, columns, window, prune in QUERIES:
+            spec = specs.get_spec(key)
+            before_table = "{}.{}".format(spec.dataset_id, spec.table_id)
+            before = scanned_bytes(engine.con, before_table, columns, run_partition_key(spec))
+
+            after_view = "{}.{}".format(spec.dataset_id, spec.latest_view_id)
+            if spec.is_snapshot:
+                after_key, after_filter = run_partition_key(spec), "TRUE"
+            else:
+                after_key, after_filter = "date", "date BETWEEN {} AND {}".format(date_literal(window - 1), date_literal(0))
+            after = scanned_bytes(engine.con, after_view, columns, after_key, after_filter, spec.cluster_fields, prune, block_kb * 1024)
+
+            print("{:<30} {:>12,} ({:>3}) {:>12,} ({:>3}) {:>7.1f}x".format(
+                name, before[1], before[0], after[1], after[0], before[1] / max(after[1], 1)))
+        print("bytes billed (partitions read)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", type=float, default=2, help="data_generator scale, ~5,700 rows per unit")
+    parser.add_argument("--days", type=int, default=7, help="daily runs ending on {}".format(END_DATE))
+    parser.add_argument("--block-kb", type=int, default=256, help="modelled storage block size of clustered partitions")
+    args = parser.parse_args()
+    run(args.scale, args.days, args.block_kb)
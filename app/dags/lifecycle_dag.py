@@ -0,0 +1,22 @@
+from airflow import DAG
+
+from datetime import datetime
+from pathlib import Path
+
+import sys
+sys.path.append("/opt/airflow/utils")
+
+import pipeline
+
+DAG_ID = Path(__file__).name
+
+# Runs after the daily DAG of the same day; a run still archiving holds the next one back
+with DAG(dag_id=DAG_ID, start_date=datetime(2025, 1, 1), catchup=False, max_active_runs=1, schedule_interval="@daily") as dag:
+    # Paradigm for this DAG follows:
+    #   1. Wait for the daily run of the same day
+    #   2. Per table with an `archive_after_days` retention: partitions older than the retention are exported as
+    #      Parquet to the archive prefix, recorded in `sales_bronze.archive_manifest` and dropped from the hot table
+    #   3. `<table>_archive` and `<table>_all` repointed, serving the archived partitions alongside the hot ones
+    #
+    # Restores are run by hand, see `utils/lifecycle.py`
+    TASKS = pipeline.build_lifecycle_pipeline(dag)
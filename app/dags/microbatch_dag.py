@@ -0,0 +1,28 @@
+from airflow import DAG
+
+from datetime import datetime
+from datetime import timedelta
+from pathlib import Path
+
+import os
+import sys
+sys.path.append("/opt/airflow/utils")
+
+import common
+import pipeline
+
+DAG_ID = Path(__file__).name
+CUR_DIR = os.path.abspath(os.path.dirname(__file__))
+
+# One run per freshness interval; a batch still running holds the next one back rather than racing it
+with DAG(dag_id=DAG_ID, start_date=datetime(2025, 1, 1), catchup=False, max_active_runs=1,
+         schedule_interval=timedelta(minutes=common.MICROBATCH_FRESHNESS_MINUTES)) as dag:
+    # Paradigm for this DAG follows:
+    #   1. Wait for the daily run of the day before, whose snapshot the batch refreshes
+    #   2. Bronze: order and line item files landed under `microbatch/<entity>/` since the last batch are appended
+    #      to the raw tables with the batch's `execution_ts`, and checked
+    #   3. Silver: the fact rows of the batch's lines and orders, then the channel fact rows of the batch's date
+    #   4. Gold: the batch's date is MERGEd
+    #
+    # The daily run of the batch's date supersedes its rows, see `utils/microbatch.py`
+    TASKS = pipeline.build_microbatch_pipeline(dag, CUR_DIR)
@@ -0,0 +1,16 @@
+CREATE TABLE `sandbox-data-pipelines.sales_bronze.archive_manifest`
+-- One row per partition the lifecycle DAG moved out of a hot table, see `app/utils/lifecycle.py`
+--  - `partition_date`: day of the partition, the `archive_date` of its Parquet files under `uri`
+--  - `row_count`/`max_execution_ts`: the partition when it was exported. A hot partition written since, e.g. a gold
+--    date MERGEd again by a backfill, is exported again, while a restored one is only dropped
+--  - `execution_ts`: the lifecycle run that exported it
+(
+    source_table        STRING,
+    partition_date      DATE,
+    uri                 STRING,
+    row_count           INT64,
+    max_execution_ts    TIMESTAMP,
+    execution_ts        TIMESTAMP,
+)
+CLUSTER BY source_table
+;
@@ -0,0 +1,12 @@
+CREATE TABLE `sandbox-data-pipelines.sales_bronze.load_fingerprints`
+-- One row per run of a table that skips unchanged inputs, see `app/utils/fingerprints.py`
+--  - `fingerprint`: hash of the run's inputs (landing file checksum or upstream fingerprints, and the table's SQL)
+--  - a run whose fingerprint matches the previous run's copies that run's partition instead of recomputing it
+(
+    source_table        STRING,
+    fingerprint         STRING,
+    execution_ts        TIMESTAMP,
+)
+PARTITION BY TIMESTAMP_TRUNC(execution_ts, DAY)
+CLUSTER BY source_table
+;
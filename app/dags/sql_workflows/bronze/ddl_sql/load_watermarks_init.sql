@@ -0,0 +1,13 @@
+CREATE TABLE `sandbox-data-pipelines.sales_bronze.load_watermarks`
+-- One row per incremental bronze load
+--  - `high_water_mark`: latest source date fully loaded by the run
+--  - `is_full_snapshot`: run re-copied the whole source, so older partitions are not needed to rebuild current state
+(
+    source_table        STRING,
+    high_water_mark     DATE,
+    is_full_snapshot    BOOLEAN,
+    execution_ts        TIMESTAMP,
+)
+PARTITION BY TIMESTAMP_TRUNC(execution_ts, DAY)
+CLUSTER BY source_table
+;
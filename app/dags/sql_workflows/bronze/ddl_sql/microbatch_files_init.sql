@@ -0,0 +1,12 @@
+CREATE TABLE `sandbox-data-pipelines.sales_bronze.microbatch_files`
+-- One row per file ingested by a micro-batch, see `app/utils/microbatch.py`
+--  - `file_name`: object name under the landing bucket, e.g. `microbatch/order_line_items/<name>.csv`
+--  - `execution_ts`: the batch that loaded it into `source_table`, with the same `execution_ts`
+(
+    source_table        STRING,
+    file_name           STRING,
+    execution_ts        TIMESTAMP,
+)
+PARTITION BY TIMESTAMP_TRUNC(execution_ts, DAY)
+CLUSTER BY source_table
+;
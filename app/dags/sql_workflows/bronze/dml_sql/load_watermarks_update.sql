@@ -0,0 +1,27 @@
+-- Records the high-water mark of an incremental bronze load once its checks have passed
+-- Re-running a date replaces that date's record, so reruns and backfills stay idempotent
+{%- set is_full_snapshot = params.full_snapshot_day and logical_date.day == params.full_snapshot_day %}
+
+DELETE FROM `sandbox-data-pipelines.sales_bronze.load_watermarks`
+WHERE 1=1
+    AND source_table = "{{ params.source_table }}"
+    AND execution_ts = TIMESTAMP("{{ ts }}")
+;
+
+INSERT INTO `sandbox-data-pipelines.sales_bronze.load_watermarks`
+    (source_table, high_water_mark, is_full_snapshot, execution_ts)
+SELECT
+    "{{ params.source_table }}"     AS source_table,
+    DATE("{{ ds }}")                AS high_water_mark,
+    -- The first load for a source has no prior mark, and is therefore a full copy
+    {{ "TRUE" if is_full_snapshot else "FALSE" }}
+        OR NOT EXISTS (
+            SELECT
+                1
+            FROM `sandbox-data-pipelines.sales_bronze.load_watermarks`
+            WHERE 1=1
+                AND source_table = "{{ params.source_table }}"
+                AND execution_ts < TIMESTAMP("{{ ts }}")
+        )                           AS is_full_snapshot,
+    TIMESTAMP("{{ ts }}")           AS execution_ts,
+;
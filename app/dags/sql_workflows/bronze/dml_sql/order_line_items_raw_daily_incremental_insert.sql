@@ -0,0 +1,81 @@
+-- Incremental variant of `order_line_items_raw_daily_insert.sql`
+-- Each partition only holds new or changed lines: those whose `line_id` has no version yet, or whose columns hash
+-- differently from its latest version loaded since the last full snapshot, the window silver merges the deltas over.
+-- Any column counts, e.g. a line's `status`, `quan`, `u_price` or `ret_q` corrected without a new date.
+-- A full copy is taken on `params.full_snapshot_day` of each month, and whenever no version exists yet. Lines deleted
+-- from the source are only dropped by the next full copy.
+-- With Parquet landing, `<entity>_landing` holds every landing date, so the run's snapshot is selected by `landing_date`
+{%- set is_parquet = params.landing_format == "parquet" %}
+{%- set is_full_snapshot = params.full_snapshot_day and logical_date.day == params.full_snapshot_day %}
+{#- Cast to the bronze column types: the autodetected CSV external table reads whole-number FLOAT64 columns as INT64,
+    which would never hash the same as the stored version #}
+{%- set row_hash -%}
+FARM_FINGERPRINT(TO_JSON_STRING(STRUCT(
+            CAST(ord_id AS INT64) AS ord_id,
+            CAST(ord_type AS STRING) AS ord_type,
+            CAST(prod_id AS INT64) AS prod_id,
+            CAST(quan AS INT64) AS quan,
+            CAST(u_price AS FLOAT64) AS u_price,
+            CAST(disc_pct AS FLOAT64) AS disc_pct,
+            CAST(ret_q AS FLOAT64) AS ret_q,
+            CAST(ret_dt AS DATE) AS ret_dt,
+            CAST(rcv_q AS FLOAT64) AS rcv_q,
+            CAST(rcv_dt AS DATE) AS rcv_dt,
+            CAST(qual_rt AS FLOAT64) AS qual_rt,
+            CAST(status AS STRING) AS status,
+            CAST(crt_dt AS DATE) AS crt_dt
+        )))
+{%- endset %}
+
+WITH
+component_order_line_items AS
+(
+    SELECT
+{%- if is_parquet %}
+        * EXCEPT(landing_date),
+{%- else %}
+        *,
+{%- endif %}
+        {{ row_hash }}     AS row_hash,
+    FROM `sandbox-data-pipelines.sales_bronze.order_line_items_{{ "landing" if is_parquet else "external" }}`
+    -- Future sales dates are still treated as "pending" sales that haven't happened yet
+    WHERE 1=1
+        AND crt_dt <= DATE("{{ ds }}")
+{%- if is_parquet %}
+        AND landing_date = DATE("{{ ds }}")
+{%- endif %}
+),
+
+component_latest_versions AS
+(
+    SELECT
+        line_id,
+        {{ row_hash }}     AS row_hash,
+    FROM `sandbox-data-pipelines.sales_bronze.order_line_items_raw_daily`
+    WHERE 1=1
+        AND execution_ts < TIMESTAMP("{{ ts }}")
+        AND execution_ts >= (
+            SELECT
+                COALESCE(MAX(execution_ts), TIMESTAMP("1970-01-01"))
+            FROM `sandbox-data-pipelines.sales_bronze.load_watermarks`
+            WHERE 1=1
+                AND source_table = "order_line_items_raw_daily"
+                AND is_full_snapshot
+                AND execution_ts < TIMESTAMP("{{ ts }}")
+        )
+{%- if is_full_snapshot %}
+        -- Full snapshot: every line is loaded, whatever its latest version
+        AND FALSE
+{%- endif %}
+    QUALIFY ROW_NUMBER() OVER(PARTITION BY line_id ORDER BY execution_ts DESC) = 1
+)
+
+SELECT
+    component_order_line_items.* EXCEPT(row_hash),
+    TIMESTAMP("{{ ts }}")    AS execution_ts,
+FROM component_order_line_items
+LEFT JOIN component_latest_versions
+    ON  component_latest_versions.line_id = component_order_line_items.line_id
+WHERE 1=1
+    AND component_latest_versions.row_hash IS DISTINCT FROM component_order_line_items.row_hash
+;
@@ -1,9 +1,19 @@
-SELECT  
+-- With Parquet landing, `<entity>_landing` holds every landing date, so the run's snapshot is selected by `landing_date`
+{%- set is_parquet = params.landing_format == "parquet" %}
+
+SELECT
+{%- if is_parquet %}
+    * EXCEPT(landing_date),
+{%- else %}
     *,
+{%- endif %}
     TIMESTAMP("{{ ts }}")    AS execution_ts,
-FROM `sandbox-data-pipelines.sales_bronze.order_line_items_external`
+FROM `sandbox-data-pipelines.sales_bronze.order_line_items_{{ "landing" if is_parquet else "external" }}`
 -- The following logic emulates a "daily" incremental load
 -- Meaning although the source data is given for the entire year 2025, future sales dates are treated as "pending" sales that haven't happened yet
 WHERE 1=1
     AND crt_dt <= DATE("{{ ds }}")
+{%- if is_parquet %}
+    AND landing_date = DATE("{{ ds }}")
+{%- endif %}
 ;
@@ -0,0 +1,77 @@
+-- Incremental variant of `sales_orders_raw_daily_insert.sql`
+-- Each partition only holds new or changed orders: those whose `ord_id` has no version yet, or whose columns hash
+-- differently from its latest version loaded since the last full snapshot, the window silver merges the deltas over.
+-- Any column counts, e.g. an order cancelled (`stat`) or re-priced (`tot_amt`) after it shipped.
+-- A full copy is taken on `params.full_snapshot_day` of each month, and whenever no version exists yet. Orders deleted
+-- from the source are only dropped by the next full copy.
+-- With Parquet landing, `<entity>_landing` holds every landing date, so the run's snapshot is selected by `landing_date`
+{%- set is_parquet = params.landing_format == "parquet" %}
+{%- set is_full_snapshot = params.full_snapshot_day and logical_date.day == params.full_snapshot_day %}
+{#- Cast to the bronze column types: the autodetected CSV external table reads whole-number FLOAT64 columns as INT64,
+    which would never hash the same as the stored version #}
+{%- set row_hash -%}
+FARM_FINGERPRINT(TO_JSON_STRING(STRUCT(
+            CAST(cust_id AS INT64) AS cust_id,
+            CAST(ord_dt AS DATE) AS ord_dt,
+            CAST(ship_dt AS DATE) AS ship_dt,
+            CAST(stat AS STRING) AS stat,
+            CAST(pmt_mthd AS STRING) AS pmt_mthd,
+            CAST(sales_ch AS STRING) AS sales_ch,
+            CAST(sales_rep_id AS INT64) AS sales_rep_id,
+            CAST(tot_amt AS FLOAT64) AS tot_amt,
+            CAST(disc_amt AS FLOAT64) AS disc_amt
+        )))
+{%- endset %}
+
+WITH
+component_sales_orders AS
+(
+    SELECT
+{%- if is_parquet %}
+        * EXCEPT(landing_date),
+{%- else %}
+        *,
+{%- endif %}
+        {{ row_hash }}     AS row_hash,
+    FROM `sandbox-data-pipelines.sales_bronze.sales_orders_{{ "landing" if is_parquet else "external" }}`
+    -- Future sales dates are still treated as "pending" sales that haven't happened yet
+    WHERE 1=1
+        AND ord_dt <= DATE("{{ ds }}")
+{%- if is_parquet %}
+        AND landing_date = DATE("{{ ds }}")
+{%- endif %}
+),
+
+component_latest_versions AS
+(
+    SELECT
+        ord_id,
+        {{ row_hash }}     AS row_hash,
+    FROM `sandbox-data-pipelines.sales_bronze.sales_orders_raw_daily`
+    WHERE 1=1
+        AND execution_ts < TIMESTAMP("{{ ts }}")
+        AND execution_ts >= (
+            SELECT
+                COALESCE(MAX(execution_ts), TIMESTAMP("1970-01-01"))
+            FROM `sandbox-data-pipelines.sales_bronze.load_watermarks`
+            WHERE 1=1
+                AND source_table = "sales_orders_raw_daily"
+                AND is_full_snapshot
+                AND execution_ts < TIMESTAMP("{{ ts }}")
+        )
+{%- if is_full_snapshot %}
+        -- Full snapshot: every order is loaded, whatever its latest version
+        AND FALSE
+{%- endif %}
+    QUALIFY ROW_NUMBER() OVER(PARTITION BY ord_id ORDER BY execution_ts DESC) = 1
+)
+
+SELECT
+    component_sales_orders.* EXCEPT(row_hash),
+    TIMESTAMP("{{ ts }}")    AS execution_ts,
+FROM component_sales_orders
+LEFT JOIN component_latest_versions
+    ON  component_latest_versions.ord_id = component_sales_orders.ord_id
+WHERE 1=1
+    AND component_latest_versions.row_hash IS DISTINCT FROM component_sales_orders.row_hash
+;
@@ -1,5 +1,16 @@
-SELECT  
+-- With Parquet landing, `<entity>_landing` holds every landing date, so the run's snapshot is selected by `landing_date`
+{%- set is_parquet = params.landing_format == "parquet" %}
+
+SELECT
+{%- if is_parquet %}
+    * EXCEPT(landing_date),
+{%- else %}
     *,
+{%- endif %}
     TIMESTAMP("{{ ts }}")    AS execution_ts,
-FROM `sandbox-data-pipelines.sales_bronze.suppliers_external`
+FROM `sandbox-data-pipelines.sales_bronze.suppliers_{{ "landing" if is_parquet else "external" }}`
+{%- if is_parquet %}
+WHERE 1=1
+    AND landing_date = DATE("{{ ds }}")
+{%- endif %}
 ;
@@ -0,0 +1,52 @@
+-- Month rollup of `sales_performance_products_daily`, one row per bucket and product_id, generated by `rollups.rollup_ddl`
+CREATE TABLE IF NOT EXISTS `sandbox-data-pipelines.sales_gold.sales_performance_products_monthly_incremental`
+(
+    date                                DATE,
+    month_start_date                    DATE,
+    quarter_start_date                  DATE,
+    year_start_date                     DATE,
+    product_id                          INT64,
+    product_name                        STRING,
+    product_category_id                 INT64,
+    product_subcategory_id              INT64,
+    product_unit_cost                   FLOAT64,
+    is_product_manufactured_inhouse     BOOLEAN,
+    supplier_id                         FLOAT64,
+    supplier_company_name               STRING,
+    supplier_is_active                  BOOLEAN,
+    supplier_is_preferred               BOOLEAN,
+    quantity_sold_total                 INT64,
+    quantity_sold_direct                INT64,
+    quantity_sold_distributor           INT64,
+    quantity_sold_quantity              INT64,
+    quantity_sold_discounted            INT64,
+    quantity_returned_total             FLOAT64,
+    quantity_returned_direct            FLOAT64,
+    quantity_returned_distributor       FLOAT64,
+    quantity_returned_online            FLOAT64,
+    quantity_returned_discounted        FLOAT64,
+    revenue_total                       FLOAT64,
+    revenue_direct                      FLOAT64,
+    revenue_distributor                 FLOAT64,
+    revenue_online                      FLOAT64,
+    cost_of_goods_sold_total            FLOAT64,
+    cost_of_goods_sold_direct           FLOAT64,
+    cost_of_goods_sold_distributor      FLOAT64,
+    cost_of_goods_sold_online           FLOAT64,
+    discount_total                      FLOAT64,
+    discount_direct                     FLOAT64,
+    discount_distributor                FLOAT64,
+    discount_online                     FLOAT64,
+    gross_profit_total                  FLOAT64,
+    gross_profit_direct                 FLOAT64,
+    gross_profit_distributor            FLOAT64,
+    gross_profit_online                 FLOAT64,
+    net_profit_total                    FLOAT64,
+    net_profit_direct                   FLOAT64,
+    net_profit_distributor              FLOAT64,
+    net_profit_online                   FLOAT64,
+    execution_ts                        TIMESTAMP,      -- run that last rewrote the row
+)
+PARTITION BY date
+CLUSTER BY product_id
+;
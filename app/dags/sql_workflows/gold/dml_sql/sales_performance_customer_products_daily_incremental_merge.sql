@@ -0,0 +1,131 @@
+-- Customer x product bridge of the gold marts: one row per sale date, customer and product that had a sale or return,
+-- with the attributes of both dimensions denormalized in, so cross-dimensional questions (e.g. the most profitable
+-- customers per product category) read one pruned table instead of joining the gold marts or rescanning the line items.
+-- Recomputes only the run date, plus `params.lookback_days` before it to pick up late returns, and swaps those dates
+-- into the date-partitioned `sales_performance_customer_products_daily_incremental` table.
+-- Backfill mode: trigger the DAG with {"backfill_start_date": "YYYY-MM-DD"} to rebuild every date from that day onwards.
+{%- if params.backfill_start_date %}
+    {%- set range_start = 'DATE("' ~ params.backfill_start_date ~ '")' %}
+{%- else %}
+    {%- set range_start = 'DATE_SUB(DATE("' ~ ds ~ '"), INTERVAL ' ~ params.lookback_days ~ ' DAY)' %}
+{%- endif %}
+
+MERGE `sandbox-data-pipelines.sales_gold.sales_performance_customer_products_daily_incremental`   AS target
+USING
+(
+    WITH
+        component_customers AS
+        (
+            SELECT
+                customer_id,
+                customer_company_name,
+                customer_industry,
+                customer_region_id,
+                is_customer_active,
+            FROM `sandbox-data-pipelines.sales_silver.dim_customers_daily`
+            WHERE 1=1
+                AND execution_ts = TIMESTAMP("{{ ts }}")
+        ),
+
+        component_products AS
+        (
+            SELECT
+                product_id,
+                product_name,
+                product_category_id,
+                product_subcategory_id,
+                product_unit_cost,
+                is_product_manufactured_inhouse,
+                supplier_id,
+                supplier_company_name,
+                supplier_is_active,
+                supplier_is_preferred,
+            FROM `sandbox-data-pipelines.sales_silver.dim_products_daily`
+            WHERE 1=1
+                AND execution_ts = TIMESTAMP("{{ ts }}")
+        ),
+
+        module_sales_by_customer_product AS
+        -- Per-channel measures, already pivoted by `fact_sales_channel_daily_wide` at this grain
+        -- Unlike the per-entity marts, there is no date spine: a spine of every customer x product pair would be almost
+        -- entirely empty rows
+        (
+            SELECT
+                date,
+                customer_id,
+                product_id,
+                quantity_sold_total,
+                quantity_sold_direct,
+                quantity_sold_distributor,
+                quantity_sold_online,
+                quantity_sold_discounted,
+
+                quantity_returned_total,
+                quantity_returned_direct,
+                quantity_returned_distributor,
+                quantity_returned_online,
+                quantity_returned_discounted,
+
+                revenue_total,
+                revenue_direct,
+                revenue_distributor,
+                revenue_online,
+
+                cost_of_goods_sold_total,
+                cost_of_goods_sold_direct,
+                cost_of_goods_sold_distributor,
+                cost_of_goods_sold_online,
+
+                discount_total,
+                discount_direct,
+                discount_distributor,
+                discount_online,
+
+                gross_profit_total,
+                gross_profit_direct,
+                gross_profit_distributor,
+                gross_profit_online,
+
+                net_profit_total,
+                net_profit_direct,
+                net_profit_distributor,
+                net_profit_online,
+            FROM `sandbox-data-pipelines.sales_silver.fact_sales_channel_daily_wide`
+            WHERE 1=1
+                AND execution_ts = TIMESTAMP("{{ ts }}")
+                AND date BETWEEN {{ range_start }} AND DATE("{{ ds }}")
+        ),
+
+        module_output AS
+        -- Sales of a customer or product missing from the run's dimension snapshot are kept, with empty attributes
+        (
+            SELECT
+                module_sales_by_customer_product.date,
+                DATE_TRUNC(module_sales_by_customer_product.date, MONTH)     AS month_start_date,
+                DATE_TRUNC(module_sales_by_customer_product.date, QUARTER)   AS quarter_start_date,
+                DATE_TRUNC(module_sales_by_customer_product.date, YEAR)      AS year_start_date,
+                module_sales_by_customer_product.customer_id,
+                component_customers.* EXCEPT(customer_id),
+                module_sales_by_customer_product.product_id,
+                component_products.* EXCEPT(product_id),
+                module_sales_by_customer_product.* EXCEPT(date, customer_id, product_id),
+            FROM module_sales_by_customer_product
+            LEFT JOIN component_customers
+                ON  component_customers.customer_id = module_sales_by_customer_product.customer_id
+            LEFT JOIN component_products
+                ON  component_products.product_id = module_sales_by_customer_product.product_id
+        )
+
+    SELECT
+        *,
+        TIMESTAMP("{{ ts }}")   AS execution_ts,
+    FROM module_output
+)   AS source
+-- Never matches, so every row in the recomputed date range is deleted and re-inserted in one atomic statement
+ON FALSE
+WHEN NOT MATCHED BY SOURCE
+    AND target.date BETWEEN {{ range_start }} AND DATE("{{ ds }}")
+    THEN DELETE
+WHEN NOT MATCHED BY TARGET
+    THEN INSERT ROW
+;
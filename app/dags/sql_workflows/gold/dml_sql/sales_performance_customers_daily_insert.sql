@@ -43,7 +43,7 @@ module_customers_daily AS
 ),
 
 module_sales_by_customer AS
--- Aggregating to a sales channel
+-- Per-channel measures, already pivoted by `fact_sales_channel_daily_wide`, summed over the other entity
 -- Facts:
 --  1. Products can only be returned if the order status is completed
 
@@ -52,40 +52,40 @@ module_sales_by_customer AS
 --  2. All future line items are also created on same day of sale
 (
     SELECT
-        line_created_date   AS date_of_sale,
+        date                AS date_of_sale,
         customer_id,
-        SUM(CASE WHEN is_order_total_sale THEN line_quantity_sold ELSE NULL END)                            AS quantity_sold_total,
-        SUM(CASE WHEN is_order_direct_sale THEN line_quantity_sold ELSE NULL END)                           AS quantity_sold_direct,
-        SUM(CASE WHEN is_order_distributor_sale THEN line_quantity_sold ELSE NULL END)                      AS quantity_sold_distributor,
-        SUM(CASE WHEN is_order_online_sale THEN line_quantity_sold ELSE NULL END)                           AS quantity_sold_quantity,
-        SUM(CASE WHEN is_line_discounted THEN line_quantity_sold ELSE NULL END)                             AS quantity_sold_discounted,
+        SUM(quantity_sold_total)                AS quantity_sold_total,
+        SUM(quantity_sold_direct)               AS quantity_sold_direct,
+        SUM(quantity_sold_distributor)          AS quantity_sold_distributor,
+        SUM(quantity_sold_online)               AS quantity_sold_quantity,
+        SUM(quantity_sold_discounted)           AS quantity_sold_discounted,
 
-        SUM(CASE WHEN is_order_total_sale THEN line_quantity_returned ELSE NULL END)                        AS quantity_returned_total,
-        SUM(CASE WHEN is_order_direct_sale THEN line_quantity_returned ELSE NULL END)                       AS quantity_returned_direct,
-        SUM(CASE WHEN is_order_distributor_sale THEN line_quantity_returned ELSE NULL END)                  AS quantity_returned_distributor,
-        SUM(CASE WHEN is_order_online_sale THEN line_quantity_returned ELSE NULL END)                       AS quantity_returned_online,
-        SUM(CASE WHEN is_line_discounted THEN line_quantity_returned ELSE NULL END)                         AS quantity_returned_discounted,
+        SUM(quantity_returned_total)            AS quantity_returned_total,
+        SUM(quantity_returned_direct)           AS quantity_returned_direct,
+        SUM(quantity_returned_distributor)      AS quantity_returned_distributor,
+        SUM(quantity_returned_online)           AS quantity_returned_online,
+        SUM(quantity_returned_discounted)       AS quantity_returned_discounted,
 
-        SUM(CASE WHEN is_order_total_sale THEN line_revenue_amount_total ELSE NULL END)                     AS revenue_total,
-        SUM(CASE WHEN is_order_direct_sale THEN line_revenue_amount_total ELSE NULL END)                    AS revenue_direct,
-        SUM(CASE WHEN is_order_distributor_sale THEN line_revenue_amount_total ELSE NULL END)               AS revenue_distributor,
-        SUM(CASE WHEN is_order_online_sale THEN line_revenue_amount_total ELSE NULL END)                    AS revenue_online,
+        SUM(revenue_total)                      AS revenue_total,
+        SUM(revenue_direct)                     AS revenue_direct,
+        SUM(revenue_distributor)                AS revenue_distributor,
+        SUM(revenue_online)                     AS revenue_online,
         
-        SUM(CASE WHEN is_order_total_sale THEN line_discount_amount_total ELSE NULL END)                    AS discount_total,
-        SUM(CASE WHEN is_order_direct_sale THEN line_discount_amount_total ELSE NULL END)                   AS discount_direct,
-        SUM(CASE WHEN is_order_distributor_sale THEN line_discount_amount_total ELSE NULL END)              AS discount_distributor,
-        SUM(CASE WHEN is_order_online_sale THEN line_discount_amount_total ELSE NULL END)                   AS discount_online,
+        SUM(discount_total)                     AS discount_total,
+        SUM(discount_direct)                    AS discount_direct,
+        SUM(discount_distributor)               AS discount_distributor,
+        SUM(discount_online)                    AS discount_online,
         
-        SUM(CASE WHEN is_order_total_sale THEN line_gross_profit_amount_total ELSE NULL END)                AS gross_profit_total,
-        SUM(CASE WHEN is_order_direct_sale THEN line_gross_profit_amount_total ELSE NULL END)               AS gross_profit_direct,
-        SUM(CASE WHEN is_order_distributor_sale THEN line_gross_profit_amount_total ELSE NULL END)          AS gross_profit_distributor,
-        SUM(CASE WHEN is_order_online_sale THEN line_gross_profit_amount_total ELSE NULL END)               AS gross_profit_online,
+        SUM(gross_profit_total)                 AS gross_profit_total,
+        SUM(gross_profit_direct)                AS gross_profit_direct,
+        SUM(gross_profit_distributor)           AS gross_profit_distributor,
+        SUM(gross_profit_online)                AS gross_profit_online,
 
-        SUM(CASE WHEN is_order_total_sale THEN line_net_profit_amount_total ELSE NULL END)                  AS net_profit_total,
-        SUM(CASE WHEN is_order_direct_sale THEN line_net_profit_amount_total ELSE NULL END)                 AS net_profit_direct,
-        SUM(CASE WHEN is_order_distributor_sale THEN line_net_profit_amount_total ELSE NULL END)            AS net_profit_distributor,
-        SUM(CASE WHEN is_order_online_sale THEN line_net_profit_amount_total ELSE NULL END)                 AS net_profit_online,
-    FROM `sandbox-data-pipelines.sales_silver.fact_line_item_sales_daily`
+        SUM(net_profit_total)                   AS net_profit_total,
+        SUM(net_profit_direct)                  AS net_profit_direct,
+        SUM(net_profit_distributor)             AS net_profit_distributor,
+        SUM(net_profit_online)                  AS net_profit_online,
+    FROM `sandbox-data-pipelines.sales_silver.fact_sales_channel_daily_wide`
     WHERE 1=1
         AND execution_ts = TIMESTAMP("{{ ts }}")
     GROUP BY ALL
@@ -0,0 +1,74 @@
+-- Quarter rollup of `sales_performance_customers_daily`, generated by `rollups.rollup_merge_sql`
+-- Recomputes the buckets holding the dates `sales_performance_customers_daily_incremental` recomputed for the run, from the rows of
+-- `sales_performance_customers_monthly_incremental` in those buckets only, and swaps them into `sales_performance_customers_quarterly_incremental`.
+-- Backfill mode: trigger the DAG with {"backfill_start_date": "YYYY-MM-DD"} to rebuild every bucket from that day onwards.
+{%- if params.backfill_start_date %}
+    {%- set range_start = 'DATE("' ~ params.backfill_start_date ~ '")' %}
+{%- else %}
+    {%- set range_start = 'DATE_SUB(DATE("' ~ ds ~ '"), INTERVAL ' ~ params.lookback_days ~ ' DAY)' %}
+{%- endif %}
+{%- set bucket_start = 'DATE_TRUNC(' ~ range_start ~ ', QUARTER)' %}
+{%- set bucket_end = 'DATE_TRUNC(DATE("' ~ ds ~ '"), QUARTER)' %}
+
+MERGE `sandbox-data-pipelines.sales_gold.sales_performance_customers_quarterly_incremental`   AS target
+USING
+(
+    WITH
+        module_quarter_rollup AS
+        (
+            SELECT
+            quarter_start_date                          AS date,
+            quarter_start_date,
+            year_start_date,
+            customer_id,
+            MAX_BY(customer_company_name, date)         AS customer_company_name,
+            MAX_BY(customer_industry, date)             AS customer_industry,
+            MAX_BY(customer_region_id, date)            AS customer_region_id,
+            MAX_BY(is_customer_active, date)            AS is_customer_active,
+            SUM(quantity_sold_total)                    AS quantity_sold_total,
+            SUM(quantity_sold_direct)                   AS quantity_sold_direct,
+            SUM(quantity_sold_distributor)              AS quantity_sold_distributor,
+            SUM(quantity_sold_quantity)                 AS quantity_sold_quantity,
+            SUM(quantity_sold_discounted)               AS quantity_sold_discounted,
+            SUM(quantity_returned_total)                AS quantity_returned_total,
+            SUM(quantity_returned_direct)               AS quantity_returned_direct,
+            SUM(quantity_returned_distributor)          AS quantity_returned_distributor,
+            SUM(quantity_returned_online)               AS quantity_returned_online,
+            SUM(quantity_returned_discounted)           AS quantity_returned_discounted,
+            SUM(revenue_total)                          AS revenue_total,
+            SUM(revenue_direct)                         AS revenue_direct,
+            SUM(revenue_distributor)                    AS revenue_distributor,
+            SUM(revenue_online)                         AS revenue_online,
+            SUM(discount_total)                         AS discount_total,
+            SUM(discount_direct)                        AS discount_direct,
+            SUM(discount_distributor)                   AS discount_distributor,
+            SUM(discount_online)                        AS discount_online,
+            SUM(gross_profit_total)                     AS gross_profit_total,
+            SUM(gross_profit_direct)                    AS gross_profit_direct,
+            SUM(gross_profit_distributor)               AS gross_profit_distributor,
+            SUM(gross_profit_online)                    AS gross_profit_online,
+            SUM(net_profit_total)                       AS net_profit_total,
+            SUM(net_profit_direct)                      AS net_profit_direct,
+            SUM(net_profit_distributor)                 AS net_profit_distributor,
+            SUM(net_profit_online)                      AS net_profit_online,
+            FROM `sandbox-data-pipelines.sales_gold.sales_performance_customers_monthly_incremental`
+            WHERE 1=1
+                -- Partition pruning, every row of a bucket is dated within it
+                AND date >= {{ bucket_start }}
+                AND quarter_start_date BETWEEN {{ bucket_start }} AND {{ bucket_end }}
+            GROUP BY ALL
+        )
+
+    SELECT
+        *,
+        TIMESTAMP("{{ ts }}")   AS execution_ts,
+    FROM module_quarter_rollup
+)   AS source
+-- Never matches, so every row of the recomputed buckets is deleted and re-inserted in one atomic statement
+ON FALSE
+WHEN NOT MATCHED BY SOURCE
+    AND target.date BETWEEN {{ bucket_start }} AND {{ bucket_end }}
+    THEN DELETE
+WHEN NOT MATCHED BY TARGET
+    THEN INSERT ROW
+;
@@ -0,0 +1,140 @@
+-- Incremental variant of `sales_performance_products_daily_insert.sql`
+-- Recomputes only the run date, plus `params.lookback_days` before it to pick up late returns, and swaps those dates
+-- into the date-partitioned `sales_performance_products_daily_incremental` table.
+-- Backfill mode: trigger the DAG with {"backfill_start_date": "YYYY-MM-DD"} to rebuild every date from that day onwards.
+{%- if params.backfill_start_date %}
+    {%- set range_start = 'DATE("' ~ params.backfill_start_date ~ '")' %}
+{%- else %}
+    {%- set range_start = 'DATE_SUB(DATE("' ~ ds ~ '"), INTERVAL ' ~ params.lookback_days ~ ' DAY)' %}
+{%- endif %}
+
+MERGE `sandbox-data-pipelines.sales_gold.sales_performance_products_daily_incremental`   AS target
+USING
+(
+    WITH
+        component_products AS
+        (
+            SELECT
+                product_id,
+                product_name,
+                product_category_id,
+                product_subcategory_id,
+                product_unit_cost,
+                is_product_manufactured_inhouse,
+                supplier_id,
+                supplier_company_name,
+                supplier_is_active,
+                supplier_is_preferred,
+            FROM `sandbox-data-pipelines.sales_silver.dim_products_daily`
+            WHERE 1=1
+                AND execution_ts = TIMESTAMP("{{ ts }}")
+        ),
+
+        component_date_generator AS
+        -- Only the dates being (re)computed by this run
+        (
+            SELECT
+                *,
+                DATE_TRUNC(date, MONTH)     AS month_start_date,
+                DATE_TRUNC(date, QUARTER)   AS quarter_start_date,
+                DATE_TRUNC(date, YEAR)      AS year_start_date,
+            FROM UNNEST(
+                GENERATE_DATE_ARRAY(
+                    {{ range_start }},
+                    DATE("{{ ds }}"),
+                    INTERVAL 1 DAY
+                )
+            )   AS date
+        ),
+
+        module_products_daily AS
+        (
+            SELECT
+                component_date_generator.date,
+                component_date_generator.month_start_date,
+                component_date_generator.quarter_start_date,
+                component_date_generator.year_start_date,
+                component_products.*,
+            FROM component_products
+            CROSS JOIN component_date_generator
+        ),
+
+        module_sales_by_product AS
+        -- Per-channel measures, already pivoted by `fact_sales_channel_daily_wide`, summed over the other entity
+        -- Facts:
+        --  1. Products can only be returned if the order status is completed
+
+        -- Assumptions
+        --  1. All dollars generated by sales are considered revenue unless the order is cancelled
+        --  2. All future line items are also created on same day of sale
+        (
+            SELECT
+                date                AS date_of_sale,
+                product_id,
+                SUM(quantity_sold_total)                AS quantity_sold_total,
+                SUM(quantity_sold_direct)               AS quantity_sold_direct,
+                SUM(quantity_sold_distributor)          AS quantity_sold_distributor,
+                SUM(quantity_sold_online)               AS quantity_sold_quantity,
+                SUM(quantity_sold_discounted)           AS quantity_sold_discounted,
+
+                SUM(quantity_returned_total)            AS quantity_returned_total,
+                SUM(quantity_returned_direct)           AS quantity_returned_direct,
+                SUM(quantity_returned_distributor)      AS quantity_returned_distributor,
+                SUM(quantity_returned_online)           AS quantity_returned_online,
+                SUM(quantity_returned_discounted)       AS quantity_returned_discounted,
+
+                SUM(revenue_total)                      AS revenue_total,
+                SUM(revenue_direct)                     AS revenue_direct,
+                SUM(revenue_distributor)                AS revenue_distributor,
+                SUM(revenue_online)                     AS revenue_online,
+
+                SUM(cost_of_goods_sold_total)           AS cost_of_goods_sold_total,
+                SUM(cost_of_goods_sold_direct)          AS cost_of_goods_sold_direct,
+                SUM(cost_of_goods_sold_distributor)     AS cost_of_goods_sold_distributor,
+                SUM(cost_of_goods_sold_online)          AS cost_of_goods_sold_online,
+
+                SUM(discount_total)                     AS discount_total,
+                SUM(discount_direct)                    AS discount_direct,
+                SUM(discount_distributor)               AS discount_distributor,
+                SUM(discount_online)                    AS discount_online,
+
+                SUM(gross_profit_total)                 AS gross_profit_total,
+                SUM(gross_profit_direct)                AS gross_profit_direct,
+                SUM(gross_profit_distributor)           AS gross_profit_distributor,
+                SUM(gross_profit_online)                AS gross_profit_online,
+
+                SUM(net_profit_total)                   AS net_profit_total,
+                SUM(net_profit_direct)                  AS net_profit_direct,
+                SUM(net_profit_distributor)             AS net_profit_distributor,
+                SUM(net_profit_online)                  AS net_profit_online,
+            FROM `sandbox-data-pipelines.sales_silver.fact_sales_channel_daily_wide`
+            WHERE 1=1
+                AND execution_ts = TIMESTAMP("{{ ts }}")
+                AND date BETWEEN {{ range_start }} AND DATE("{{ ds }}")
+            GROUP BY ALL
+        ),
+
+        module_output AS
+        (
+            SELECT
+                module_products_daily.*,
+                module_sales_by_product.* EXCEPT(date_of_sale, product_id),
+            FROM module_products_daily
+            LEFT JOIN module_sales_by_product
+                ON  module_sales_by_product.product_id = module_products_daily.product_id
+                AND module_sales_by_product.date_of_sale = module_products_daily.date
+        )
+
+    SELECT
+        *,
+        TIMESTAMP("{{ ts }}")   AS execution_ts,
+    FROM module_output
+)   AS source
+-- Never matches, so every row in the recomputed date range is deleted and re-inserted in one atomic statement
+ON FALSE
+WHEN NOT MATCHED BY SOURCE
+    AND target.date BETWEEN {{ range_start }} AND DATE("{{ ds }}")
+    THEN DELETE
+WHEN NOT MATCHED BY TARGET
+    THEN INSERT ROW
+;
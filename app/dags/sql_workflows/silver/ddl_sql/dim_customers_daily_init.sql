@@ -1,4 +1,4 @@
-CREATE OR REPLACE TABLE `sandbox-data-pipelines.sales_silver.dim_customers_daily`
+CREATE TABLE IF NOT EXISTS `sandbox-data-pipelines.sales_silver.dim_customers_daily`
 (
     customer_id                         INT64,
     customer_company_name               STRING,
@@ -12,3 +12,9 @@ CREATE OR REPLACE TABLE `sandbox-data-pipelines.sales_silver.dim_customers_daily
     execution_ts                        TIMESTAMP,
 )
 PARTITION BY TIMESTAMP_TRUNC(execution_ts, DAY)
+CLUSTER BY customer_id
+OPTIONS(
+    partition_expiration_days = 90,
+    require_partition_filter = TRUE
+)
+;
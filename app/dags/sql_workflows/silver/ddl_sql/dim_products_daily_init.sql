@@ -1,4 +1,4 @@
-CREATE OR REPLACE TABLE `sandbox-data-pipelines.sales_silver.dim_products_daily`
+CREATE TABLE IF NOT EXISTS `sandbox-data-pipelines.sales_silver.dim_products_daily`
 (
     product_id                          INTEGER,
     product_name                        STRING,
@@ -24,3 +24,9 @@ CREATE OR REPLACE TABLE `sandbox-data-pipelines.sales_silver.dim_products_daily`
     execution_ts                        TIMESTAMP,
 )
 PARTITION BY TIMESTAMP_TRUNC(execution_ts, DAY)
+CLUSTER BY product_id
+OPTIONS(
+    partition_expiration_days = 90,
+    require_partition_filter = TRUE
+)
+;
@@ -0,0 +1,21 @@
+-- Slowly changing dimension (type 2) of products, maintained by `dim_products_history_merge.sql`
+-- Open versions have `valid_to` = 9999-12-31 and `is_current`; `execution_ts` is the run that created the version
+CREATE TABLE IF NOT EXISTS `sandbox-data-pipelines.sales_silver.dim_products_history`
+(
+    product_id                          INT64,
+    product_name                        STRING,
+    product_category_id                 INT64,
+    product_subcategory_id              INT64,
+    product_unit_cost                   FLOAT64,
+    product_list_price                  FLOAT64,
+    is_product_manufactured_inhouse     BOOLEAN,
+    product_complexity_score            FLOAT64,
+    supplier_id                         FLOAT64,
+    supplier_part_number                STRING,
+    valid_from                          TIMESTAMP,
+    valid_to                            TIMESTAMP,
+    is_current                          BOOLEAN,
+    execution_ts                        TIMESTAMP
+)
+CLUSTER BY product_id, valid_from
+;
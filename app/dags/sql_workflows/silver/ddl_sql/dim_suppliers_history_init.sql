@@ -0,0 +1,19 @@
+-- Slowly changing dimension (type 2) of suppliers, maintained by `dim_suppliers_history_merge.sql`
+-- Open versions have `valid_to` = 9999-12-31 and `is_current`; `execution_ts` is the run that created the version
+CREATE TABLE IF NOT EXISTS `sandbox-data-pipelines.sales_silver.dim_suppliers_history`
+(
+    supplier_id                 INT64,
+    supplier_company_name       STRING,
+    supplier_contact_name       STRING,
+    supplier_payment_terms      STRING,
+    supplier_lead_time          INT64,
+    supplier_is_active          BOOLEAN,
+    supplier_is_preferred       BOOLEAN,
+    supplier_currency_code      STRING,
+    valid_from                  TIMESTAMP,
+    valid_to                    TIMESTAMP,
+    is_current                  BOOLEAN,
+    execution_ts                TIMESTAMP
+)
+CLUSTER BY supplier_id, valid_from
+;
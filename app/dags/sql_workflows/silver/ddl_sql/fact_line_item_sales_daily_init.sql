@@ -1,4 +1,4 @@
-CREATE OR REPLACE TABLE `sandbox-data-pipelines.sales_silver.fact_line_item_sales_daily`
+CREATE TABLE IF NOT EXISTS `sandbox-data-pipelines.sales_silver.fact_line_item_sales_daily`
 (
     line_id                                 INT64,
     line_quantity_sold                      INT64,
@@ -33,3 +33,9 @@ CREATE OR REPLACE TABLE `sandbox-data-pipelines.sales_silver.fact_line_item_sale
     execution_ts                            TIMESTAMP
 )
 PARTITION BY TIMESTAMP_TRUNC(execution_ts, DAY)
+CLUSTER BY line_created_date, customer_id, product_id
+OPTIONS(
+    partition_expiration_days = 90,
+    require_partition_filter = TRUE
+)
+;
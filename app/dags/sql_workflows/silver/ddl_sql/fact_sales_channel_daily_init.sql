@@ -0,0 +1,24 @@
+CREATE TABLE IF NOT EXISTS `sandbox-data-pipelines.sales_silver.fact_sales_channel_daily`
+(
+    date                    DATE,
+    customer_id             INT64,
+    product_id              INT64,
+    sales_channel           STRING,
+    is_line_discounted      BOOLEAN,
+    line_count              INT64,
+    quantity_sold           INT64,
+    quantity_returned       FLOAT64,
+    revenue                 FLOAT64,
+    cost_of_goods_sold      FLOAT64,
+    discount                FLOAT64,
+    gross_profit            FLOAT64,
+    net_profit              FLOAT64,
+    execution_ts            TIMESTAMP
+)
+PARTITION BY TIMESTAMP_TRUNC(execution_ts, DAY)
+CLUSTER BY sales_channel, date, customer_id, product_id
+OPTIONS(
+    partition_expiration_days = 90,
+    require_partition_filter = TRUE
+)
+;
@@ -0,0 +1,49 @@
+-- Compatibility view: `fact_sales_channel_daily` pivoted back into the per-channel columns of the gold tables, one row
+-- per run, sale date, customer and product. Filter on `execution_ts`, which BigQuery pushes through the GROUP BY to
+-- prune to that run's partition (and which `require_partition_filter` asks for).
+CREATE OR REPLACE VIEW `sandbox-data-pipelines.sales_silver.fact_sales_channel_daily_wide`
+AS
+SELECT
+    execution_ts,
+    date,
+    customer_id,
+    product_id,
+    SUM(quantity_sold)                                                                      AS quantity_sold_total,
+    SUM(CASE WHEN sales_channel = "Direct" THEN quantity_sold ELSE NULL END)                AS quantity_sold_direct,
+    SUM(CASE WHEN sales_channel = "Distributor" THEN quantity_sold ELSE NULL END)           AS quantity_sold_distributor,
+    SUM(CASE WHEN sales_channel = "Online" THEN quantity_sold ELSE NULL END)                AS quantity_sold_online,
+    SUM(CASE WHEN is_line_discounted THEN quantity_sold ELSE NULL END)                      AS quantity_sold_discounted,
+
+    SUM(quantity_returned)                                                                  AS quantity_returned_total,
+    SUM(CASE WHEN sales_channel = "Direct" THEN quantity_returned ELSE NULL END)            AS quantity_returned_direct,
+    SUM(CASE WHEN sales_channel = "Distributor" THEN quantity_returned ELSE NULL END)       AS quantity_returned_distributor,
+    SUM(CASE WHEN sales_channel = "Online" THEN quantity_returned ELSE NULL END)            AS quantity_returned_online,
+    SUM(CASE WHEN is_line_discounted THEN quantity_returned ELSE NULL END)                  AS quantity_returned_discounted,
+
+    SUM(revenue)                                                                            AS revenue_total,
+    SUM(CASE WHEN sales_channel = "Direct" THEN revenue ELSE NULL END)                      AS revenue_direct,
+    SUM(CASE WHEN sales_channel = "Distributor" THEN revenue ELSE NULL END)                 AS revenue_distributor,
+    SUM(CASE WHEN sales_channel = "Online" THEN revenue ELSE NULL END)                      AS revenue_online,
+
+    SUM(cost_of_goods_sold)                                                                 AS cost_of_goods_sold_total,
+    SUM(CASE WHEN sales_channel = "Direct" THEN cost_of_goods_sold ELSE NULL END)           AS cost_of_goods_sold_direct,
+    SUM(CASE WHEN sales_channel = "Distributor" THEN cost_of_goods_sold ELSE NULL END)      AS cost_of_goods_sold_distributor,
+    SUM(CASE WHEN sales_channel = "Online" THEN cost_of_goods_sold ELSE NULL END)           AS cost_of_goods_sold_online,
+
+    SUM(discount)                                                                           AS discount_total,
+    SUM(CASE WHEN sales_channel = "Direct" THEN discount ELSE NULL END)                     AS discount_direct,
+    SUM(CASE WHEN sales_channel = "Distributor" THEN discount ELSE NULL END)                AS discount_distributor,
+    SUM(CASE WHEN sales_channel = "Online" THEN discount ELSE NULL END)                     AS discount_online,
+
+    SUM(gross_profit)                                                                       AS gross_profit_total,
+    SUM(CASE WHEN sales_channel = "Direct" THEN gross_profit ELSE NULL END)                 AS gross_profit_direct,
+    SUM(CASE WHEN sales_channel = "Distributor" THEN gross_profit ELSE NULL END)            AS gross_profit_distributor,
+    SUM(CASE WHEN sales_channel = "Online" THEN gross_profit ELSE NULL END)                 AS gross_profit_online,
+
+    SUM(net_profit)                                                                         AS net_profit_total,
+    SUM(CASE WHEN sales_channel = "Direct" THEN net_profit ELSE NULL END)                   AS net_profit_direct,
+    SUM(CASE WHEN sales_channel = "Distributor" THEN net_profit ELSE NULL END)              AS net_profit_distributor,
+    SUM(CASE WHEN sales_channel = "Online" THEN net_profit ELSE NULL END)                   AS net_profit_online,
+FROM `sandbox-data-pipelines.sales_silver.fact_sales_channel_daily`
+GROUP BY ALL
+;
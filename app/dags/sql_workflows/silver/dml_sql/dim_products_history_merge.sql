@@ -0,0 +1,177 @@
+-- Maintains `dim_products_history`, a slowly changing dimension (type 2), from the run's bronze products snapshot
+--  - a product whose tracked columns differ from its current version gets a new version valid from the run's
+--    timestamp, and the current version is closed at it
+--  - a product missing from the snapshot has its current version closed
+--  - the first version of a product is valid from 1970-01-01, so sales older than the history still find it
+-- Open versions are valid to 9999-12-31, so a point-in-time join is a single range condition:
+--     ON product_id = ... AND TIMESTAMP(sale_date) >= valid_from AND TIMESTAMP(sale_date) < valid_to
+-- Stock levels change every day and are not tracked, `dim_products_daily` keeps them.
+--
+-- Runs not newer than the table's latest change leave it as is, so reruns are idempotent. A backfill, triggered
+-- with {"backfill_start_date": "YYYY-MM-DD"}, first rewinds the table to that day, then replays its runs in order.
+{%- if params.backfill_start_date == ds %}
+
+DELETE FROM `sandbox-data-pipelines.sales_silver.dim_products_history`
+WHERE 1=1
+    AND execution_ts >= TIMESTAMP("{{ ts }}")
+;
+
+UPDATE `sandbox-data-pipelines.sales_silver.dim_products_history`
+SET
+    valid_to = TIMESTAMP("9999-12-31"),
+    is_current = TRUE
+WHERE 1=1
+    AND NOT is_current
+    AND valid_to >= TIMESTAMP("{{ ts }}")
+;
+{%- endif %}
+
+MERGE `sandbox-data-pipelines.sales_silver.dim_products_history`    AS target
+USING
+(
+    WITH
+        component_products AS
+        (
+            SELECT
+                prod_id     AS product_id,
+                prod_nm     AS product_name,
+                cat_id      AS product_category_id,
+                sub_cat_id  AS product_subcategory_id,
+                u_cost      AS product_unit_cost,
+                list_pr     AS product_list_price,
+                is_mfg      AS is_product_manufactured_inhouse,
+                complexity  AS product_complexity_score,
+                sup_id      AS supplier_id,
+                sup_part_no AS supplier_part_number,
+            FROM `sandbox-data-pipelines.sales_bronze.products_raw_daily`
+            WHERE 1=1
+                AND execution_ts = TIMESTAMP("{{ ts }}")
+        ),
+
+        component_history AS
+        (
+            SELECT
+                *,
+            FROM `sandbox-data-pipelines.sales_silver.dim_products_history`
+        ),
+
+        component_current_versions AS
+        (
+            SELECT
+                * EXCEPT(valid_from, valid_to, is_current, execution_ts),
+            FROM component_history
+            WHERE 1=1
+                AND is_current
+        ),
+
+        component_last_change AS
+        -- Latest run that created or closed a version
+        (
+            SELECT
+                COALESCE(MAX(IF(is_current, execution_ts, valid_to)), TIMESTAMP("1970-01-01"))  AS last_change_ts,
+            FROM component_history
+        ),
+
+        module_changed_products AS
+        -- Products without a current version, or whose tracked columns changed since it
+        (
+            SELECT
+                component_products.*,
+                component_products.product_id NOT IN (SELECT product_id FROM component_history)     AS is_first_version,
+            FROM component_products
+            LEFT JOIN component_current_versions
+                ON  component_current_versions.product_id = component_products.product_id
+            WHERE 1=1
+                AND (
+                    component_current_versions.product_id IS NULL
+                    OR component_current_versions.product_name IS DISTINCT FROM component_products.product_name
+                    OR component_current_versions.product_category_id IS DISTINCT FROM component_products.product_category_id
+                    OR component_current_versions.product_subcategory_id IS DISTINCT FROM component_products.product_subcategory_id
+                    OR component_current_versions.product_unit_cost IS DISTINCT FROM component_products.product_unit_cost
+                    OR component_current_versions.product_list_price IS DISTINCT FROM component_products.product_list_price
+                    OR component_current_versions.is_product_manufactured_inhouse IS DISTINCT FROM component_products.is_product_manufactured_inhouse
+                    OR component_current_versions.product_complexity_score IS DISTINCT FROM component_products.product_complexity_score
+                    OR component_current_versions.supplier_id IS DISTINCT FROM component_products.supplier_id
+                    OR component_current_versions.supplier_part_number IS DISTINCT FROM component_products.supplier_part_number
+                )
+        ),
+
+        module_closed_versions AS
+        -- Current versions replaced by a new one, or whose product left the export
+        (
+            SELECT
+                component_current_versions.*,
+                FALSE   AS is_first_version,
+            FROM component_current_versions
+            LEFT JOIN component_products
+                ON  component_products.product_id = component_current_versions.product_id
+            WHERE 1=1
+                AND (
+                    component_products.product_id IS NULL
+                    OR component_current_versions.product_id IN (SELECT product_id FROM module_changed_products)
+                )
+        ),
+
+        module_changes AS
+        -- Closed versions match their target row on `merge_key`, new versions never match and are inserted
+        (
+            SELECT
+                product_id  AS merge_key,
+                *,
+            FROM module_closed_versions
+
+            UNION ALL
+
+            SELECT
+                NULL        AS merge_key,
+                *,
+            FROM module_changed_products
+        )
+
+    SELECT
+        module_changes.*,
+    FROM module_changes
+    CROSS JOIN component_last_change
+    WHERE 1=1
+        AND TIMESTAMP("{{ ts }}") > component_last_change.last_change_ts
+)   AS source
+ON  target.product_id = source.merge_key
+    AND target.is_current
+WHEN MATCHED
+    THEN UPDATE SET
+        valid_to = TIMESTAMP("{{ ts }}"),
+        is_current = FALSE
+WHEN NOT MATCHED BY TARGET
+    THEN INSERT (
+        product_id,
+        product_name,
+        product_category_id,
+        product_subcategory_id,
+        product_unit_cost,
+        product_list_price,
+        is_product_manufactured_inhouse,
+        product_complexity_score,
+        supplier_id,
+        supplier_part_number,
+        valid_from,
+        valid_to,
+        is_current,
+        execution_ts
+    )
+    VALUES (
+        source.product_id,
+        source.product_name,
+        source.product_category_id,
+        source.product_subcategory_id,
+        source.product_unit_cost,
+        source.product_list_price,
+        source.is_product_manufactured_inhouse,
+        source.product_complexity_score,
+        source.supplier_id,
+        source.supplier_part_number,
+        IF(source.is_first_version, TIMESTAMP("1970-01-01"), TIMESTAMP("{{ ts }}")),
+        TIMESTAMP("9999-12-31"),
+        TRUE,
+        TIMESTAMP("{{ ts }}")
+    )
+;
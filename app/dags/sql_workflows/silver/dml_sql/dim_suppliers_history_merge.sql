@@ -0,0 +1,169 @@
+-- Maintains `dim_suppliers_history`, a slowly changing dimension (type 2), from the run's bronze suppliers snapshot
+--  - a supplier whose tracked columns differ from its current version gets a new version valid from the run's
+--    timestamp, and the current version is closed at it
+--  - a supplier missing from the snapshot has its current version closed
+--  - the first version of a supplier is valid from 1970-01-01, so sales older than the history still find it
+-- Open versions are valid to 9999-12-31, so a point-in-time join is a single range condition:
+--     ON supplier_id = ... AND TIMESTAMP(sale_date) >= valid_from AND TIMESTAMP(sale_date) < valid_to
+-- The last order date changes with every order and is not tracked, `dim_products_daily` keeps it.
+--
+-- Runs not newer than the table's latest change leave it as is, so reruns are idempotent. A backfill, triggered
+-- with {"backfill_start_date": "YYYY-MM-DD"}, first rewinds the table to that day, then replays its runs in order.
+{%- if params.backfill_start_date == ds %}
+
+DELETE FROM `sandbox-data-pipelines.sales_silver.dim_suppliers_history`
+WHERE 1=1
+    AND execution_ts >= TIMESTAMP("{{ ts }}")
+;
+
+UPDATE `sandbox-data-pipelines.sales_silver.dim_suppliers_history`
+SET
+    valid_to = TIMESTAMP("9999-12-31"),
+    is_current = TRUE
+WHERE 1=1
+    AND NOT is_current
+    AND valid_to >= TIMESTAMP("{{ ts }}")
+;
+{%- endif %}
+
+MERGE `sandbox-data-pipelines.sales_silver.dim_suppliers_history`    AS target
+USING
+(
+    WITH
+        component_suppliers AS
+        (
+            SELECT
+                sup_id      AS supplier_id,
+                comp_nm     AS supplier_company_name,
+                cont_nm     AS supplier_contact_name,
+                pmt_terms   AS supplier_payment_terms,
+                lead_tm     AS supplier_lead_time,
+                act_stat    AS supplier_is_active,
+                pref_stat   AS supplier_is_preferred,
+                curr        AS supplier_currency_code,
+            FROM `sandbox-data-pipelines.sales_bronze.suppliers_raw_daily`
+            WHERE 1=1
+                AND execution_ts = TIMESTAMP("{{ ts }}")
+        ),
+
+        component_history AS
+        (
+            SELECT
+                *,
+            FROM `sandbox-data-pipelines.sales_silver.dim_suppliers_history`
+        ),
+
+        component_current_versions AS
+        (
+            SELECT
+                * EXCEPT(valid_from, valid_to, is_current, execution_ts),
+            FROM component_history
+            WHERE 1=1
+                AND is_current
+        ),
+
+        component_last_change AS
+        -- Latest run that created or closed a version
+        (
+            SELECT
+                COALESCE(MAX(IF(is_current, execution_ts, valid_to)), TIMESTAMP("1970-01-01"))  AS last_change_ts,
+            FROM component_history
+        ),
+
+        module_changed_suppliers AS
+        -- Suppliers without a current version, or whose tracked columns changed since it
+        (
+            SELECT
+                component_suppliers.*,
+                component_suppliers.supplier_id NOT IN (SELECT supplier_id FROM component_history)     AS is_first_version,
+            FROM component_suppliers
+            LEFT JOIN component_current_versions
+                ON  component_current_versions.supplier_id = component_suppliers.supplier_id
+            WHERE 1=1
+                AND (
+                    component_current_versions.supplier_id IS NULL
+                    OR component_current_versions.supplier_company_name IS DISTINCT FROM component_suppliers.supplier_company_name
+                    OR component_current_versions.supplier_contact_name IS DISTINCT FROM component_suppliers.supplier_contact_name
+                    OR component_current_versions.supplier_payment_terms IS DISTINCT FROM component_suppliers.supplier_payment_terms
+                    OR component_current_versions.supplier_lead_time IS DISTINCT FROM component_suppliers.supplier_lead_time
+                    OR component_current_versions.supplier_is_active IS DISTINCT FROM component_suppliers.supplier_is_active
+                    OR component_current_versions.supplier_is_preferred IS DISTINCT FROM component_suppliers.supplier_is_preferred
+                    OR component_current_versions.supplier_currency_code IS DISTINCT FROM component_suppliers.supplier_currency_code
+                )
+        ),
+
+        module_closed_versions AS
+        -- Current versions replaced by a new one, or whose supplier left the export
+        (
+            SELECT
+                component_current_versions.*,
+                FALSE   AS is_first_version,
+            FROM component_current_versions
+            LEFT JOIN component_suppliers
+                ON  component_suppliers.supplier_id = component_current_versions.supplier_id
+            WHERE 1=1
+                AND (
+                    component_suppliers.supplier_id IS NULL
+                    OR component_current_versions.supplier_id IN (SELECT supplier_id FROM module_changed_suppliers)
+                )
+        ),
+
+        module_changes AS
+        -- Closed versions match their target row on `merge_key`, new versions never match and are inserted
+        (
+            SELECT
+                supplier_id  AS merge_key,
+                *,
+            FROM module_closed_versions
+
+            UNION ALL
+
+            SELECT
+                NULL        AS merge_key,
+                *,
+            FROM module_changed_suppliers
+        )
+
+    SELECT
+        module_changes.*,
+    FROM module_changes
+    CROSS JOIN component_last_change
+    WHERE 1=1
+        AND TIMESTAMP("{{ ts }}") > component_last_change.last_change_ts
+)   AS source
+ON  target.supplier_id = source.merge_key
+    AND target.is_current
+WHEN MATCHED
+    THEN UPDATE SET
+        valid_to = TIMESTAMP("{{ ts }}"),
+        is_current = FALSE
+WHEN NOT MATCHED BY TARGET
+    THEN INSERT (
+        supplier_id,
+        supplier_company_name,
+        supplier_contact_name,
+        supplier_payment_terms,
+        supplier_lead_time,
+        supplier_is_active,
+        supplier_is_preferred,
+        supplier_currency_code,
+        valid_from,
+        valid_to,
+        is_current,
+        execution_ts
+    )
+    VALUES (
+        source.supplier_id,
+        source.supplier_company_name,
+        source.supplier_contact_name,
+        source.supplier_payment_terms,
+        source.supplier_lead_time,
+        source.supplier_is_active,
+        source.supplier_is_preferred,
+        source.supplier_currency_code,
+        IF(source.is_first_version, TIMESTAMP("1970-01-01"), TIMESTAMP("{{ ts }}")),
+        TIMESTAMP("9999-12-31"),
+        TRUE,
+        TIMESTAMP("{{ ts }}")
+    )
+;
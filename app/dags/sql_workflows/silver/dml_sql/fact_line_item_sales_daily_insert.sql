@@ -22,8 +22,25 @@ component_order_line_items AS
         prod_id         AS product_id,
     FROM `sandbox-data-pipelines.sales_bronze.order_line_items_raw_daily`
     WHERE 1=1
+{%- if "order_line_items" in params.incremental_sources %}
+        -- Incremental bronze: latest version of each record across the deltas loaded since the last full snapshot
+        AND execution_ts <= TIMESTAMP("{{ ts }}")
+        AND execution_ts >= (
+            SELECT
+                COALESCE(MAX(execution_ts), TIMESTAMP("1970-01-01"))
+            FROM `sandbox-data-pipelines.sales_bronze.load_watermarks`
+            WHERE 1=1
+                AND source_table = "order_line_items_raw_daily"
+                AND is_full_snapshot
+                AND execution_ts <= TIMESTAMP("{{ ts }}")
+        )
+{%- else %}
         AND execution_ts = TIMESTAMP("{{ ts }}")
+{%- endif %}
         AND ord_type = "SO"
+{%- if "order_line_items" in params.incremental_sources %}
+    QUALIFY ROW_NUMBER() OVER(PARTITION BY line_id ORDER BY execution_ts DESC) = 1
+{%- endif %}
 ),
 
 component_sales_orders AS
@@ -38,20 +55,38 @@ component_sales_orders AS
         disc_amt        AS total_discount_amount,
     FROM `sandbox-data-pipelines.sales_bronze.sales_orders_raw_daily`
     WHERE 1=1
+{%- if "sales_orders" in params.incremental_sources %}
+        -- Incremental bronze: latest version of each record across the deltas loaded since the last full snapshot
+        AND execution_ts <= TIMESTAMP("{{ ts }}")
+        AND execution_ts >= (
+            SELECT
+                COALESCE(MAX(execution_ts), TIMESTAMP("1970-01-01"))
+            FROM `sandbox-data-pipelines.sales_bronze.load_watermarks`
+            WHERE 1=1
+                AND source_table = "sales_orders_raw_daily"
+                AND is_full_snapshot
+                AND execution_ts <= TIMESTAMP("{{ ts }}")
+        )
+{%- else %}
         AND execution_ts = TIMESTAMP("{{ ts }}")
+{%- endif %}
+{%- if "sales_orders" in params.incremental_sources %}
+    QUALIFY ROW_NUMBER() OVER(PARTITION BY ord_id ORDER BY execution_ts DESC) = 1
+{%- endif %}
 ),
 
 component_products AS
+-- Every version of each product, lines are joined to the one valid when they were created
 (
     SELECT
-        prod_id         AS product_id,
-        prod_nm         AS product_name,
-        cat_id          AS product_category_id,
-        sub_cat_id      AS product_subcategory_id,
-        u_cost          AS product_unit_cost,
-    FROM `sandbox-data-pipelines.sales_bronze.products_raw_daily`
-    WHERE 1=1
-        AND execution_ts = TIMESTAMP("{{ ts }}")
+        product_id,
+        product_name,
+        product_category_id,
+        product_subcategory_id,
+        product_unit_cost,
+        valid_from,
+        valid_to,
+    FROM `sandbox-data-pipelines.sales_silver.dim_products_history`
 ),
 
 module_line_item_sales_base AS
@@ -60,12 +95,15 @@ module_line_item_sales_base AS
         -- These `SELECT *` set up so product and order dimensions stay grouped together in table schema
         component_order_line_items.* EXCEPT(order_id, product_id),
         component_sales_orders.*,
-        component_products.*,
+        component_products.* EXCEPT(valid_from, valid_to),
     FROM component_order_line_items
     LEFT JOIN component_sales_orders
         ON  component_sales_orders.order_id = component_order_line_items.order_id
+    -- Point-in-time join, clustering on (product_id, valid_from) keeps it to each product's few blocks
     LEFT JOIN component_products
         ON  component_products.product_id = component_order_line_items.product_id
+        AND TIMESTAMP(component_order_line_items.line_created_date) >= component_products.valid_from
+        AND TIMESTAMP(component_order_line_items.line_created_date) < component_products.valid_to
 ),
 
 component_sales_channel_identifiers AS
@@ -0,0 +1,35 @@
+-- Purpose of this table is to hold sales measures in long format, one row per sale date, customer, product and sales
+-- channel, so dashboards can group or filter by channel instead of picking from per-channel columns.
+-- Each measure is summed once in a single grouped pass; `fact_sales_channel_daily_wide` pivots the channels back into
+-- the per-channel columns the gold tables carry.
+
+
+WITH
+module_sales_by_channel AS
+-- Lines of orders missing from the run's snapshot have no channel, they only count towards totals
+(
+    SELECT
+        line_created_date                               AS date,
+        customer_id,
+        product_id,
+        COALESCE(order_sales_channel, "Unknown")        AS sales_channel,
+        is_line_discounted,
+        COUNT(*)                                        AS line_count,
+        SUM(line_quantity_sold)                         AS quantity_sold,
+        SUM(line_quantity_returned)                     AS quantity_returned,
+        SUM(line_revenue_amount_total)                  AS revenue,
+        SUM(line_cost_of_goods_sold_amount_total)       AS cost_of_goods_sold,
+        SUM(line_discount_amount_total)                 AS discount,
+        SUM(line_gross_profit_amount_total)             AS gross_profit,
+        SUM(line_net_profit_amount_total)               AS net_profit,
+    FROM `sandbox-data-pipelines.sales_silver.fact_line_item_sales_daily`
+    WHERE 1=1
+        AND execution_ts = TIMESTAMP("{{ ts }}")
+    GROUP BY ALL
+)
+
+SELECT 
+    *,
+    TIMESTAMP("{{ ts }}")   AS execution_ts,
+FROM module_sales_by_channel
+;
@@ -0,0 +1,14 @@
+"""
+Shared test setup
+
+The modules under test live in `app/utils`, which Airflow puts on the path as `/opt/airflow/utils`. Tests run from
+the `app/` directory, without GCP: BigQuery is replaced by stubbed responses or by `utils/local_engine.py`.
+
+Usage:
+    python -m pytest -q tests
+"""
+import os
+import sys
+
+APP_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(os.path.join(APP_DIR, "utils"))
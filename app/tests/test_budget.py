@@ -0,0 +1,85 @@
+import dataclasses
+import json
+
+import duckdb
+import pytest
+
+import budget
+import common
+import pipeline
+import specs
+
+BUDGET = 1000
+
+
+def stub_estimator(estimate):
+    return lambda sql: estimate
+
+
+def test_within_budget_is_recorded(tmp_path):
+    path = tmp_path / "budget_estimates.jsonl"
+    estimate = budget.preflight("gold_customers_perf_load", "SELECT 1", stub_estimator(BUDGET), BUDGET,
+                                specs.OVER_BUDGET_BLOCK, "2025-03-01", "scheduled__2025-03-01", path=str(path))
+    assert estimate["decision"] == budget.WITHIN_BUDGET
+    recorded, = [json.loads(line) for line in path.read_text().splitlines()]
+    assert recorded["estimated_bytes"] == BUDGET
+    assert recorded["task_id"] == "gold_customers_perf_load"
+
+
+def test_over_budget_blocks_before_submitting(tmp_path):
+    path = tmp_path / "budget_estimates.jsonl"
+    with pytest.raises(budget.BudgetExceededError, match="over its budget of 1,000 bytes"):
+        budget.preflight("silver_fact_line_load", "SELECT 1", stub_estimator(BUDGET + 1), BUDGET, specs.OVER_BUDGET_BLOCK,
+                         path=str(path))
+    # Blocked estimates are recorded too, `report` counts them
+    assert json.loads(path.read_text())["decision"] == specs.OVER_BUDGET_BLOCK
+
+
+def test_over_budget_downgrades():
+    estimate = budget.preflight("gold_customers_perf_load", "SELECT 1", stub_estimator(BUDGET + 1), BUDGET,
+                                specs.OVER_BUDGET_DOWNGRADE, path=None)
+    assert estimate["decision"] == specs.OVER_BUDGET_DOWNGRADE
+
+
+def test_over_the_downgrade_ceiling_blocks():
+    ceiling = budget.downgrade_ceiling(BUDGET)
+    assert budget.preflight("gold_customers_perf_load", "SELECT 1", stub_estimator(ceiling), BUDGET,
+                            specs.OVER_BUDGET_DOWNGRADE, path=None)["decision"] == specs.OVER_BUDGET_DOWNGRADE
+    with pytest.raises(budget.BudgetExceededError, match="downgrade ceiling"):
+        budget.preflight("gold_customers_perf_load", "SELECT 1", stub_estimator(ceiling + 1), BUDGET,
+                         specs.OVER_BUDGET_DOWNGRADE, path=None)
+
+
+@pytest.mark.parametrize("spec", [spec for spec in specs.TABLE_SPECS if spec.over_budget == specs.OVER_BUDGET_DOWNGRADE],
+                         ids=lambda spec: spec.key)
+def test_downgraded_configuration_differs_from_the_original(spec):
+    original = pipeline.script_job_configuration(spec, "SELECT 1")
+    downgraded = budget.downgraded_configuration(original, spec.bytes_budget)
+
+    assert downgraded != original
+    assert original["query"]["priority"] != budget.DOWNGRADE_PRIORITY
+    assert downgraded["query"]["priority"] == budget.DOWNGRADE_PRIORITY
+    assert int(downgraded["query"]["maximumBytesBilled"]) == spec.bytes_budget * common.BQ_DOWNGRADE_CEILING_FACTOR
+    assert "maximumBytesBilled" not in original["query"]
+
+
+def test_downgrade_requires_interactive_priority():
+    spec = specs.get_spec(common.BQ_GOLD_CUSTOMERS_SALES)
+    with pytest.raises(ValueError, match="must run at INTERACTIVE priority"):
+        dataclasses.replace(spec, priority="BATCH")
+    assert dataclasses.replace(spec, priority="BATCH", over_budget=specs.OVER_BUDGET_BLOCK).priority == "BATCH"
+
+
+def test_local_dry_run_prunes_on_the_partition_column():
+    con = duckdb.connect()
+    con.execute("CREATE SCHEMA {}".format(common.BQ_DATASET_BRONZE))
+    con.execute("CREATE TABLE {}.customers_raw_daily (customer_id BIGINT, name VARCHAR, execution_ts TIMESTAMP)".format(common.BQ_DATASET_BRONZE))
+    con.execute("INSERT INTO {}.customers_raw_daily VALUES (1, 'abc', TIMESTAMP '2025-03-01'), (2, 'de', TIMESTAMP '2025-03-02')".format(
+        common.BQ_DATASET_BRONZE))
+    estimator = budget.LocalDryRun(con)
+
+    # customer_id and execution_ts, 8 bytes each, of the one partition kept
+    assert estimator("SELECT customer_id FROM sales_bronze.customers_raw_daily WHERE execution_ts = TIMESTAMP '2025-03-01'") == 8 + 8
+    # customer_id of both partitions, then with the names, 2 bytes + their length
+    assert estimator("SELECT customer_id FROM sales_bronze.customers_raw_daily") == 2 * 8
+    assert estimator("SELECT customer_id, name FROM sales_bronze.customers_raw_daily") == 2 * 8 + (2 + 3) + (2 + 2)
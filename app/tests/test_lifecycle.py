@@ -0,0 +1,131 @@
+import dataclasses
+import datetime
+import os
+
+import pytest
+
+import common
+import lifecycle
+import local_engine
+import specs
+
+DATA_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "data"))
+FIRST_RUN_DATE = datetime.date(2025, 3, 5)
+LAST_RUN_DATE = datetime.date(2025, 3, 7)
+LIFECYCLE_DATE = datetime.date(2025, 3, 8)
+KEEP_DAYS = 2
+
+# Every retention shortened to `KEEP_DAYS`, the real ones are weeks to years
+TABLE_SPECS = tuple(
+    dataclasses.replace(spec, archive_after_days=KEEP_DAYS) if spec.archive_after_days is not None else spec
+    for spec in specs.TABLE_SPECS
+)
+ARCHIVED = lifecycle.archived_specs(TABLE_SPECS)
+RESTORED = specs.get_spec(common.BQ_GOLD_CUSTOMERS_SALES, TABLE_SPECS)
+
+
+class RecordingArchive:
+    def partition_uri(self, spec, day):
+        return "archive/{}".format(lifecycle.partition_path(spec, day))
+
+    def export_sql(self, spec, day):
+        return "EXPORT {}".format(day.isoformat())
+
+
+def test_archived_partitions_are_only_dropped_again():
+    statements = lifecycle.archive_statements(
+        RESTORED, [(datetime.date(2025, 1, 1), False), (datetime.date(2025, 1, 2), True)], "2025-03-08T00:00:00+00:00",
+        RecordingArchive())
+    assert [statement.split()[0] for statement in statements] == ["EXPORT", "MERGE", "DELETE", "DELETE"]
+    assert 'date = DATE("2025-01-02")' in statements[-1]
+    assert "archive_date=2025-01-01" in statements[1]
+
+
+def table_path(spec, table_id):
+    return "`{}.{}.{}`".format(common.BQ_PROJECT_ID, spec.dataset_id, table_id)
+
+
+def rows_digest(engine, spec, table_id):
+    """
+    Returns (rows, order-independent hash of the rows) of a table or view
+    """
+    return engine.execute("SELECT COUNT(*), BIT_XOR(HASH(t)) FROM {} AS t".format(table_path(spec, table_id))).fetchone()
+
+
+def manifest_entries(engine, spec):
+    return set(engine.execute('SELECT partition_date, max_execution_ts, execution_ts FROM {} WHERE source_table = "{}"'.format(
+        lifecycle.MANIFEST_TABLE, spec.checked_table_id)).fetchall())
+
+
+def archive_all(engine, archive_dir, run_date):
+    """
+    Runs the lifecycle of `run_date` until nothing is left to archive, returning {table: partitions dropped}
+    """
+    dropped = {}
+    while True:
+        result = lifecycle.archive_local(engine, archive_dir, run_date, TABLE_SPECS)
+        for table, count in result.items():
+            dropped[table] = dropped.get(table, 0) + count
+        if not any(result.values()):
+            return dropped
+
+
+@pytest.fixture(scope="module")
+def archived(tmp_path_factory):
+    """
+    Returns (engine, archive directory, {spec key: rows digest before archiving}, {table: partitions dropped})
+    """
+    engine = local_engine.LocalEngine(landing_dir=DATA_DIR, table_specs=TABLE_SPECS)
+    engine.init_tables()
+    engine.run_day(FIRST_RUN_DATE, {"backfill_start_date": "2025-01-01"})
+    engine.run_range(FIRST_RUN_DATE + datetime.timedelta(days=1), LAST_RUN_DATE)
+
+    before = {spec.key: rows_digest(engine, spec, spec.checked_table_id) for spec in ARCHIVED}
+    archive_dir = str(tmp_path_factory.mktemp("archive_bucket"))
+    return engine, archive_dir, before, archive_all(engine, archive_dir, LIFECYCLE_DATE)
+
+
+def test_expired_partitions_leave_the_hot_table(archived):
+    engine, _, _, dropped = archived
+    # The gold history from January 1st, beyond one run's `ARCHIVE_MAX_PARTITIONS_PER_RUN`, and the first daily snapshot
+    assert dropped[RESTORED.checked_table_id] == (lifecycle.cutoff_date(RESTORED, LIFECYCLE_DATE) - datetime.date(2025, 1, 1)).days
+    assert dropped[RESTORED.checked_table_id] > common.ARCHIVE_MAX_PARTITIONS_PER_RUN
+    assert dropped[specs.get_spec(common.BQ_DIM_CUSTOMERS, TABLE_SPECS).checked_table_id] == 1
+
+    for spec in ARCHIVED:
+        assert engine.execute(lifecycle.expired_partitions_sql(spec, LIFECYCLE_DATE)).fetchall() == []
+
+
+def test_all_view_returns_the_rows_held_before_archiving(archived):
+    engine, _, before, dropped = archived
+    for spec in ARCHIVED:
+        if dropped[spec.checked_table_id]:
+            assert rows_digest(engine, spec, lifecycle.all_view_id(spec)) == before[spec.key], spec.key
+
+
+def test_restore_then_rerun_is_idempotent(archived):
+    engine, archive_dir, before, _ = archived
+    backend = lifecycle.LocalArchive(engine, archive_dir)
+    exports = manifest_entries(engine, RESTORED)
+    days = sorted(day for day, _, _ in exports)
+
+    hot_rows = rows_digest(engine, RESTORED, RESTORED.checked_table_id)[0]
+    assert lifecycle.restore(RESTORED, days, backend) == before[RESTORED.key][0] - hot_rows
+    assert rows_digest(engine, RESTORED, RESTORED.checked_table_id) == before[RESTORED.key]
+    # Restoring again replaces the partitions instead of appending them
+    lifecycle.restore(RESTORED, days[:1], backend)
+    assert rows_digest(engine, RESTORED, RESTORED.checked_table_id) == before[RESTORED.key]
+
+    # The next run, a day later, drops the restored partitions again without exporting them a second time
+    redropped = archive_all(engine, archive_dir, LIFECYCLE_DATE + datetime.timedelta(days=1))
+    # ...and March 6th, newly expired
+    assert redropped[RESTORED.checked_table_id] == len(days) + 1
+    assert manifest_entries(engine, RESTORED) - exports == {
+        entry for entry in manifest_entries(engine, RESTORED) if entry[0] == LAST_RUN_DATE - datetime.timedelta(days=1)}
+    assert rows_digest(engine, RESTORED, lifecycle.all_view_id(RESTORED)) == before[RESTORED.key]
+
+
+def test_restore_of_a_partition_never_archived_fails(archived):
+    engine, archive_dir, _, _ = archived
+    with pytest.raises(lifecycle.RestoreError, match="no archived partitions for 2025-03-07"):
+        lifecycle.restore(RESTORED, [LAST_RUN_DATE], lifecycle.LocalArchive(engine, archive_dir))
@@ -0,0 +1,65 @@
+import datetime
+import os
+
+import common
+import microbatch
+
+DATA_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "data"))
+RUN_DATE = datetime.date(2025, 3, 5)
+
+
+def test_new_files_skips_ingested_and_non_csv_objects():
+    listed = [
+        "microbatch/sales_orders/b.csv",
+        "microbatch/sales_orders/a.csv",
+        "microbatch/sales_orders/_SUCCESS",
+        "microbatch/sales_orders/c.csv",
+    ]
+    assert microbatch.new_files(listed, ["microbatch/sales_orders/c.csv"]) == [
+        "microbatch/sales_orders/a.csv",
+        "microbatch/sales_orders/b.csv",
+    ]
+
+
+def test_batches_refresh_the_snapshot_of_the_day_before():
+    first, second = microbatch.batch_times(RUN_DATE, 2, freshness_minutes=15)
+    assert second - first == datetime.timedelta(minutes=15)
+    assert microbatch.snapshot_date(second) == RUN_DATE - datetime.timedelta(days=1)
+    logical_date = datetime.datetime(2025, 3, 5, 0, 15, tzinfo=datetime.timezone.utc)
+    assert microbatch.snapshot_logical_date(logical_date) == datetime.datetime(2025, 3, 4, tzinfo=datetime.timezone.utc)
+
+
+def test_list_local_files_returns_object_names(tmp_path):
+    entity_dir = tmp_path / microbatch.object_prefix(common.SALES_ORDERS)
+    entity_dir.mkdir(parents=True)
+    (entity_dir / "2025-03-05-0000.csv").write_text("")
+    assert microbatch.list_local_files(str(tmp_path), common.SALES_ORDERS) == [
+        microbatch.object_prefix(common.SALES_ORDERS) + "2025-03-05-0000.csv",
+    ]
+
+
+def bronze_rows(engine, spec):
+    return engine.execute("SELECT COUNT(*) FROM `{}.{}.{}`".format(common.BQ_PROJECT_ID, spec.dataset_id, spec.table_id)).fetchone()[0]
+
+
+def test_local_batches_ingest_each_file_once(tmp_path):
+    watch_dir = str(tmp_path / "landing_bucket")
+    engine = microbatch.simulate_local(RUN_DATE, 2, DATA_DIR, watch_dir)
+
+    streamed = microbatch.streamed_specs(engine.table_specs)
+    files_sql = "SELECT COUNT(*) FROM {}".format(microbatch.MICROBATCH_FILES_TABLE)
+    assert engine.execute(files_sql).fetchone()[0] == 2 * len(streamed)
+    ingests = [task_run for task_run in engine.task_runs if task_run["task_id"].endswith("_ingest")]
+    assert sum(task_run["rows"] for task_run in ingests) > 0
+    rows = {spec.key: bronze_rows(engine, spec) for spec in streamed}
+
+    # A retry of the last batch replaces its earlier attempt instead of appending the files again
+    last_batch_ts = microbatch.batch_times(RUN_DATE, 2)[-1]
+    assert microbatch.run_local_batch(engine, watch_dir, last_batch_ts) == len(streamed)
+    assert engine.execute(files_sql).fetchone()[0] == 2 * len(streamed)
+    assert {spec.key: bronze_rows(engine, spec) for spec in streamed} == rows
+
+    # The next batch finds nothing new, so it neither ingests nor refreshes
+    task_runs = len(engine.task_runs)
+    assert microbatch.run_local_batch(engine, watch_dir, last_batch_ts + datetime.timedelta(minutes=15)) == 0
+    assert len(engine.task_runs) == task_runs
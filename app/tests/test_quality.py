@@ -0,0 +1,61 @@
+import duckdb
+import pytest
+
+import common
+import local_engine
+import quality
+import specs
+import sql_registry
+
+TS = "2025-03-01T00:00:00+00:00"
+
+
+def check_spec(*assertions):
+    return specs.TableSpec(
+        key = "checked",
+        layer = specs.BRONZE,
+        dataset_id = common.BQ_DATASET_BRONZE,
+        table_id = "checked",
+        task_prefix = "checked",
+        sql_dir = common.SQL_BRONZE,
+        sql_file = "checked.sql",
+        assertions = assertions,
+    )
+
+
+@pytest.fixture
+def con():
+    con = duckdb.connect()
+    con.execute("CREATE SCHEMA {}".format(common.BQ_DATASET_BRONZE))
+    con.execute("CREATE TABLE {}.checked (id INT64, part VARCHAR, execution_ts TIMESTAMP)".format(common.BQ_DATASET_BRONZE))
+    return con
+
+
+def failing_rows(con, rows, *assertions):
+    for row in rows:
+        con.execute("INSERT INTO {}.checked VALUES (?, ?, TIMESTAMP '2025-03-01')".format(common.BQ_DATASET_BRONZE), row)
+    sql = sql_registry.REGISTRY.render_string(quality.compile_check(check_spec(*assertions), specs.TABLE_SPECS), ts=TS)
+    return list(con.execute(local_engine.translate(sql)).fetchone()[1:])
+
+
+def test_unique_single_null_key_passes(con):
+    assert failing_rows(con, [(1, "a"), (None, "b")], quality.unique("id")) == [0]
+
+
+def test_unique_null_keys_compare_equal_for_any_key_width(con):
+    rows = [(1, "a"), (None, "a"), (None, "a")]
+    assert failing_rows(con, rows, quality.unique("id"), quality.unique("id", "part")) == [1, 1]
+
+
+def test_unique_null_and_empty_keys_differ(con):
+    rows = [(1, None), (1, ""), (2, ""), (2, "")]
+    assert failing_rows(con, rows, quality.unique("part"), quality.unique("id", "part")) == [2, 1]
+
+
+def test_unique_counts_rows_beyond_the_first(con):
+    assert failing_rows(con, [(1, "a"), (1, "b"), (1, "c"), (2, "a")], quality.unique("id"), quality.unique("id", "part")) == [2, 0]
+
+
+def test_one_column_per_assertion(con):
+    assertions = (quality.not_empty(), quality.not_null("id"), quality.in_range("id", min_value=0, max_value=10))
+    assert failing_rows(con, [(1, "a"), (None, "b"), (11, "c")], *assertions) == [0, 1, 1]
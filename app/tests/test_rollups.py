@@ -0,0 +1,107 @@
+import datetime
+import os
+
+import pytest
+
+import common
+import local_engine
+import rollups
+import specs
+import sql_registry
+
+DATA_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "data"))
+BACKFILL_DATE = datetime.date(2025, 3, 5)
+RUN_DATE = datetime.date(2025, 3, 6)
+ROLLUPS = [spec for spec in specs.GOLD_TABLES if spec.rollup_grain]
+
+
+@pytest.mark.parametrize("day, grain, start, end", [
+    (datetime.date(2025, 2, 14), "MONTH", datetime.date(2025, 2, 1), datetime.date(2025, 2, 28)),
+    (datetime.date(2024, 2, 14), "MONTH", datetime.date(2024, 2, 1), datetime.date(2024, 2, 29)),
+    (datetime.date(2025, 5, 31), "QUARTER", datetime.date(2025, 4, 1), datetime.date(2025, 6, 30)),
+    (datetime.date(2025, 12, 31), "QUARTER", datetime.date(2025, 10, 1), datetime.date(2025, 12, 31)),
+    (datetime.date(2025, 7, 4), "YEAR", datetime.date(2025, 1, 1), datetime.date(2025, 12, 31)),
+    (datetime.date(2025, 7, 4), rollups.DAY, datetime.date(2025, 7, 4), datetime.date(2025, 7, 4)),
+])
+def test_buckets(day, grain, start, end):
+    assert rollups.bucket_start(day, grain) == start
+    assert rollups.bucket_end(day, grain) == end
+
+
+@pytest.mark.parametrize("start, end, grain, table_id", [
+    # The coarsest rollup whose buckets tile the range, no coarser than the grain asked for
+    (datetime.date(2025, 1, 1), datetime.date(2025, 6, 30), None, "sales_performance_customers_quarterly"),
+    (datetime.date(2025, 1, 1), datetime.date(2025, 6, 30), "MONTH", "sales_performance_customers_monthly"),
+    (datetime.date(2025, 1, 1), datetime.date(2025, 12, 31), None, "sales_performance_customers_yearly"),
+    (datetime.date(2025, 1, 1), datetime.date(2025, 12, 31), "QUARTER", "sales_performance_customers_quarterly"),
+    (datetime.date(2025, 2, 1), datetime.date(2025, 2, 28), None, "sales_performance_customers_monthly"),
+    # Partial buckets fall back to the finer tables
+    (datetime.date(2025, 1, 15), datetime.date(2025, 2, 14), None, common.BQ_GOLD_CUSTOMERS_SALES),
+    (datetime.date(2025, 1, 1), datetime.date(2025, 6, 30), rollups.DAY, common.BQ_GOLD_CUSTOMERS_SALES),
+])
+def test_route(start, end, grain, table_id):
+    assert rollups.route(common.BQ_GOLD_CUSTOMERS_SALES, start, end, grain).table_id == table_id
+
+
+def test_routed_query_reads_the_latest_view_of_the_routed_table():
+    query = rollups.routed_query(common.BQ_GOLD_PRODUCTS_SALES, datetime.date(2025, 1, 1), datetime.date(2025, 6, 30), "MONTH")
+    assert "FROM `{}.{}.sales_performance_products_monthly_latest`".format(common.BQ_PROJECT_ID, common.BQ_DATASET_GOLD) in query
+    assert "    month_start_date,\n    product_id,\n" in query
+    assert "SUM(revenue_total) AS revenue_total" in query
+    assert 'date BETWEEN DATE("2025-01-01") AND DATE("2025-06-30")' in query
+
+
+@pytest.mark.parametrize("spec", ROLLUPS, ids=lambda spec: spec.key)
+def test_generated_scripts_are_up_to_date(spec):
+    for path, contents in rollups.rollup_scripts(spec).items():
+        assert sql_registry.REGISTRY.get_source(path) == contents, "run `python utils/rollups.py` to regenerate " + path
+
+
+@pytest.fixture(scope="module")
+def engine():
+    engine = local_engine.LocalEngine(landing_dir=DATA_DIR)
+    engine.init_tables()
+    engine.run_day(BACKFILL_DATE, {"backfill_start_date": "2025-01-01"})
+    engine.run_day(RUN_DATE)
+    return engine
+
+
+def table_path(spec):
+    return "`{}.{}.{}`".format(common.BQ_PROJECT_ID, spec.dataset_id, spec.checked_table_id)
+
+
+def bucket_totals(engine, spec, grain):
+    """
+    Returns {(bucket, key): (rows, revenue)} of the daily table `spec`, or of a rollup read at its own grain
+    """
+    sql = "SELECT {}, {}, COUNT(*), ROUND(SUM(revenue_total), 4) FROM {} GROUP BY ALL".format(
+        rollups.START_DATE_COLUMNS[grain], spec.cluster_fields[0], table_path(spec))
+    return {(bucket, key): (rows, revenue) for bucket, key, rows, revenue in engine.execute(sql).fetchall()}
+
+
+@pytest.mark.parametrize("spec", ROLLUPS, ids=lambda spec: spec.key)
+def test_incremental_run_matches_the_daily_table(engine, spec):
+    daily = rollups.daily_spec(spec)
+    expected = {bucket: revenue for bucket, (_, revenue) in bucket_totals(engine, daily, spec.rollup_grain).items()}
+    rolled_up = bucket_totals(engine, spec, spec.rollup_grain)
+
+    # One row per bucket and key, summing every daily row of the bucket
+    assert {bucket: rows for bucket, (rows, _) in rolled_up.items()} == dict.fromkeys(expected, 1)
+    assert {bucket: revenue for bucket, (_, revenue) in rolled_up.items()} == expected
+
+
+def test_incremental_run_only_rewrites_the_buckets_of_its_lookback(engine):
+    spec = specs.get_spec("sales_performance_customers_monthly")
+    sql = "SELECT date, MAX(execution_ts) FROM {} GROUP BY ALL ORDER BY date".format(table_path(spec))
+    (january, january_ts), (february, february_ts), (march, march_ts) = engine.execute(sql).fetchall()
+
+    # The run of March 6th looks back to February 27th, so January keeps the rows of the backfill
+    assert (january, february, march) == (datetime.date(2025, 1, 1), datetime.date(2025, 2, 1), datetime.date(2025, 3, 1))
+    assert january_ts < february_ts == march_ts
+
+
+def test_rerun_replaces_the_buckets_it_recomputes(engine):
+    spec = specs.get_spec("sales_performance_products_quarterly")
+    before = bucket_totals(engine, spec, spec.rollup_grain)
+    engine.run_day(RUN_DATE)
+    assert bucket_totals(engine, spec, spec.rollup_grain) == before
@@ -0,0 +1,115 @@
+import json
+
+import common
+import gold_scan
+import lifecycle
+import microbatch
+import specs
+import telemetry
+
+# Trimmed REST representation of a finished query job, as `job.to_api_repr()` returns it: numbers are strings
+JOB_RESOURCE = {
+    "jobReference": {"projectId": "sandbox-data-pipelines", "jobId": "airflow_silver_fact_line_load_1"},
+    "statistics": {
+        "creationTime": "1740787200000",
+        "startTime": "1740787201500",
+        "endTime": "1740787211500",
+        "totalBytesProcessed": "1048576",
+        "totalSlotMs": "52000",
+        "query": {
+            "statementType": "INSERT",
+            "totalBytesProcessed": "1048576",
+            "totalBytesBilled": "10485760",
+            "totalSlotMs": "52000",
+            "cacheHit": False,
+            "queryPlan": [
+                {"name": "S00: Input", "startMs": "1740787201600", "endMs": "1740787205600", "slotMs": "40000",
+                 "recordsRead": "250000", "recordsWritten": "1200"},
+                {"name": "S01: Output", "startMs": "1740787205600", "endMs": "1740787211400", "slotMs": "12000",
+                 "recordsRead": "1200", "recordsWritten": "1200"},
+            ],
+        },
+    },
+}
+
+
+def test_job_metrics():
+    metrics = telemetry.job_metrics(JOB_RESOURCE)
+    stages = metrics.pop("stages")
+    assert metrics == {
+        "job_id": "airflow_silver_fact_line_load_1",
+        "statement_type": "INSERT",
+        "bytes_processed": 1048576,
+        "bytes_billed": 10485760,
+        "slot_ms": 52000,
+        "cache_hit": False,
+        "rows_written": 1200,
+        "queued_ms": 1500,
+        "elapsed_ms": 10000,
+    }
+    assert stages[0] == {"name": "S00: Input", "elapsed_ms": 4000, "slot_ms": 40000, "records_read": 250000, "records_written": 1200}
+    assert [stage["slot_ms"] for stage in stages] == [40000, 12000]
+
+
+def test_job_metrics_of_a_job_still_missing_statistics():
+    metrics = telemetry.job_metrics({"jobReference": {"jobId": "pending"}})
+    assert metrics["job_id"] == "pending"
+    assert metrics["bytes_billed"] is None
+    assert metrics["queued_ms"] is None
+    assert metrics["stages"] == []
+
+
+def test_rows_written_prefers_dml_affected_rows():
+    assert telemetry.rows_written({"numDmlAffectedRows": "7", "dmlStats": {"insertedRowCount": "3"}}) == 7
+
+
+def test_rows_written_sums_merge_dml_stats():
+    statistics = {"dmlStats": {"insertedRowCount": "10", "updatedRowCount": "2", "deletedRowCount": "5"}}
+    assert telemetry.rows_written(statistics) == 17
+
+
+def test_rows_written_falls_back_to_the_last_stage():
+    assert telemetry.rows_written({"queryPlan": [{"recordsWritten": "99"}, {"recordsWritten": "4"}]}) == 4
+    assert telemetry.rows_written({}) is None
+
+
+def test_record_appends_one_line_per_job(tmp_path):
+    path = tmp_path / "telemetry" / "bigquery_jobs.jsonl"
+    telemetry.record(JOB_RESOURCE, "silver_fact_line_load", "scheduled__2025-03-01", "2025-03-01", 1, path=str(path))
+    telemetry.record(JOB_RESOURCE, "silver_fact_line_load", "scheduled__2025-03-02", "2025-03-02", 1, path=str(path))
+
+    lines = [json.loads(line) for line in path.read_text().splitlines()]
+    assert [line["ds"] for line in lines] == ["2025-03-01", "2025-03-02"]
+    assert lines[0]["layer"] == "silver"
+    assert lines[0]["slot_ms"] == 52000
+
+
+def test_task_layers_cover_tasks_outside_the_spec_plans():
+    layers = telemetry.task_layers()
+    assert layers["gold_customers_perf_load"] == specs.GOLD
+    assert layers[gold_scan.SHARED_SCAN_TASK_ID] == specs.GOLD
+    assert layers[specs.BATCHED_LOAD_TASK_ID] == specs.BRONZE
+    assert layers[microbatch.ingest_task_id(specs.get_spec(common.SALES_ORDERS))] == specs.BRONZE
+    assert layers[microbatch.refresh_task_id(specs.get_spec(common.BQ_FACT_LINE_ITEM_SALES))] == specs.SILVER
+    assert layers[lifecycle.archive_task_id(specs.get_spec(common.BQ_GOLD_PRODUCTS_SALES))] == specs.GOLD
+    # Planned once per process, not on every record
+    assert telemetry.task_layers() is layers
+
+
+def test_record_of_the_shared_gold_scan_counts_towards_gold(tmp_path):
+    metrics = telemetry.record(JOB_RESOURCE, gold_scan.SHARED_SCAN_TASK_ID, path=str(tmp_path / "bigquery_jobs.jsonl"))
+    assert metrics["layer"] == specs.GOLD
+    assert telemetry.layer_totals([metrics])[specs.GOLD]["slot_ms"] == 52000
+
+
+def test_task_trends_flags_regressions():
+    records = [
+        {"task_id": "gold_customers_perf_load", "ds": "2025-03-0{}".format(day), "slot_ms": slot_ms, "bytes_billed": 100,
+         "cache_hit": False}
+        for day, slot_ms in enumerate([1000, 1100, 900, 2000], start=1)
+    ]
+    trend, = telemetry.task_trends(records, baseline_runs=7, threshold=1.5)
+    assert trend["baseline_slot_ms"] == 1000
+    assert trend["regressed"]
+    trend, = telemetry.task_trends(records, baseline_runs=7, threshold=2.5)
+    assert not trend["regressed"]
@@ -0,0 +1,333 @@
+"""
+Parallel backfill
+
+Rebuilds silver and gold for a date range from the bronze partitions already loaded, instead of replaying daily DAG
+runs one after another.
+
+`plan_backfill` splits the range into units of one table and one run date:
+  - every `execution_ts` partition of a silver table only reads bronze, so its units are independent across dates
+  - MERGE-maintained gold tables get a single unit on the last date, run with `backfill_start_date` set to the start of
+    the range (less the table's `lookback_days`), which recomputes every date of the range from the latest silver
+    snapshot in one job
+  - a unit waits on the units of the tables in its spec's `upstream` and in its assertions' references, the same edges
+    `pipeline.build_pipeline` wires into the DAG
+  - history tables (slowly changing dimensions) are left out: they hold every version since the first run, so the
+    rebuilt tables' point-in-time joins read them as they are. To rebuild one after bronze was corrected, trigger the
+    DAG runs of the range in order with {"backfill_start_date": "<first ds>"}; the first run rewinds the table
+
+`BackfillScheduler` runs the ready units on a thread pool:
+  - at most `concurrency` units at a time, and within `slot_budget` BigQuery slots, estimated per table from the
+    average slots its last finished unit used
+  - latest dates first, so gold can start as soon as the last day of silver is loaded
+  - every finished unit is appended to a JSON lines ledger. Rerunning with the same ledger skips them, so a failed
+    backfill resumes where it stopped. Units downstream of a failure are skipped, the rest carry on
+
+Each unit runs the same tasks as the DAG (load, quality check, `_latest` view), always on the load branch: a rebuild
+recomputes tables that skip unchanged inputs rather than carrying their previous partition forward. Jobs run in the
+table's `reservation`, if any, like the DAG's, and the BigQuery runner records their statistics like the DAG's tasks
+(see `telemetry.py`), with `run_id` "backfill".
+
+This module must stay free of module-level Airflow imports; the BigQuery runner imports them when it first runs.
+
+Usage:
+    python utils/backfill.py --start 2025-01-01 --end 2025-12-31 --concurrency 32 --slot-budget 2000
+    python utils/backfill.py --start 2025-03-01 --end 2025-03-31 --engine local --database /tmp/pipeline.duckdb
+"""
+import argparse
+import concurrent.futures
+import datetime
+import json
+import os
+import sys
+import threading
+import time
+from dataclasses import dataclass
+
+import common
+import connections
+import ddl
+import quality
+import specs
+import sql_registry
+import telemetry
+
+APP_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+DEFAULT_DAGS_DIR = os.path.join(APP_DIR, "dags")
+
+
+class BackfillError(Exception):
+    """
+    Raised when a unit fails an ERROR data-quality assertion
+    """
+
+
+@dataclass(frozen=True)
+class BackfillUnit:
+    """
+    One table's tasks for one run date
+
+    - `params`: Jinja params overriding `specs.query_params`, e.g. `backfill_start_date`
+    - `upstream`: keys of the units that must finish first
+    """
+    spec: specs.TableSpec
+    run_date: datetime.date
+    params: dict = None
+    upstream: tuple = ()
+
+    @property
+    def key(self):
+        return unit_key(self.spec, self.run_date)
+
+
+def unit_key(spec, run_date):
+    return "{}@{}".format(spec.task_prefix, run_date.isoformat())
+
+
+def plan_backfill(start_date, end_date, table_specs=specs.TABLE_SPECS, layers=(specs.SILVER, specs.GOLD)):
+    """
+    Returns the units rebuilding every table of `layers` for run dates `start_date` to `end_date` inclusive
+    """
+    dates = [start_date + datetime.timedelta(days=offset) for offset in range((end_date - start_date).days + 1)]
+    # History tables already hold every version, and replaying them is sequential by nature, see the module docstring
+    rebuilt = [spec for spec in table_specs if spec.layer in layers and not spec.is_history]
+    rebuilt_keys = {spec.key for spec in rebuilt}
+
+    def unit_dates(spec):
+        return dates if spec.is_snapshot else [end_date]
+
+    units = []
+    for spec in rebuilt:
+        # Same dates a daily replay of the range would rewrite, including the lookback before its first run
+        backfill_start_date = start_date - datetime.timedelta(days=spec.lookback_days)
+        params = None if spec.is_snapshot else {"backfill_start_date": backfill_start_date.isoformat()}
+        parent_keys = [key for key in dict.fromkeys(spec.upstream + quality.reference_keys(spec)) if key in rebuilt_keys]
+        for run_date in unit_dates(spec):
+            upstream = []
+            for parent_key in parent_keys:
+                parent = specs.get_spec(parent_key, table_specs)
+                # A MERGE-maintained parent is only rebuilt on the last date
+                upstream.append(unit_key(parent, run_date if parent.is_snapshot else end_date))
+            units.append(BackfillUnit(spec, run_date, params, tuple(upstream)))
+    return units
+
+
+class BackfillScheduler:
+    """
+    Runs backfill units concurrently, in dependency order, within a concurrency limit and a slot budget
+
+    `run_unit(unit)` executes one unit and returns the BigQuery slot milliseconds it used (None when unknown).
+    `progress(message)`, if given, is called after every finished unit.
+    """
+
+    def __init__(self, run_unit, concurrency=8, slot_budget=None, ledger_path=None, progress=None):
+        self.run_unit = run_unit
+        self.concurrency = concurrency
+        self.slot_budget = slot_budget
+        self.ledger_path = ledger_path
+        self.progress = progress
+        self.slot_estimates = {}    # spec key -> average slots of its last finished unit
+        self.peak_slots = 0
+
+    def completed_units(self):
+        """
+        Returns the keys of the units the ledger records as finished
+        """
+        if not self.ledger_path or not os.path.exists(self.ledger_path):
+            return set()
+        with open(self.ledger_path) as ledger:
+            return {json.loads(line)["unit"] for line in ledger if line.strip()}
+
+    def record(self, unit, seconds, slot_ms):
+        if not self.ledger_path:
+            return
+        with open(self.ledger_path, "a") as ledger:
+            ledger.write(json.dumps({
+                "unit": unit.key,
+                "seconds": round(seconds, 3),
+                "slot_ms": slot_ms,
+                "finished_at": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            }) + "\n")
+
+    def estimated_slots(self, unit):
+        if not self.slot_budget:
+            return 0
+        return self.slot_estimates.get(unit.spec.key, self.slot_budget / self.concurrency)
+
+    def run(self, units):
+        """
+        Runs every unit not already in the ledger, returning a summary dict:
+        {"completed", "resumed", "failed", "skipped", "seconds"}. `failed` maps unit keys to their error
+        """
+        start = time.perf_counter()
+        plan_keys = {unit.key for unit in units}
+        finished = self.completed_units() & plan_keys
+        resumed = len(finished)
+        order = {unit.key: index for index, unit in enumerate(units)}
+        pending = {unit.key: unit for unit in units if unit.key not in finished}
+        failed, skipped = {}, set()
+        running = {}                # future -> (unit, estimated slots, start time)
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            while pending or running:
+                for key, unit in list(pending.items()):
+                    if any(parent in failed or parent in skipped for parent in unit.upstream):
+                        skipped.add(key)
+                        del pending[key]
+
+                ready = [unit for unit in pending.values() if all(parent in finished for parent in unit.upstream if parent in plan_keys)]
+                for unit in sorted(ready, key=lambda ready_unit: (-ready_unit.run_date.toordinal(), order[ready_unit.key])):
+                    slots = self.estimated_slots(unit)
+                    running_slots = sum(estimate for _, estimate, _ in running.values())
+                    if len(running) >= self.concurrency or (running and self.slot_budget and running_slots + slots > self.slot_budget):
+                        break
+                    del pending[unit.key]
+                    running[pool.submit(self.run_unit, unit)] = (unit, slots, time.perf_counter())
+                    self.peak_slots = max(self.peak_slots, running_slots + slots)
+
+                if not running:
+                    break
+                done, _ = concurrent.futures.wait(running, return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in done:
+                    unit, _, unit_start = running.pop(future)
+                    seconds = time.perf_counter() - unit_start
+                    try:
+                        slot_ms = future.result()
+                    except Exception as error:
+                        failed[unit.key] = "{}: {}".format(type(error).__name__, error)
+                        self._report("FAILED {} after {:.1f} s: {}".format(unit.key, seconds, failed[unit.key]))
+                        continue
+                    if slot_ms and seconds > 0:
+                        self.slot_estimates[unit.spec.key] = slot_ms / (seconds * 1000)
+                    finished.add(unit.key)
+                    self.record(unit, seconds, slot_ms)
+                    self._report("done {} in {:.1f} s ({}/{})".format(unit.key, seconds, len(finished), len(plan_keys)))
+
+        return {
+            "completed": len(finished) - resumed,
+            "resumed": resumed,
+            "failed": failed,
+            "skipped": sorted(skipped),
+            "seconds": time.perf_counter() - start,
+        }
+
+    def _report(self, message):
+        if self.progress:
+            self.progress(message)
+
+
+class LocalRunner:
+    """
+    Runs units against a `local_engine.LocalEngine` database, through one DuckDB cursor per worker thread
+    """
+
+    def __init__(self, engine):
+        self.engine = engine
+        self._thread_engines = threading.local()
+
+    def __call__(self, unit):
+        import local_engine
+
+        engine = getattr(self._thread_engines, "engine", None)
+        if engine is None:
+            engine = local_engine.LocalEngine(
+                landing_dir=self.engine.landing_dir, dags_dir=self.engine.dags_dir, table_specs=self.engine.table_specs,
+                registry=self.engine.registry, parquet_dir=self.engine.parquet_dir, connection=self.engine.con.cursor())
+            self._thread_engines.engine = engine
+        context = specs.render_context(unit.run_date, unit.spec, engine.table_specs, unit.params)
+        for step in specs.rebuild_tasks(unit.spec):
+            engine.run_step(step, context)
+        return None
+
+
+class BigQueryRunner:
+    """
+    Runs units as BigQuery jobs, with the same job configurations as the DAG's operators
+    """
+
+    def __init__(self, dags_dir=DEFAULT_DAGS_DIR, table_specs=specs.TABLE_SPECS, gcp_conn_id=common.GCP_SERVICE_ACCT,
+                 registry=sql_registry.REGISTRY):
+        self.dags_dir = dags_dir
+        self.table_specs = table_specs
+        self.gcp_conn_id = gcp_conn_id
+        self.registry = registry
+
+    def render(self, value, context):
+        """
+        Renders every string of a job configuration, e.g. the query and the `$<partition>` destination
+        """
+        if isinstance(value, dict):
+            return {key: self.render(item, context) for key, item in value.items()}
+        if isinstance(value, str):
+            return self.registry.render_string(value, **context)
+        return value
+
+    def __call__(self, unit):
+        import pipeline
+
+        hook = connections.get_bigquery_hook(self.gcp_conn_id)
+        spec = unit.spec
+        context = specs.render_context(unit.run_date, spec, self.table_specs, unit.params)
+        slot_ms = 0
+        for step in specs.rebuild_tasks(spec):
+            if step.kind == specs.CHECK_TASK:
+                sql = self.registry.render_string(quality.compile_check(spec, self.table_specs), **context)
+                results = quality.evaluate(spec.assertions, hook.get_first(sql))
+                if quality.failures(results):
+                    raise BackfillError(quality.format_results(spec.checked_table_id, results))
+                continue
+
+            if step.kind == specs.VIEW_TASK:
+                configuration = pipeline.script_job_configuration(spec, ddl.latest_view_script(spec))
+            elif step.kind == specs.QUERY_TASK:
+                query = self.registry.get_source(os.path.join(self.dags_dir, step.sql_dir, step.sql_file))
+                configuration = pipeline.query_job_configuration(spec, query)
+            elif step.kind == specs.SCRIPT_TASK:
+                query = self.registry.get_source(os.path.join(self.dags_dir, step.sql_dir, step.sql_file))
+                configuration = pipeline.script_job_configuration(spec, query)
+            else:
+                raise ValueError("{} tasks are not backfilled, bronze is the source of a rebuild".format(step.kind))
+
+            job = hook.insert_job(configuration=self.render(configuration, context), project_id=common.BQ_PROJECT_ID)
+            telemetry.record(job.to_api_repr(), step.task_id, "backfill", context["ds"])
+            slot_ms += job.slot_millis or 0
+        return slot_ms
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--start", required=True, type=datetime.date.fromisoformat, help="first run date (ds)")
+    parser.add_argument("--end", required=True, type=datetime.date.fromisoformat, help="last run date (ds)")
+    parser.add_argument("--engine", choices=("bigquery", "local"), default="bigquery")
+    parser.add_argument("--concurrency", type=int, default=8, help="units running at once")
+    parser.add_argument("--slot-budget", type=int, help="BigQuery slots the running units may use together")
+    parser.add_argument("--ledger", help="JSON lines file of finished units, defaults to backfill_<start>_<end>.jsonl")
+    parser.add_argument("--dags-dir", default=DEFAULT_DAGS_DIR)
+    parser.add_argument("--database", help="local engine only: DuckDB database holding the bronze partitions")
+    parser.add_argument("--landing-dir", help="local engine only: directory standing in for the landing bucket")
+    args = parser.parse_args()
+
+    if args.engine == "local":
+        import local_engine
+
+        engine = local_engine.LocalEngine(database=args.database or ":memory:", dags_dir=args.dags_dir,
+                                          landing_dir=args.landing_dir or local_engine.DEFAULT_LANDING_DIR)
+        engine.init_tables()
+        run_unit = LocalRunner(engine)
+    else:
+        run_unit = BigQueryRunner(dags_dir=args.dags_dir)
+
+    units = plan_backfill(args.start, args.end)
+    ledger_path = args.ledger or "backfill_{}_{}.jsonl".format(args.start.isoformat(), args.end.isoformat())
+    scheduler = BackfillScheduler(run_unit, args.concurrency, args.slot_budget, ledger_path, progress=print)
+    summary = scheduler.run(units)
+
+    print("{} units rebuilt, {} resumed from {}, {} failed, {} skipped, in {:.1f} s".format(
+        summary["completed"], summary["resumed"], ledger_path, len(summary["failed"]), len(summary["skipped"]), summary["seconds"]))
+    for key, error in summary["failed"].items():
+        print("  failed  {}: {}".format(key, error))
+    if summary["failed"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
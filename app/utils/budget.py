@@ -0,0 +1,256 @@
+"""
+Dry-run cost estimates and per-table byte budgets
+
+A bad `ds`, a `backfill_start_date` typo or a lost partition filter can make a load scan every historical partition,
+and nothing noticed until the bill. Tables declaring a `bytes_budget` (see `specs.TableSpec`) now have each load and
+carry-forward query dry-run first, with the rendered SQL:
+  - within budget, the job is submitted as usual
+  - over budget, OVER_BUDGET_BLOCK fails the task before anything is billed, and OVER_BUDGET_DOWNGRADE submits it
+    at BATCH priority, so it only uses idle slots, with `maximumBytesBilled` set to `downgrade_ceiling`, so BigQuery
+    fails it rather than bill more. An estimate above that ceiling fails the task as OVER_BUDGET_BLOCK would
+
+Every estimate is appended to `common.BUDGET_ESTIMATES_PATH`, which `report` summarises per task.
+
+Estimates come from an estimator, any callable returning the bytes a SQL text would process:
+  - `BigQueryDryRun`: a BigQuery dry-run query, free and exact for native tables
+  - `LocalDryRun`: DuckDB's plan of the translated SQL in a `local_engine.LocalEngine` database. For every table scan,
+    the BigQuery logical bytes of the columns read, over the partitions its filters on the partition column keep,
+    which is how BigQuery bills. Needs no GCP access, and a stub returning a fixed number works too
+
+Usage:
+    python utils/budget.py --database /tmp/pipeline.duckdb --date 2025-03-07     # local estimates against the budgets
+    python utils/budget.py --report ../logs/telemetry/budget_estimates.jsonl     # recorded estimates per task
+"""
+import argparse
+import copy
+import datetime
+import json
+import os
+import re
+import statistics
+
+import common
+import specs
+
+WITHIN_BUDGET = "within"
+DOWNGRADE_PRIORITY = "BATCH"
+
+# DuckDB column types and their BigQuery logical size, STRING (VARCHAR) is sized per value
+# HUGEINT is what DuckDB sums BIGINT columns into, where BigQuery keeps INT64
+FIXED_SIZES = {"BIGINT": 8, "HUGEINT": 8, "INTEGER": 8, "DOUBLE": 8, "DATE": 8, "TIMESTAMP": 8, "BOOLEAN": 1}
+
+FILTER_COLUMN = re.compile(r"\W*(\w+)")
+
+
+class BudgetExceededError(Exception):
+    """
+    Raised when a query job of a table with `over_budget = OVER_BUDGET_BLOCK` is estimated above its `bytes_budget`,
+    or one of an OVER_BUDGET_DOWNGRADE table above its `downgrade_ceiling`
+    """
+
+
+def byte_expression(column, column_type):
+    """
+    Returns the DuckDB expression of a column's BigQuery logical size: 8 for numbers, dates and timestamps, 1 for
+    BOOL, 2 + UTF-8 length for STRING, 0 for NULL
+    """
+    if column_type in FIXED_SIZES:
+        return "IF({} IS NULL, 0, {})".format(column, FIXED_SIZES[column_type])
+    if column_type == "VARCHAR":
+        return "IF({0} IS NULL, 0, 2 + strlen({0}))".format(column)
+    raise ValueError("No BigQuery size for column '{}' of type {}".format(column, column_type))
+
+
+def partition_columns(table_specs=specs.TABLE_SPECS):
+    """
+    Returns {"dataset.table": partition column} of the tables the specs write to, None when unpartitioned
+    """
+    columns = {}
+    for spec in table_specs:
+        columns["{}.{}".format(spec.dataset_id, spec.table_id)] = None if spec.is_history else spec.partition_field
+        if not spec.is_snapshot and not spec.is_history:
+            columns["{}.{}".format(spec.dataset_id, spec.checked_table_id)] = "date"
+    return columns
+
+
+def _as_list(value):
+    if value is None:
+        return []
+    return value if isinstance(value, list) else [value]
+
+
+class LocalDryRun:
+    """
+    Estimates the bytes BigQuery would process for translated SQL, from DuckDB's plan of it, see the module docstring
+    """
+
+    def __init__(self, con, table_specs=specs.TABLE_SPECS):
+        self.con = con
+        self.partition_columns = partition_columns(table_specs)
+
+    def scans(self, sql):
+        """
+        Returns the plan's table scans as (table, columns read, filters) for every statement of `sql`
+        """
+        scans = []
+
+        def walk(node):
+            extra_info = node.get("extra_info") or {}
+            if "Table" in extra_info:
+                filters = _as_list(extra_info.get("Filters"))
+                columns = _as_list(extra_info.get("Projections")) + [FILTER_COLUMN.match(condition).group(1) for condition in filters]
+                scans.append((".".join(extra_info["Table"].split(".")[-2:]), columns, filters))
+            for child in node.get("children", []):
+                walk(child)
+
+        for statement in self.con.extract_statements(sql):
+            for root in json.loads(self.con.execute("EXPLAIN (FORMAT JSON) " + statement.query).fetchall()[0][1]):
+                walk(root)
+        return scans
+
+    def __call__(self, sql):
+        total = 0
+        for table, columns, filters in self.scans(sql):
+            column_types = {row[0]: row[1] for row in self.con.execute("DESCRIBE {}".format(table)).fetchall()}
+            selected = [column for column in dict.fromkeys(columns) if column in column_types]
+            if not selected:
+                continue
+            partition_column = self.partition_columns.get(table, "execution_ts")
+            pruning = [condition for condition in filters if FILTER_COLUMN.match(condition).group(1) == partition_column]
+            total += self.con.execute("SELECT COALESCE(SUM({}), 0) FROM {} WHERE {}".format(
+                " + ".join(byte_expression(column, column_types[column]) for column in selected), table,
+                " AND ".join(pruning) or "TRUE")).fetchone()[0]
+        return int(total)
+
+
+class BigQueryDryRun:
+    """
+    Estimates the bytes BigQuery will process for SQL through a dry-run query, which is not billed
+    """
+
+    def __init__(self, hook, project_id=common.BQ_PROJECT_ID):
+        self.hook = hook
+        self.project_id = project_id
+
+    def __call__(self, sql):
+        from google.cloud.bigquery import QueryJobConfig
+
+        client = self.hook.get_client(project_id=self.project_id)
+        job = client.query(sql, job_config=QueryJobConfig(dry_run=True, use_query_cache=False))
+        return job.total_bytes_processed or 0
+
+
+def downgrade_ceiling(bytes_budget):
+    """
+    Returns the bytes an over-budget job of an OVER_BUDGET_DOWNGRADE table may still bill
+    """
+    return bytes_budget * common.BQ_DOWNGRADE_CEILING_FACTOR
+
+
+def downgraded_configuration(configuration, bytes_budget):
+    """
+    Returns a copy of a query job configuration at DOWNGRADE_PRIORITY, billing at most `downgrade_ceiling`
+    """
+    configuration = copy.deepcopy(configuration)
+    configuration["query"]["priority"] = DOWNGRADE_PRIORITY
+    configuration["query"]["maximumBytesBilled"] = str(downgrade_ceiling(bytes_budget))
+    return configuration
+
+
+def preflight(task_id, sql, estimator, bytes_budget, over_budget=specs.OVER_BUDGET_BLOCK, ds=None, run_id=None,
+              path=common.BUDGET_ESTIMATES_PATH):
+    """
+    Estimates `sql`, records the estimate to `path` (unless None) and returns the record, whose `decision` is
+    WITHIN_BUDGET or OVER_BUDGET_DOWNGRADE
+
+    Raises BudgetExceededError instead when the estimate is over budget and `over_budget` is OVER_BUDGET_BLOCK, or
+    when it is over `downgrade_ceiling` and the job would only fail in BigQuery.
+    """
+    estimate = estimator(sql)
+    if estimate <= bytes_budget:
+        decision = WITHIN_BUDGET
+    elif over_budget == specs.OVER_BUDGET_DOWNGRADE and estimate > downgrade_ceiling(bytes_budget):
+        decision = specs.OVER_BUDGET_BLOCK
+    else:
+        decision = over_budget
+    estimate_record = {
+        "task_id": task_id,
+        "ds": ds,
+        "run_id": run_id,
+        "recorded_at": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "estimated_bytes": estimate,
+        "bytes_budget": bytes_budget,
+        "decision": decision,
+    }
+    if path:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "a") as estimates_file:
+            estimates_file.write(json.dumps(estimate_record, sort_keys=True) + "\n")
+
+    if estimate_record["decision"] == specs.OVER_BUDGET_BLOCK:
+        if over_budget == specs.OVER_BUDGET_DOWNGRADE:
+            limit = "downgrade ceiling of {:,} bytes".format(downgrade_ceiling(bytes_budget))
+        else:
+            limit = "budget of {:,} bytes".format(bytes_budget)
+        raise BudgetExceededError("{} would process {:,} bytes, over its {}".format(task_id, estimate, limit))
+    return estimate_record
+
+
+def report(path):
+    """
+    Prints, per task, the latest and median estimates, the budget, and how many runs went over it
+    """
+    by_task = {}
+    with open(path) as estimates_file:
+        for line in estimates_file:
+            if line.strip():
+                estimate_record = json.loads(line)
+                by_task.setdefault(estimate_record["task_id"], []).append(estimate_record)
+
+    print("{:<40} {:>5} {:>12} {:>12} {:>12} {:>7} {:>6}".format("task", "runs", "latest MB", "median MB", "budget MB", "used", "over"))
+    for task_id, records in sorted(by_task.items()):
+        records.sort(key=lambda estimate_record: (estimate_record.get("ds") or "", estimate_record["recorded_at"]))
+        latest = records[-1]
+        print("{:<40} {:>5} {:>12,.1f} {:>12,.1f} {:>12,.0f} {:>6.1f}% {:>6}".format(
+            task_id, len(records), latest["estimated_bytes"] / 1e6,
+            statistics.median(estimate_record["estimated_bytes"] for estimate_record in records) / 1e6,
+            latest["bytes_budget"] / 1e6, 100 * latest["estimated_bytes"] / latest["bytes_budget"],
+            sum(1 for estimate_record in records if estimate_record["decision"] != WITHIN_BUDGET)))
+
+
+def estimate_local(database, run_date, table_specs=specs.TABLE_SPECS):
+    """
+    Prints the local estimate of every budgeted load for `run_date` against its budget, without running anything
+    """
+    import local_engine
+
+    engine = local_engine.LocalEngine(database=database, table_specs=table_specs)
+    estimator = LocalDryRun(engine.con, table_specs)
+    print("{:<40} {:>14} {:>14} {:>7}".format("task", "estimate MB", "budget MB", "used"))
+    for spec in table_specs:
+        if spec.bytes_budget is None:
+            continue
+        step = next(step for step in specs.plan_tasks(spec) if step.task_id == spec.load_task_id)
+        context = specs.render_context(run_date, spec, table_specs)
+        estimate = estimator(local_engine.translate(engine.render(step, context)))
+        print("{:<40} {:>14,.3f} {:>14,.0f} {:>6.2f}%".format(
+            step.task_id, estimate / 1e6, spec.bytes_budget / 1e6, 100 * estimate / spec.bytes_budget))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--report", help="JSON lines file of recorded estimates to summarise")
+    parser.add_argument("--database", help="DuckDB database built by `local_engine.py` to estimate against")
+    parser.add_argument("--date", type=datetime.date.fromisoformat, help="run date (ds) of the local estimates")
+    args = parser.parse_args()
+
+    if args.report:
+        report(args.report)
+    elif args.database and args.date:
+        estimate_local(args.database, args.date)
+    else:
+        parser.error("pass --report, or --database and --date")
+
+
+if __name__ == "__main__":
+    main()
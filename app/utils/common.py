@@ -6,6 +6,8 @@ These are used to manage GCS connectivity within Airflow environment
 GCP_SERVICE_ACCT = "saGCS"
 GCS_LANDING_BUCKET = "t3-landing-zone"
 GCS_LANDING_SUBDIR = "anduril-take-home-data"
+GCS_PARQUET_SUBDIR = "parquet"
+GCS_MICROBATCH_SUBDIR = "microbatch"
 
 """
 BQ configurations
@@ -18,16 +20,52 @@ BQ_DATASET_BRONZE = "sales_bronze"
 BQ_DATASET_SILVER = "sales_silver"
 BQ_DATASET_GOLD = "sales_gold"
 
+BQ_LOAD_WATERMARKS = "load_watermarks"
+BQ_LOAD_FINGERPRINTS = "load_fingerprints"
+BQ_MICROBATCH_FILES = "microbatch_files"
+BQ_ARCHIVE_MANIFEST = "archive_manifest"
+
 BQ_LOAD_SUFFIX = "_external"
+BQ_LANDING_SUFFIX = "_landing"
 BQ_RAW_SUFFIX = "_raw_daily"
 
 BQ_DIM_CUSTOMERS = "dim_customers_daily"
 BQ_DIM_PRODUCTS = "dim_products_daily"
 BQ_FACT_LINE_ITEM_SALES = "fact_line_item_sales_daily"
+BQ_FACT_SALES_CHANNEL = "fact_sales_channel_daily"
+BQ_FACT_SALES_CHANNEL_WIDE = "fact_sales_channel_daily_wide"
+BQ_PRODUCTS_HISTORY = "dim_products_history"
+BQ_SUPPLIERS_HISTORY = "dim_suppliers_history"
 
 
 BQ_GOLD_CUSTOMERS_SALES = "sales_performance_customers_daily"
 BQ_GOLD_PRODUCTS_SALES = "sales_performance_products_daily"
+BQ_GOLD_CUSTOMER_PRODUCTS_SALES = "sales_performance_customer_products_daily"
+BQ_DAILY_SUFFIX = "_daily"
+# Gold tables summed per bucket of each grain, finest first, see `app/utils/rollups.py`
+BQ_ROLLUP_SUFFIXES = {
+    "MONTH": "_monthly",
+    "QUARTER": "_quarterly",
+    "YEAR": "_yearly",
+}
+BQ_INCREMENTAL_SUFFIX = "_incremental"
+BQ_LATEST_SUFFIX = "_latest"
+BQ_ARCHIVE_SUFFIX = "_archive"
+BQ_ALL_SUFFIX = "_all"
+
+# Days a daily snapshot partition is kept. Reruns and backfills only read the snapshot of their own run
+BQ_SNAPSHOT_EXPIRATION_DAYS = 90
+
+"""
+Budget configurations
+
+Bytes a single query job may process, checked with a dry run before it is submitted, see `app/utils/budget.py`
+"""
+GIB = 1024 ** 3
+BQ_BYTES_BUDGET_SILVER = 20 * GIB
+BQ_BYTES_BUDGET_GOLD = 50 * GIB
+# An over-budget job of an OVER_BUDGET_DOWNGRADE table still runs, but may bill at most this many times its budget
+BQ_DOWNGRADE_CEILING_FACTOR = 4
 
 """
 Data configurations
@@ -35,6 +73,10 @@ Data configurations
 These are used to manage raw data landed in GCS
 """
 FILE_FORMAT = "csv"
+LANDING_FORMAT_CSV = "csv"
+LANDING_FORMAT_PARQUET = "parquet"
+LANDING_FORMAT = LANDING_FORMAT_PARQUET
+LANDING_PARTITION_COLUMN = "landing_date"
 CUSTOMERS = "customers"
 ORDER_LINE_ITEMS = "order_line_items"
 PRODUCTS = "products"
@@ -46,30 +88,84 @@ SQL Configurations
 
 These are used to direct Airflow to the specific job it needs to run
 """
+AIRFLOW_DAGS_DIR = "/opt/airflow/dags"
+SQL_WORKFLOWS_DIR = "sql_workflows"
 SQL_BRONZE = "sql_workflows/bronze/dml_sql"
-SQL_BRONZE_TESTS = "sql_workflows/bronze/test_sql"
 SQL_SILVER = "sql_workflows/silver/dml_sql"
 SQL_GOLD = "sql_workflows/gold/dml_sql"
 
 SQL_BRONZE_CUSTOMERS = "customers_raw_daily_insert.sql"
-SQL_BRONZE_CUSTOMERS_PRTN_CHECK = "customers_raw_daily_partition_check.sql"
-SQL_BRONZE_CUSTOMERS_GRAIN_CHECK = "customers_raw_daily_granularity_check.sql"
 SQL_BRONZE_LINE = "order_line_items_raw_daily_insert.sql"
-SQL_BRONZE_LINE_PRTN_CHECK = "order_line_items_raw_daily_partition_check.sql"
-SQL_BRONZE_LINE_GRAIN_CHECK = "order_line_items_raw_daily_granularity_check.sql"
+SQL_BRONZE_LINE_INCREMENTAL = "order_line_items_raw_daily_incremental_insert.sql"
 SQL_BRONZE_PRODUCTS = "products_raw_daily_insert.sql"
-SQL_BRONZE_PRODUCTS_PRTN_CHECK = "products_raw_daily_partition_check.sql"
-SQL_BRONZE_PRODUCTS_GRAIN_CHECK = "products_raw_daily_granularity_check.sql"
 SQL_BRONZE_SALES_ORDERS = "sales_orders_raw_daily_insert.sql"
-SQL_BRONZE_SALES_ORDERS_PRTN_CHECK = "sales_orders_raw_daily_partition_check.sql"
-SQL_BRONZE_SALES_ORDERS_GRAIN_CHECK = "sales_orders_raw_daily_granularity_check.sql"
+SQL_BRONZE_SALES_ORDERS_INCREMENTAL = "sales_orders_raw_daily_incremental_insert.sql"
 SQL_BRONZE_SUPPLIERS = "suppliers_raw_daily_insert.sql"
-SQL_BRONZE_SUPPLIERS_PRTN_CHECK = "suppliers_raw_daily_partition_check.sql"
-SQL_BRONZE_SUPPLIERS_GRAIN_CHECK = "suppliers_raw_daily_granularity_check.sql"
+SQL_BRONZE_WATERMARK_UPDATE = "load_watermarks_update.sql"
 
 SQL_SILVER_DIM_CUSTOMERS = "dim_customers_daily_insert.sql"
 SQL_SILVER_DIM_PRODUCTS = "dim_products_daily_insert.sql"
 SQL_SILVER_FACT_LINE = "fact_line_item_sales_daily_insert.sql"
+SQL_SILVER_FACT_CHANNEL = "fact_sales_channel_daily_insert.sql"
+SQL_SILVER_PRODUCTS_HISTORY = "dim_products_history_merge.sql"
+SQL_SILVER_SUPPLIERS_HISTORY = "dim_suppliers_history_merge.sql"
 
 SQL_GOLD_CUSTOMERS_PERF = "sales_performance_customers_daily_insert.sql"
 SQL_GOLD_PRODUCTS_PERF = "sales_performance_products_daily_insert.sql"
+SQL_GOLD_CUSTOMERS_PERF_INCREMENTAL = "sales_performance_customers_daily_incremental_merge.sql"
+SQL_GOLD_PRODUCTS_PERF_INCREMENTAL = "sales_performance_products_daily_incremental_merge.sql"
+SQL_GOLD_CUSTOMER_PRODUCTS_PERF_INCREMENTAL = "sales_performance_customer_products_daily_incremental_merge.sql"
+# `<rollup table>` + suffix, generated by `app/utils/rollups.py`
+SQL_ROLLUP_MERGE_SUFFIX = "_incremental_merge.sql"
+
+"""
+Task execution configurations
+
+Deferrable BigQuery tasks give their worker slot back while the job runs; the triggerer polls every job
+asynchronously and the task resumes on a worker once it has finished
+"""
+AIRFLOW_DEFERRABLE = True
+AIRFLOW_POLL_SECONDS = 10
+# Opt-in: loads every bronze table without a fingerprint branch in one multi-statement script job, see `pipeline.py`.
+# `skip_unchanged` tables are left out, their branch picks a load or a carry-forward at run time
+BRONZE_BATCHED_LOADS = False
+# Builds every gold table reading the channel pivot from one read of it in one script job, see `gold_scan.py`
+GOLD_SHARED_SCAN = False
+
+"""
+Micro-batch configurations
+
+These are used to ingest order and line item drops during the day, see `app/utils/microbatch.py`
+"""
+AIRFLOW_DAILY_DAG_ID = "dag.py"
+MICROBATCH_FRESHNESS_MINUTES = 15
+# Days ingested files are remembered, the micro-batch prefix should expire its objects after as many days
+MICROBATCH_RETENTION_DAYS = 7
+
+"""
+Archive configurations
+
+Partitions older than a table's `archive_after_days` are exported as Parquet under the archive prefix and dropped from
+the hot table, see `app/utils/lifecycle.py`. A bucket lifecycle rule matching the prefix should move its objects to a
+colder storage class
+"""
+GCS_ARCHIVE_BUCKET = GCS_LANDING_BUCKET
+GCS_ARCHIVE_SUBDIR = "archive"
+ARCHIVE_PARTITION_COLUMN = "archive_date"
+ARCHIVE_COMPRESSION = "ZSTD"
+# Bronze is kept hot for a monthly full snapshot and the deltas since, plus margin for reruns
+ARCHIVE_AFTER_DAYS_BRONZE = 45
+# Archived before `BQ_SNAPSHOT_EXPIRATION_DAYS` has BigQuery drop the partition
+ARCHIVE_AFTER_DAYS_SILVER = 60
+# Must exceed a year: the rollup MERGEs recompute their whole bucket from the daily gold rows still hot
+ARCHIVE_AFTER_DAYS_GOLD = 730
+# Partitions one table's lifecycle task archives per run, oldest first, so a first run works off its backlog over days
+ARCHIVE_MAX_PARTITIONS_PER_RUN = 31
+
+"""
+Telemetry configurations
+
+These are used to record the statistics of every BigQuery job, see `app/utils/telemetry.py`
+"""
+TELEMETRY_PATH = "/opt/airflow/logs/telemetry/bigquery_jobs.jsonl"
+BUDGET_ESTIMATES_PATH = "/opt/airflow/logs/telemetry/budget_estimates.jsonl"
@@ -0,0 +1,48 @@
+"""
+Lazy GCP connection handling
+
+Hooks and credentials are resolved the first time a task asks for them, never while the scheduler parses a DAG file.
+Airflow imports are kept inside the functions so importing this module stays free of metastore and network round trips.
+"""
+import functools
+
+import common
+
+
+@functools.lru_cache(maxsize=None)
+def get_gcp_hook(gcp_conn_id=common.GCP_SERVICE_ACCT):
+    """
+    Returns a GoogleBaseHook for `gcp_conn_id`, built once per worker process
+    """
+    from airflow.providers.google.common.hooks.base_google import GoogleBaseHook
+
+    return GoogleBaseHook(gcp_conn_id=gcp_conn_id)
+
+
+@functools.lru_cache(maxsize=None)
+def get_bigquery_hook(gcp_conn_id=common.GCP_SERVICE_ACCT, use_legacy_sql=False):
+    """
+    Returns a BigQueryHook for `gcp_conn_id`, built once per worker process
+    """
+    from airflow.providers.google.cloud.hooks.bigquery import BigQueryHook
+
+    return BigQueryHook(gcp_conn_id=gcp_conn_id, use_legacy_sql=use_legacy_sql)
+
+
+@functools.lru_cache(maxsize=None)
+def get_gcs_hook(gcp_conn_id=common.GCP_SERVICE_ACCT):
+    """
+    Returns a GCSHook for `gcp_conn_id`, built once per worker process
+    """
+    from airflow.providers.google.cloud.hooks.gcs import GCSHook
+
+    return GCSHook(gcp_conn_id=gcp_conn_id)
+
+
+def get_gcp_credentials(gcp_conn_id=common.GCP_SERVICE_ACCT):
+    """
+    Returns the credentials stored against `gcp_conn_id` within the Airflow environment
+
+    Only call this from within a task's execute path, e.g. a PythonOperator callable.
+    """
+    return get_gcp_hook(gcp_conn_id).get_credentials()
@@ -0,0 +1,450 @@
+"""
+Synthetic ERP data generator
+
+Writes the five landing exports (`customers`, `suppliers`, `products`, `sales_orders`, `order_line_items`) with the
+same columns as `data/*.csv`, at any volume, for load testing the pipeline.
+
+- Referential integrity: `order_line_items.ord_id` -> `sales_orders.ord_id` (SO lines), `order_line_items.prod_id` ->
+  `products.prod_id`, `products.sup_id` -> `suppliers.sup_id`, `sales_orders.cust_id` -> `customers.cust_id`
+- Skew: a few customers and products receive most orders, as in real sales data (see `skewed_id`)
+- Dates: orders fall within `--start-date`..`--end-date`, with quieter weekends and a busier fourth quarter
+- Seeded and deterministic: each chunk has its own random stream derived from `--seed`, so output does not depend on
+  `--workers`, and any chunk can be regenerated on its own
+- Bounded memory: rows are streamed to disk chunk by chunk. Only product list prices (8 bytes per product) are held
+
+Files are written as `<output-dir>/<entity>/part-<chunk>.<format>`. Parquet output needs `pyarrow`.
+
+`--scale 1` matches the bundled exports (200 customers, 20 suppliers, 100 products, 1,000 orders, ~4,500 line items);
+every unit of scale adds ~5,700 rows, so `--scale 200` is ~1M rows and `--scale 200000` is ~1B rows.
+
+Usage:
+    python utils/data_generator.py --scale 200 --output-dir /tmp/landing --format parquet --workers 4
+"""
+import argparse
+import array
+import csv
+import datetime
+import math
+import multiprocessing
+import os
+import random
+import time
+
+import common
+
+# Column names and types of each landing export, in file order
+ENTITY_COLUMNS = {
+    common.CUSTOMERS: (
+        ("cust_id", "int"), ("comp_nm", "str"), ("cust_typ", "str"), ("ind", "str"), ("rgn_id", "int"),
+        ("cred_lim", "int"), ("pmt_terms", "str"), ("actstat", "bool"),
+    ),
+    common.SUPPLIERS: (
+        ("sup_id", "int"), ("comp_nm", "str"), ("cont_nm", "str"), ("pmt_terms", "str"), ("lead_tm", "int"),
+        ("act_stat", "bool"), ("pref_stat", "bool"), ("curr", "str"), ("last_ord_dt", "date"),
+    ),
+    common.PRODUCTS: (
+        ("prod_id", "int"), ("prod_nm", "str"), ("cat_id", "int"), ("sub_cat_id", "int"), ("u_cost", "float"),
+        ("list_pr", "float"), ("min_stk", "int"), ("max_stk", "int"), ("cur_stk", "int"), ("is_mfg", "bool"),
+        ("complexity", "int"), ("sup_id", "int"), ("sup_part_no", "str"),
+    ),
+    common.SALES_ORDERS: (
+        ("ord_id", "int"), ("cust_id", "int"), ("ord_dt", "date"), ("ship_dt", "date"), ("stat", "str"),
+        ("pmt_mthd", "str"), ("sales_ch", "str"), ("sales_rep_id", "int"), ("tot_amt", "float"), ("disc_amt", "float"),
+    ),
+    common.ORDER_LINE_ITEMS: (
+        ("line_id", "int"), ("ord_id", "int"), ("ord_type", "str"), ("prod_id", "int"), ("quan", "int"),
+        ("u_price", "float"), ("disc_pct", "float"), ("ret_q", "int"), ("ret_dt", "date"), ("rcv_q", "int"),
+        ("rcv_dt", "date"), ("qual_rt", "int"), ("status", "str"), ("crt_dt", "date"),
+    ),
+}
+
+# Row counts at `--scale 1`, i.e. the bundled exports
+BASE_CUSTOMERS = 200
+BASE_SUPPLIERS = 20
+BASE_PRODUCTS = 100
+BASE_ORDERS = 1000
+
+# Line IDs are `(ord_id - 1) * LINE_ID_STRIDE + n`, so they stay unique without coordinating between chunks
+MAX_SO_LINES = 8
+MAX_PO_LINES = 8
+LINE_ID_STRIDE = MAX_SO_LINES + MAX_PO_LINES
+
+# Exponent of `skewed_id`: 1 is uniform, higher concentrates more rows on low IDs
+CUSTOMER_SKEW = 2.0
+PRODUCT_SKEW = 1.6
+
+COMPANY_PREFIXES = ("Peak", "Prime", "Tech", "Global", "Summit", "BlueWave", "Infinity", "Vortex", "Pioneer", "NextGen")
+COMPANY_SUFFIXES = ("Industries", "Innovations", "Networks", "Enterprises", "Solutions", "Systems", "Technologies",
+                    "Dynamics", "Consulting", "Ventures")
+SUPPLIER_SUFFIXES = ("Corp", "Labs", "Analytics", "Synergy", "Works Inc.")
+FIRST_NAMES = ("John", "Emma", "Michael", "Sophia", "William", "Olivia", "James", "Isabella", "Benjamin", "Mia",
+               "Alexander", "Charlotte", "Ethan", "Amelia", "Daniel", "Harper", "Henry", "Evelyn", "Matthew", "Avery")
+LAST_NAMES = ("Smith", "Johnson", "Brown", "Martinez", "Davis", "Wilson", "Anderson", "Thomas", "Taylor", "Moore",
+              "Harris", "White", "Martin", "Thompson", "Garcia", "Lewis", "Clark", "Robinson", "Walker", "Hall")
+PRODUCT_STEMS = ("Glow", "Aero", "Flexi", "Zest", "Hyper", "Aqua", "Zen", "Bolt", "Lush", "Snap", "Ever", "Neo",
+                 "Swift", "Vita", "Frosti", "Pure", "Gleam", "Sonic", "Chroma", "Nova")
+PRODUCT_ENDINGS = ("Gizmo", "Pure", "Grip", "Zap", "Chill", "Beam", "Brew", "Charge", "Lather", "Track", "Fresh",
+                   "Nest", "Sync", "Wave", "Flow", "Paws", "Guard", "Scribe", "Tote", "Soothe")
+CUSTOMER_TYPES = ("Wholesale", "Enterprise", "Retail")
+INDUSTRIES = ("Manufacturing", "Healthcare", "Finance", "Technology", "Retail")
+CUSTOMER_PAYMENT_TERMS = ("Immediate", "Net 30", "Net 60", "Net 90")
+SUPPLIER_PAYMENT_TERMS = ("Net 30", "Net 60", "Net 90")
+CURRENCIES = ("USD", "EUR", "GBP")
+STATUSES = ("Draft", "Submitted", "Pending", "Cancelled", "Shipped", "Received", "Completed")
+SHIPPED_STATUSES = ("Shipped", "Received", "Completed")
+PAYMENT_METHODS = ("Credit Card", "Check", "Wire Transfer")
+SALES_CHANNELS = ("Direct", "Distributor", "Online")
+
+# Relative order volume by weekday (Monday first) and by month
+WEEKDAY_WEIGHTS = (1.0, 1.0, 1.0, 1.0, 0.9, 0.4, 0.3)
+MONTH_WEIGHTS = (0.8, 0.8, 0.9, 0.9, 1.0, 1.0, 0.9, 0.9, 1.0, 1.1, 1.3, 1.4)
+
+
+class GeneratorConfig:
+    """
+    Sizes, date range and output settings of one generated data set
+    """
+
+    def __init__(self, scale=1, seed=0, start_date=datetime.date(2025, 1, 1), end_date=datetime.date(2025, 12, 31),
+                 output_dir="generated", file_format="csv", chunk_rows=1_000_000):
+        self.scale = scale
+        self.seed = seed
+        self.start_date = start_date
+        self.end_date = end_date
+        self.output_dir = output_dir
+        self.file_format = file_format
+        self.chunk_rows = chunk_rows
+
+        # Dimensions grow slower than facts: a business with 100x the orders rarely has 100x the catalogue
+        self.customers = max(1, round(BASE_CUSTOMERS * scale))
+        self.suppliers = max(1, round(BASE_SUPPLIERS * math.sqrt(scale)))
+        self.products = max(1, round(BASE_PRODUCTS * math.sqrt(scale)))
+        self.orders = max(1, round(BASE_ORDERS * scale))
+
+    def row_counts(self):
+        return {
+            common.CUSTOMERS: self.customers,
+            common.SUPPLIERS: self.suppliers,
+            common.PRODUCTS: self.products,
+            common.SALES_ORDERS: self.orders,
+        }
+
+
+def chunk_rng(config, entity, chunk):
+    """
+    Returns the random stream of one chunk, independent of every other chunk
+    """
+    return random.Random("{}:{}:{}".format(config.seed, entity, chunk))
+
+
+def skewed_id(rng, count, skew):
+    """
+    Returns an ID in 1..count, with low IDs drawn more often when `skew` > 1 (power-law, constant memory)
+    """
+    return 1 + min(count - 1, int(count * rng.random() ** skew))
+
+
+def sample_date(rng, start_date, days):
+    """
+    Returns a date in the range weighted by `WEEKDAY_WEIGHTS` and `MONTH_WEIGHTS`, by rejection sampling
+    """
+    ceiling = max(WEEKDAY_WEIGHTS) * max(MONTH_WEIGHTS)
+    while True:
+        date = start_date + datetime.timedelta(days=rng.randrange(days))
+        if rng.random() * ceiling <= WEEKDAY_WEIGHTS[date.weekday()] * MONTH_WEIGHTS[date.month - 1]:
+            return date
+
+
+def list_prices(config):
+    """
+    Returns every product's list price, indexed by `prod_id - 1`; line item prices are derived from them
+    """
+    prices = array.array("d")
+    for chunk, (first_id, last_id) in enumerate(chunk_ranges(config.products, config.chunk_rows)):
+        rng = chunk_rng(config, common.PRODUCTS, chunk)
+        for prod_id in range(first_id, last_id + 1):
+            prices.append(product_row(rng, prod_id, config)[5])
+    return prices
+
+
+def chunk_ranges(count, chunk_rows):
+    """
+    Returns (first_id, last_id) of each chunk of `count` sequential IDs
+    """
+    return [(first_id, min(count, first_id + chunk_rows - 1)) for first_id in range(1, count + 1, chunk_rows)]
+
+
+# ============================
+# Row builders
+# ============================
+def customer_row(rng, cust_id, config):
+    return (
+        cust_id,
+        "{} {}".format(rng.choice(COMPANY_PREFIXES), rng.choice(COMPANY_SUFFIXES)),
+        rng.choice(CUSTOMER_TYPES),
+        rng.choice(INDUSTRIES),
+        rng.randint(1, 5),
+        rng.randrange(0, 10) * 1000,
+        rng.choice(CUSTOMER_PAYMENT_TERMS),
+        rng.random() < 0.5,
+    )
+
+
+def supplier_row(rng, sup_id, config):
+    return (
+        sup_id,
+        "{}{} {}".format(rng.choice(PRODUCT_STEMS), rng.choice(("Tech", "Core", "Wave", "Net")), rng.choice(SUPPLIER_SUFFIXES)),
+        "{} {}".format(rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)),
+        rng.choice(SUPPLIER_PAYMENT_TERMS),
+        rng.randint(2, 49),
+        rng.random() < 0.5,
+        rng.random() < 0.5,
+        rng.choice(CURRENCIES),
+        config.start_date + datetime.timedelta(days=rng.randrange((config.end_date - config.start_date).days + 1)),
+    )
+
+
+def product_row(rng, prod_id, config):
+    unit_cost = round(rng.uniform(7.5, 1200.0), 6)
+    list_price = round(unit_cost * rng.uniform(1.4, 4.5), 6)
+    min_stock = rng.randint(10, 50)
+    is_manufactured = rng.random() < 0.25
+    # A quarter of products have no supplier, as in the bundled export
+    sup_id = skewed_id(rng, config.suppliers, 1.2) if rng.random() < 0.75 else None
+    return (
+        prod_id,
+        rng.choice(PRODUCT_STEMS) + rng.choice(PRODUCT_ENDINGS),
+        rng.randint(1, 5),
+        rng.randint(1, 10),
+        unit_cost,
+        list_price,
+        min_stock,
+        rng.randint(max(50, min_stock), 99),
+        rng.randint(15, 85),
+        is_manufactured,
+        rng.randint(1, 5) if is_manufactured else None,
+        sup_id,
+        "SUP{}-{:08d}".format(rng.randrange(10), rng.randrange(10 ** 8)) if sup_id else None,
+    )
+
+
+def order_rows(rng, ord_id, config, prices):
+    """
+    Returns one sales order and its line items: SO lines for the order itself, plus PO lines sharing the order number
+    """
+    days = (config.end_date - config.start_date).days + 1
+    order_date = sample_date(rng, config.start_date, days)
+    status = rng.choice(STATUSES)
+
+    lines = []
+    total_amount = 0.0
+    discount_amount = 0.0
+    for ord_type, line_count in (("SO", rng.randint(1, MAX_SO_LINES // 2 + 1)), ("PO", rng.randint(0, MAX_PO_LINES // 2 + 1))):
+        for _ in range(line_count):
+            prod_id = skewed_id(rng, config.products, PRODUCT_SKEW)
+            quantity = rng.randint(1, 100)
+            unit_price = round(prices[prod_id - 1] * rng.uniform(0.05, 0.6), 6)
+            discount_pct = round(rng.choice((0.0, 0.0, 0.05, 0.1, rng.random())), 2)
+            has_return_count = rng.random() < 0.68
+            returned_quantity = rng.choice((0, 0, 0, 0, 0, 0, 0, 0, 0, rng.randint(1, 10))) if has_return_count else None
+            received = ord_type == "PO" and rng.random() < 0.17
+            if ord_type == "SO":
+                total_amount += quantity * unit_price
+                discount_amount += quantity * unit_price * discount_pct
+            lines.append([
+                None,
+                ord_id,
+                ord_type,
+                prod_id,
+                quantity,
+                unit_price,
+                discount_pct,
+                returned_quantity,
+                order_date + datetime.timedelta(days=rng.randint(10, 40)) if returned_quantity else None,
+                rng.randint(max(1, quantity - 10), quantity) if received else None,
+                order_date + datetime.timedelta(days=rng.randint(3, 30)) if received else None,
+                rng.randint(1, 5) if received else None,
+                status,
+                order_date,
+            ])
+    for n, line in enumerate(lines, start=1):
+        line[0] = (ord_id - 1) * LINE_ID_STRIDE + n
+
+    order = (
+        ord_id,
+        skewed_id(rng, config.customers, CUSTOMER_SKEW),
+        order_date,
+        order_date + datetime.timedelta(days=rng.randint(1, 5)) if status in SHIPPED_STATUSES else None,
+        status,
+        rng.choice(PAYMENT_METHODS),
+        rng.choice(SALES_CHANNELS),
+        rng.randint(1, 50),
+        round(total_amount, 6),
+        round(discount_amount, 6),
+    )
+    return order, lines
+
+
+# ============================
+# Writers
+# ============================
+def format_value(value):
+    """
+    Formats a value the way the ERP exports do: TRUE/FALSE booleans, ISO dates, blanks for NULLs
+    """
+    if value is None:
+        return ""
+    if value is True or value is False:
+        return "TRUE" if value else "FALSE"
+    return value
+
+
+class ChunkWriter:
+    """
+    Streams rows of one entity into `<output_dir>/<entity>/part-<chunk>.<file_format>`
+
+    CSV rows go straight to disk. Parquet rows are buffered per row group of `ROW_GROUP_ROWS`.
+    """
+    ROW_GROUP_ROWS = 100_000
+
+    def __init__(self, config, entity, chunk):
+        self.entity = entity
+        self.columns = ENTITY_COLUMNS[entity]
+        self.file_format = config.file_format
+        self.rows = 0
+        directory = os.path.join(config.output_dir, entity)
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, "part-{:05d}.{}".format(chunk, config.file_format))
+
+        if self.file_format == "csv":
+            self.file = open(self.path, "w", newline="")
+            self.csv_writer = csv.writer(self.file)
+            self.csv_writer.writerow([name for name, _ in self.columns])
+        elif self.file_format == "parquet":
+            import pyarrow.parquet as pq
+            self.schema = arrow_schema(entity)
+            self.parquet_writer = pq.ParquetWriter(self.path, self.schema)
+            self.buffer = []
+        else:
+            raise ValueError("Unsupported file format '{}'".format(self.file_format))
+
+    def write(self, row):
+        self.rows += 1
+        if self.file_format == "csv":
+            self.csv_writer.writerow([format_value(value) for value in row])
+            return
+        self.buffer.append(row)
+        if len(self.buffer) >= self.ROW_GROUP_ROWS:
+            self.flush()
+
+    def flush(self):
+        import pyarrow as pa
+        if self.buffer:
+            columns = list(zip(*self.buffer))
+            self.parquet_writer.write_table(pa.Table.from_arrays(
+                [pa.array(values, type=field.type) for values, field in zip(columns, self.schema)], schema=self.schema))
+            self.buffer = []
+
+    def close(self):
+        if self.file_format == "csv":
+            self.file.close()
+        else:
+            self.flush()
+            self.parquet_writer.close()
+
+
+def arrow_schema(entity):
+    """
+    Returns the pyarrow schema of an entity's landing files
+    """
+    import pyarrow as pa
+    types = {"int": pa.int64(), "float": pa.float64(), "str": pa.string(), "bool": pa.bool_(), "date": pa.date32()}
+    return pa.schema([(name, types[kind]) for name, kind in ENTITY_COLUMNS[entity]])
+
+
+def generate_dimension_chunk(config, entity, chunk, first_id, last_id):
+    """
+    Writes one chunk of customers, suppliers or products, returning {entity: rows written}
+    """
+    build_row = {common.CUSTOMERS: customer_row, common.SUPPLIERS: supplier_row, common.PRODUCTS: product_row}[entity]
+    rng = chunk_rng(config, entity, chunk)
+    writer = ChunkWriter(config, entity, chunk)
+    for entity_id in range(first_id, last_id + 1):
+        writer.write(build_row(rng, entity_id, config))
+    writer.close()
+    return {entity: writer.rows}
+
+
+def generate_order_chunk(config, chunk, first_id, last_id, prices):
+    """
+    Writes one chunk of sales orders together with their line items, returning {entity: rows written}
+    """
+    rng = chunk_rng(config, common.SALES_ORDERS, chunk)
+    orders = ChunkWriter(config, common.SALES_ORDERS, chunk)
+    lines = ChunkWriter(config, common.ORDER_LINE_ITEMS, chunk)
+    for ord_id in range(first_id, last_id + 1):
+        order, order_lines = order_rows(rng, ord_id, config, prices)
+        orders.write(order)
+        for line in order_lines:
+            lines.write(line)
+    orders.close()
+    lines.close()
+    return {common.SALES_ORDERS: orders.rows, common.ORDER_LINE_ITEMS: lines.rows}
+
+
+def _run_job(job):
+    function, args = job
+    return function(*args)
+
+
+def generate(config, workers=1):
+    """
+    Writes the full data set described by `config`, returning {entity: rows written}
+    """
+    prices = list_prices(config)
+    jobs = []
+    for entity in (common.CUSTOMERS, common.SUPPLIERS, common.PRODUCTS):
+        for chunk, (first_id, last_id) in enumerate(chunk_ranges(config.row_counts()[entity], config.chunk_rows)):
+            jobs.append((generate_dimension_chunk, (config, entity, chunk, first_id, last_id)))
+    # ~4.5 line items per order, so order chunks are sized for the line item files to stay near `chunk_rows`
+    order_chunk_rows = max(1, config.chunk_rows // 5)
+    for chunk, (first_id, last_id) in enumerate(chunk_ranges(config.orders, order_chunk_rows)):
+        jobs.append((generate_order_chunk, (config, chunk, first_id, last_id, prices)))
+
+    totals = {}
+    if workers > 1:
+        with multiprocessing.Pool(workers) as pool:
+            results = list(pool.imap_unordered(_run_job, jobs))
+    else:
+        results = map(_run_job, jobs)
+    for result in results:
+        for entity, rows in result.items():
+            totals[entity] = totals.get(entity, 0) + rows
+    return totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", type=float, default=1, help="multiple of the bundled export sizes")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--start-date", type=datetime.date.fromisoformat, default=datetime.date(2025, 1, 1))
+    parser.add_argument("--end-date", type=datetime.date.fromisoformat, default=datetime.date(2025, 12, 31))
+    parser.add_argument("--output-dir", required=True)
+    parser.add_argument("--format", dest="file_format", choices=("csv", "parquet"), default="csv")
+    parser.add_argument("--chunk-rows", type=int, default=1_000_000, help="rows per output file")
+    parser.add_argument("--workers", type=int, default=1, help="processes generating chunks in parallel")
+    args = parser.parse_args()
+
+    config = GeneratorConfig(scale=args.scale, seed=args.seed, start_date=args.start_date, end_date=args.end_date,
+                             output_dir=args.output_dir, file_format=args.file_format, chunk_rows=args.chunk_rows)
+    start = time.perf_counter()
+    totals = generate(config, workers=args.workers)
+    elapsed = time.perf_counter() - start
+    for entity, rows in sorted(totals.items()):
+        print("{:<18} {:>14,} rows".format(entity, rows))
+    print("{:,} rows in {:.1f} s ({:,.0f} rows/s) -> {}".format(
+        sum(totals.values()), elapsed, sum(totals.values()) / max(elapsed, 1e-9), config.output_dir))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+"""
+Table DDL and `_latest` views
+
+The physical layout of silver/gold tables (partitioning, clustering, partition expiration, `require_partition_filter`)
+is declared on their specs. `table_ddl` renders a table's `ddl_sql` init script from its spec, keeping the column
+definitions already in the file, and `main` rewrites (or `--check`s) those scripts so the DDL never drifts from the
+specs.
+
+Partitions are keyed on `execution_ts`, so reading current data used to mean knowing the latest run's timestamp or
+scanning every partition. Each silver/gold table has a `<table_id>_latest` view, repointed by its `_latest_view` task
+once the run's quality check has passed:
+  - tables partitioned per run filter on `execution_ts = TIMESTAMP("<ts>")`, a constant BigQuery prunes to a single
+    partition and which satisfies `require_partition_filter`
+  - MERGEd `_incremental` tables already hold one current row per date and key, the view gives them a stable name
+  - history tables hold every version of a key, the view keeps the current ones
+
+Usage:
+    python utils/ddl.py             # rewrites the silver/gold DDL scripts from the specs
+    python utils/ddl.py --check     # exits non-zero when a script is out of date
+    python utils/ddl.py --alter     # prints the ALTER TABLE statements applying the options to existing tables
+"""
+import argparse
+import glob
+import os
+import sys
+
+import common
+import specs
+import sql_registry
+
+APP_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+DEFAULT_DAGS_DIR = os.path.join(APP_DIR, "dags")
+
+
+def _table_path(dataset_id, table_id):
+    return "`{}.{}.{}`".format(common.BQ_PROJECT_ID, dataset_id, table_id)
+
+
+def find_ddl(layer, table_id, dags_dir=common.AIRFLOW_DAGS_DIR):
+    """
+    Returns the path of the `ddl_sql` script under `layer` that creates `table_id`
+    """
+    ddl_dir = os.path.join(dags_dir, common.SQL_WORKFLOWS_DIR, layer, "ddl_sql")
+    for path in sorted(glob.glob(os.path.join(ddl_dir, "*.sql"))):
+        if "." + table_id + "`" in sql_registry.REGISTRY.get_source(path):
+            return path
+    raise KeyError("No {} DDL declares '{}' under {}".format(layer, table_id, ddl_dir))
+
+
+def parse_ddl(source):
+    """
+    Returns the leading comment lines and the column definition lines of a `CREATE TABLE` script
+    """
+    lines = source.splitlines()
+    create_index = next(index for index, line in enumerate(lines) if line.upper().startswith("CREATE"))
+    open_index = lines.index("(", create_index)
+    close_index = next(index for index in range(open_index, len(lines)) if lines[index].startswith(")"))
+    return lines[:create_index], lines[open_index + 1:close_index]
+
+
+def partition_expression(spec):
+    """
+    Returns the `PARTITION BY` expression of the table the spec's runs write to, None for unpartitioned history tables
+    """
+    if spec.is_history:
+        return None
+    if spec.is_snapshot:
+        return "TIMESTAMP_TRUNC({}, {})".format(spec.partition_field, spec.partition_type)
+    return "date"
+
+
+def _options(spec, defaults=True):
+    """
+    Returns the `OPTIONS(...)` body lines. `defaults=False` leaves out options that are unset on the spec
+    """
+    options = []
+    if defaults or spec.partition_expiration_days is not None:
+        expiration = spec.partition_expiration_days
+        options.append("partition_expiration_days = {}".format("NULL" if expiration is None else expiration))
+    if defaults or spec.require_partition_filter:
+        options.append("require_partition_filter = {}".format("TRUE" if spec.require_partition_filter else "FALSE"))
+    return ["    " + option + ("," if index < len(options) - 1 else "") for index, option in enumerate(options)]
+
+
+def table_ddl(spec, comment_lines, column_lines):
+    """
+    Returns the `CREATE TABLE IF NOT EXISTS` script of the table the spec's runs write to
+    """
+    lines = list(comment_lines) + [
+        "CREATE TABLE IF NOT EXISTS {}".format(_table_path(spec.dataset_id, spec.checked_table_id)),
+        "(",
+    ] + list(column_lines) + [")"]
+    if partition_expression(spec):
+        lines.append("PARTITION BY {}".format(partition_expression(spec)))
+    if spec.cluster_fields:
+        lines.append("CLUSTER BY {}".format(", ".join(spec.cluster_fields)))
+    options = _options(spec, defaults=False)
+    if options:
+        lines += ["OPTIONS("] + options + [")"]
+    lines.append(";")
+    return "\n".join(lines) + "\n"
+
+
+def alter_table_sql(spec):
+    """
+    Returns the statement applying the spec's table options to an existing table
+
+    Clustering of an existing table is changed through the API (`bq update --clustering_fields`) instead, and only
+    applies to data written afterwards.
+    """
+    lines = ["ALTER TABLE {}".format(_table_path(spec.dataset_id, spec.checked_table_id)), "SET OPTIONS("]
+    return "\n".join(lines + _options(spec) + [");"]) + "\n"
+
+
+def latest_view_sql(spec):
+    """
+    Returns the Jinja-templated statement pointing `<table_id>_latest` at the rows the run wrote
+    """
+    lines = [
+        "CREATE OR REPLACE VIEW {}".format(_table_path(spec.dataset_id, spec.latest_view_id)),
+        "AS",
+        "SELECT",
+        "    *,",
+        "FROM {}".format(_table_path(spec.dataset_id, spec.checked_table_id)),
+    ]
+    if spec.is_snapshot:
+        lines += ["WHERE 1=1", '    AND {} = TIMESTAMP("{{{{ ts }}}}")'.format(spec.partition_field)]
+    elif spec.is_history:
+        lines += ["WHERE 1=1", "    AND is_current"]
+    return "\n".join(lines) + "\n;\n"
+
+
+def later_run_sql(spec):
+    """
+    Returns the Jinja-templated query counting rows written by later runs, or None when the view does not depend on
+    the run
+
+    A backfill of an older date must not move the view back in time.
+    """
+    if not spec.is_snapshot:
+        return None
+    return "SELECT COUNT(*) FROM {} WHERE {} > TIMESTAMP(\"{{{{ ts }}}}\")\n".format(
+        _table_path(spec.dataset_id, spec.checked_table_id), spec.partition_field)
+
+
+def latest_view_script(spec):
+    """
+    Returns the BigQuery script run by the spec's `_latest_view` task
+    """
+    header = "-- `{}.{}`, generated by `ddl.latest_view_script` from its table spec\n".format(spec.dataset_id, spec.latest_view_id)
+    guard = later_run_sql(spec)
+    if guard is None:
+        return header + latest_view_sql(spec)
+    view = "\n".join("    " + line if line else line for line in latest_view_sql(spec).splitlines())
+    return header + "IF ({}) = 0 THEN\n{}\nEND IF;\n".format(guard.strip(), view)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dags-dir", default=DEFAULT_DAGS_DIR)
+    parser.add_argument("--check", action="store_true", help="only report scripts that differ from the specs")
+    parser.add_argument("--alter", action="store_true", help="print ALTER TABLE statements instead of writing scripts")
+    args = parser.parse_args()
+
+    stale = []
+    for spec in specs.SILVER_TABLES + specs.GOLD_TABLES:
+        if args.alter:
+            print(alter_table_sql(spec))
+            continue
+        path = find_ddl(spec.layer, spec.checked_table_id, args.dags_dir)
+        source = sql_registry.REGISTRY.get_source(path)
+        ddl = table_ddl(spec, *parse_ddl(source))
+        if ddl == source:
+            continue
+        stale.append(path)
+        if not args.check:
+            with open(path, "w") as ddl_file:
+                ddl_file.write(ddl)
+        print("{} {}".format("stale" if args.check else "wrote", os.path.relpath(path, args.dags_dir)))
+
+    if args.check and stale:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+"""
+Input fingerprints of `skip_unchanged` tables
+
+Static exports such as `products.csv` are usually identical from one day to the next, yet every run used to convert,
+load and check them again, then rebuild the silver dimensions on top. Each run of a `skip_unchanged` spec now hashes
+its inputs together with its insert SQL (and, for bronze, its landing schema), so editing either invalidates it:
+  - bronze: the landing export's checksum, the GCS object's MD5 (CRC32C for composite objects)
+  - silver/gold: the fingerprints recorded for the same run by its `upstream` tables and the tables its `references`
+    assertions read. Fingerprints chain, so an unchanged export short-circuits every table built only from it
+
+The `_fingerprint` task compares the hash with the previous run's in `sales_bronze.load_fingerprints`. When they match,
+`_carry_forward` copies the previous run's partition into the run's own, instead of the load and quality check; the
+copy was already checked, and downstream SQL keeps reading `execution_ts = TIMESTAMP("<ts>")`. `_fingerprint_update`
+records the hash once either branch has succeeded, so a failed run is never carried forward.
+
+A BigQuery copy job cannot move rows between partitions of a column-partitioned table, so the carry-forward is a query
+over the previous partition, rewriting only `execution_ts`: no landing file read, no joins, no check scan.
+
+Airflow and GCP are only touched inside `choose_branch`, so the local engine can use the same SQL.
+"""
+import glob
+import hashlib
+import os
+
+import common
+import connections
+import landing
+import quality
+import specs
+import sql_registry
+
+FINGERPRINTS_TABLE = "`{}.{}.{}`".format(common.BQ_PROJECT_ID, common.BQ_DATASET_BRONZE, common.BQ_LOAD_FINGERPRINTS)
+
+# Read size when hashing local landing files
+CHUNK_BYTES = 1 << 20
+
+
+def input_keys(spec):
+    """
+    Returns the spec keys whose fingerprints are part of `spec`'s: its upstream tables, then the tables it references
+    """
+    return tuple(dict.fromkeys(spec.upstream + quality.reference_keys(spec)))
+
+
+def file_checksum(source):
+    """
+    Returns the MD5 of a local landing file, or of the concatenated files matching a glob (e.g. `part-*.csv`)
+    """
+    digest = hashlib.md5()
+    for path in sorted(glob.glob(source)) or [source]:
+        with open(path, "rb") as landing_file:
+            for chunk in iter(lambda: landing_file.read(CHUNK_BYTES), b""):
+                digest.update(chunk)
+    return digest.hexdigest()
+
+
+def gcs_checksum(entity, gcp_conn_id=common.GCP_SERVICE_ACCT):
+    """
+    Returns the checksum GCS keeps for `gs://<bucket>/<subdir>/<entity>.csv`, without downloading it
+    """
+    gcs_hook = connections.get_gcs_hook(gcp_conn_id)
+    source_object = "/".join([common.GCS_LANDING_SUBDIR, "{}.{}".format(entity, common.FILE_FORMAT)])
+    # Composite objects (parallel uploads) have no MD5
+    return (gcs_hook.get_md5hash(bucket_name=common.GCS_LANDING_BUCKET, object_name=source_object)
+            or gcs_hook.get_crc32c(bucket_name=common.GCS_LANDING_BUCKET, object_name=source_object))
+
+
+def input_fingerprint(spec, ts, dags_dir=common.AIRFLOW_DAGS_DIR, source_checksum=None, recorded=None,
+                      table_specs=specs.TABLE_SPECS):
+    """
+    Returns the SHA-256 of a run's inputs
+
+    `recorded` maps table IDs to the fingerprints recorded for the run. An input without one (a table that does not
+    skip unchanged inputs) is hashed with the run's timestamp, so it never matches another run.
+    """
+    parts = [spec.table_id, sql_registry.REGISTRY.get_source(os.path.join(dags_dir, spec.sql_dir, spec.insert_sql_file))]
+    if spec.layer == specs.BRONZE:
+        parts += [spec.landing_format or "", repr(landing.landing_schema(spec.key, dags_dir)), source_checksum or ""]
+    for key in input_keys(spec):
+        table_id = specs.get_spec(key, table_specs).table_id
+        parts.append("{}={}".format(table_id, (recorded or {}).get(table_id) or "unfingerprinted@" + ts))
+    return hashlib.sha256("\n".join(parts).encode("utf-8")).hexdigest()
+
+
+def recorded_fingerprints_sql(spec, table_specs=specs.TABLE_SPECS):
+    """
+    Returns the Jinja-templated query of the fingerprints `spec`'s inputs recorded for the run, or None without inputs
+    """
+    table_ids = [specs.get_spec(key, table_specs).table_id for key in input_keys(spec)]
+    if not table_ids:
+        return None
+    return "\n".join([
+        "SELECT",
+        "    source_table,",
+        "    fingerprint,",
+        "FROM {}".format(FINGERPRINTS_TABLE),
+        "WHERE 1=1",
+        '    AND execution_ts = TIMESTAMP("{{ ts }}")',
+        "    AND source_table IN ({})".format(", ".join('"{}"'.format(table_id) for table_id in table_ids)),
+    ]) + "\n"
+
+
+def previous_fingerprint_sql(spec):
+    """
+    Returns the Jinja-templated query of the latest fingerprint recorded before the run, with that run's timestamp
+
+    Runs whose partition has expired since are left out, there would be nothing to carry forward.
+    """
+    lines = [
+        "SELECT",
+        "    fingerprint,",
+        "    CAST(execution_ts AS STRING)  AS execution_ts,",
+        "FROM {}".format(FINGERPRINTS_TABLE),
+        "WHERE 1=1",
+        '    AND source_table = "{}"'.format(spec.table_id),
+        '    AND execution_ts < TIMESTAMP("{{ ts }}")',
+    ]
+    if spec.partition_expiration_days is not None:
+        lines.append('    AND DATE(execution_ts) > DATE_SUB(DATE("{{{{ ds }}}}"), INTERVAL {} DAY)'.format(spec.partition_expiration_days))
+    lines += ["ORDER BY execution_ts DESC", "LIMIT 1"]
+    return "\n".join(lines) + "\n"
+
+
+def carry_forward_sql(spec, previous_ts):
+    """
+    Returns the Jinja-templated query copying the partition written at `previous_ts` as the run's rows
+
+    `previous_ts` is either a literal or a template, e.g. an XCom pull of the `_fingerprint` task's choice.
+    """
+    return "\n".join([
+        "-- `{}.{}` inputs unchanged since the previous run, generated by `fingerprints.carry_forward_sql`".format(spec.dataset_id, spec.table_id),
+        "SELECT",
+        '    * REPLACE (TIMESTAMP("{{{{ ts }}}}") AS {}),'.format(spec.partition_field),
+        "FROM `{}.{}.{}`".format(common.BQ_PROJECT_ID, spec.dataset_id, spec.table_id),
+        "WHERE 1=1",
+        '    AND {} = TIMESTAMP("{}")'.format(spec.partition_field, previous_ts),
+    ]) + "\n"
+
+
+def record_fingerprint_sql(spec, fingerprint):
+    """
+    Returns the Jinja-templated script recording the run's fingerprint, replacing any earlier record of the same run
+    """
+    return "\n".join([
+        "DELETE FROM {}".format(FINGERPRINTS_TABLE),
+        "WHERE 1=1",
+        '    AND source_table = "{}"'.format(spec.table_id),
+        '    AND execution_ts = TIMESTAMP("{{ ts }}")',
+        ";",
+        "",
+        "INSERT INTO {}".format(FINGERPRINTS_TABLE),
+        "    (source_table, fingerprint, execution_ts)",
+        "SELECT",
+        '    "{}"     AS source_table,'.format(spec.table_id),
+        '    "{}"     AS fingerprint,'.format(fingerprint),
+        '    TIMESTAMP("{{ ts }}")    AS execution_ts,',
+        ";",
+    ]) + "\n"
+
+
+def is_unchanged(fingerprint, previous):
+    """
+    Returns whether the run can carry forward `previous`, the (fingerprint, execution_ts) row of the previous run
+    """
+    return previous is not None and previous[0] == fingerprint
+
+
+def choose_branch(spec_key, dags_dir, load_task_id, carry_forward_task_id, ti, ts, ds, gcp_conn_id=common.GCP_SERVICE_ACCT):
+    """
+    BranchPythonOperator callable: returns the task to run next, `carry_forward_task_id` when the inputs are unchanged
+
+    Pushes the run's `fingerprint`, and the `previous_ts` to copy from, to XCom.
+    """
+    spec = specs.get_spec(spec_key)
+    hook = connections.get_bigquery_hook(gcp_conn_id)
+    context = {"ts": ts, "ds": ds}
+
+    source_checksum = gcs_checksum(spec.key, gcp_conn_id) if spec.layer == specs.BRONZE else None
+    recorded_sql = recorded_fingerprints_sql(spec)
+    recorded = {}
+    if recorded_sql:
+        recorded = dict(hook.get_records(sql_registry.REGISTRY.render_string(recorded_sql, **context)))
+    fingerprint = input_fingerprint(spec, ts, dags_dir, source_checksum, recorded)
+    previous = hook.get_first(sql_registry.REGISTRY.render_string(previous_fingerprint_sql(spec), **context))
+
+    ti.xcom_push(key="fingerprint", value=fingerprint)
+    if not is_unchanged(fingerprint, previous):
+        return load_task_id
+    ti.xcom_push(key="previous_ts", value=previous[1])
+    return carry_forward_task_id
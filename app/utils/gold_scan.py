@@ -0,0 +1,101 @@
+"""
+Shared-scan gold build
+
+Every incremental gold MERGE reads the dates it recomputes from `fact_sales_channel_daily_wide`, the per-channel pivot
+of `fact_sales_channel_daily` at (date, customer, product) grain, and sums them over the other entity. Run one job per
+table, each gold table scans the run's channel fact partition and evaluates the pivot's conditional SUMs again.
+
+`shared_scan_script` reads those dates of the pivot once into a temporary table, then runs every gold MERGE against it
+in the same script job. A new gold table reading the pivot adds a MERGE over the small temporary table, not another
+scan of the channel fact. `pipeline.build_pipeline` submits it as `gold_shared_scan` when `common.GOLD_SHARED_SCAN` is
+set, and `local_engine.LocalEngine` runs it with `gold_shared_scan=True`.
+"""
+import os
+
+import common
+import specs
+import sql_registry
+
+SHARED_SCAN_TASK_ID = "gold_shared_scan"
+
+SHARED_SOURCE_TABLE = "`{}.{}.{}`".format(common.BQ_PROJECT_ID, common.BQ_DATASET_SILVER, common.BQ_FACT_SALES_CHANNEL_WIDE)
+# Lives for the script job only
+SHARED_TABLE = "gold_sales_shared"
+
+
+def shared_scan_specs(dags_dir, table_specs=specs.TABLE_SPECS, registry=sql_registry.REGISTRY):
+    """
+    Returns the incremental gold specs whose MERGE reads `SHARED_SOURCE_TABLE`, which the shared scan builds together
+    """
+    return [
+        spec for spec in table_specs
+        if spec.layer == specs.GOLD and spec.is_incremental
+        and SHARED_SOURCE_TABLE in registry.get_source(os.path.join(dags_dir, spec.sql_dir, spec.insert_sql_file))
+    ]
+
+
+def shared_select_sql(gold_specs):
+    """
+    Returns the Jinja-templated query reading the run's rows of `SHARED_SOURCE_TABLE` over the widest window any of
+    `gold_specs` recomputes: its lookback, or every date from the run's `backfill_start_date`
+    """
+    lookback_days = max(spec.lookback_days for spec in gold_specs)
+    return "\n".join([
+        "{%- if params.backfill_start_date %}",
+        "    {%- set range_start = 'DATE(\"' ~ params.backfill_start_date ~ '\")' %}",
+        "{%- else %}",
+        "    {%- set range_start = 'DATE_SUB(DATE(\"' ~ ds ~ '\"), INTERVAL " + str(lookback_days) + " DAY)' %}",
+        "{%- endif %}",
+        "SELECT",
+        "    *,",
+        "FROM {}".format(SHARED_SOURCE_TABLE),
+        "WHERE 1=1",
+        '    AND execution_ts = TIMESTAMP("{{ ts }}")',
+        '    AND date BETWEEN {{ range_start }} AND DATE("{{ ds }}")',
+    ])
+
+
+def shared_scan_script(gold_specs, dags_dir, registry=sql_registry.REGISTRY):
+    """
+    Returns the Jinja-templated script building every spec of `gold_specs` from one read of `SHARED_SOURCE_TABLE`
+
+    Each MERGE is inlined as is, reading `SHARED_TABLE` instead, with `params.lookback_days` scoped to its spec's.
+    The other params are shared, so a run's `backfill_start_date` conf reaches every MERGE.
+    """
+    lines = [
+        "-- Shared-scan gold build, generated by `gold_scan.shared_scan_script`",
+        "CREATE TEMP TABLE {} AS".format(SHARED_TABLE),
+        shared_select_sql(gold_specs),
+        ";",
+    ]
+    for spec in gold_specs:
+        source = registry.get_source(os.path.join(dags_dir, spec.sql_dir, spec.insert_sql_file))
+        lines += [
+            "",
+            "-- {}".format(spec.load_task_id),
+            "{{% with params = dict(params, lookback_days={}) %}}".format(spec.lookback_days),
+            source.strip().replace(SHARED_SOURCE_TABLE, SHARED_TABLE),
+            "{% endwith %}",
+        ]
+    lines += [
+        "",
+        "DROP TABLE {};".format(SHARED_TABLE),
+    ]
+    return "\n".join(lines) + "\n"
+
+
+def shared_scan_params(gold_specs, table_specs=specs.TABLE_SPECS):
+    """
+    Returns the Jinja `params` of the shared scan, those of the first spec: the gold MERGEs only differ in
+    `lookback_days`, which `shared_scan_script` scopes per MERGE
+    """
+    return specs.query_params(gold_specs[0], table_specs)
+
+
+def shared_bytes_budget(gold_specs):
+    """
+    Returns the bytes budget of the shared scan, that of the jobs it replaces, or None when one of them has none
+    """
+    if any(spec.bytes_budget is None for spec in gold_specs):
+        return None
+    return sum(spec.bytes_budget for spec in gold_specs)
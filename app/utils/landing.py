@@ -0,0 +1,189 @@
+"""
+Parquet landing conversion
+
+The ERP exports land in GCS as CSV. Reading them through a CSV external table means every query re-parses the whole
+file with autodetected types. This module converts each export into Parquet with the column types declared in
+`sql_workflows/bronze/ddl_sql`, partitioned by landing date:
+
+    gs://<bucket>/<subdir>/parquet/<entity>/landing_date=<ds>/part-00000.parquet
+
+The bronze `<entity>_landing` external tables are Hive-partitioned on `landing_date` with an explicit schema, so a
+bronze load only reads the run's snapshot (partition pruning), only the columns it selects (column pruning), and can
+skip row groups through Parquet min/max statistics (predicate pushdown).
+
+`pyarrow` is imported inside the functions so the DAG file can build its tasks without it.
+"""
+import glob
+import os
+import re
+import tempfile
+
+import common
+import connections
+import ddl
+import specs
+import sql_registry
+
+# BigQuery types used by the bronze DDL and their Parquet equivalents
+ARROW_TYPES = {
+    "INT64": "int64",
+    "FLOAT64": "float64",
+    "STRING": "string",
+    "BOOL": "bool_",
+    "BOOLEAN": "bool_",
+    "DATE": "date32",
+}
+
+COLUMN_DEFINITION = re.compile(r"^\s*(\w+)\s+([A-Z0-9]+)\s*,?\s*$")
+
+# Row groups are the unit Parquet readers skip through min/max statistics
+ROW_GROUP_ROWS = 250_000
+
+
+def landing_schema(entity, dags_dir=common.AIRFLOW_DAGS_DIR):
+    """
+    Returns [(column, BigQuery type)] of an entity's landing file, read from its bronze `_raw_daily` DDL
+
+    The DDL is the source of truth for column names and types; `execution_ts` is added by the bronze load and is not
+    part of the landing file.
+    """
+    source = sql_registry.REGISTRY.get_source(ddl.find_ddl(specs.BRONZE, entity + common.BQ_RAW_SUFFIX, dags_dir))
+    columns = []
+    for line in source.splitlines():
+        match = COLUMN_DEFINITION.match(line)
+        if match and match.group(1) != "execution_ts":
+            columns.append((match.group(1), match.group(2)))
+    return columns
+
+
+def bigquery_schema_fields(entity, dags_dir=common.AIRFLOW_DAGS_DIR):
+    """
+    Returns the landing schema as BigQuery API schema fields
+    """
+    return [{"name": name, "type": bq_type, "mode": "NULLABLE"} for name, bq_type in landing_schema(entity, dags_dir)]
+
+
+def arrow_schema(entity, dags_dir=common.AIRFLOW_DAGS_DIR):
+    """
+    Returns the landing schema as a pyarrow schema
+    """
+    import pyarrow as pa
+
+    return pa.schema([(name, getattr(pa, ARROW_TYPES[bq_type])()) for name, bq_type in landing_schema(entity, dags_dir)])
+
+
+def parquet_prefix(entity):
+    """
+    Returns the object prefix under which an entity's Parquet partitions are stored
+    """
+    return "/".join([common.GCS_LANDING_SUBDIR, common.GCS_PARQUET_SUBDIR, entity])
+
+
+def partition_path(entity, landing_date):
+    """
+    Returns the path of the Parquet file holding one landing date's snapshot, relative to the Parquet root
+    """
+    return "/".join([entity, "{}={}".format(common.LANDING_PARTITION_COLUMN, landing_date), "part-00000.parquet"])
+
+
+def parquet_object_path(entity, landing_date):
+    """
+    Returns the GCS object name of one landing date's snapshot
+    """
+    return "/".join([common.GCS_LANDING_SUBDIR, common.GCS_PARQUET_SUBDIR, partition_path(entity, landing_date)])
+
+
+def external_table_resource(spec, dags_dir=common.AIRFLOW_DAGS_DIR):
+    """
+    Returns the BigQuery table resource of a bronze spec's Hive-partitioned Parquet external table
+
+    The definition does not change between runs, so the table is created once and every run filters on
+    `landing_date`, which BigQuery requires (`requirePartitionFilter`) to avoid accidental full-history scans.
+    """
+    source_prefix = "gs://{}/{}".format(common.GCS_LANDING_BUCKET, parquet_prefix(spec.key))
+    return {
+        "tableReference": {
+            "projectId": common.BQ_PROJECT_ID,
+            "datasetId": spec.dataset_id,
+            "tableId": spec.external_table_id,
+        },
+        "schema": {"fields": bigquery_schema_fields(spec.key, dags_dir)},
+        "externalDataConfiguration": {
+            "sourceFormat": "PARQUET",
+            "sourceUris": [source_prefix + "/*"],
+            "autodetect": False,
+            "hivePartitioningOptions": {
+                "mode": "CUSTOM",
+                "sourceUriPrefix": "{}/{{{}:DATE}}".format(source_prefix, common.LANDING_PARTITION_COLUMN),
+                "requirePartitionFilter": True,
+            },
+        },
+    }
+
+
+def convert_csv_to_parquet(source, destination, entity, dags_dir=common.AIRFLOW_DAGS_DIR):
+    """
+    Streams CSV export(s) into one Parquet file typed by the entity's DDL, returning the number of rows written
+
+    `source` is a path or glob; CSV headers are matched to the DDL by position, since a few exports name columns
+    differently from the raw tables (e.g. `actstat` -> `act_stat`). Memory is bounded by one row group.
+    """
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+    import pyarrow.parquet as pq
+
+    schema = arrow_schema(entity, dags_dir)
+    paths = sorted(glob.glob(source)) or [source]
+    os.makedirs(os.path.dirname(destination), exist_ok=True)
+
+    rows = 0
+    with pq.ParquetWriter(destination, schema) as writer:
+        for path in paths:
+            header = pa_csv.open_csv(path).schema.names
+            if len(header) != len(schema):
+                raise ValueError("{} has {} columns, the bronze DDL of '{}' declares {}".format(path, len(header), entity, len(schema)))
+            reader = pa_csv.open_csv(
+                path,
+                read_options=pa_csv.ReadOptions(column_names=schema.names, skip_rows=1, block_size=64 << 20),
+                convert_options=pa_csv.ConvertOptions(column_types=schema, strings_can_be_null=True),
+            )
+            # Blocks are buffered up to a full row group, so small CSV blocks don't fragment the file
+            batches, pending_rows = [], 0
+            for batch in reader:
+                batches.append(batch)
+                pending_rows += len(batch)
+                if pending_rows >= ROW_GROUP_ROWS:
+                    writer.write_table(pa.Table.from_batches(batches, schema=schema), row_group_size=ROW_GROUP_ROWS)
+                    rows += pending_rows
+                    batches, pending_rows = [], 0
+            if batches:
+                writer.write_table(pa.Table.from_batches(batches, schema=schema), row_group_size=ROW_GROUP_ROWS)
+                rows += pending_rows
+    return rows
+
+
+def convert_local_landing(source, parquet_dir, entity, landing_date, dags_dir=common.AIRFLOW_DAGS_DIR):
+    """
+    Converts a local CSV export into `<parquet_dir>/<entity>/landing_date=<landing_date>/part-00000.parquet`
+    """
+    destination = os.path.join(parquet_dir, *partition_path(entity, landing_date).split("/"))
+    return convert_csv_to_parquet(source, destination, entity, dags_dir)
+
+
+def convert_gcs_landing(entity, landing_date, dags_dir=common.AIRFLOW_DAGS_DIR, gcp_conn_id=common.GCP_SERVICE_ACCT):
+    """
+    PythonOperator callable: converts `gs://<bucket>/<subdir>/<entity>.csv` into the run's Parquet partition
+
+    Files are staged on local disk so worker memory stays bounded by one row group.
+    """
+    gcs_hook = connections.get_gcs_hook(gcp_conn_id)
+    source_object = "/".join([common.GCS_LANDING_SUBDIR, "{}.{}".format(entity, common.FILE_FORMAT)])
+    destination_object = parquet_object_path(entity, landing_date)
+
+    with tempfile.TemporaryDirectory() as staging_dir:
+        csv_path = os.path.join(staging_dir, "{}.{}".format(entity, common.FILE_FORMAT))
+        parquet_path = os.path.join(staging_dir, "{}.parquet".format(entity))
+        gcs_hook.download(bucket_name=common.GCS_LANDING_BUCKET, object_name=source_object, filename=csv_path)
+        rows = convert_csv_to_parquet(csv_path, parquet_path, entity, dags_dir)
+        gcs_hook.upload(bucket_name=common.GCS_LANDING_BUCKET, object_name=destination_object, filename=parquet_path)
+    return rows
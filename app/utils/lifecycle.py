@@ -0,0 +1,469 @@
+"""
+Partition lifecycle
+
+Every run writes a full `execution_ts` partition of each bronze and silver table, and the gold `_incremental` tables
+keep one `date` partition per day forever, so storage grows with time while queries mostly read recent partitions.
+Tables with an `archive_after_days` retention (see `specs.TableSpec`) are tiered by `dags/lifecycle_dag.py` once the
+daily run of the same day has succeeded. For each table, partitions whose day is older than the retention before the
+run, oldest first and at most `common.ARCHIVE_MAX_PARTITIONS_PER_RUN` per run, are:
+  1. exported as compressed Parquet, Hive-partitioned on `archive_date`:
+
+         gs://<common.GCS_ARCHIVE_BUCKET>/<common.GCS_ARCHIVE_SUBDIR>/<dataset>/<table>/archive_date=<day>/part-*.parquet
+
+  2. recorded in `sales_bronze.archive_manifest`, with the partition's row count and latest `execution_ts`
+  3. dropped from the hot table
+
+A partition whose latest `execution_ts` is already in the manifest (e.g. one restored earlier) is only dropped again;
+one written since (e.g. gold dates a backfill MERGEd again) is exported again first. Each step only runs once the
+previous one has succeeded, so a failed run leaves every partition either hot or archived, and the next run finishes
+it.
+
+After archiving, the table's `<table>_archive` external table reads the archive, and `<table>_all` serves point-in-time
+queries across both tiers: hot partitions from the day after the newest archived one, archived partitions before it.
+`restore` loads archived partitions back into the hot table, e.g. before a backfill reads them. They are served from the
+archive by `<table>_all` and dropped again by the next lifecycle run, so pause the lifecycle DAG while they are needed.
+
+The lifecycle runs against BigQuery through `BigQueryArchive`, or locally through `LocalArchive`, with a directory
+standing in for the archive bucket and a `local_engine.LocalEngine` database for the tables.
+
+Usage:
+    python utils/lifecycle.py --database /tmp/pipeline.duckdb --archive-dir /tmp/archive --date 2025-06-30
+    python utils/lifecycle.py --database /tmp/pipeline.duckdb --archive-dir /tmp/archive --restore customers --partition 2025-03-01
+    python utils/lifecycle.py --engine bigquery --restore customers --partition 2025-03-01
+"""
+import argparse
+import datetime
+import os
+
+import common
+import connections
+import specs
+import telemetry
+
+MANIFEST_TABLE = "`{}.{}.{}`".format(common.BQ_PROJECT_ID, common.BQ_DATASET_BRONZE, common.BQ_ARCHIVE_MANIFEST)
+
+
+class RestoreError(Exception):
+    """
+    Raised when a restored partition does not hold the rows its manifest entry recorded
+    """
+
+
+def archived_specs(table_specs=specs.TABLE_SPECS):
+    """
+    Returns the specs with a retention, whose tables the lifecycle DAG archives
+    """
+    return tuple(spec for spec in table_specs if spec.archive_after_days is not None and not spec.is_history)
+
+
+def archive_task_id(spec):
+    return "lifecycle_{}_archive".format(spec.task_prefix)
+
+
+def _table_path(spec, table_id=None):
+    return "`{}.{}.{}`".format(common.BQ_PROJECT_ID, spec.dataset_id, table_id or spec.checked_table_id)
+
+
+def archive_table_id(spec):
+    return spec.checked_table_id + common.BQ_ARCHIVE_SUFFIX
+
+
+def all_view_id(spec):
+    return spec.checked_table_id + common.BQ_ALL_SUFFIX
+
+
+def archive_prefix(spec):
+    """
+    Returns the object prefix of the table's archived partitions
+    """
+    return "/".join([common.GCS_ARCHIVE_SUBDIR, spec.dataset_id, spec.checked_table_id])
+
+
+def partition_path(spec, day):
+    """
+    Returns the path of one archived partition's files, relative to the archive root
+    """
+    return "/".join([archive_prefix(spec), "{}={}".format(common.ARCHIVE_PARTITION_COLUMN, day.isoformat())])
+
+
+def partition_date_sql(spec):
+    """
+    Returns the expression of a row's partition day: its run's for tables partitioned per run, its `date` otherwise
+    """
+    return "DATE({})".format(spec.partition_field) if spec.is_snapshot else "date"
+
+
+def partition_filter(spec, day):
+    """
+    Returns the condition selecting one day's partition, on the partition column itself so BigQuery prunes to it
+    """
+    if spec.is_snapshot:
+        return '{0} >= TIMESTAMP("{1}") AND {0} < TIMESTAMP("{2}")'.format(
+            spec.partition_field, day.isoformat(), (day + datetime.timedelta(days=1)).isoformat())
+    return 'date = DATE("{}")'.format(day.isoformat())
+
+
+def expired_before_filter(spec, day):
+    """
+    Returns the condition selecting the partitions of days before `day`
+    """
+    if spec.is_snapshot:
+        return '{} < TIMESTAMP("{}")'.format(spec.partition_field, day.isoformat())
+    return 'date < DATE("{}")'.format(day.isoformat())
+
+
+def cutoff_date(spec, run_date):
+    """
+    Returns the first day whose partitions the run keeps hot
+    """
+    return run_date - datetime.timedelta(days=spec.archive_after_days)
+
+
+def expired_partitions_sql(spec, run_date, limit=common.ARCHIVE_MAX_PARTITIONS_PER_RUN):
+    """
+    Returns the query listing the table's expired partitions, oldest first, as (day, already archived)
+    """
+    return "\n".join([
+        "-- Expired partitions of `{}.{}`, generated by `lifecycle.expired_partitions_sql`".format(spec.dataset_id, spec.checked_table_id),
+        "WITH",
+        "    component_hot AS",
+        "    (",
+        "        SELECT",
+        "            {}     AS partition_date,".format(partition_date_sql(spec)),
+        "            MAX(execution_ts)   AS max_execution_ts,",
+        "        FROM {}".format(_table_path(spec)),
+        "        WHERE 1=1",
+        "            AND {}".format(expired_before_filter(spec, cutoff_date(spec, run_date))),
+        "        GROUP BY ALL",
+        "    ),",
+        "",
+        "    component_manifest AS",
+        "    (",
+        "        SELECT",
+        "            partition_date,",
+        "            max_execution_ts,",
+        "        FROM {}".format(MANIFEST_TABLE),
+        "        WHERE 1=1",
+        '            AND source_table = "{}"'.format(spec.checked_table_id),
+        "    )",
+        "",
+        "SELECT",
+        "    component_hot.partition_date,",
+        "    COALESCE(component_hot.max_execution_ts <= component_manifest.max_execution_ts, FALSE)   AS is_archived,",
+        "FROM component_hot",
+        "LEFT JOIN component_manifest",
+        "    ON  component_manifest.partition_date = component_hot.partition_date",
+        "ORDER BY component_hot.partition_date",
+        "LIMIT {}".format(limit),
+        ";",
+    ]) + "\n"
+
+
+def manifest_sql(spec, day, uri, ts):
+    """
+    Returns the MERGE recording one exported partition in the manifest, replacing an earlier export of it
+    """
+    return "\n".join([
+        "MERGE {}   AS target".format(MANIFEST_TABLE),
+        "USING",
+        "(",
+        "    SELECT",
+        '        "{}"    AS source_table,'.format(spec.checked_table_id),
+        '        DATE("{}")    AS partition_date,'.format(day.isoformat()),
+        '        "{}"    AS uri,'.format(uri),
+        "        COUNT(*)    AS row_count,",
+        "        MAX(execution_ts)   AS max_execution_ts,",
+        '        TIMESTAMP("{}")   AS execution_ts,'.format(ts),
+        "    FROM {}".format(_table_path(spec)),
+        "    WHERE 1=1",
+        "        AND {}".format(partition_filter(spec, day)),
+        ")   AS source",
+        "ON  target.source_table = source.source_table",
+        "AND target.partition_date = source.partition_date",
+        "WHEN MATCHED THEN",
+        "    UPDATE SET uri = source.uri, row_count = source.row_count, max_execution_ts = source.max_execution_ts, execution_ts = source.execution_ts",
+        "WHEN NOT MATCHED THEN",
+        "    INSERT ROW",
+        ";",
+    ]) + "\n"
+
+
+def drop_sql(spec, day):
+    """
+    Returns the DELETE dropping one partition from the hot table. It covers the whole partition, which BigQuery drops
+    without scanning it
+    """
+    return "DELETE FROM {}\nWHERE 1=1\n    AND {}\n;\n".format(_table_path(spec), partition_filter(spec, day))
+
+
+def archive_statements(spec, partitions, ts, backend):
+    """
+    Returns the statements archiving `partitions`, (day, already archived) pairs, in the order they must run
+    """
+    statements = []
+    for day, is_archived in partitions:
+        if not is_archived:
+            statements.append(backend.export_sql(spec, day))
+            statements.append(manifest_sql(spec, day, backend.partition_uri(spec, day), ts))
+        statements.append(drop_sql(spec, day))
+    return statements
+
+
+def newest_archived_sql(spec):
+    return 'SELECT MAX(partition_date) FROM {} WHERE source_table = "{}"\n'.format(MANIFEST_TABLE, spec.checked_table_id)
+
+
+def all_view_sql(spec, boundary):
+    """
+    Returns the statement pointing `<table>_all` at the hot partitions from `boundary` on and the archived ones before
+    it. Both are filtered on their partition column, so queries prune either side and `require_partition_filter` holds
+    """
+    return "\n".join([
+        "CREATE OR REPLACE VIEW {}".format(_table_path(spec, all_view_id(spec))),
+        "AS",
+        "SELECT",
+        "    *,",
+        "FROM {}".format(_table_path(spec)),
+        "WHERE 1=1",
+        "    AND NOT ({})".format(expired_before_filter(spec, boundary)),
+        "UNION ALL",
+        "SELECT",
+        "    * EXCEPT({}),".format(common.ARCHIVE_PARTITION_COLUMN),
+        "FROM {}".format(_table_path(spec, archive_table_id(spec))),
+        "WHERE 1=1",
+        '    AND {} < DATE("{}")'.format(common.ARCHIVE_PARTITION_COLUMN, boundary.isoformat()),
+        ";",
+    ]) + "\n"
+
+
+def archive(spec, run_date, ts, backend):
+    """
+    Archives the table's expired partitions for the run on `run_date`, see the module docstring, and returns how many
+    partitions were dropped from the hot table
+    """
+    partitions = backend.query(expired_partitions_sql(spec, run_date))
+    if not partitions:
+        return 0
+    backend.run(archive_statements(spec, partitions, ts, backend))
+
+    boundary = backend.query(newest_archived_sql(spec))[0][0] + datetime.timedelta(days=1)
+    backend.run([backend.archive_table_sql(spec), all_view_sql(spec, boundary)])
+    return len(partitions)
+
+
+def manifest_entries_sql(spec, days):
+    return "SELECT partition_date, uri, row_count FROM {} WHERE source_table = \"{}\" AND partition_date IN ({})\n".format(
+        MANIFEST_TABLE, spec.checked_table_id, ", ".join('DATE("{}")'.format(day.isoformat()) for day in days))
+
+
+def partition_rows_sql(spec, day):
+    return "SELECT COUNT(*) FROM {} WHERE {}\n".format(_table_path(spec), partition_filter(spec, day))
+
+
+def restore(spec, days, backend):
+    """
+    Loads archived partitions back into the hot table, replacing any rows of those days still in it, and returns the
+    rows restored. Raises RestoreError when a partition was never archived or does not hold its recorded rows
+    """
+    entries = {row[0]: row for row in backend.query(manifest_entries_sql(spec, days))}
+    missing = [day.isoformat() for day in days if day not in entries]
+    if missing:
+        raise RestoreError("{} has no archived partitions for {}".format(spec.checked_table_id, ", ".join(missing)))
+
+    restored = 0
+    for day in days:
+        backend.run([drop_sql(spec, day), backend.load_sql(spec, day)])
+        rows = backend.query(partition_rows_sql(spec, day))[0][0]
+        if rows != entries[day][2]:
+            raise RestoreError("{} {}: restored {:,} rows, the manifest records {:,}".format(
+                spec.checked_table_id, day.isoformat(), rows, entries[day][2]))
+        restored += rows
+    return restored
+
+
+def job_configuration(spec, query):
+    """
+    Returns the BigQuery job configuration of a lifecycle script, at the spec's priority in its reservation
+    """
+    configuration = {
+        "query": {
+            "query": query,
+            "useLegacySql": False,
+            "priority": spec.priority,
+        }
+    }
+    if spec.reservation:
+        configuration["reservation"] = spec.reservation
+    return configuration
+
+
+class BigQueryArchive:
+    """
+    Runs the lifecycle against BigQuery, with `gs://<bucket>` as the archive
+    """
+
+    def __init__(self, spec, gcp_conn_id=common.GCP_SERVICE_ACCT, bucket=common.GCS_ARCHIVE_BUCKET, task_id=None, run_id=None,
+                 ds=None, try_number=1):
+        self.spec = spec
+        self.hook = connections.get_bigquery_hook(gcp_conn_id)
+        self.root = "gs://{}".format(bucket)
+        self.task_id, self.run_id, self.ds, self.try_number = task_id, run_id, ds, try_number
+
+    def query(self, sql):
+        return self.hook.get_records(sql)
+
+    def run(self, statements):
+        """
+        Runs `statements` as one script job and records its statistics
+        """
+        job = self.hook.insert_job(configuration=job_configuration(self.spec, "\n".join(statements)), project_id=common.BQ_PROJECT_ID)
+        if self.task_id:
+            telemetry.record(job.to_api_repr(), self.task_id, self.run_id, self.ds, self.try_number)
+        return job
+
+    def partition_uri(self, spec, day):
+        return "{}/{}/part-*.parquet".format(self.root, partition_path(spec, day))
+
+    def export_sql(self, spec, day):
+        return "\n".join([
+            "EXPORT DATA",
+            "OPTIONS (",
+            '    uri = "{}",'.format(self.partition_uri(spec, day)),
+            '    format = "PARQUET",',
+            '    compression = "{}",'.format(common.ARCHIVE_COMPRESSION),
+            "    overwrite = TRUE",
+            ")",
+            "AS",
+            "SELECT",
+            "    *,",
+            "FROM {}".format(_table_path(spec)),
+            "WHERE 1=1",
+            "    AND {}".format(partition_filter(spec, day)),
+            ";",
+        ]) + "\n"
+
+    def archive_table_sql(self, spec):
+        prefix = "{}/{}".format(self.root, archive_prefix(spec))
+        return "\n".join([
+            "CREATE OR REPLACE EXTERNAL TABLE {}".format(_table_path(spec, archive_table_id(spec))),
+            "WITH PARTITION COLUMNS (",
+            "    {} DATE".format(common.ARCHIVE_PARTITION_COLUMN),
+            ")",
+            "OPTIONS (",
+            '    format = "PARQUET",',
+            '    uris = ["{}/*"],'.format(prefix),
+            '    hive_partition_uri_prefix = "{}"'.format(prefix),
+            ")",
+            ";",
+        ]) + "\n"
+
+    def load_sql(self, spec, day):
+        return "\n".join([
+            "LOAD DATA INTO {}".format(_table_path(spec)),
+            "FROM FILES (",
+            '    format = "PARQUET",',
+            '    uris = ["{}"]'.format(self.partition_uri(spec, day)),
+            ")",
+            ";",
+        ]) + "\n"
+
+
+class LocalArchive:
+    """
+    Runs the lifecycle against a `local_engine.LocalEngine` database, with `archive_dir` standing in for the archive
+    bucket
+    """
+
+    def __init__(self, engine, archive_dir):
+        self.engine = engine
+        self.root = os.path.abspath(archive_dir)
+
+    def query(self, sql):
+        return self.engine.execute(sql).fetchall()
+
+    def run(self, statements):
+        for statement in statements:
+            self.engine.execute(statement)
+
+    def partition_uri(self, spec, day):
+        return os.path.join(self.root, partition_path(spec, day), "part-000000000000.parquet")
+
+    def export_sql(self, spec, day):
+        # Unlike GCS, the file's directory has to exist
+        os.makedirs(os.path.dirname(self.partition_uri(spec, day)), exist_ok=True)
+        return "COPY (SELECT * FROM {} WHERE {}) TO \"{}\" (FORMAT PARQUET, COMPRESSION {})\n".format(
+            _table_path(spec), partition_filter(spec, day), self.partition_uri(spec, day), common.ARCHIVE_COMPRESSION)
+
+    def archive_table_sql(self, spec):
+        return "CREATE OR REPLACE VIEW {} AS SELECT * FROM read_parquet(\"{}\", hive_partitioning = TRUE, hive_types = {{\"{}\": \"DATE\"}})\n".format(
+            _table_path(spec, archive_table_id(spec)), os.path.join(self.root, archive_prefix(spec), "*", "*.parquet"),
+            common.ARCHIVE_PARTITION_COLUMN)
+
+    def load_sql(self, spec, day):
+        # Otherwise DuckDB adds the `archive_date` of the file's path as a column
+        return "INSERT INTO {} SELECT * FROM read_parquet(\"{}\", hive_partitioning = FALSE)\n".format(
+            _table_path(spec), self.partition_uri(spec, day))
+
+
+# ============================
+# Airflow callables
+# ============================
+
+
+def archive_task(spec_key, ti, ds, ts, run_id, gcp_conn_id=common.GCP_SERVICE_ACCT):
+    """
+    PythonOperator callable: archives the table's expired partitions, returning how many were dropped
+    """
+    spec = specs.get_spec(spec_key)
+    backend = BigQueryArchive(spec, gcp_conn_id, task_id=ti.task_id, run_id=run_id, ds=ds, try_number=ti.try_number)
+    return archive(spec, datetime.date.fromisoformat(ds), ts, backend)
+
+
+# ============================
+# Local stand-in
+# ============================
+
+
+def archive_local(engine, archive_dir, run_date, table_specs=None):
+    """
+    Archives the expired partitions of every archived table of a `local_engine.LocalEngine` database as the lifecycle
+    run of `run_date` would, and returns {table: partitions dropped}
+    """
+    backend = LocalArchive(engine, archive_dir)
+    ts = datetime.datetime.combine(run_date, datetime.time(), tzinfo=datetime.timezone.utc).isoformat()
+    return {spec.checked_table_id: archive(spec, run_date, ts, backend) for spec in archived_specs(table_specs or engine.table_specs)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--engine", choices=("bigquery", "local"), default="local")
+    parser.add_argument("--database", help="local engine only: DuckDB database holding the tables")
+    parser.add_argument("--archive-dir", help="local engine only: directory standing in for the archive bucket")
+    parser.add_argument("--date", type=datetime.date.fromisoformat, help="run date (ds) to archive as, local engine only")
+    parser.add_argument("--restore", metavar="KEY", help="restore this table's --partition days instead of archiving")
+    parser.add_argument("--partition", action="append", type=datetime.date.fromisoformat, default=[], help="day to restore, repeatable")
+    args = parser.parse_args()
+
+    if args.engine == "bigquery":
+        if not args.restore:
+            parser.error("the lifecycle DAG archives BigQuery tables, only --restore runs from here")
+        spec = specs.get_spec(args.restore)
+        print("{}: {:,} rows restored".format(spec.checked_table_id, restore(spec, args.partition, BigQueryArchive(spec))))
+        return
+
+    import local_engine
+
+    engine = local_engine.LocalEngine(database=args.database or ":memory:")
+    engine.init_tables()
+    if args.restore:
+        spec = specs.get_spec(args.restore)
+        print("{}: {:,} rows restored".format(spec.checked_table_id, restore(spec, args.partition, LocalArchive(engine, args.archive_dir))))
+        return
+    if not args.date:
+        parser.error("--date is required to archive")
+    for table, dropped in archive_local(engine, args.archive_dir, args.date).items():
+        print("{}: {} partitions archived".format(table, dropped))
+
+
+if __name__ == "__main__":
+    main()
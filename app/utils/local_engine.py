@@ -0,0 +1,515 @@
+"""
+Local DuckDB engine
+
+Runs the same bronze/silver/gold/test SQL and the same task plan as `dags/dag.py` against DuckDB, with the `data/`
+exports (or any directory of landing CSVs) standing in for GCS. Nothing here touches the network, so it doubles as a
+throughput harness for profiling and regression-testing each layer before paying for BigQuery slots.
+
+BigQuery-isms used by the SQL are translated on the fly, see `translate`.
+
+Usage:
+    python utils/local_engine.py --start 2025-01-01 --end 2025-01-31 --landing-dir ../data
+"""
+import argparse
+import dataclasses
+import datetime
+import os
+import re
+import tempfile
+import time
+
+import duckdb
+
+import budget
+import common
+import ddl
+import fingerprints
+import gold_scan
+import landing
+import quality
+import specs
+import sql_registry
+
+APP_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+DEFAULT_DAGS_DIR = os.path.join(APP_DIR, "dags")
+DEFAULT_LANDING_DIR = os.path.join(APP_DIR, "..", "data")
+
+# BigQuery column types without a DuckDB equivalent of the same name
+TYPE_NAMES = {
+    "INT64": "BIGINT",
+    "FLOAT64": "DOUBLE",
+    "STRING": "VARCHAR",
+    "BYTES": "BLOB",
+    "NUMERIC": "DECIMAL(38, 9)",
+    "BIGNUMERIC": "DECIMAL(38, 9)",
+}
+
+# Trailing DDL clauses DuckDB has no use for
+TABLE_OPTION_CLAUSE = re.compile(r"\s*(PARTITION\s+BY|CLUSTER\s+BY|OPTIONS\s*\()", re.IGNORECASE)
+
+
+class LocalCheckError(Exception):
+    """
+    Raised when a table fails an ERROR data-quality assertion, mirroring `operators.DataQualityCheckOperator`
+    """
+
+
+# ============================
+# SQL translation
+# ============================
+def _normalise_tokens(sql):
+    """
+    Drops `--` comments, turns "double quoted" string literals into 'single quoted' ones and
+    `project.dataset.table` references into `dataset.table`
+    """
+    out = []
+    i = 0
+    while i < len(sql):
+        char = sql[i]
+        if sql.startswith("--", i):
+            end = sql.find("\n", i)
+            i = len(sql) if end == -1 else end
+        elif char in ("'", '"'):
+            end = i + 1
+            while end < len(sql) and sql[end] != char:
+                end += 2 if sql[end] == "\\" else 1
+            literal = sql[i + 1:end]
+            if char == '"':
+                literal = literal.replace('\\"', '"').replace("'", "''")
+            out.append("'" + literal + "'")
+            i = end + 1
+        elif char == "`":
+            end = sql.index("`", i + 1)
+            parts = sql[i + 1:end].split(".")
+            out.append(".".join(parts[-2:]))
+            i = end + 1
+        else:
+            out.append(char)
+            i += 1
+    return "".join(out)
+
+
+def _closing_paren(sql, open_index):
+    """
+    Returns the index of the parenthesis closing the one at `open_index`
+    """
+    depth = 0
+    i = open_index
+    while i < len(sql):
+        char = sql[i]
+        if char == "'":
+            i = sql.index("'", i + 1)
+            while sql.startswith("''", i):
+                i = sql.index("'", i + 2)
+        elif char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+            if depth == 0:
+                return i
+        i += 1
+    raise ValueError("Unbalanced parentheses in SQL")
+
+
+def _split_args(args):
+    """
+    Splits a function's argument list on top-level commas
+    """
+    parts, depth, current, i = [], 0, [], 0
+    while i < len(args):
+        char = args[i]
+        if char == "'":
+            end = args.index("'", i + 1)
+            current.append(args[i:end + 1])
+            i = end + 1
+            continue
+        if char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+        if char == "," and depth == 0:
+            parts.append("".join(current).strip())
+            current = []
+        else:
+            current.append(char)
+        i += 1
+    parts.append("".join(current).strip())
+    return parts
+
+
+def _rewrite_function(sql, name, rewrite):
+    """
+    Replaces every `NAME(args)` call with `rewrite(args)`, innermost calls first
+    """
+    pattern = re.compile(r"(?<![\w.])" + name + r"\s*\(")
+    match = pattern.search(sql)
+    while match:
+        open_index = match.end() - 1
+        close_index = _closing_paren(sql, open_index)
+        args = _split_args(_rewrite_function(sql[open_index + 1:close_index], name, rewrite))
+        replacement = rewrite(args)
+        sql = sql[:match.start()] + replacement + sql[close_index + 1:]
+        match = pattern.search(sql, match.start() + len(replacement))
+    return sql
+
+
+def _rewrite_unnest_aliases(sql):
+    """
+    BigQuery names the element column of `UNNEST(array) AS x` after the alias; DuckDB needs `AS x(x)`
+    """
+    pattern = re.compile(r"\bUNNEST\s*\(", re.IGNORECASE)
+    alias = re.compile(r"\s*AS\s+(\w+)(?!\s*\()", re.IGNORECASE)
+    match = pattern.search(sql)
+    while match:
+        close_index = _closing_paren(sql, match.end() - 1)
+        alias_match = alias.match(sql, close_index + 1)
+        if alias_match:
+            name = alias_match.group(1)
+            replacement = " AS __unnest_{0}({0})".format(name)
+            sql = sql[:alias_match.start()] + replacement + sql[alias_match.end():]
+        match = pattern.search(sql, close_index)
+    return sql
+
+
+def _strip_table_options(sql):
+    """
+    Drops `PARTITION BY`, `CLUSTER BY` and `OPTIONS(...)` from `CREATE TABLE ... (columns)` statements
+    """
+    pattern = re.compile(r"CREATE\s+(OR\s+REPLACE\s+)?TABLE\s+(IF\s+NOT\s+EXISTS\s+)?[\w.]+\s*\(", re.IGNORECASE)
+    match = pattern.search(sql)
+    while match:
+        close_index = _closing_paren(sql, match.end() - 1)
+        if TABLE_OPTION_CLAUSE.match(sql, close_index + 1):
+            end = sql.find(";", close_index)
+            end = len(sql) if end == -1 else end
+            sql = sql[:close_index + 1] + "\n" + sql[end:]
+        match = pattern.search(sql, close_index)
+    return sql
+
+
+def _date_part(part):
+    return "'" + part.strip().lower() + "'"
+
+
+def translate(sql):
+    """
+    Translates rendered BigQuery Standard SQL into DuckDB SQL
+
+    Covers the constructs used under `sql_workflows/`: backtick table paths, double quoted strings, `TIMESTAMP(...)`/
+    `DATE(...)` casts, `DATE_TRUNC`, `DATE_ADD`/`DATE_SUB`, `GENERATE_DATE_ARRAY` with `UNNEST ... AS x`, `* EXCEPT`,
+    `COUNTIF`, `SAFE_DIVIDE`, `STRUCT`, `TO_JSON_STRING`, `FARM_FINGERPRINT`, `MERGE ... INSERT ROW`, BigQuery type
+    names, and table partitioning/clustering options. `GROUP BY ALL`, `QUALIFY` and named `WINDOW` clauses are
+    supported by DuckDB as-is.
+    """
+    sql = _normalise_tokens(sql)
+    sql = _strip_table_options(sql)
+
+    sql = _rewrite_function(sql, "TIMESTAMP", lambda args: "CAST({} AS TIMESTAMP)".format(args[0]))
+    sql = _rewrite_function(sql, "DATE", lambda args: "CAST({} AS DATE)".format(args[0]))
+    sql = _rewrite_function(sql, "DATE_TRUNC", lambda args: "CAST(date_trunc({}, {}) AS DATE)".format(_date_part(args[1]), args[0]))
+    sql = _rewrite_function(sql, "TIMESTAMP_TRUNC", lambda args: "date_trunc({}, {})".format(_date_part(args[1]), args[0]))
+    sql = _rewrite_function(sql, "DATE_SUB", lambda args: "CAST(({}) - {} AS DATE)".format(args[0], args[1]))
+    sql = _rewrite_function(sql, "DATE_ADD", lambda args: "CAST(({}) + {} AS DATE)".format(args[0], args[1]))
+    sql = _rewrite_function(sql, "GENERATE_DATE_ARRAY", lambda args: "CAST(generate_series(CAST({} AS DATE), CAST({} AS DATE), {}) AS DATE[])".format(
+        args[0], args[1], args[2] if len(args) > 2 else "INTERVAL 1 DAY"))
+    # DuckDB's count_if is NULL over no rows, BigQuery's COUNTIF is 0
+    sql = _rewrite_function(sql, "COUNTIF", lambda args: "COALESCE(count_if({}), 0)".format(args[0]))
+    sql = _rewrite_function(sql, "SAFE_DIVIDE", lambda args: "(({}) / NULLIF({}, 0))".format(args[0], args[1]))
+    # `struct_pack` names each field after its column, as BigQuery's `STRUCT` does, or `expression AS name` as `name := ...`
+    sql = _rewrite_function(sql, "STRUCT", lambda args: "struct_pack({})".format(", ".join(
+        re.sub(r"^(.+?)\s+AS\s+(\w+)$", r"\2 := \1", arg, flags=re.IGNORECASE | re.DOTALL) for arg in args)))
+    sql = _rewrite_function(sql, "TO_JSON_STRING", lambda args: "CAST(to_json({}) AS VARCHAR)".format(args[0]))
+    sql = _rewrite_function(sql, "FARM_FINGERPRINT", lambda args: "hash({})".format(args[0]))
+    sql = _rewrite_unnest_aliases(sql)
+
+    sql = re.sub(r"\*\s*EXCEPT\s*\(", "* EXCLUDE(", sql)
+    sql = re.sub(r"\bINSERT\s+ROW\b", "INSERT", sql)
+    sql = re.sub(r"\bMERGE\s+(?!INTO\b)", "MERGE INTO ", sql)
+    for bigquery_type, duckdb_type in TYPE_NAMES.items():
+        sql = re.sub(r"\b{}\b".format(bigquery_type), duckdb_type, sql)
+    return sql
+
+
+def resolve_landing_file(landing_dir, entity, file_format=common.FILE_FORMAT):
+    """
+    Returns the local file (or glob) standing in for `gs://<bucket>/<subdir>/<entity>.<file_format>`
+
+    Accepts the GCS layout (`<subdir>/<entity>.csv`), a flat `<entity>.csv`, the ERP export naming in `data/`, and the
+    chunked `<entity>/part-*.csv` layout written by `data_generator.py`.
+    """
+    chunk_dir = os.path.join(landing_dir, entity)
+    if os.path.isdir(chunk_dir):
+        return os.path.join(chunk_dir, "part-*.{}".format(file_format))
+
+    candidates = [
+        os.path.join(landing_dir, common.GCS_LANDING_SUBDIR, "{}.{}".format(entity, file_format)),
+        os.path.join(landing_dir, "{}.{}".format(entity, file_format)),
+        os.path.join(landing_dir, "{} - Export.{}".format(entity, file_format)),
+    ]
+    for candidate in candidates:
+        if os.path.exists(candidate):
+            return candidate
+    raise FileNotFoundError("No landing file for '{}' under {}".format(entity, landing_dir))
+
+
+# ============================
+# Engine
+# ============================
+class LocalEngine:
+    """
+    Executes the pipeline's task plan against a DuckDB database
+
+    Each BigQuery dataset becomes a DuckDB schema of the same name, and every executed task is recorded in
+    `self.task_runs` as a dict of run date, task ID, layer, seconds and rows written. Tasks on the branch a
+    `_fingerprint` task did not choose are skipped, as Airflow would.
+    """
+
+    def __init__(self, database=":memory:", landing_dir=DEFAULT_LANDING_DIR, dags_dir=DEFAULT_DAGS_DIR,
+                 table_specs=specs.TABLE_SPECS, registry=sql_registry.REGISTRY, parquet_dir=None, connection=None,
+                 gold_shared_scan=False):
+        # A DuckDB connection is not thread-safe: concurrent engines share a database through `connection.cursor()`
+        self.con = connection or duckdb.connect(database)
+        self.landing_dir = landing_dir
+        # Stands in for `gs://<bucket>/<subdir>/parquet`, see `landing.py`
+        self.parquet_dir = parquet_dir or tempfile.mkdtemp(prefix="parquet_landing_")
+        self.dags_dir = dags_dir
+        self.table_specs = table_specs
+        self.registry = registry
+        self.task_runs = []
+        self.check_results = []
+        # spec key -> (branch, fingerprint, previous_ts) chosen by the table's latest `_fingerprint` task
+        self.fingerprints = {}
+        # Dry-run estimates of the jobs of tables with a `bytes_budget`, see `budget.preflight`
+        self.budget_estimates = []
+        # Gold specs MERGEd together by `gold_scan.shared_scan_script`, with the load of the first of them
+        self.shared_scan_specs = gold_scan.shared_scan_specs(dags_dir, table_specs, registry) if gold_shared_scan else []
+
+    def sql_path(self, sql_dir, sql_file):
+        return os.path.join(self.dags_dir, sql_dir, sql_file)
+
+    def execute(self, bigquery_sql):
+        """
+        Translates and runs BigQuery SQL, returning the DuckDB cursor
+        """
+        return self.con.execute(translate(bigquery_sql))
+
+    def init_tables(self):
+        """
+        Creates every dataset as a schema and runs each DDL script under `sql_workflows/*/ddl_sql` once
+
+        Tables that already exist are kept, so a persistent database can be reused across runs.
+        """
+        for dataset in (common.BQ_DATASET_BRONZE, common.BQ_DATASET_SILVER, common.BQ_DATASET_GOLD):
+            self.con.execute("CREATE SCHEMA IF NOT EXISTS {}".format(dataset))
+
+        ddl_paths = []
+        for layer in sql_registry.LAYERS:
+            ddl_dir = os.path.join(self.dags_dir, common.SQL_WORKFLOWS_DIR, layer, "ddl_sql")
+            if os.path.isdir(ddl_dir):
+                ddl_paths.extend(os.path.join(ddl_dir, name) for name in sorted(os.listdir(ddl_dir)) if name.endswith(".sql"))
+
+        # Views may select from tables declared in later files, so create tables first
+        for path in sorted(ddl_paths, key=lambda ddl_path: " VIEW " in self.registry.get_source(ddl_path).upper()):
+            ddl = translate(self.registry.get_source(path))
+            ddl = re.sub(r"CREATE\s+(OR\s+REPLACE\s+)?TABLE\s+(IF\s+NOT\s+EXISTS\s+)?", "CREATE TABLE IF NOT EXISTS ", ddl, flags=re.IGNORECASE)
+            self.con.execute(ddl)
+
+    def render(self, step, context):
+        return self.registry.render(self.sql_path(step.sql_dir, step.sql_file), **context)
+
+    def check_budget(self, step, sql, context):
+        """
+        Estimates a job of a table with a `bytes_budget` before it runs, raising `budget.BudgetExceededError` when it
+        would be blocked
+        """
+        if step.spec.bytes_budget is None:
+            return
+        estimate = budget.preflight(step.task_id, sql, budget.LocalDryRun(self.con, self.table_specs), step.spec.bytes_budget,
+                                    step.spec.over_budget, context["ds"], path=None)
+        self.budget_estimates.append(estimate)
+
+    def write_partition(self, step, bigquery_sql, context):
+        """
+        Equivalent of a WRITE_TRUNCATE query job on `<table>$<partition>`, returning the number of rows written
+        """
+        spec = step.spec
+        sql = translate(bigquery_sql).strip().rstrip(";")
+        self.check_budget(step, sql, context)
+        table = "{}.{}".format(spec.dataset_id, spec.table_id)
+        partition = "date_trunc('{}', {})".format(spec.partition_type.lower(), spec.partition_field)
+        run_partition = "date_trunc('{}', CAST('{}' AS TIMESTAMP))".format(spec.partition_type.lower(), context["logical_date"].strftime("%Y-%m-%d %H:%M:%S"))
+        self.con.execute("DELETE FROM {} WHERE {} = {}".format(table, partition, run_partition))
+        self.con.execute("INSERT INTO {} SELECT * FROM ({})".format(table, sql))
+        return self.con.execute("SELECT COUNT(*) FROM {} WHERE {} = {}".format(table, partition, run_partition)).fetchone()[0]
+
+    def run_shared_scan(self, step, context):
+        """
+        Runs `gold_scan.shared_scan_script` for the gold specs in `self.shared_scan_specs`
+
+        DuckDB can only plan the MERGEs once the temporary table they read exists, so it is created first. The budget
+        check then covers the shared read and the MERGEs before any of them writes.
+        """
+        script = self.registry.render_string(gold_scan.shared_scan_script(self.shared_scan_specs, self.dags_dir, self.registry), **context)
+        statements = [statement.query for statement in self.con.extract_statements(translate(script))]
+        create, merges, drop = statements[0], statements[1:-1], statements[-1]
+        shared_select = translate(self.registry.render_string(gold_scan.shared_select_sql(self.shared_scan_specs), **context))
+        shared_step = dataclasses.replace(step, task_id=gold_scan.SHARED_SCAN_TASK_ID, spec=dataclasses.replace(
+            step.spec, bytes_budget=gold_scan.shared_bytes_budget(self.shared_scan_specs)))
+        self.con.execute(create)
+        try:
+            self.check_budget(shared_step, ";\n".join([shared_select] + merges), context)
+            for merge in merges:
+                self.con.execute(merge)
+        finally:
+            self.con.execute(drop)
+
+    def choose_branch(self, spec, context):
+        """
+        Local equivalent of `fingerprints.choose_branch`, hashing the landing file instead of asking GCS
+        """
+        source_checksum = None
+        if spec.layer == specs.BRONZE:
+            source_checksum = fingerprints.file_checksum(resolve_landing_file(self.landing_dir, spec.key))
+        recorded_sql = fingerprints.recorded_fingerprints_sql(spec, self.table_specs)
+        recorded = {}
+        if recorded_sql:
+            recorded = dict(self.execute(self.registry.render_string(recorded_sql, **context)).fetchall())
+        fingerprint = fingerprints.input_fingerprint(spec, context["ts"], self.dags_dir, source_checksum, recorded, self.table_specs)
+        previous = self.execute(self.registry.render_string(fingerprints.previous_fingerprint_sql(spec), **context)).fetchone()
+
+        if fingerprints.is_unchanged(fingerprint, previous):
+            return specs.CARRY_FORWARD_BRANCH, fingerprint, previous[1]
+        return specs.LOAD_BRANCH, fingerprint, None
+
+    def run_step(self, step, context):
+        """
+        Executes one planned task, returning the number of rows it wrote (or None)
+        """
+        spec = step.spec
+        if step.kind == specs.FINGERPRINT_TASK:
+            self.fingerprints[spec.key] = self.choose_branch(spec, context)
+            return None
+
+        if step.kind == specs.CARRY_FORWARD_TASK:
+            previous_ts = self.fingerprints[spec.key][2]
+            return self.write_partition(step, self.registry.render_string(fingerprints.carry_forward_sql(spec, previous_ts), **context), context)
+
+        if step.kind == specs.FINGERPRINT_UPDATE_TASK:
+            fingerprint = self.fingerprints[spec.key][1]
+            self.execute(self.registry.render_string(fingerprints.record_fingerprint_sql(spec, fingerprint), **context))
+            return None
+
+        if step.kind == specs.CONVERT_TASK:
+            landing_file = resolve_landing_file(self.landing_dir, spec.key)
+            return landing.convert_local_landing(landing_file, self.parquet_dir, spec.key, context["ds"], self.dags_dir)
+
+        if step.kind == specs.EXTERNAL_TASK and spec.is_parquet_landing:
+            partitions = os.path.join(self.parquet_dir, spec.key, "*", "*.parquet").replace("'", "''")
+            self.con.execute(
+                "CREATE OR REPLACE VIEW {}.{} AS SELECT * FROM read_parquet('{}', hive_partitioning = true, hive_types = {{'{}': DATE}})".format(
+                    spec.dataset_id, spec.external_table_id, partitions, common.LANDING_PARTITION_COLUMN))
+            return None
+
+        if step.kind == specs.EXTERNAL_TASK:
+            landing_file = resolve_landing_file(self.landing_dir, spec.key).replace("'", "''")
+            self.con.execute("CREATE OR REPLACE VIEW {}.{} AS SELECT * FROM read_csv('{}', header = true)".format(
+                spec.dataset_id, spec.external_table_id, landing_file))
+            return None
+
+        if step.kind == specs.CHECK_TASK:
+            sql = translate(self.registry.render_string(quality.compile_check(spec, self.table_specs), **context))
+            results = quality.evaluate(spec.assertions, self.con.execute(sql).fetchone())
+            self.check_results.extend(dict(result, run_date=context["ds"], task_id=step.task_id) for result in results)
+            if quality.failures(results):
+                raise LocalCheckError("{} failed for {}\n{}".format(
+                    step.task_id, context["ds"], quality.format_results(spec.checked_table_id, results)))
+            return None
+
+        if step.kind == specs.VIEW_TASK:
+            # Same guard as `ddl.latest_view_script`, whose IF ... END IF scripting DuckDB has no equivalent for
+            later_run = ddl.later_run_sql(spec)
+            if later_run and self.execute(self.registry.render_string(later_run, **context)).fetchone()[0]:
+                return None
+            self.execute(self.registry.render_string(ddl.latest_view_sql(spec), **context))
+            return None
+
+        if step.task_id == spec.load_task_id and spec in self.shared_scan_specs:
+            if spec == self.shared_scan_specs[0]:
+                self.run_shared_scan(step, context)
+            # Otherwise already MERGEd by the shared scan
+            return None
+
+        if step.kind == specs.SCRIPT_TASK:
+            sql = translate(self.render(step, context)).strip().rstrip(";")
+            self.check_budget(step, sql, context)
+            self.con.execute(sql)
+            return None
+
+        return self.write_partition(step, self.render(step, context), context)
+
+    def run_day(self, run_date, params=None):
+        """
+        Runs every table's tasks for one logical date, upstream-first, in the same order as the DAG's dependencies
+        """
+        for spec in self.table_specs:
+            context = specs.render_context(run_date, spec, self.table_specs, params)
+            for step in specs.plan_tasks(spec):
+                if step.branch and step.branch != self.fingerprints[spec.key][0]:
+                    continue
+                start = time.perf_counter()
+                rows = self.run_step(step, context)
+                self.task_runs.append({
+                    "run_date": run_date.isoformat(),
+                    "task_id": step.task_id,
+                    "layer": spec.layer,
+                    "seconds": time.perf_counter() - start,
+                    "rows": rows,
+                })
+
+    def run_range(self, start_date, end_date, params=None):
+        """
+        Runs every logical date from `start_date` to `end_date` inclusive, like a catch-up of daily DAG runs
+        """
+        run_date = start_date
+        while run_date <= end_date:
+            self.run_day(run_date, params)
+            run_date += datetime.timedelta(days=1)
+
+    def profile(self):
+        """
+        Returns per-layer totals of the recorded task runs: {layer: {"tasks", "seconds", "rows"}}
+        """
+        totals = {}
+        for task_run in self.task_runs:
+            layer = totals.setdefault(task_run["layer"], {"tasks": 0, "seconds": 0.0, "rows": 0})
+            layer["tasks"] += 1
+            layer["seconds"] += task_run["seconds"]
+            layer["rows"] += task_run["rows"] or 0
+        return totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--start", required=True, type=datetime.date.fromisoformat, help="first logical date (ds)")
+    parser.add_argument("--end", type=datetime.date.fromisoformat, help="last logical date (ds), defaults to --start")
+    parser.add_argument("--landing-dir", default=DEFAULT_LANDING_DIR, help="directory standing in for the GCS landing bucket")
+    parser.add_argument("--database", default=":memory:", help="DuckDB database file, in memory by default")
+    parser.add_argument("--parquet-dir", help="where converted Parquet landing partitions are kept, a temporary directory by default")
+    parser.add_argument("--gold-shared-scan", action="store_true", help="build the gold tables from one read of the channel pivot, see `gold_scan.py`")
+    args = parser.parse_args()
+
+    engine = LocalEngine(database=args.database, landing_dir=args.landing_dir, parquet_dir=args.parquet_dir,
+                         gold_shared_scan=args.gold_shared_scan)
+    engine.init_tables()
+    engine.run_range(args.start, args.end or args.start)
+
+    for layer, totals in engine.profile().items():
+        print("{:<7} {:>5} tasks | {:>9.3f} s | {:>12,} rows written".format(layer, totals["tasks"], totals["seconds"], totals["rows"]))
+    slowest = sorted(engine.task_runs, key=lambda task_run: task_run["seconds"], reverse=True)[:5]
+    print("slowest tasks:")
+    for task_run in slowest:
+        print("  {run_date} {task_id:<40} {seconds:>8.3f} s".format(**task_run))
+
+
+if __name__ == "__main__":
+    main()
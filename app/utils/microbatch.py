@@ -0,0 +1,515 @@
+"""
+Intraday micro-batch ingestion
+
+The daily DAG only sees an order once the export of its day has landed, so today's gold rows trail by up to a day.
+`dags/microbatch_dag.py` also picks order and line item drops up as they land, every
+`common.MICROBATCH_FRESHNESS_MINUTES`:
+
+    gs://<bucket>/<common.GCS_MICROBATCH_SUBDIR>/<entity>/<any name>.csv
+
+Each file has the columns of the entity's daily export and holds new or changed rows only. Each batch:
+  1. ingest: loads the files missing from `sales_bronze.microbatch_files` into the entity's bronze table, with the
+     batch's `execution_ts`, checks those rows with the spec's assertions and records the files. `references` rules are
+     left to the daily load, the parent tables are only loaded once a day
+  2. refresh, once the daily run of the day before the batch (the latest snapshot) has succeeded. The snapshot's rows
+     are replaced in place, so its `_latest` views and the gold tables show them at once:
+       - `fact_line_item_sales_daily`: the lines whose line item or order arrived in the batch, recomputed by the
+         fact's own SQL rendered at the batch's `ts`, whose incremental bronze window takes in every batch so far
+       - `fact_sales_channel_daily`: the rows of the batch's date
+       - gold: the batch's date, MERGEd as a backfill of that single day would be
+
+The daily run of the batch's date supersedes all of it: its bronze load rewrites the day's partition, micro-batch rows
+included, and its silver and gold loads are computed from the export as usual. Returns of lines created on earlier days
+reach the fact at once, but their dates' aggregates only with the next daily run.
+
+Locally, a directory stands in for the bucket: `feed_local` drops the day's new and changed rows of the landing
+exports (e.g. `data/`) into it, one chunk per batch, and `run_local_batch` runs a batch through `local_engine`.
+
+Airflow and GCP are only touched inside `ingest` and `refresh`.
+
+Usage:
+    python utils/microbatch.py --date 2025-03-05 --batches 8 --landing-dir ../data --database /tmp/pipeline.duckdb
+"""
+import argparse
+import dataclasses
+import datetime
+import glob
+import os
+import tempfile
+import time
+
+import common
+import connections
+import landing
+import quality
+import rollups
+import specs
+import sql_registry
+import telemetry
+
+APP_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+DEFAULT_DAGS_DIR = os.path.join(APP_DIR, "dags")
+
+MICROBATCH_FILES_TABLE = "`{}.{}.{}`".format(common.BQ_PROJECT_ID, common.BQ_DATASET_BRONZE, common.BQ_MICROBATCH_FILES)
+
+# Freshness is what the batches are for, they must not queue behind BATCH jobs for idle slots
+PRIORITY = "INTERACTIVE"
+
+# Streamed entity -> (fact column, bronze column) identifying the fact rows a batch of it touches
+BATCH_KEYS = {
+    common.ORDER_LINE_ITEMS: ("line_id", "line_id"),
+    common.SALES_ORDERS: ("order_id", "ord_id"),
+}
+
+# Streamed entity -> date columns on which `feed_local` finds a row of the static exports new or changed. The first one
+# is the creation date
+DELTA_DATE_COLUMNS = {
+    common.ORDER_LINE_ITEMS: ("crt_dt", "ret_dt", "rcv_dt"),
+    common.SALES_ORDERS: ("ord_dt", "ship_dt"),
+}
+
+
+def streamed_specs(table_specs=specs.TABLE_SPECS):
+    """
+    Returns the bronze specs micro-batches ingest: the incremental ones, whose loads already take deltas
+    """
+    return tuple(spec for spec in table_specs if spec.layer == specs.BRONZE and spec.is_incremental)
+
+
+def refreshed_specs(table_specs=specs.TABLE_SPECS):
+    """
+    Returns the silver and gold specs built from the streamed tables, upstream-first. History tables are left to the
+    daily run, they do not read the streamed tables
+    """
+    keys = {spec.key for spec in streamed_specs(table_specs)}
+    refreshed = []
+    for spec in table_specs:
+        if spec.layer != specs.BRONZE and not spec.is_history and keys.intersection(spec.upstream):
+            keys.add(spec.key)
+            refreshed.append(spec)
+    return tuple(refreshed)
+
+
+def ingest_task_id(spec):
+    return "microbatch_{}_ingest".format(spec.task_prefix)
+
+
+def refresh_task_id(spec):
+    return "microbatch_{}_refresh".format(spec.task_prefix)
+
+
+def snapshot_date(batch_ts):
+    """
+    Returns the logical date of the daily run whose snapshot a batch at `batch_ts` refreshes, the day before its own
+    """
+    return batch_ts.date() - datetime.timedelta(days=1)
+
+
+def snapshot_logical_date(logical_date, **kwargs):
+    """
+    ExternalTaskSensor `execution_date_fn`: returns the logical date of the daily run a batch waits for
+    """
+    return logical_date.replace(hour=0, minute=0, second=0, microsecond=0) - datetime.timedelta(days=1)
+
+
+def batch_context(batch_ts, spec=None, table_specs=specs.TABLE_SPECS, params=None):
+    """
+    Returns the template context of a batch at `batch_ts`, a timezone-aware datetime within its day
+    """
+    context = specs.render_context(batch_ts.date(), spec, table_specs, params)
+    context.update(ts=batch_ts.isoformat(), ts_nodash=batch_ts.strftime("%Y%m%dT%H%M%S"), logical_date=batch_ts)
+    return context
+
+
+def object_prefix(entity):
+    return "{}/{}/".format(common.GCS_MICROBATCH_SUBDIR, entity)
+
+
+def batch_table_id(spec):
+    """
+    Returns the name of the temporary table a batch's files are read through
+    """
+    return spec.key + "_microbatch"
+
+
+def new_files(listed, ingested):
+    """
+    Returns the CSV files of `listed` not in `ingested`, in name order
+    """
+    ingested = set(ingested)
+    return sorted(name for name in listed if name.endswith("." + common.FILE_FORMAT) and name not in ingested)
+
+
+def ingested_files_sql(spec):
+    """
+    Returns the Jinja-templated query of the files earlier batches ingested into `spec`'s table
+
+    The batch's own records are left out, so a retry ingests its files again.
+    """
+    return "\n".join([
+        "SELECT",
+        "    file_name,",
+        "FROM {}".format(MICROBATCH_FILES_TABLE),
+        "WHERE 1=1",
+        '    AND source_table = "{}"'.format(spec.table_id),
+        '    AND DATE(execution_ts) >= DATE_SUB(DATE("{{{{ ds }}}}"), INTERVAL {} DAY)'.format(common.MICROBATCH_RETENTION_DAYS),
+        '    AND execution_ts != TIMESTAMP("{{ ts }}")',
+    ]) + "\n"
+
+
+def discard_sql(spec):
+    """
+    Returns the Jinja-templated script removing the batch's rows and file records, e.g. of an earlier attempt
+    """
+    return "\n".join([
+        "DELETE FROM `{}.{}.{}`".format(common.BQ_PROJECT_ID, spec.dataset_id, spec.table_id),
+        "WHERE 1=1",
+        '    AND execution_ts = TIMESTAMP("{{ ts }}")',
+        ";",
+        "",
+        "DELETE FROM {}".format(MICROBATCH_FILES_TABLE),
+        "WHERE 1=1",
+        '    AND source_table = "{}"'.format(spec.table_id),
+        '    AND execution_ts = TIMESTAMP("{{ ts }}")',
+        ";",
+    ]) + "\n"
+
+
+def ingest_sql(spec, files, dags_dir=common.AIRFLOW_DAGS_DIR):
+    """
+    Returns the Jinja-templated script appending the batch's files, read through `batch_table_id(spec)`, to `spec`'s
+    bronze table with the batch's `execution_ts`, and recording them
+    """
+    columns = [column for column, _ in landing.landing_schema(spec.key, dags_dir)]
+    lines = [
+        "-- Micro-batch load of `{}.{}`, generated by `microbatch.ingest_sql`".format(spec.dataset_id, spec.table_id),
+        "-- Replaces any earlier attempt of the same batch",
+        discard_sql(spec),
+        "INSERT INTO `{}.{}.{}`".format(common.BQ_PROJECT_ID, spec.dataset_id, spec.table_id),
+        "    ({}, execution_ts)".format(", ".join(columns)),
+        "SELECT",
+    ]
+    lines += ["    {},".format(column) for column in columns]
+    lines += [
+        '    TIMESTAMP("{{ ts }}")    AS execution_ts,',
+        "FROM {}".format(batch_table_id(spec)),
+        ";",
+        "",
+        "INSERT INTO {}".format(MICROBATCH_FILES_TABLE),
+        "    (source_table, file_name, execution_ts)",
+        "VALUES",
+        ",\n".join('    ("{}", "{}", TIMESTAMP("{{{{ ts }}}}"))'.format(spec.table_id, name) for name in files),
+        ";",
+    ]
+    return "\n".join(lines) + "\n"
+
+
+def batch_check_spec(spec):
+    """
+    Returns `spec` with the assertions a batch is checked with, all but `references`
+    """
+    return dataclasses.replace(spec, assertions=tuple(assertion for assertion in spec.assertions if assertion.kind != quality.REFERENCES))
+
+
+def batch_filter(spec, table_specs=specs.TABLE_SPECS):
+    """
+    Returns the Jinja-templated condition selecting the rows of `spec` a batch refreshes
+
+    Tables built from the streamed tables refresh the rows of the keys the batch brought, e.g. the lines of an order
+    whose status changed. The others refresh the batch's date.
+    """
+    conditions = []
+    for streamed in streamed_specs(table_specs):
+        if streamed.key in spec.upstream:
+            column, bronze_column = BATCH_KEYS[streamed.key]
+            conditions.append('{} IN (SELECT {} FROM `{}.{}.{}` WHERE execution_ts = TIMESTAMP("{{{{ ts }}}}"))'.format(
+                column, bronze_column, common.BQ_PROJECT_ID, streamed.dataset_id, streamed.table_id))
+    return " OR ".join(conditions) or 'date = DATE("{{ ds }}")'
+
+
+def refresh_sql(spec, source_sql, row_filter, snapshot_ts):
+    """
+    Returns the script replacing the rows matching `row_filter` in the snapshot written at `snapshot_ts` with those of
+    `source_sql`, the table's rendered insert query
+    """
+    table = "`{}.{}.{}`".format(common.BQ_PROJECT_ID, spec.dataset_id, spec.table_id)
+    return "\n".join([
+        "-- Micro-batch refresh of `{}.{}`, generated by `microbatch.refresh_sql`".format(spec.dataset_id, spec.table_id),
+        "DELETE FROM {}".format(table),
+        "WHERE 1=1",
+        '    AND {} = TIMESTAMP("{}")'.format(spec.partition_field, snapshot_ts),
+        "    AND ({})".format(row_filter),
+        ";",
+        "",
+        "INSERT INTO {}".format(table),
+        "SELECT",
+        '    * REPLACE (TIMESTAMP("{}") AS {}),'.format(snapshot_ts, spec.partition_field),
+        "FROM (",
+        source_sql.strip().rstrip(";"),
+        ")   AS refreshed",
+        "WHERE 1=1",
+        "    AND ({})".format(row_filter),
+        ";",
+    ]) + "\n"
+
+
+def refresh_script(spec, batch_ts, dags_dir=common.AIRFLOW_DAGS_DIR, table_specs=specs.TABLE_SPECS,
+                   registry=sql_registry.REGISTRY):
+    """
+    Returns the rendered script refreshing `spec`'s rows of the latest snapshot for the batch at `batch_ts`
+    """
+    source_path = os.path.join(dags_dir, spec.sql_dir, spec.insert_sql_file)
+    batch = batch_context(batch_ts, spec, table_specs)
+    snapshot = specs.render_context(snapshot_date(batch_ts), spec, table_specs)
+    if spec.is_incremental:
+        # The batch's date only, read from the snapshot and MERGEd with its `execution_ts`
+        snapshot.update(ds=batch["ds"], ds_nodash=batch["ds_nodash"])
+        snapshot["params"]["backfill_start_date"] = batch["ds"]
+        return registry.render(source_path, **snapshot)
+
+    streamed_keys = {streamed.key for streamed in streamed_specs(table_specs)}
+    source_context = batch if streamed_keys.intersection(spec.upstream) else snapshot
+    row_filter = registry.render_string(batch_filter(spec, table_specs), **batch)
+    return refresh_sql(spec, registry.render(source_path, **source_context), row_filter, snapshot["ts"])
+
+
+def job_configuration(spec, query, table_definitions=None):
+    """
+    Returns the BigQuery job configuration of a batch's script, at PRIORITY in the spec's reservation
+    """
+    configuration = {
+        "query": {
+            "query": query,
+            "useLegacySql": False,
+            "priority": PRIORITY,
+        }
+    }
+    if table_definitions:
+        configuration["query"]["tableDefinitions"] = table_definitions
+    if spec.reservation:
+        configuration["reservation"] = spec.reservation
+    return configuration
+
+
+def batch_table_definition(spec, files, dags_dir=common.AIRFLOW_DAGS_DIR):
+    """
+    Returns the temporary external table definitions reading a batch's files, with the landing schema
+    """
+    return {
+        batch_table_id(spec): {
+            "sourceUris": ["gs://{}/{}".format(common.GCS_LANDING_BUCKET, name) for name in files],
+            "sourceFormat": "CSV",
+            "csvOptions": {"skipLeadingRows": 1},
+            "schema": {"fields": landing.bigquery_schema_fields(spec.key, dags_dir)},
+        }
+    }
+
+
+# ============================
+# Airflow callables
+# ============================
+
+
+def _run_job(hook, configuration, task_id, ti, run_id, ds):
+    job = hook.insert_job(configuration=configuration, project_id=common.BQ_PROJECT_ID)
+    telemetry.record(job.to_api_repr(), task_id, run_id, ds, ti.try_number)
+    return job
+
+
+def ingest(spec_key, dags_dir, ti, ts, ds, run_id, gcp_conn_id=common.GCP_SERVICE_ACCT):
+    """
+    PythonOperator callable: ingests the entity's new micro-batch files, returning how many
+
+    Skips when none has landed, and removes the batch's rows again when they fail an ERROR assertion.
+    """
+    from airflow.exceptions import AirflowException
+    from airflow.exceptions import AirflowSkipException
+
+    spec = specs.get_spec(spec_key)
+    context = batch_context(datetime.datetime.fromisoformat(ts), spec)
+    hook = connections.get_bigquery_hook(gcp_conn_id)
+    listed = connections.get_gcs_hook(gcp_conn_id).list(common.GCS_LANDING_BUCKET, prefix=object_prefix(spec.key))
+    ingested = [row[0] for row in hook.get_records(sql_registry.REGISTRY.render_string(ingested_files_sql(spec), **context))]
+    files = new_files(listed, ingested)
+    if not files:
+        raise AirflowSkipException("No new {} files under {}".format(spec.key, object_prefix(spec.key)))
+
+    query = sql_registry.REGISTRY.render_string(ingest_sql(spec, files, dags_dir), **context)
+    _run_job(hook, job_configuration(spec, query, batch_table_definition(spec, files, dags_dir)), ti.task_id, ti, run_id, ds)
+
+    check_spec = batch_check_spec(spec)
+    results = quality.evaluate(check_spec.assertions, hook.get_first(
+        sql_registry.REGISTRY.render_string(quality.compile_check(check_spec, specs.TABLE_SPECS), **context)))
+    if quality.failures(results):
+        _run_job(hook, job_configuration(spec, sql_registry.REGISTRY.render_string(discard_sql(spec), **context)), ti.task_id, ti, run_id, ds)
+        raise AirflowException("{} failed for {}\n{}".format(ti.task_id, ", ".join(files), quality.format_results(spec.table_id, results)))
+    return len(files)
+
+
+def refresh(spec_key, dags_dir, ti, ts, ds, run_id, gcp_conn_id=common.GCP_SERVICE_ACCT):
+    """
+    PythonOperator callable: refreshes the table's rows of the latest snapshot for the batch
+    """
+    spec = specs.get_spec(spec_key)
+    script = refresh_script(spec, datetime.datetime.fromisoformat(ts), dags_dir)
+    _run_job(connections.get_bigquery_hook(gcp_conn_id), job_configuration(spec, script), ti.task_id, ti, run_id, ds)
+
+
+# ============================
+# Local stand-in
+# ============================
+
+
+def feed_local(landing_dir, watch_dir, run_date, batch, batches):
+    """
+    Drops chunk `batch` of `batches` of `run_date`'s new and changed rows of each streamed export into `watch_dir`,
+    returning the files written. Orders are chunked by `ord_id`, so an order and its lines usually land together
+    """
+    import duckdb
+    import local_engine
+
+    con = duckdb.connect()
+    written = []
+    for spec in streamed_specs():
+        created_column = DELTA_DATE_COLUMNS[spec.key][0]
+        entity_dir = os.path.join(watch_dir, object_prefix(spec.key))
+        os.makedirs(entity_dir, exist_ok=True)
+        path = os.path.join(entity_dir, "{}-{:04d}.{}".format(run_date.isoformat(), batch, common.FILE_FORMAT))
+        con.execute("""
+            COPY (
+                SELECT *
+                FROM read_csv('{source}', header = true)
+                WHERE {created} <= DATE '{date}'
+                    AND ({changed})
+                    AND ord_id % {batches} = {batch}
+            ) TO '{path}' (HEADER, DELIMITER ',')
+        """.format(
+            source=local_engine.resolve_landing_file(landing_dir, spec.key).replace("'", "''"), created=created_column,
+            date=run_date.isoformat(), batches=batches, batch=batch, path=path.replace("'", "''"),
+            changed=" OR ".join("{} = DATE '{}'".format(column, run_date.isoformat()) for column in DELTA_DATE_COLUMNS[spec.key])))
+        written.append(path)
+    return written
+
+
+def list_local_files(watch_dir, entity):
+    """
+    Returns the object names of the files under `watch_dir`, which stands in for the landing bucket
+    """
+    paths = glob.glob(os.path.join(watch_dir, object_prefix(entity), "*"))
+    return [os.path.relpath(path, watch_dir).replace(os.sep, "/") for path in paths]
+
+
+def run_local_batch(engine, watch_dir, batch_ts):
+    """
+    Runs a batch at `batch_ts` against a `local_engine.LocalEngine` database, appending its tasks to
+    `engine.task_runs`, and returns the number of files ingested. The day before's daily run must have been loaded
+    """
+    import local_engine
+
+    files_ingested = 0
+    for spec in streamed_specs(engine.table_specs):
+        start = time.perf_counter()
+        context = batch_context(batch_ts, spec, engine.table_specs)
+        ingested = [row[0] for row in engine.execute(engine.registry.render_string(ingested_files_sql(spec), **context)).fetchall()]
+        files = new_files(list_local_files(watch_dir, spec.key), ingested)
+        if not files:
+            continue
+
+        columns = ", ".join("'{}': '{}'".format(column, local_engine.TYPE_NAMES.get(column_type, column_type))
+                            for column, column_type in landing.landing_schema(spec.key, engine.dags_dir))
+        paths = ", ".join("'{}'".format(os.path.join(watch_dir, name).replace("'", "''")) for name in files)
+        engine.con.execute("CREATE OR REPLACE TEMP VIEW {} AS SELECT * FROM read_csv([{}], header = true, columns = {{{}}})".format(
+            batch_table_id(spec), paths, columns))
+        engine.execute(engine.registry.render_string(ingest_sql(spec, files, engine.dags_dir), **context))
+
+        check_spec = batch_check_spec(spec)
+        check_sql = engine.registry.render_string(quality.compile_check(check_spec, engine.table_specs), **context)
+        results = quality.evaluate(check_spec.assertions, engine.execute(check_sql).fetchone())
+        if quality.failures(results):
+            engine.execute(engine.registry.render_string(discard_sql(spec), **context))
+            raise local_engine.LocalCheckError("{} failed for {}\n{}".format(
+                ingest_task_id(spec), ", ".join(files), quality.format_results(spec.table_id, results)))
+
+        files_ingested += len(files)
+        engine.task_runs.append({
+            "run_date": context["ts"],
+            "task_id": ingest_task_id(spec),
+            "layer": spec.layer,
+            "seconds": time.perf_counter() - start,
+            "rows": results[0]["row_count"] if results else None,
+        })
+
+    if not files_ingested:
+        return 0
+    for spec in refreshed_specs(engine.table_specs):
+        start = time.perf_counter()
+        engine.execute(refresh_script(spec, batch_ts, engine.dags_dir, engine.table_specs, engine.registry))
+        engine.task_runs.append({
+            "run_date": batch_ts.isoformat(),
+            "task_id": refresh_task_id(spec),
+            "layer": spec.layer,
+            "seconds": time.perf_counter() - start,
+            "rows": None,
+        })
+    return files_ingested
+
+
+def batch_times(run_date, batches, freshness_minutes=common.MICROBATCH_FRESHNESS_MINUTES):
+    """
+    Returns the logical timestamps of the first `batches` micro-batches of `run_date`
+    """
+    midnight = datetime.datetime.combine(run_date, datetime.time(), tzinfo=datetime.timezone.utc)
+    return [midnight + datetime.timedelta(minutes=freshness_minutes * batch) for batch in range(batches)]
+
+
+def simulate_local(run_date, batches, landing_dir, watch_dir, database=":memory:",
+                   freshness_minutes=common.MICROBATCH_FRESHNESS_MINUTES, progress=None):
+    """
+    Loads the daily run of the day before `run_date` unless the database already holds it, then feeds and runs
+    `batches` micro-batches of `run_date`, passing a summary line of each to `progress`, and returns the engine
+    """
+    import local_engine
+
+    engine = local_engine.LocalEngine(database=database, landing_dir=landing_dir)
+    engine.init_tables()
+    previous_date = run_date - datetime.timedelta(days=1)
+    loaded = engine.execute("SELECT COUNT(*) FROM `{}.{}.{}` WHERE execution_ts = TIMESTAMP(\"{}\")".format(
+        common.BQ_PROJECT_ID, common.BQ_DATASET_BRONZE, common.BQ_LOAD_WATERMARKS,
+        specs.render_context(previous_date)["ts"])).fetchone()[0]
+    if not loaded:
+        engine.run_day(previous_date)
+
+    for batch, batch_ts in enumerate(batch_times(run_date, batches, freshness_minutes)):
+        feed_local(landing_dir, watch_dir, run_date, batch, batches)
+        first_task = len(engine.task_runs)
+        files = run_local_batch(engine, watch_dir, batch_ts)
+        task_runs = engine.task_runs[first_task:]
+        if progress:
+            progress("{} | {:>2} files | {:>9,} rows ingested | {:>8.3f} s".format(
+                batch_ts.strftime("%H:%M"), files, sum(task_run["rows"] or 0 for task_run in task_runs if task_run["task_id"].endswith("_ingest")),
+                sum(task_run["seconds"] for task_run in task_runs)))
+    return engine
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--date", required=True, type=datetime.date.fromisoformat, help="day the batches run on")
+    parser.add_argument("--batches", type=int, default=8, help="micro-batches run, each fed one chunk of the day's rows")
+    parser.add_argument("--freshness-minutes", type=int, default=common.MICROBATCH_FRESHNESS_MINUTES, help="minutes between batches")
+    parser.add_argument("--landing-dir", default=os.path.join(APP_DIR, "..", "data"), help="daily exports the batches are fed from")
+    parser.add_argument("--watch-dir", help="directory standing in for the landing bucket, a temporary directory by default")
+    parser.add_argument("--database", default=":memory:", help="DuckDB database file, in memory by default")
+    args = parser.parse_args()
+
+    watch_dir = args.watch_dir or tempfile.mkdtemp(prefix="microbatch_landing_")
+    engine = simulate_local(args.date, args.batches, args.landing_dir, watch_dir, args.database, args.freshness_minutes, progress=print)
+    for spec in refreshed_specs(engine.table_specs):
+        if spec.layer == specs.GOLD:
+            bucket = rollups.bucket_start(args.date, spec.rollup_grain)
+            rows = engine.execute('SELECT COUNT(*) FROM `{}.{}.{}` WHERE date = DATE("{}")'.format(
+                common.BQ_PROJECT_ID, spec.dataset_id, spec.checked_table_id, bucket.isoformat())).fetchone()[0]
+            print("{}: {:,} rows for {}".format(spec.checked_table_id, rows, bucket.isoformat()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+Custom Airflow operators
+
+Hooks are built through `connections` inside `execute`, so constructing these operators while the DAG file is parsed
+never touches the metastore or GCP. Every BigQuery job they run is recorded through `telemetry.record`.
+
+With `deferrable=True` both operators submit their job, then hand the worker slot back to the executor while
+`BigQueryInsertJobTrigger` polls the job from the triggerer's event loop, and resume in `execute_complete` once it has
+finished. A worker slot is then only held for submitting and for reading the result, not for the job itself.
+"""
+from airflow.exceptions import AirflowException
+from airflow.exceptions import AirflowFailException
+from airflow.models import BaseOperator
+from airflow.providers.google.cloud.operators.bigquery import BigQueryInsertJobOperator
+from airflow.providers.google.cloud.triggers.bigquery import BigQueryInsertJobTrigger
+
+import budget
+import common
+import connections
+import quality
+import specs
+import telemetry
+
+
+def record_job(operator, job, context):
+    """
+    Records a finished job's statistics against the running task. Telemetry never fails the task
+    """
+    try:
+        telemetry.record(job.to_api_repr(), operator.task_id, context["run_id"], context["ds"], context["ti"].try_number)
+    except Exception as error:
+        operator.log.warning("Could not record the statistics of job %s: %s", job.job_id, error)
+
+
+class InstrumentedBigQueryInsertJobOperator(BigQueryInsertJobOperator):
+    """
+    `BigQueryInsertJobOperator` that records the statistics of its job once it has finished, see `telemetry.py`
+
+    With a `bytes_budget`, the rendered query is dry-run first and `over_budget` applied when the estimate exceeds
+    it, see `budget.py`. A blocked task fails without retries, since a rerun would scan the same bytes.
+    """
+
+    def __init__(self, *, bytes_budget=None, over_budget=specs.OVER_BUDGET_BLOCK, **kwargs):
+        super().__init__(**kwargs)
+        self.bytes_budget = bytes_budget
+        self.over_budget = over_budget
+
+    def execute(self, context):
+        if self.bytes_budget is not None:
+            self.check_budget(context)
+        job_id = super().execute(context)
+        # Reached once the job has finished: waited for, or, deferrable, done before the task could defer
+        self.record(context)
+        return job_id or self.job_id
+
+    def execute_complete(self, context, event):
+        job_id = super().execute_complete(context, event)
+        self.record(context)
+        return job_id
+
+    def check_budget(self, context):
+        estimator = budget.BigQueryDryRun(connections.get_bigquery_hook(self.gcp_conn_id))
+        try:
+            estimate = budget.preflight(self.task_id, self.configuration["query"]["query"], estimator, self.bytes_budget,
+                                        self.over_budget, context["ds"], context["run_id"])
+        except budget.BudgetExceededError as error:
+            raise AirflowFailException(str(error))
+
+        self.log.info("Estimated %s bytes processed, budget %s bytes", estimate["estimated_bytes"], self.bytes_budget)
+        if estimate["decision"] == specs.OVER_BUDGET_DOWNGRADE:
+            self.log.warning("Over budget, submitting at %s priority, billing at most %s bytes", budget.DOWNGRADE_PRIORITY,
+                             budget.downgrade_ceiling(self.bytes_budget))
+            self.configuration = budget.downgraded_configuration(self.configuration, self.bytes_budget)
+
+    def record(self, context):
+        hook = self.hook or connections.get_bigquery_hook(self.gcp_conn_id)
+        job = hook.get_job(job_id=self.job_id, project_id=self.project_id or hook.project_id, location=self.location)
+        record_job(self, job, context)
+
+
+class DataQualityCheckOperator(BaseOperator):
+    """
+    Runs a table's fused data-quality check (see `quality.compile_check`) as one BigQuery query
+
+    Logs the failing row count of every assertion, pushes the per-assertion results to XCom, and fails the task when
+    any ERROR assertion has failing rows.
+    """
+    template_fields = ("sql",)
+    template_ext = (".sql",)
+    ui_color = "#e8f4e4"
+
+    def __init__(self, *, sql, assertions, table, gcp_conn_id=common.GCP_SERVICE_ACCT, deferrable=False,
+                 poll_interval=common.AIRFLOW_POLL_SECONDS, **kwargs):
+        super().__init__(**kwargs)
+        self.sql = sql
+        self.assertions = assertions
+        self.table = table
+        self.gcp_conn_id = gcp_conn_id
+        self.deferrable = deferrable
+        self.poll_interval = poll_interval
+
+    def execute(self, context):
+        hook = connections.get_bigquery_hook(self.gcp_conn_id)
+        # A query job rather than `hook.get_first`, so its statistics can be recorded
+        job = hook.insert_job(configuration={"query": {"query": self.sql, "useLegacySql": False}}, project_id=hook.project_id,
+                              nowait=self.deferrable)
+        if self.deferrable and not job.done():
+            self.defer(
+                trigger=BigQueryInsertJobTrigger(conn_id=self.gcp_conn_id, job_id=job.job_id, project_id=hook.project_id,
+                                                 location=job.location, poll_interval=self.poll_interval),
+                method_name="execute_complete",
+                kwargs={"location": job.location},
+            )
+        return self.evaluate(job, context)
+
+    def execute_complete(self, context, event, location=None):
+        if event["status"] == "error":
+            raise AirflowException(event["message"])
+        hook = connections.get_bigquery_hook(self.gcp_conn_id)
+        return self.evaluate(hook.get_job(job_id=event["job_id"], project_id=hook.project_id, location=location), context)
+
+    def evaluate(self, job, context):
+        row = tuple(next(iter(job.result())))
+        record_job(self, job, context)
+        results = quality.evaluate(self.assertions, row)
+        self.log.info(quality.format_results(self.table, results))
+
+        failed = quality.failures(results)
+        if failed:
+            raise AirflowException("{} failed {} data-quality assertion(s): {}".format(
+                self.table, len(failed), ", ".join(result["assertion"] for result in failed)))
+        return results
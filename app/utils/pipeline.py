@@ -0,0 +1,497 @@
+"""
+Pipeline factory
+
+Builds the bronze/silver/gold task graph from the table specs declared in `specs.py`.
+"""
+from airflow.operators.python import BranchPythonOperator
+from airflow.operators.python import PythonOperator
+from airflow.providers.google.cloud.operators.bigquery import BigQueryCreateExternalTableOperator
+from airflow.providers.google.cloud.transfers.gcs_to_bigquery import GCSToBigQueryOperator
+from airflow.sensors.external_task import ExternalTaskSensor
+from airflow.utils.trigger_rule import TriggerRule
+
+import common
+import ddl
+import fingerprints
+import gold_scan
+import landing
+import lifecycle
+import microbatch
+import operators
+import quality
+import services
+import specs
+
+def query_job_configuration(spec, query):
+    """
+    Returns the BigQuery job configuration that writes `query` into the spec's partition for the run
+    """
+    configuration = {
+        "query": {
+            "query": query,
+            "useLegacySql": False,
+            "priority": spec.priority,
+            "writeDisposition": "WRITE_TRUNCATE",
+            "destinationTable": {
+                "projectId": common.BQ_PROJECT_ID,
+                "datasetId": spec.dataset_id,
+                "tableId": spec.table_id + '$' + spec.partition_decorator,       # specifies partition to modify
+                "timePartitioning": {
+                    "field": spec.partition_field,
+                    "type": spec.partition_type
+                },
+            },
+            "allow_large_results": True,
+        }
+    }
+    if spec.cluster_fields:
+        # Must match the table's clustering, or the partition overwrite is rejected
+        configuration["query"]["clustering"] = {"fields": list(spec.cluster_fields)}
+    if spec.reservation:
+        configuration["reservation"] = spec.reservation
+    return configuration
+
+
+def script_job_configuration(spec, query):
+    """
+    Returns the BigQuery job configuration for a DML script (MERGE, DELETE/INSERT) that manages its own destination
+    """
+    configuration = {
+        "query": {
+            "query": query,
+            "useLegacySql": False,
+            "priority": spec.priority,
+        }
+    }
+    if spec.reservation:
+        configuration["reservation"] = spec.reservation
+    return configuration
+
+
+def batched_load_specs(table_specs=specs.TABLE_SPECS):
+    """
+    Returns the bronze specs whose loads can share one script job: those without a fingerprint branch to follow, as
+    `skip_unchanged` specs only know at run time whether they load or carry the previous partition forward
+    """
+    return [spec for spec in table_specs if spec.layer == specs.BRONZE and not spec.skip_unchanged]
+
+
+def batched_load_script(batch_specs, dags_dir):
+    """
+    Returns the Jinja-templated script running the load of every spec in `batch_specs` as one job
+
+    Each insert query is inlined with `params` scoped to the spec's own, see `build_batched_load_task`, and replaces the
+    rows of the run's partition like the WRITE_TRUNCATE of the spec's own load job would.
+    """
+    lines = ["-- Batched bronze loads, generated by `pipeline.batched_load_script`"]
+    for spec in batch_specs:
+        table = "`{}.{}.{}`".format(common.BQ_PROJECT_ID, spec.dataset_id, spec.table_id)
+        lines += [
+            "",
+            "-- {}".format(spec.load_task_id),
+            '{{% with params = params["{}"] %}}'.format(spec.key),
+            "DELETE FROM {}".format(table),
+            "WHERE 1=1",
+            '    AND TIMESTAMP_TRUNC({0}, {1}) = TIMESTAMP_TRUNC(TIMESTAMP("{{{{ ts }}}}"), {1})'.format(spec.partition_field, spec.partition_type),
+            ";",
+            "",
+            "INSERT INTO {}".format(table),
+            "SELECT * FROM (",
+            services.get_query([dags_dir, spec.sql_dir, spec.insert_sql_file]).strip().rstrip(";"),
+            ")",
+            ";",
+            "{% endwith %}",
+        ]
+    return "\n".join(lines) + "\n"
+
+
+def build_batched_load_task(dag, dags_dir, batch_specs, table_specs, deferrable=common.AIRFLOW_DEFERRABLE):
+    """
+    Returns the task that loads every spec in `batch_specs` in one script job, see `batched_load_script`
+    """
+    return operators.InstrumentedBigQueryInsertJobOperator(
+        dag = dag,
+        task_id = specs.BATCHED_LOAD_TASK_ID,
+        gcp_conn_id = common.GCP_SERVICE_ACCT,
+        deferrable = deferrable,
+        poll_interval = common.AIRFLOW_POLL_SECONDS,
+        priority_weight = max(spec.priority_weight for spec in batch_specs),
+        params = {spec.key: specs.query_params(spec, table_specs) for spec in batch_specs},
+        # Bronze specs share their priority and reservation
+        configuration = script_job_configuration(batch_specs[0], batched_load_script(batch_specs, dags_dir)),
+    )
+
+
+def build_shared_scan_task(dag, dags_dir, gold_specs, table_specs, deferrable=common.AIRFLOW_DEFERRABLE):
+    """
+    Returns the task that builds every spec in `gold_specs` from one read of the channel pivot, see `gold_scan.py`
+    """
+    return operators.InstrumentedBigQueryInsertJobOperator(
+        dag = dag,
+        task_id = gold_scan.SHARED_SCAN_TASK_ID,
+        gcp_conn_id = common.GCP_SERVICE_ACCT,
+        deferrable = deferrable,
+        poll_interval = common.AIRFLOW_POLL_SECONDS,
+        priority_weight = max(spec.priority_weight for spec in gold_specs),
+        params = gold_scan.shared_scan_params(gold_specs, table_specs),
+        # Gold specs share their priority, reservation and over-budget action
+        configuration = script_job_configuration(gold_specs[0], gold_scan.shared_scan_script(gold_specs, dags_dir)),
+        bytes_budget = gold_scan.shared_bytes_budget(gold_specs),
+        over_budget = gold_specs[0].over_budget,
+    )
+
+
+def build_convert_task(dag, dags_dir, step):
+    """
+    Returns the task that converts the spec's landing CSV into the run's Parquet partition
+    """
+    return PythonOperator(
+        dag = dag,
+        task_id = step.task_id,
+        priority_weight = step.spec.priority_weight,
+        python_callable = landing.convert_gcs_landing,
+        op_kwargs = {
+            "entity": step.spec.key,
+            "landing_date": "{{ ds }}",
+            "dags_dir": dags_dir,
+        },
+    )
+
+
+def build_external_task(dag, dags_dir, step):
+    """
+    Returns the task that (re)creates the external table over the spec's landing file
+    """
+    spec = step.spec
+    if spec.is_parquet_landing:
+        # Definition is static (Hive-partitioned on `landing_date`), so this only creates the table on the first run
+        return BigQueryCreateExternalTableOperator(
+            dag = dag,
+            task_id = step.task_id,
+            priority_weight = spec.priority_weight,
+            table_resource = landing.external_table_resource(spec, dags_dir),
+            gcp_conn_id = common.GCP_SERVICE_ACCT,
+        )
+
+    return GCSToBigQueryOperator(
+        # Loads raw GCS content via external table
+        # - done to not incur any transfer costs
+        # - external table treated as a staging table and will be removed
+        dag = dag,
+        task_id = step.task_id,
+        priority_weight = spec.priority_weight,
+        bucket = common.GCS_LANDING_BUCKET,
+        source_objects = [services.build_gcs_object_path(common.GCS_LANDING_SUBDIR, spec.key, common.FILE_FORMAT)],
+        destination_project_dataset_table = services.build_bq_table_name(common.BQ_PROJECT_ID, spec.dataset_id, spec.external_table_id),
+        source_format = "CSV",
+        create_disposition = "CREATE_IF_NEEDED",
+        external_table = True,
+        autodetect = True,
+        gcp_conn_id = common.GCP_SERVICE_ACCT,
+    )
+
+
+def build_job_task(dag, dags_dir, step, table_specs, deferrable=common.AIRFLOW_DEFERRABLE):
+    """
+    Returns the task that runs a query or script step
+    """
+    query = services.get_query([dags_dir, step.sql_dir, step.sql_file])
+    if step.kind == specs.QUERY_TASK:
+        configuration = query_job_configuration(step.spec, query)
+    else:
+        configuration = script_job_configuration(step.spec, query)
+
+    return operators.InstrumentedBigQueryInsertJobOperator(
+        dag = dag,
+        task_id = step.task_id,
+        gcp_conn_id = common.GCP_SERVICE_ACCT,
+        deferrable = deferrable,
+        poll_interval = common.AIRFLOW_POLL_SECONDS,
+        priority_weight = step.spec.priority_weight,
+        params = specs.query_params(step.spec, table_specs),
+        configuration = configuration,
+        bytes_budget = step.spec.bytes_budget,
+        over_budget = step.spec.over_budget,
+    )
+
+
+def build_check_task(dag, step, table_specs, deferrable=common.AIRFLOW_DEFERRABLE):
+    """
+    Returns the task that evaluates the spec's data-quality assertions in a single query
+    """
+    spec = step.spec
+    return operators.DataQualityCheckOperator(
+        dag = dag,
+        task_id = step.task_id,
+        priority_weight = spec.priority_weight,
+        sql = quality.compile_check(spec, table_specs),
+        assertions = spec.assertions,
+        table = "{}.{}".format(spec.dataset_id, spec.checked_table_id),
+        gcp_conn_id = common.GCP_SERVICE_ACCT,
+        deferrable = deferrable,
+        poll_interval = common.AIRFLOW_POLL_SECONDS,
+    )
+
+
+def build_view_task(dag, step, deferrable=common.AIRFLOW_DEFERRABLE):
+    """
+    Returns the task that repoints the spec's `_latest` view at the rows the run wrote
+    """
+    spec = step.spec
+    return operators.InstrumentedBigQueryInsertJobOperator(
+        dag = dag,
+        task_id = step.task_id,
+        gcp_conn_id = common.GCP_SERVICE_ACCT,
+        deferrable = deferrable,
+        poll_interval = common.AIRFLOW_POLL_SECONDS,
+        priority_weight = spec.priority_weight,
+        configuration = script_job_configuration(spec, ddl.latest_view_script(spec)),
+    )
+
+
+def fingerprint_xcom(spec, key):
+    """
+    Returns the template pulling `key` from the XCom of the spec's `_fingerprint` task
+    """
+    return '{{{{ ti.xcom_pull(task_ids="{}_fingerprint", key="{}") }}}}'.format(spec.task_prefix, key)
+
+
+def build_fingerprint_task(dag, dags_dir, step):
+    """
+    Returns the task that fingerprints the spec's inputs and branches to its load, or to its carry-forward when they
+    are unchanged since the previous run
+    """
+    spec = step.spec
+    branch_heads = {}
+    for planned in specs.plan_tasks(spec):
+        branch_heads.setdefault(planned.branch, planned.task_id)
+    return BranchPythonOperator(
+        dag = dag,
+        task_id = step.task_id,
+        priority_weight = spec.priority_weight,
+        python_callable = fingerprints.choose_branch,
+        op_kwargs = {
+            "spec_key": spec.key,
+            "dags_dir": dags_dir,
+            "load_task_id": branch_heads[specs.LOAD_BRANCH],
+            "carry_forward_task_id": branch_heads[specs.CARRY_FORWARD_BRANCH],
+        },
+    )
+
+
+def build_carry_forward_task(dag, step, deferrable=common.AIRFLOW_DEFERRABLE):
+    """
+    Returns the task that copies the previous run's partition as the run's, see `fingerprints.carry_forward_sql`
+    """
+    spec = step.spec
+    return operators.InstrumentedBigQueryInsertJobOperator(
+        dag = dag,
+        task_id = step.task_id,
+        gcp_conn_id = common.GCP_SERVICE_ACCT,
+        deferrable = deferrable,
+        poll_interval = common.AIRFLOW_POLL_SECONDS,
+        priority_weight = spec.priority_weight,
+        configuration = query_job_configuration(spec, fingerprints.carry_forward_sql(spec, fingerprint_xcom(spec, "previous_ts"))),
+        bytes_budget = spec.bytes_budget,
+        over_budget = spec.over_budget,
+    )
+
+
+def build_fingerprint_update_task(dag, step, deferrable=common.AIRFLOW_DEFERRABLE):
+    """
+    Returns the task that records the run's fingerprint once the load or the carry-forward has succeeded
+    """
+    spec = step.spec
+    return operators.InstrumentedBigQueryInsertJobOperator(
+        dag = dag,
+        task_id = step.task_id,
+        gcp_conn_id = common.GCP_SERVICE_ACCT,
+        deferrable = deferrable,
+        poll_interval = common.AIRFLOW_POLL_SECONDS,
+        priority_weight = spec.priority_weight,
+        # One of the two branches is always skipped
+        trigger_rule = TriggerRule.NONE_FAILED_MIN_ONE_SUCCESS,
+        configuration = script_job_configuration(spec, fingerprints.record_fingerprint_sql(spec, fingerprint_xcom(spec, "fingerprint"))),
+    )
+
+
+def build_task(dag, dags_dir, step, table_specs, deferrable=common.AIRFLOW_DEFERRABLE):
+    """
+    Returns the Airflow operator for one planned step, BigQuery job steps deferring while their job runs when
+    `deferrable` is set
+    """
+    if step.kind == specs.CONVERT_TASK:
+        return build_convert_task(dag, dags_dir, step)
+    if step.kind == specs.EXTERNAL_TASK:
+        return build_external_task(dag, dags_dir, step)
+    if step.kind == specs.CHECK_TASK:
+        return build_check_task(dag, step, table_specs, deferrable)
+    if step.kind == specs.VIEW_TASK:
+        return build_view_task(dag, step, deferrable)
+    if step.kind == specs.FINGERPRINT_TASK:
+        return build_fingerprint_task(dag, dags_dir, step)
+    if step.kind == specs.CARRY_FORWARD_TASK:
+        return build_carry_forward_task(dag, step, deferrable)
+    if step.kind == specs.FINGERPRINT_UPDATE_TASK:
+        return build_fingerprint_update_task(dag, step, deferrable)
+    return build_job_task(dag, dags_dir, step, table_specs, deferrable)
+
+
+def build_pipeline(dag, dags_dir, table_specs=specs.TABLE_SPECS, deferrable=common.AIRFLOW_DEFERRABLE,
+                   batch_bronze_loads=common.BRONZE_BATCHED_LOADS, gold_shared_scan=common.GOLD_SHARED_SCAN):
+    """
+    Adds every table in `table_specs` to `dag` and wires the dependencies between them
+
+    Specs must be listed upstream-first. Each table's first task waits on the last task of every table in its
+    `upstream`, e.g. `[bronze_products_quality_check, bronze_suppliers_quality_check] >> silver_dim_products_load`, and
+    its quality check waits on the last task of every table its assertions reference. The fingerprint of a
+    `skip_unchanged` table hashes those referenced tables' fingerprints, so it waits on them as well.
+
+    Steps on a branch are chained after the fingerprint task, and the first step after the branches waits on the last
+    step of each.
+
+    With `batch_bronze_loads`, the loads of `batched_load_specs` are one `bronze_batched_load` task instead, and with
+    `gold_shared_scan` the loads of `gold_scan.shared_scan_specs` are one `gold_shared_scan` task. A shared load waits
+    on the upstream of each of the tables it loads, and each of their quality checks waits on it.
+
+    Returns a dict of task_id -> task.
+    """
+    tasks = {}
+    terminal_tasks = {}
+    # spec key -> task loading it along with other tables
+    shared_loads = {}
+    batch_specs = batched_load_specs(table_specs) if batch_bronze_loads else []
+    if batch_specs:
+        batched_load_task = build_batched_load_task(dag, dags_dir, batch_specs, table_specs, deferrable)
+        shared_loads.update((spec.key, batched_load_task) for spec in batch_specs)
+    gold_specs = gold_scan.shared_scan_specs(dags_dir, table_specs) if gold_shared_scan else []
+    if gold_specs:
+        shared_scan_task = build_shared_scan_task(dag, dags_dir, gold_specs, table_specs, deferrable)
+        shared_loads.update((spec.key, shared_scan_task) for spec in gold_specs)
+
+    for spec in table_specs:
+        plan = specs.plan_tasks(spec)
+        chain = [
+            shared_loads[spec.key] if spec.key in shared_loads and step.task_id == spec.load_task_id
+            else build_task(dag, dags_dir, step, table_specs, deferrable)
+            for step in plan
+        ]
+
+        previous_task, branch_tails = None, {}
+        for step, task in zip(plan, chain):
+            if step.branch:
+                branch_tails.get(step.branch, previous_task) >> task
+                branch_tails[step.branch] = task
+                continue
+            upstream_tasks = list(branch_tails.values()) if branch_tails else [previous_task]
+            for upstream_task in upstream_tasks:
+                if upstream_task:
+                    upstream_task >> task
+            previous_task, branch_tails = task, {}
+        for upstream_key in spec.upstream:
+            terminal_tasks[upstream_key] >> chain[0]
+        for step, task in zip(plan, chain):
+            if step.kind in (specs.CHECK_TASK, specs.FINGERPRINT_TASK):
+                for parent_key in quality.reference_keys(spec):
+                    if parent_key not in spec.upstream:
+                        terminal_tasks[parent_key] >> task
+
+        tasks.update((task.task_id, task) for task in chain)
+        # Downstream tables wait on the load (and its check, or the fingerprint record), not on the `_latest` view
+        terminal_tasks[spec.key] = [task for step, task in zip(plan, chain) if step.kind != specs.VIEW_TASK][-1]
+
+    return tasks
+
+
+def build_microbatch_pipeline(dag, dags_dir, table_specs=specs.TABLE_SPECS, daily_dag_id=common.AIRFLOW_DAILY_DAG_ID):
+    """
+    Adds the micro-batch tasks to `dag`, see `microbatch.py`
+
+    The daily run of the day before the batch must have succeeded first, its snapshot is what the batch refreshes.
+    Each streamed entity's `_ingest` task then loads its new files, or is skipped when none has landed. The refreshes
+    run upstream-first once at least one entity ingested something, and are skipped along with the ingests otherwise.
+
+    Returns a dict of task_id -> task.
+    """
+    wait_for_daily = ExternalTaskSensor(
+        dag = dag,
+        task_id = "microbatch_wait_for_daily_run",
+        external_dag_id = daily_dag_id,
+        execution_date_fn = microbatch.snapshot_logical_date,
+        mode = "reschedule",
+        poke_interval = 60,
+    )
+    tasks = {wait_for_daily.task_id: wait_for_daily}
+
+    ingest_tasks = []
+    for spec in microbatch.streamed_specs(table_specs):
+        task = PythonOperator(
+            dag = dag,
+            task_id = microbatch.ingest_task_id(spec),
+            priority_weight = spec.priority_weight,
+            python_callable = microbatch.ingest,
+            op_kwargs = {
+                "spec_key": spec.key,
+                "dags_dir": dags_dir,
+            },
+        )
+        wait_for_daily >> task
+        ingest_tasks.append(task)
+
+    streamed_keys = {spec.key for spec in microbatch.streamed_specs(table_specs)}
+    refresh_tasks = {}
+    for spec in microbatch.refreshed_specs(table_specs):
+        reads_streamed = bool(streamed_keys.intersection(spec.upstream))
+        task = PythonOperator(
+            dag = dag,
+            task_id = microbatch.refresh_task_id(spec),
+            priority_weight = spec.priority_weight,
+            # Either entity may have had nothing to ingest
+            trigger_rule = TriggerRule.NONE_FAILED_MIN_ONE_SUCCESS if reads_streamed else TriggerRule.ALL_SUCCESS,
+            python_callable = microbatch.refresh,
+            op_kwargs = {
+                "spec_key": spec.key,
+                "dags_dir": dags_dir,
+            },
+        )
+        upstream_tasks = ingest_tasks if reads_streamed else [refresh_tasks[key] for key in spec.upstream if key in refresh_tasks]
+        for upstream_task in upstream_tasks:
+            upstream_task >> task
+        refresh_tasks[spec.key] = task
+
+    tasks.update((task.task_id, task) for task in ingest_tasks + list(refresh_tasks.values()))
+    return tasks
+
+
+def build_lifecycle_pipeline(dag, table_specs=specs.TABLE_SPECS, daily_dag_id=common.AIRFLOW_DAILY_DAG_ID):
+    """
+    Adds the partition lifecycle tasks to `dag`, see `lifecycle.py`
+
+    The daily run of the same day must have succeeded first, so a table is never archived while that run writes or
+    checks it. Each table with an `archive_after_days` retention then gets its own `_archive` task, independent of the
+    others so one failing table does not hold the rest back.
+
+    Returns a dict of task_id -> task.
+    """
+    wait_for_daily = ExternalTaskSensor(
+        dag = dag,
+        task_id = "lifecycle_wait_for_daily_run",
+        external_dag_id = daily_dag_id,
+        mode = "reschedule",
+        poke_interval = 300,
+    )
+    tasks = {wait_for_daily.task_id: wait_for_daily}
+
+    for spec in lifecycle.archived_specs(table_specs):
+        task = PythonOperator(
+            dag = dag,
+            task_id = lifecycle.archive_task_id(spec),
+            python_callable = lifecycle.archive_task,
+            op_kwargs = {
+                "spec_key": spec.key,
+            },
+        )
+        wait_for_daily >> task
+        tasks[task.task_id] = task
+
+    return tasks
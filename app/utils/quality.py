@@ -0,0 +1,186 @@
+"""
+Data-quality assertions
+
+Each table spec declares a list of assertions (`TableSpec.assertions`). `compile_check` turns them into one BigQuery
+query that scans the run's partition once and returns a single row: the number of rows checked, then the number of
+failing rows for each assertion. Adding a rule adds a column to that aggregate rather than another job and scan;
+only `references` adds a (deduplicated) read of the parent table's partition.
+
+This module must stay free of Airflow imports so the local engine can evaluate the same checks.
+"""
+from dataclasses import dataclass
+
+import common
+
+NOT_EMPTY = "not_empty"
+UNIQUE = "unique"
+NOT_NULL = "not_null"
+REFERENCES = "references"
+IN_RANGE = "in_range"
+
+ERROR = "error"     # fails the check task
+WARN = "warn"       # only logged
+
+ROW_COUNT_COLUMN = "__row_count"
+
+
+@dataclass(frozen=True)
+class Assertion:
+    """
+    One data-quality rule, evaluated as the number of rows violating it
+
+    - `columns`: columns the rule applies to. `unique` treats them as one composite key
+    - `parent_key`/`parent_column`: `references` only. Spec key and column every non-null value must exist in, read
+      from the parent's partition for the same run
+    - `min_value`/`max_value`: `in_range` only. Inclusive bounds, either may be omitted
+    - `severity`: ERROR fails the task, WARN only logs the failing row count
+    """
+    name: str
+    kind: str
+    columns: tuple = ()
+    parent_key: str = None
+    parent_column: str = None
+    min_value: float = None
+    max_value: float = None
+    severity: str = ERROR
+
+
+def not_empty(severity=ERROR):
+    return Assertion(NOT_EMPTY, NOT_EMPTY, severity=severity)
+
+
+def unique(*columns, severity=ERROR):
+    """
+    Fails on every row beyond the first per key; rows with a NULL key part are compared as empty strings
+    """
+    return Assertion("__".join((UNIQUE,) + columns), UNIQUE, columns, severity=severity)
+
+
+def not_null(*columns, severity=ERROR):
+    return Assertion("__".join((NOT_NULL,) + columns), NOT_NULL, columns, severity=severity)
+
+
+def references(column, parent_key, parent_column=None, severity=ERROR):
+    return Assertion("__".join((REFERENCES, column, parent_key)), REFERENCES, (column,),
+                     parent_key=parent_key, parent_column=parent_column or column, severity=severity)
+
+
+def in_range(column, min_value=None, max_value=None, severity=ERROR):
+    return Assertion("__".join((IN_RANGE, column)), IN_RANGE, (column,),
+                     min_value=min_value, max_value=max_value, severity=severity)
+
+
+def reference_keys(spec):
+    """
+    Returns the spec keys `spec`'s assertions reference, which must be loaded before its check runs
+    """
+    return tuple(dict.fromkeys(assertion.parent_key for assertion in spec.assertions if assertion.kind == REFERENCES))
+
+
+def _table_path(dataset_id, table_id):
+    return "`{}.{}.{}`".format(common.BQ_PROJECT_ID, dataset_id, table_id)
+
+
+def _literal(value):
+    return repr(value) if isinstance(value, (int, float)) else '"{}"'.format(value)
+
+
+def _failing_rows(assertion, parents):
+    columns = ["checked." + column for column in assertion.columns]
+    if assertion.kind == NOT_EMPTY:
+        return "IF(COUNT(*) = 0, 1, 0)"
+    if assertion.kind == UNIQUE:
+        # Single-column keys too: COUNT(DISTINCT) skips NULLs, so every NULL key would count as a duplicate. As JSON,
+        # NULL keys compare equal to each other but not to "", and no column's value can run into the next one's
+        return "COUNT(*) - COUNT(DISTINCT TO_JSON_STRING(STRUCT({})))".format(", ".join(columns))
+    if assertion.kind == NOT_NULL:
+        return "COUNTIF({})".format(" OR ".join("{} IS NULL".format(column) for column in columns))
+    if assertion.kind == REFERENCES:
+        return "COUNTIF({} IS NOT NULL AND {}.__key IS NULL)".format(columns[0], parents[assertion.name])
+    if assertion.kind == IN_RANGE:
+        bounds = []
+        if assertion.min_value is not None:
+            bounds.append("{} < {}".format(columns[0], _literal(assertion.min_value)))
+        if assertion.max_value is not None:
+            bounds.append("{} > {}".format(columns[0], _literal(assertion.max_value)))
+        return "COUNTIF({})".format(" OR ".join(bounds) or "FALSE")
+    raise ValueError("Unknown assertion kind '{}'".format(assertion.kind))
+
+
+def compile_check(spec, table_specs):
+    """
+    Returns the Jinja-templated BigQuery SQL evaluating all of `spec`'s assertions in one scan of its run's rows
+
+    The single result row holds `__row_count`, then one column per assertion (named after it) with its failing rows.
+    """
+    specs_by_key = {table_spec.key: table_spec for table_spec in table_specs}
+    table_id, filters = spec.checked_table_id, spec.checked_partition_filters
+    parents = {}
+    ctes = []
+    for assertion in spec.assertions:
+        if assertion.kind != REFERENCES:
+            continue
+        parent_spec = specs_by_key[assertion.parent_key]
+        parent_table_id, parent_filters = parent_spec.checked_table_id, parent_spec.checked_partition_filters
+        cte_name = "component_parent_{}".format(len(ctes))
+        parents[assertion.name] = cte_name
+        ctes.append("\n".join([
+            "{} AS".format(cte_name),
+            "(",
+            "    SELECT DISTINCT",
+            "        {}    AS __key,".format(assertion.parent_column),
+            "    FROM {}".format(_table_path(parent_spec.dataset_id, parent_table_id)),
+            "    WHERE 1=1",
+        ] + ["        AND {}".format(parent_filter) for parent_filter in parent_filters] + [")"]))
+
+    lines = [
+        "-- Data-quality check for `{}.{}`, generated by `quality.compile_check` from its table spec".format(spec.dataset_id, table_id),
+        "-- One scan of the run's rows; each column after `{}` is the number of rows failing that assertion".format(ROW_COUNT_COLUMN),
+        "",
+    ]
+    if ctes:
+        lines += ["WITH", ",\n\n".join(ctes), ""]
+    lines.append("SELECT")
+    lines.append("    COUNT(*)    AS {},".format(ROW_COUNT_COLUMN))
+    lines += ["    {}    AS {},".format(_failing_rows(assertion, parents), assertion.name) for assertion in spec.assertions]
+    lines.append("FROM {}    AS checked".format(_table_path(spec.dataset_id, table_id)))
+    for assertion in spec.assertions:
+        if assertion.kind == REFERENCES:
+            lines.append("LEFT JOIN {0}\n    ON  {0}.__key = checked.{1}".format(parents[assertion.name], assertion.columns[0]))
+    lines.append("WHERE 1=1")
+    lines += ["    AND checked.{}".format(table_filter) for table_filter in filters]
+    lines.append(";")
+    return "\n".join(lines) + "\n"
+
+
+def evaluate(assertions, row):
+    """
+    Returns one result dict per assertion from the check query's result row
+    """
+    row_count = row[0]
+    results = []
+    for assertion, failing_rows in zip(assertions, row[1:]):
+        results.append({
+            "assertion": assertion.name,
+            "kind": assertion.kind,
+            "severity": assertion.severity,
+            "row_count": row_count,
+            "failing_rows": failing_rows,
+            "passed": failing_rows == 0,
+        })
+    return results
+
+
+def failures(results):
+    """
+    Returns the results that should fail the check task
+    """
+    return [result for result in results if not result["passed"] and result["severity"] == ERROR]
+
+
+def format_results(table, results):
+    lines = ["{}: {:,} rows checked".format(table, results[0]["row_count"] if results else 0)]
+    for result in results:
+        status = "PASS" if result["passed"] else result["severity"].upper()
+        lines.append("  {:<5} {:<45} {:>12,} failing rows".format(status, result["assertion"], result["failing_rows"]))
+    return "\n".join(lines)
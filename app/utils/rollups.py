@@ -0,0 +1,264 @@
+"""
+Gold rollups
+
+Every gold row carries its `month_start_date`, `quarter_start_date` and `year_start_date`, so monthly, quarterly and
+yearly dashboards used to sum the whole daily customer (or product) x date spine on every query. Each gold table now
+has a rollup per grain of `common.BQ_ROLLUP_SUFFIXES` (see `specs.rollup_specs`), each summed from the one before:
+
+    sales_performance_customers_daily -> _monthly -> _quarterly -> _yearly
+
+A rollup row holds one bucket of one customer (or product), keyed on the bucket's first day as its `date`, with the
+start dates of its grain and the coarser ones. Measures are summed, dimension attributes are those of the bucket's
+latest row. Each run's MERGE recomputes the buckets holding the dates its gold table recomputed (the lookback window, or
+every date from `backfill_start_date`), from the rows of the finer table in those buckets only.
+
+The MERGE and `CREATE TABLE` scripts are generated here from the gold table's DDL, so the rollups never drift from it.
+`route` picks the coarsest table answering a date range at a grain, and `routed_query` writes the query against its
+`_latest` view.
+
+Usage:
+    python utils/rollups.py             # rewrites the rollup MERGE and DDL scripts
+    python utils/rollups.py --check     # exits non-zero when a script is out of date
+    python utils/rollups.py --route sales_performance_customers_daily --start 2025-01-01 --end 2025-06-30 --grain MONTH
+"""
+import argparse
+import datetime
+import os
+import sys
+
+import common
+import ddl
+import specs
+import sql_registry
+
+APP_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+DEFAULT_DAGS_DIR = os.path.join(APP_DIR, "dags")
+
+DAY = "DAY"
+GRAINS = (DAY,) + tuple(common.BQ_ROLLUP_SUFFIXES)
+
+# Grain -> column holding the first day of a row's bucket of that grain
+START_DATE_COLUMNS = {
+    DAY: "date",
+    "MONTH": "month_start_date",
+    "QUARTER": "quarter_start_date",
+    "YEAR": "year_start_date",
+}
+
+# Gold columns summed into a bucket, the others are dimension attributes
+MEASURE_PREFIXES = ("quantity_sold_", "quantity_returned_", "revenue_", "cost_of_goods_sold_", "discount_", "gross_profit_", "net_profit_")
+
+
+def daily_spec(spec, table_specs=specs.TABLE_SPECS):
+    """
+    Returns the gold spec `spec` rolls up, following its chain of finer rollups
+    """
+    while spec.rollup_grain:
+        spec = specs.get_spec(spec.upstream[0], table_specs)
+    return spec
+
+
+def rollups_of(spec, table_specs=specs.TABLE_SPECS):
+    """
+    Returns the rollups of the gold spec `spec`, finest first
+    """
+    return [rollup for rollup in table_specs if rollup.rollup_grain and daily_spec(rollup, table_specs) == spec]
+
+
+def daily_columns(spec, dags_dir=DEFAULT_DAGS_DIR, table_specs=specs.TABLE_SPECS):
+    """
+    Returns the (name, column definition line) of each column of the gold table `spec` rolls up, from its DDL
+    """
+    daily = daily_spec(spec, table_specs)
+    source = sql_registry.REGISTRY.get_source(ddl.find_ddl(daily.layer, daily.checked_table_id, dags_dir))
+    return [(line.split()[0], line) for line in ddl.parse_ddl(source)[1]]
+
+
+def rollup_columns(spec, dags_dir=DEFAULT_DAGS_DIR, table_specs=specs.TABLE_SPECS):
+    """
+    Returns the (name, column definition line) of each column of the rollup `spec`: the gold table's, less the start
+    dates of finer grains
+    """
+    finer = {START_DATE_COLUMNS[grain] for grain in GRAINS[1:GRAINS.index(spec.rollup_grain)]}
+    return [(name, line) for name, line in daily_columns(spec, dags_dir, table_specs) if name not in finer]
+
+
+def _select_line(expression, alias=None):
+    line = "            {}".format(expression)
+    return "{} AS {},".format(line.ljust(55), alias) if alias else line + ","
+
+
+def rollup_merge_sql(spec, dags_dir=DEFAULT_DAGS_DIR, table_specs=specs.TABLE_SPECS):
+    """
+    Returns the Jinja-templated MERGE recomputing the rollup `spec`'s buckets for the run, see the module docstring
+    """
+    grain, source = spec.rollup_grain, specs.get_spec(spec.upstream[0], table_specs)
+    daily, bucket_column = daily_spec(spec, table_specs), START_DATE_COLUMNS[spec.rollup_grain]
+    keys = set(spec.cluster_fields)
+
+    select_lines = [_select_line(bucket_column, "date")]
+    for name, _ in rollup_columns(spec, dags_dir, table_specs):
+        if name in ("date", "execution_ts"):
+            continue
+        if name in keys or name in START_DATE_COLUMNS.values():
+            select_lines.append(_select_line(name))
+        elif name.startswith(MEASURE_PREFIXES):
+            select_lines.append(_select_line("SUM({})".format(name), name))
+        else:
+            select_lines.append(_select_line("MAX_BY({}, date)".format(name), name))
+
+    lines = [
+        "-- {} rollup of `{}`, generated by `rollups.rollup_merge_sql`".format(grain.capitalize(), daily.table_id),
+        "-- Recomputes the buckets holding the dates `{}` recomputed for the run, from the rows of".format(daily.checked_table_id),
+        "-- `{}` in those buckets only, and swaps them into `{}`.".format(source.checked_table_id, spec.checked_table_id),
+        '-- Backfill mode: trigger the DAG with {"backfill_start_date": "YYYY-MM-DD"} to rebuild every bucket from that day onwards.',
+        "{%- if params.backfill_start_date %}",
+        "    {%- set range_start = 'DATE(\"' ~ params.backfill_start_date ~ '\")' %}",
+        "{%- else %}",
+        "    {%- set range_start = 'DATE_SUB(DATE(\"' ~ ds ~ '\"), INTERVAL ' ~ params.lookback_days ~ ' DAY)' %}",
+        "{%- endif %}",
+        "{{%- set bucket_start = 'DATE_TRUNC(' ~ range_start ~ ', {})' %}}".format(grain),
+        "{{%- set bucket_end = 'DATE_TRUNC(DATE(\"' ~ ds ~ '\"), {})' %}}".format(grain),
+        "",
+        "MERGE `{}.{}.{}`   AS target".format(common.BQ_PROJECT_ID, spec.dataset_id, spec.checked_table_id),
+        "USING",
+        "(",
+        "    WITH",
+        "        module_{}_rollup AS".format(grain.lower()),
+        "        (",
+        "            SELECT",
+    ] + select_lines + [
+        "            FROM `{}.{}.{}`".format(common.BQ_PROJECT_ID, source.dataset_id, source.checked_table_id),
+        "            WHERE 1=1",
+        "                -- Partition pruning, every row of a bucket is dated within it",
+        "                AND date >= {{ bucket_start }}",
+        "                AND {} BETWEEN {{{{ bucket_start }}}} AND {{{{ bucket_end }}}}".format(bucket_column),
+        "            GROUP BY ALL",
+        "        )",
+        "",
+        "    SELECT",
+        "        *,",
+        '        TIMESTAMP("{{ ts }}")   AS execution_ts,',
+        "    FROM module_{}_rollup".format(grain.lower()),
+        ")   AS source",
+        "-- Never matches, so every row of the recomputed buckets is deleted and re-inserted in one atomic statement",
+        "ON FALSE",
+        "WHEN NOT MATCHED BY SOURCE",
+        "    AND target.date BETWEEN {{ bucket_start }} AND {{ bucket_end }}",
+        "    THEN DELETE",
+        "WHEN NOT MATCHED BY TARGET",
+        "    THEN INSERT ROW",
+        ";",
+    ]
+    return "\n".join(lines) + "\n"
+
+
+def rollup_ddl(spec, dags_dir=DEFAULT_DAGS_DIR, table_specs=specs.TABLE_SPECS):
+    """
+    Returns the `CREATE TABLE` script of the rollup `spec`
+    """
+    comment_lines = ["-- {} rollup of `{}`, one row per bucket and {}, generated by `rollups.rollup_ddl`".format(
+        spec.rollup_grain.capitalize(), daily_spec(spec, table_specs).table_id, spec.cluster_fields[0])]
+    return ddl.table_ddl(spec, comment_lines, [line for _, line in rollup_columns(spec, dags_dir, table_specs)])
+
+
+def rollup_scripts(spec, dags_dir=DEFAULT_DAGS_DIR, table_specs=specs.TABLE_SPECS):
+    """
+    Returns {path: contents} of the rollup `spec`'s generated scripts
+    """
+    ddl_path = os.path.join(dags_dir, common.SQL_WORKFLOWS_DIR, spec.layer, "ddl_sql", spec.checked_table_id + "_init.sql")
+    return {
+        os.path.join(dags_dir, spec.sql_dir, spec.insert_sql_file): rollup_merge_sql(spec, dags_dir, table_specs),
+        ddl_path: rollup_ddl(spec, dags_dir, table_specs),
+    }
+
+
+def bucket_start(day, grain):
+    if grain == "MONTH":
+        return day.replace(day=1)
+    if grain == "QUARTER":
+        return day.replace(month=(day.month - 1) // 3 * 3 + 1, day=1)
+    if grain == "YEAR":
+        return day.replace(month=1, day=1)
+    return day
+
+
+def bucket_end(day, grain):
+    if grain == DAY:
+        return day
+    following = bucket_start(day, grain) + datetime.timedelta(days=366 if grain == "YEAR" else 93 if grain == "QUARTER" else 31)
+    return bucket_start(following, grain) - datetime.timedelta(days=1)
+
+
+def route(key, start_date, end_date, grain=None, table_specs=specs.TABLE_SPECS):
+    """
+    Returns the spec of the coarsest table answering a query of the gold table `key` over `start_date` to `end_date`
+    inclusive, grouped by `grain`, or totalled over the range when None
+
+    A rollup answers it when its grain is no coarser than `grain` and its buckets tile the range exactly, e.g. January
+    to June by month or in total reads the quarterly rollup, while January 15th to February 14th reads the daily table.
+    """
+    daily = specs.get_spec(key, table_specs)
+    routed = daily
+    for rollup in rollups_of(daily, table_specs):
+        if grain and GRAINS.index(rollup.rollup_grain) > GRAINS.index(grain):
+            break
+        if bucket_start(start_date, rollup.rollup_grain) != start_date or bucket_end(end_date, rollup.rollup_grain) != end_date:
+            break
+        routed = rollup
+    return routed
+
+
+def routed_query(key, start_date, end_date, grain=None, measures=("revenue_total", "net_profit_total"), table_specs=specs.TABLE_SPECS):
+    """
+    Returns the query summing `measures` per key of the gold table `key` (and per `grain` bucket) over the range,
+    against the `_latest` view of the table `route` picks
+    """
+    spec = route(key, start_date, end_date, grain, table_specs)
+    group_columns = ([START_DATE_COLUMNS[grain]] if grain else []) + [spec.cluster_fields[0]]
+    lines = ["-- Reads `{}`, generated by `rollups.routed_query`".format(spec.latest_view_id), "SELECT"]
+    lines += ["    {},".format(column) for column in group_columns]
+    lines += ["    SUM({0}) AS {0},".format(measure) for measure in measures]
+    lines += [
+        "FROM `{}.{}.{}`".format(common.BQ_PROJECT_ID, spec.dataset_id, spec.latest_view_id),
+        "WHERE 1=1",
+        '    AND date BETWEEN DATE("{}") AND DATE("{}")'.format(start_date.isoformat(), end_date.isoformat()),
+        "GROUP BY ALL",
+        ";",
+    ]
+    return "\n".join(lines) + "\n"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dags-dir", default=DEFAULT_DAGS_DIR)
+    parser.add_argument("--check", action="store_true", help="only report scripts that differ from the generated ones")
+    parser.add_argument("--route", metavar="KEY", help="print the query of this gold table over --start to --end instead")
+    parser.add_argument("--start", type=datetime.date.fromisoformat, help="first date of the routed query")
+    parser.add_argument("--end", type=datetime.date.fromisoformat, help="last date of the routed query")
+    parser.add_argument("--grain", choices=GRAINS, help="buckets the routed query groups by, a total over the range by default")
+    args = parser.parse_args()
+
+    if args.route:
+        print(routed_query(args.route, args.start, args.end, args.grain), end="")
+        return
+
+    stale = []
+    for spec in specs.GOLD_TABLES:
+        if not spec.rollup_grain:
+            continue
+        for path, contents in rollup_scripts(spec, args.dags_dir).items():
+            if os.path.exists(path) and sql_registry.REGISTRY.get_source(path) == contents:
+                continue
+            stale.append(path)
+            if not args.check:
+                with open(path, "w") as script_file:
+                    script_file.write(contents)
+            print("{} {}".format("stale" if args.check else "wrote", os.path.relpath(path, args.dags_dir)))
+
+    if args.check and stale:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
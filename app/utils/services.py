@@ -1,3 +1,5 @@
+import sql_registry
+
 def build_gcs_object_path(gcs_subdir, gcs_filename, file_format):
     """
     Returns string representation of 'gcs_subdir/gcs_filename.file_format'
@@ -19,6 +21,8 @@ def build_path(list_of_path_segments):
 def get_query(input_list):
     """
     Given a list of strings ["path", "to_this", "query"], returns the file contents of the query
+
+    Contents are served from the shared `sql_registry.REGISTRY`, so the file is only read again after it changes
     """
     path_to_query = build_path(input_list)
-    return open(path_to_query, 'r').read()
+    return sql_registry.REGISTRY.get_source(path_to_query)
@@ -0,0 +1,629 @@
+"""
+Table specifications
+
+Every table the pipeline loads is declared once here. `pipeline.build_pipeline` turns these specs into the Airflow
+task graph, so adding an entity or tuning a table (job priority, slot reservation, partitioning) is a config change
+rather than another hand-written block in `dags/dag.py`.
+
+This module must stay free of Airflow imports so local tooling can read the specs without an Airflow install.
+"""
+import datetime
+from dataclasses import dataclass
+
+import common
+import quality
+
+BRONZE = "bronze"
+SILVER = "silver"
+GOLD = "gold"
+
+FULL_LOAD = "full"
+INCREMENTAL_LOAD = "incremental"
+HISTORY_LOAD = "history"
+
+# What a query job whose dry-run estimate exceeds its table's `bytes_budget` does, see `budget.py`
+OVER_BUDGET_BLOCK = "block"             # fails before the job is submitted
+OVER_BUDGET_DOWNGRADE = "downgrade"     # runs at BATCH priority, capped at a multiple of the budget
+
+# Kinds of task a table is built from, see `plan_tasks`
+CONVERT_TASK = "convert"        # converts the landing CSV export into the run's Parquet partition
+EXTERNAL_TASK = "external"      # (re)creates the external table over the landing file
+QUERY_TASK = "query"            # writes the query result into the table's partition for the run
+SCRIPT_TASK = "script"          # runs a DML script that manages its own destination, e.g. MERGE
+CHECK_TASK = "check"            # evaluates the table's data-quality assertions in one scan, see `quality.py`
+VIEW_TASK = "view"              # repoints the table's `_latest` view at the rows the run wrote, see `ddl.py`
+FINGERPRINT_TASK = "fingerprint"                # hashes the run's inputs and picks a branch, see `fingerprints.py`
+CARRY_FORWARD_TASK = "carry_forward"            # copies the previous run's partition when the inputs are unchanged
+FINGERPRINT_UPDATE_TASK = "fingerprint_update"  # records the run's fingerprint once either branch has succeeded
+
+# Task loading every `pipeline.batched_load_specs` table in one script job, see `common.BRONZE_BATCHED_LOADS`
+BATCHED_LOAD_TASK_ID = "bronze_batched_load"
+
+# Branches following a FINGERPRINT_TASK, only one of which runs
+LOAD_BRANCH = "load"
+CARRY_FORWARD_BRANCH = "carry_forward"
+
+# BigQuery partition decorator (the `$...` suffix on a table ID) for each supported partition granularity
+PARTITION_DECORATORS = {
+    "HOUR": "{{ logical_date.strftime('%Y%m%d%H') }}",
+    "DAY": "{{ ds_nodash }}",
+    "MONTH": "{{ logical_date.strftime('%Y%m') }}",
+    "YEAR": "{{ logical_date.strftime('%Y') }}",
+}
+
+
+@dataclass(frozen=True)
+class TableSpec:
+    """
+    Declarative description of one pipeline table
+
+    - `key`: name other specs use in `upstream`, e.g. `common.CUSTOMERS` or `common.BQ_DIM_CUSTOMERS`
+    - `task_prefix`: tasks are named `<task_prefix>_load`, `_quality_check`, for bronze `_convert`, `_external`, and
+      for silver/gold `_latest_view`
+    - `sql_dir`/`sql_file`: insert query for the table, relative to the DAG folder
+    - `upstream`: keys of the tables that must be loaded (and checked) first
+    - `assertions`: data-quality rules checked after every load, see `quality.py`. `references` rules also make the
+      check wait for the referenced table
+    - `priority`: BigQuery job priority, BATCH or INTERACTIVE
+    - `priority_weight`: Airflow scheduling weight of the table's tasks
+    - `reservation`: BigQuery slot reservation to run the table's jobs in, if any
+    - `partition_field`/`partition_type`: time partitioning of the destination table
+    - `cluster_fields`: clustering columns of the table, most filtered first. Queries filtering on them only read the
+      matching blocks of each partition
+    - `partition_expiration_days`: partitions older than this are dropped by BigQuery, none when None
+    - `archive_after_days`: partitions whose day is older than this before the run are exported as Parquet to the archive
+      prefix and dropped from the table by the lifecycle DAG, and stay readable through `<table>_all`, see
+      `lifecycle.py`. None keeps every partition hot
+    - `require_partition_filter`: queries without a filter on the partition column are rejected instead of scanning
+      every partition. Analysts read current rows through the `<table_id>_latest` view instead
+    - `load_mode`: FULL_LOAD rewrites the run's partition with `sql_file`. INCREMENTAL_LOAD runs `incremental_sql_file`
+      instead: bronze only loads new rows and rows whose columns hash differently from their latest version since the
+      last full snapshot in `load_watermarks`, any column counting, while silver/gold MERGE the recomputed dates into
+      `<table_id>_incremental`. HISTORY_LOAD (silver only) MERGEs the run's bronze snapshot into
+      an unpartitioned slowly changing dimension (type 2) table, one row per version with `valid_from`/`valid_to`
+    - `full_snapshot_day`: incremental bronze only. Day of the month on which a full copy is taken anyway, which bounds
+      how many deltas downstream tables have to merge and how long rows deleted from the source stay
+    - `lookback_days`: incremental silver/gold only. Days before the run date that are recomputed as well, to pick up
+      late changes such as returns
+    - `landing_format`: bronze only. `common.LANDING_FORMAT_PARQUET` converts the CSV export to Parquet first and reads
+      it through the Hive-partitioned `<key>_landing` external table (see `landing.py`); `common.LANDING_FORMAT_CSV`
+      reads the export through the autodetected `<key>_external` table
+    - `bytes_budget`: bytes a query job of the table may process, checked against a dry run before each load (and
+      carry-forward) is submitted. None skips the dry run
+    - `over_budget`: OVER_BUDGET_BLOCK or OVER_BUDGET_DOWNGRADE, applied when the estimate exceeds `bytes_budget`.
+      OVER_BUDGET_DOWNGRADE tables must run at INTERACTIVE `priority`, for BATCH to be a downgrade, or the spec raises
+      ValueError
+    - `skip_unchanged`: FULL_LOAD tables only. Each run fingerprints its inputs (the landing file's checksum for
+      bronze, the upstream tables' fingerprints otherwise) and, when they match the previous run's, copies that run's
+      partition instead of converting, loading and checking it again. Upstream tables without it count as changed on
+      every run, see `fingerprints.py`
+    - `rollup_grain`: gold rollups only. MONTH, QUARTER or YEAR: each row sums the rows of its `upstream` table, one
+      grain finer, over one bucket whose first day is its `date`, see `rollups.py`
+    """
+    key: str
+    layer: str
+    dataset_id: str
+    table_id: str
+    task_prefix: str
+    sql_dir: str
+    sql_file: str
+    upstream: tuple = ()
+    assertions: tuple = ()
+    priority: str = "BATCH"
+    priority_weight: int = 1
+    reservation: str = None
+    partition_field: str = "execution_ts"
+    partition_type: str = "DAY"
+    load_mode: str = FULL_LOAD
+    incremental_sql_file: str = None
+    full_snapshot_day: int = None
+    lookback_days: int = 0
+    landing_format: str = None
+    cluster_fields: tuple = ()
+    partition_expiration_days: int = None
+    archive_after_days: int = None
+    require_partition_filter: bool = False
+    skip_unchanged: bool = False
+    bytes_budget: int = None
+    over_budget: str = OVER_BUDGET_BLOCK
+    rollup_grain: str = None
+
+    def __post_init__(self):
+        if self.over_budget == OVER_BUDGET_DOWNGRADE and self.priority != "INTERACTIVE":
+            raise ValueError("'{}' downgrades over-budget jobs to BATCH priority, so it must run at INTERACTIVE priority, not {}".format(
+                self.key, self.priority))
+
+    @property
+    def load_task_id(self):
+        return self.task_prefix + "_load"
+
+    @property
+    def is_incremental(self):
+        return self.load_mode == INCREMENTAL_LOAD
+
+    @property
+    def insert_sql_file(self):
+        return self.incremental_sql_file if self.is_incremental else self.sql_file
+
+    @property
+    def is_history(self):
+        return self.load_mode == HISTORY_LOAD
+
+    @property
+    def incremental_table_id(self):
+        return self.table_id + common.BQ_INCREMENTAL_SUFFIX
+
+    @property
+    def is_parquet_landing(self):
+        return self.landing_format == common.LANDING_FORMAT_PARQUET
+
+    @property
+    def external_table_id(self):
+        return self.key + (common.BQ_LANDING_SUFFIX if self.is_parquet_landing else common.BQ_LOAD_SUFFIX)
+
+    @property
+    def checked_table_id(self):
+        """
+        Table the run's rows are written to, which `assertions` are checked against
+        """
+        return self.table_id if self.is_snapshot or self.is_history else self.incremental_table_id
+
+    @property
+    def checked_partition_filters(self):
+        """
+        Filters selecting the rows the run wrote. Incremental silver/gold tables are date-partitioned and MERGEd, so
+        those are the rows it rewrote within the lookback window, or within its buckets for rollups. History tables are
+        checked on their current versions
+        """
+        if self.is_history:
+            return ["is_current"]
+        if self.rollup_grain:
+            # Buckets are keyed on their first day, which can precede the lookback window
+            return [
+                'date BETWEEN DATE_TRUNC(DATE_SUB(DATE("{{{{ ds }}}}"), INTERVAL {} DAY), {}) AND DATE("{{{{ ds }}}}")'.format(
+                    self.lookback_days, self.rollup_grain),
+                'execution_ts = TIMESTAMP("{{ ts }}")',
+            ]
+        if not self.is_snapshot:
+            return [
+                'date BETWEEN DATE_SUB(DATE("{{{{ ds }}}}"), INTERVAL {} DAY) AND DATE("{{{{ ds }}}}")'.format(self.lookback_days),
+                'execution_ts = TIMESTAMP("{{ ts }}")',
+            ]
+        return ['{} = TIMESTAMP("{{{{ ts }}}}")'.format(self.partition_field)]
+
+    @property
+    def partition_decorator(self):
+        return PARTITION_DECORATORS[self.partition_type]
+
+    @property
+    def is_snapshot(self):
+        """
+        Whether each run writes its rows into its own `execution_ts` partition, as opposed to MERGEing the recomputed
+        dates into the date-partitioned `<table_id>_incremental`, or the run's changes into a history table
+        """
+        return not (self.is_history or self.is_incremental and self.layer != BRONZE)
+
+    @property
+    def has_latest_view(self):
+        return self.layer != BRONZE
+
+    @property
+    def latest_view_id(self):
+        return self.table_id + common.BQ_LATEST_SUFFIX
+
+
+@dataclass(frozen=True)
+class TaskPlan:
+    """
+    One task of a table's build, independent of how it is executed (Airflow operator or local engine)
+    """
+    task_id: str
+    kind: str
+    spec: TableSpec
+    sql_dir: str = None
+    sql_file: str = None
+    branch: str = None
+
+
+def bronze_spec(entity, task_prefix, sql_insert, assertions, landing_format=common.LANDING_FORMAT, **tuning):
+    """
+    Returns the spec of a raw, daily partitioned bronze table sourced from `<entity>.<common.FILE_FORMAT>` in GCS
+    """
+    return TableSpec(
+        key = entity,
+        layer = BRONZE,
+        dataset_id = common.BQ_DATASET_BRONZE,
+        table_id = entity + common.BQ_RAW_SUFFIX,
+        task_prefix = task_prefix,
+        sql_dir = common.SQL_BRONZE,
+        sql_file = sql_insert,
+        assertions = assertions,
+        landing_format = landing_format,
+        archive_after_days = common.ARCHIVE_AFTER_DAYS_BRONZE,
+        **tuning
+    )
+
+
+def rollup_spec(spec, grain, source):
+    """
+    Returns the spec of the `grain` rollup of the gold table `spec`, summed from `source`: the rollup one grain finer,
+    or `spec` itself for the monthly one. The MERGE recomputing its buckets is generated by `rollups.py`
+    """
+    table_id = spec.table_id.replace(common.BQ_DAILY_SUFFIX, common.BQ_ROLLUP_SUFFIXES[grain])
+    return TableSpec(
+        key = table_id,
+        layer = GOLD,
+        dataset_id = spec.dataset_id,
+        table_id = table_id,
+        task_prefix = spec.task_prefix + common.BQ_ROLLUP_SUFFIXES[grain],
+        sql_dir = common.SQL_GOLD,
+        sql_file = table_id + common.SQL_ROLLUP_MERGE_SUFFIX,
+        load_mode = INCREMENTAL_LOAD,
+        incremental_sql_file = table_id + common.SQL_ROLLUP_MERGE_SUFFIX,
+        rollup_grain = grain,
+        # Recomputes the buckets holding the dates the gold table recomputed
+        lookback_days = spec.lookback_days,
+        priority = spec.priority,
+        bytes_budget = spec.bytes_budget,
+        over_budget = spec.over_budget,
+        cluster_fields = spec.cluster_fields,
+        upstream = (source.key,),
+        assertions = (
+            quality.not_empty(),
+            quality.unique("date", *spec.cluster_fields),
+            quality.in_range("quantity_sold_total", min_value=0),
+        ),
+    )
+
+
+def rollup_specs(gold_specs):
+    """
+    Returns the month, quarter and year rollups of each of `gold_specs`, each summed from the one before
+    """
+    rollups = []
+    for spec in gold_specs:
+        source = spec
+        for grain in common.BQ_ROLLUP_SUFFIXES:
+            source = rollup_spec(spec, grain, source)
+            rollups.append(source)
+    return tuple(rollups)
+
+
+# Referenced tables are declared first, since a check waits on the tables its `references` rules point at
+BRONZE_TABLES = (
+    bronze_spec(common.SUPPLIERS, "bronze_suppliers", common.SQL_BRONZE_SUPPLIERS, (
+        quality.not_empty(),
+        quality.unique("sup_id"),
+        quality.in_range("lead_tm", min_value=0),
+    ), skip_unchanged = True),
+    bronze_spec(common.CUSTOMERS, "bronze_customer", common.SQL_BRONZE_CUSTOMERS, (
+        quality.not_empty(),
+        quality.unique("cust_id"),
+        quality.in_range("cred_lim", min_value=0),
+    ), skip_unchanged = True),
+    bronze_spec(common.PRODUCTS, "bronze_products", common.SQL_BRONZE_PRODUCTS, (
+        quality.not_empty(),
+        quality.unique("prod_id"),
+        quality.references("sup_id", common.SUPPLIERS),
+        quality.in_range("list_pr", min_value=0),
+    ), skip_unchanged = True),
+    # Incremental: a day without new source rows is a valid empty delta, so no `not_empty`
+    bronze_spec(common.SALES_ORDERS, "bronze_sales_order", common.SQL_BRONZE_SALES_ORDERS, (
+        quality.unique("ord_id"),
+        quality.not_null("cust_id", "ord_dt"),
+        quality.references("cust_id", common.CUSTOMERS),
+        quality.in_range("tot_amt", min_value=0),
+    ), load_mode = INCREMENTAL_LOAD, incremental_sql_file = common.SQL_BRONZE_SALES_ORDERS_INCREMENTAL, full_snapshot_day = 1),
+    bronze_spec(common.ORDER_LINE_ITEMS, "bronze_line", common.SQL_BRONZE_LINE, (
+        quality.unique("line_id"),
+        quality.not_null("ord_id", "prod_id", "crt_dt"),
+        quality.references("prod_id", common.PRODUCTS),
+        quality.in_range("quan", min_value=0),
+        quality.in_range("disc_pct", min_value=0, max_value=1),
+    ), load_mode = INCREMENTAL_LOAD, incremental_sql_file = common.SQL_BRONZE_LINE_INCREMENTAL, full_snapshot_day = 1),
+)
+
+SILVER_TABLES = (
+    # Slowly changing dimensions (type 2): one row per version of a supplier or product, so point-in-time questions
+    # read one small table instead of every daily snapshot. Daily-changing columns (stock levels, last order date) are
+    # left to the snapshots, they would add a version per key per day
+    TableSpec(
+        key = common.BQ_SUPPLIERS_HISTORY,
+        layer = SILVER,
+        dataset_id = common.BQ_DATASET_SILVER,
+        table_id = common.BQ_SUPPLIERS_HISTORY,
+        task_prefix = "silver_suppliers_history",
+        sql_dir = common.SQL_SILVER,
+        sql_file = common.SQL_SILVER_SUPPLIERS_HISTORY,
+        load_mode = HISTORY_LOAD,
+        cluster_fields = ("supplier_id", "valid_from"),
+        bytes_budget = common.BQ_BYTES_BUDGET_SILVER,
+        upstream = (common.SUPPLIERS,),
+        assertions = (
+            quality.not_empty(),
+            quality.unique("supplier_id"),
+        ),
+    ),
+    TableSpec(
+        key = common.BQ_PRODUCTS_HISTORY,
+        layer = SILVER,
+        dataset_id = common.BQ_DATASET_SILVER,
+        table_id = common.BQ_PRODUCTS_HISTORY,
+        task_prefix = "silver_products_history",
+        sql_dir = common.SQL_SILVER,
+        sql_file = common.SQL_SILVER_PRODUCTS_HISTORY,
+        load_mode = HISTORY_LOAD,
+        cluster_fields = ("product_id", "valid_from"),
+        bytes_budget = common.BQ_BYTES_BUDGET_SILVER,
+        upstream = (common.PRODUCTS,),
+        assertions = (
+            quality.not_empty(),
+            quality.unique("product_id"),
+        ),
+    ),
+    TableSpec(
+        key = common.BQ_DIM_CUSTOMERS,
+        layer = SILVER,
+        dataset_id = common.BQ_DATASET_SILVER,
+        table_id = common.BQ_DIM_CUSTOMERS,
+        task_prefix = "silver_dim_customers",
+        sql_dir = common.SQL_SILVER,
+        sql_file = common.SQL_SILVER_DIM_CUSTOMERS,
+        cluster_fields = ("customer_id",),
+        partition_expiration_days = common.BQ_SNAPSHOT_EXPIRATION_DAYS,
+        archive_after_days = common.ARCHIVE_AFTER_DAYS_SILVER,
+        require_partition_filter = True,
+        bytes_budget = common.BQ_BYTES_BUDGET_SILVER,
+        skip_unchanged = True,
+        upstream = (common.CUSTOMERS,),
+        assertions = (
+            quality.not_empty(),
+            quality.unique("customer_id"),
+        ),
+    ),
+    TableSpec(
+        key = common.BQ_DIM_PRODUCTS,
+        layer = SILVER,
+        dataset_id = common.BQ_DATASET_SILVER,
+        table_id = common.BQ_DIM_PRODUCTS,
+        task_prefix = "silver_dim_products",
+        sql_dir = common.SQL_SILVER,
+        sql_file = common.SQL_SILVER_DIM_PRODUCTS,
+        cluster_fields = ("product_id",),
+        partition_expiration_days = common.BQ_SNAPSHOT_EXPIRATION_DAYS,
+        archive_after_days = common.ARCHIVE_AFTER_DAYS_SILVER,
+        require_partition_filter = True,
+        bytes_budget = common.BQ_BYTES_BUDGET_SILVER,
+        skip_unchanged = True,
+        upstream = (common.PRODUCTS, common.SUPPLIERS),
+        assertions = (
+            quality.not_empty(),
+            quality.unique("product_id"),
+        ),
+    ),
+    TableSpec(
+        key = common.BQ_FACT_LINE_ITEM_SALES,
+        layer = SILVER,
+        dataset_id = common.BQ_DATASET_SILVER,
+        table_id = common.BQ_FACT_LINE_ITEM_SALES,
+        task_prefix = "silver_fact_line",
+        sql_dir = common.SQL_SILVER,
+        sql_file = common.SQL_SILVER_FACT_LINE,
+        cluster_fields = ("line_created_date", "customer_id", "product_id"),
+        partition_expiration_days = common.BQ_SNAPSHOT_EXPIRATION_DAYS,
+        archive_after_days = common.ARCHIVE_AFTER_DAYS_SILVER,
+        require_partition_filter = True,
+        bytes_budget = common.BQ_BYTES_BUDGET_SILVER,
+        upstream = (common.ORDER_LINE_ITEMS, common.SALES_ORDERS, common.BQ_PRODUCTS_HISTORY),
+        assertions = (
+            quality.unique("line_id"),
+            # Order and product columns come from LEFT JOINs, so lines whose order or product is missing from the
+            # run's bronze snapshot have none. Tracked rather than blocking until the source feeds are reconciled
+            quality.not_null("order_id", "product_id", severity = quality.WARN),
+            quality.references("customer_id", common.BQ_DIM_CUSTOMERS),
+            quality.references("product_id", common.BQ_DIM_PRODUCTS),
+            quality.in_range("line_quantity_sold", min_value=0),
+        ),
+    ),
+    # Line measures summed per sales channel, so gold and channel dashboards no longer pick them out of the line items
+    # one CASE WHEN per channel and measure. `fact_sales_channel_daily_wide` pivots it back to per-channel columns
+    TableSpec(
+        key = common.BQ_FACT_SALES_CHANNEL,
+        layer = SILVER,
+        dataset_id = common.BQ_DATASET_SILVER,
+        table_id = common.BQ_FACT_SALES_CHANNEL,
+        task_prefix = "silver_fact_channel",
+        sql_dir = common.SQL_SILVER,
+        sql_file = common.SQL_SILVER_FACT_CHANNEL,
+        cluster_fields = ("sales_channel", "date", "customer_id", "product_id"),
+        partition_expiration_days = common.BQ_SNAPSHOT_EXPIRATION_DAYS,
+        archive_after_days = common.ARCHIVE_AFTER_DAYS_SILVER,
+        require_partition_filter = True,
+        bytes_budget = common.BQ_BYTES_BUDGET_SILVER,
+        upstream = (common.BQ_FACT_LINE_ITEM_SALES,),
+        assertions = (
+            quality.unique("date", "customer_id", "product_id", "sales_channel", "is_line_discounted"),
+            quality.in_range("quantity_sold", min_value=0),
+        ),
+    ),
+)
+
+# Gold tables hold the date history, so their partitions never expire. Dashboards read them, so their jobs run at
+# INTERACTIVE priority, and an over-budget run still lands: at BATCH priority, on idle slots, and failing rather than
+# billing more than `common.BQ_DOWNGRADE_CEILING_FACTOR` times its budget. `require_partition_filter` stays off: the `_latest` view of a gold table is the
+# whole date history, and whole-history questions (e.g. a customer's lifetime revenue) are what analysts read it for,
+# pruned by the entity clustering instead. The MERGEs themselves do not need it, `WHEN NOT MATCHED BY SOURCE` bounds
+# the target to the recomputed dates
+GOLD_TABLES = (
+    TableSpec(
+        key = common.BQ_GOLD_CUSTOMERS_SALES,
+        layer = GOLD,
+        dataset_id = common.BQ_DATASET_GOLD,
+        table_id = common.BQ_GOLD_CUSTOMERS_SALES,
+        task_prefix = "gold_customers_perf",
+        sql_dir = common.SQL_GOLD,
+        sql_file = common.SQL_GOLD_CUSTOMERS_PERF,
+        load_mode = INCREMENTAL_LOAD,
+        incremental_sql_file = common.SQL_GOLD_CUSTOMERS_PERF_INCREMENTAL,
+        lookback_days = 7,
+        priority = "INTERACTIVE",
+        bytes_budget = common.BQ_BYTES_BUDGET_GOLD,
+        archive_after_days = common.ARCHIVE_AFTER_DAYS_GOLD,
+        over_budget = OVER_BUDGET_DOWNGRADE,
+        cluster_fields = ("customer_id",),
+        upstream = (common.BQ_DIM_CUSTOMERS, common.BQ_FACT_SALES_CHANNEL),
+        assertions = (
+            quality.not_empty(),
+            quality.unique("date", "customer_id"),
+            quality.in_range("quantity_sold_total", min_value=0),
+        ),
+    ),
+    TableSpec(
+        key = common.BQ_GOLD_PRODUCTS_SALES,
+        layer = GOLD,
+        dataset_id = common.BQ_DATASET_GOLD,
+        table_id = common.BQ_GOLD_PRODUCTS_SALES,
+        task_prefix = "gold_products_perf",
+        sql_dir = common.SQL_GOLD,
+        sql_file = common.SQL_GOLD_PRODUCTS_PERF,
+        load_mode = INCREMENTAL_LOAD,
+        incremental_sql_file = common.SQL_GOLD_PRODUCTS_PERF_INCREMENTAL,
+        lookback_days = 7,
+        priority = "INTERACTIVE",
+        bytes_budget = common.BQ_BYTES_BUDGET_GOLD,
+        archive_after_days = common.ARCHIVE_AFTER_DAYS_GOLD,
+        over_budget = OVER_BUDGET_DOWNGRADE,
+        cluster_fields = ("product_id",),
+        upstream = (common.BQ_DIM_PRODUCTS, common.BQ_FACT_SALES_CHANNEL),
+        assertions = (
+            quality.not_empty(),
+            quality.unique("date", "product_id"),
+            quality.in_range("quantity_sold_total", min_value=0),
+        ),
+    ),
+    TableSpec(
+        key = common.BQ_GOLD_CUSTOMER_PRODUCTS_SALES,
+        layer = GOLD,
+        dataset_id = common.BQ_DATASET_GOLD,
+        table_id = common.BQ_GOLD_CUSTOMER_PRODUCTS_SALES,
+        task_prefix = "gold_customer_products_perf",
+        sql_dir = common.SQL_GOLD,
+        # Incremental only, there is no full-rewrite variant of the bridge
+        sql_file = common.SQL_GOLD_CUSTOMER_PRODUCTS_PERF_INCREMENTAL,
+        load_mode = INCREMENTAL_LOAD,
+        incremental_sql_file = common.SQL_GOLD_CUSTOMER_PRODUCTS_PERF_INCREMENTAL,
+        lookback_days = 7,
+        priority = "INTERACTIVE",
+        bytes_budget = common.BQ_BYTES_BUDGET_GOLD,
+        archive_after_days = common.ARCHIVE_AFTER_DAYS_GOLD,
+        over_budget = OVER_BUDGET_DOWNGRADE,
+        cluster_fields = ("customer_id", "product_id"),
+        upstream = (common.BQ_DIM_CUSTOMERS, common.BQ_DIM_PRODUCTS, common.BQ_FACT_SALES_CHANNEL),
+        assertions = (
+            quality.not_empty(),
+            quality.unique("date", "customer_id", "product_id"),
+            quality.in_range("quantity_sold_total", min_value=0),
+        ),
+    ),
+)
+
+# Monthly and quarterly dashboards read these instead of summing the daily rows, see `rollups.route`. The bridge only
+# holds the pairs that sold, so its buckets would save little over its days
+GOLD_TABLES += rollup_specs(spec for spec in GOLD_TABLES if spec.key != common.BQ_GOLD_CUSTOMER_PRODUCTS_SALES)
+
+TABLE_SPECS = BRONZE_TABLES + SILVER_TABLES + GOLD_TABLES
+
+
+def get_spec(key, table_specs=TABLE_SPECS):
+    """
+    Returns the spec registered under `key`
+    """
+    for spec in table_specs:
+        if spec.key == key:
+            return spec
+    raise KeyError("No table spec registered under '{}'".format(key))
+
+
+def plan_tasks(spec):
+    """
+    Returns the ordered tasks that build one table
+
+    - Bronze: external table, raw load. Parquet landing specs convert the export first. Incremental specs end with a
+      high-water mark update, after the quality check.
+    - Silver/Gold: a single load. Incremental and history specs run a MERGE script instead of overwriting the run's
+      partition.
+    - Every table with `assertions` is checked right after its load, in a single scan.
+    - Silver/Gold: the `_latest` view is repointed last, so it only ever exposes checked rows.
+    - `skip_unchanged` specs start with a fingerprint of their inputs, which runs either the load and check
+      (LOAD_BRANCH) or a copy of the previous run's partition (CARRY_FORWARD_BRANCH), then records the fingerprint.
+    """
+    branch = LOAD_BRANCH if spec.skip_unchanged else None
+    plan = []
+    if spec.skip_unchanged:
+        plan.append(TaskPlan(spec.task_prefix + "_fingerprint", FINGERPRINT_TASK, spec))
+    if spec.layer == BRONZE:
+        if spec.is_parquet_landing:
+            plan.append(TaskPlan(spec.task_prefix + "_convert", CONVERT_TASK, spec, branch=branch))
+        plan.append(TaskPlan(spec.task_prefix + "_external", EXTERNAL_TASK, spec, branch=branch))
+        plan.append(TaskPlan(spec.load_task_id, QUERY_TASK, spec, spec.sql_dir, spec.insert_sql_file, branch))
+    else:
+        kind = SCRIPT_TASK if spec.is_incremental or spec.is_history else QUERY_TASK
+        plan.append(TaskPlan(spec.load_task_id, kind, spec, spec.sql_dir, spec.insert_sql_file, branch))
+
+    if spec.assertions:
+        plan.append(TaskPlan(spec.task_prefix + "_quality_check", CHECK_TASK, spec, branch=branch))
+    if spec.skip_unchanged:
+        plan.append(TaskPlan(spec.task_prefix + "_carry_forward", CARRY_FORWARD_TASK, spec, branch=CARRY_FORWARD_BRANCH))
+        plan.append(TaskPlan(spec.task_prefix + "_fingerprint_update", FINGERPRINT_UPDATE_TASK, spec))
+    if spec.has_latest_view:
+        plan.append(TaskPlan(spec.task_prefix + "_latest_view", VIEW_TASK, spec))
+    if spec.layer == BRONZE and spec.is_incremental:
+        plan.append(TaskPlan(spec.task_prefix + "_watermark_update", SCRIPT_TASK, spec, common.SQL_BRONZE, common.SQL_BRONZE_WATERMARK_UPDATE))
+    return plan
+
+
+def rebuild_tasks(spec):
+    """
+    Returns the tasks a backfill runs for `spec`: its load branch only, since a rebuild always recomputes
+    """
+    return [step for step in plan_tasks(spec) if step.kind not in (FINGERPRINT_TASK, CARRY_FORWARD_TASK, FINGERPRINT_UPDATE_TASK)]
+
+
+def query_params(spec, table_specs=TABLE_SPECS):
+    """
+    Returns the Jinja `params` every query for `spec` is rendered with
+
+    - `source_table`: the spec's own table ID
+    - `full_snapshot_day`, `lookback_days`: see `TableSpec`
+    - `backfill_start_date`: when set, e.g. through the triggering run's conf, incremental silver/gold queries
+      recompute every date from this day onwards instead of only the lookback window, and history MERGEs first rewind
+      their versions to that day
+    - `incremental_sources`: upstream keys loaded incrementally, whose deltas the query must merge itself
+    - `landing_format`: see `TableSpec`; bronze queries read `<key>_landing` filtered on the run's `landing_date` for
+      Parquet, or `<key>_external` for CSV
+    """
+    return {
+        "source_table": spec.table_id,
+        "full_snapshot_day": spec.full_snapshot_day,
+        "lookback_days": spec.lookback_days,
+        "backfill_start_date": None,
+        "incremental_sources": [key for key in spec.upstream if get_spec(key, table_specs).is_incremental],
+        "landing_format": spec.landing_format,
+    }
+
+
+def render_context(run_date, table_spec=None, table_specs=TABLE_SPECS, params=None):
+    """
+    Returns the subset of the Airflow template context the SQL uses, for a daily run on `run_date`
+    """
+    logical_date = datetime.datetime.combine(run_date, datetime.time(), tzinfo=datetime.timezone.utc)
+    context = {
+        "ds": logical_date.strftime("%Y-%m-%d"),
+        "ds_nodash": logical_date.strftime("%Y%m%d"),
+        "ts": logical_date.isoformat(),
+        "ts_nodash": logical_date.strftime("%Y%m%dT%H%M%S"),
+        "logical_date": logical_date,
+        "params": dict(query_params(table_spec, table_specs)) if table_spec else {},
+    }
+    context["params"].update(params or {})
+    return context
@@ -0,0 +1,122 @@
+"""
+SQL template registry
+
+Indexes every script under `sql_workflows/{bronze,silver,gold}/{ddl_sql,dml_sql,test_sql}` once per process.
+Sources are cached by path and mtime. A lookup costs one `stat`; a file is only read again after it changes on disk.
+A single registry (`REGISTRY`) is shared by every operator built in the process, so a DAG parse reads no SQL files.
+
+What this saves at parse time is file I/O, not Jinja compilation: operators are handed the raw source, and Airflow
+renders it with its own Jinja environment when the task runs. The compiled templates cached by `get_template` only
+serve the SQL rendered in-process, by `render`, e.g. the local engine, BigQuery backfills and micro-batches.
+"""
+import os
+import threading
+
+import jinja2
+
+import common
+
+LAYERS = ("bronze", "silver", "gold")
+KINDS = ("ddl_sql", "dml_sql", "test_sql")
+
+
+class SqlRegistry:
+    """
+    Path/mtime keyed cache of SQL sources and their compiled Jinja templates
+    """
+
+    def __init__(self):
+        self._entries = {}          # abs path -> (mtime_ns, source, template or None)
+        self._indexed_roots = set()
+        self._lock = threading.Lock()
+        self._env = jinja2.Environment(undefined=jinja2.StrictUndefined, keep_trailing_newline=True)
+        self.reads = 0              # number of files read from disk, kept for benchmarks
+
+    def index(self, workflow_root):
+        """
+        Loads every `.sql` file under `workflow_root/<layer>/<kind>/` into the cache
+        """
+        workflow_root = os.path.abspath(workflow_root)
+        for layer in LAYERS:
+            for kind in KINDS:
+                directory = os.path.join(workflow_root, layer, kind)
+                if not os.path.isdir(directory):
+                    continue
+                for entry in os.scandir(directory):
+                    if entry.name.endswith(".sql"):
+                        self._load(entry.path, entry.stat().st_mtime_ns)
+        self._indexed_roots.add(workflow_root)
+
+    def paths(self):
+        """
+        Returns every indexed SQL path
+        """
+        return sorted(self._entries)
+
+    def get_source(self, path):
+        """
+        Returns the raw contents of the SQL file at `path`
+        """
+        return self._get(path)[1]
+
+    def get_template(self, path):
+        """
+        Returns the compiled Jinja template for the SQL file at `path`, compiled on first use and kept until the file
+        changes
+        """
+        path = os.path.abspath(path)
+        mtime_ns, source, template = self._get(path)
+        if template is None:
+            template = self._env.from_string(source)
+            with self._lock:
+                if self._entries.get(path, (None,))[0] == mtime_ns:
+                    self._entries[path] = (mtime_ns, source, template)
+        return template
+
+    def render(self, path, **context):
+        """
+        Renders the SQL file at `path` with the given template context, e.g. `ts`, `ds`, `params`
+        """
+        return self.get_template(path).render(**context)
+
+    def render_string(self, source, **context):
+        """
+        Renders SQL that is generated rather than read from a file, e.g. `quality.compile_check`, with the same
+        environment as the SQL files
+        """
+        return self._env.from_string(source).render(**context)
+
+    def _get(self, path):
+        path = os.path.abspath(path)
+        self._maybe_index(path)
+        mtime_ns = os.stat(path).st_mtime_ns
+        entry = self._entries.get(path)
+        if entry is None or entry[0] != mtime_ns:
+            entry = self._load(path, mtime_ns)
+        return entry
+
+    def _maybe_index(self, path):
+        # Index the whole workflow tree the first time any file inside of it is requested
+        parts = path.split(os.sep)
+        if common.SQL_WORKFLOWS_DIR not in parts:
+            return
+        workflow_root = os.sep.join(parts[:parts.index(common.SQL_WORKFLOWS_DIR) + 1])
+        if workflow_root not in self._indexed_roots:
+            self.index(workflow_root)
+
+    def _load(self, path, mtime_ns):
+        with open(path, "r") as sql_file:
+            source = sql_file.read()
+        entry = (mtime_ns, source, None)
+        with self._lock:
+            self._entries[os.path.abspath(path)] = entry
+            self.reads += 1
+        return entry
+
+
+REGISTRY = SqlRegistry()
+
+# Warm the cache from the deployed DAG folder at import time. With `/opt/airflow/utils` on PYTHONPATH the DAG processor
+# manager pre-imports this module, and every forked parse inherits the populated cache.
+if os.path.isdir(os.path.join(common.AIRFLOW_DAGS_DIR, common.SQL_WORKFLOWS_DIR)):
+    REGISTRY.index(os.path.join(common.AIRFLOW_DAGS_DIR, common.SQL_WORKFLOWS_DIR))
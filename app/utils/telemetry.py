@@ -0,0 +1,236 @@
+"""
+BigQuery job telemetry
+
+Every BigQuery job the DAG runs (loads, MERGE scripts, carry-forwards, `_latest` views, fingerprint records and the
+fused quality checks) goes through `operators.InstrumentedBigQueryInsertJobOperator` or
+`operators.DataQualityCheckOperator`, which read the finished job's statistics and append one JSON line per job to
+`common.TELEMETRY_PATH` (under the Airflow logs volume). Backfills run by `backfill.BigQueryRunner` are recorded the
+same way. Each record holds:
+  - `task_id`, `layer`, `run_id`, `ds`, `try_number`, `job_id`, `statement_type`
+  - `bytes_processed`, `bytes_billed`, `slot_ms`, `cache_hit`, `rows_written`
+  - `queued_ms` (creation to start) and `elapsed_ms` (start to end)
+  - `stages`: the query plan's stages, each with `name`, `elapsed_ms`, `slot_ms`, `records_read` and `records_written`
+
+`job_metrics` only reads the job's REST representation (`job.to_api_repr()`), so a stubbed response is enough to
+exercise it without GCP.
+
+`report` summarises a metrics file per layer and per task, flags tasks whose latest run used markedly more slots
+than their previous runs, and lists the stages using the most slots.
+
+Usage:
+    python utils/telemetry.py --metrics ../logs/telemetry/bigquery_jobs.jsonl
+    python utils/telemetry.py --metrics bigquery_jobs.jsonl --since 2025-03-01 --baseline-runs 14 --threshold 1.5
+"""
+import argparse
+import datetime
+import functools
+import json
+import os
+import statistics
+
+import common
+import gold_scan
+import specs
+
+
+def _int(value):
+    return int(value) if value is not None else None
+
+
+def _stage_metrics(stage):
+    start_ms, end_ms = _int(stage.get("startMs")), _int(stage.get("endMs"))
+    return {
+        "name": stage.get("name"),
+        "elapsed_ms": end_ms - start_ms if start_ms is not None and end_ms is not None else None,
+        "slot_ms": _int(stage.get("slotMs")),
+        "records_read": _int(stage.get("recordsRead")),
+        "records_written": _int(stage.get("recordsWritten")),
+    }
+
+
+def rows_written(query_statistics):
+    """
+    Returns the rows a query job wrote: DML affected rows, else what the plan's last stage wrote to the destination
+    """
+    if query_statistics.get("numDmlAffectedRows") is not None:
+        return int(query_statistics["numDmlAffectedRows"])
+    dml_statistics = query_statistics.get("dmlStats")
+    if dml_statistics:
+        return sum(int(dml_statistics.get(key, 0)) for key in ("insertedRowCount", "updatedRowCount", "deletedRowCount"))
+    plan = query_statistics.get("queryPlan")
+    if plan:
+        return _int(plan[-1].get("recordsWritten"))
+    return None
+
+
+def job_metrics(job_resource):
+    """
+    Returns the metrics of a finished BigQuery job, from its REST representation (`job.to_api_repr()`)
+    """
+    job_statistics = job_resource.get("statistics", {})
+    query_statistics = job_statistics.get("query", {})
+    creation_ms = _int(job_statistics.get("creationTime"))
+    start_ms = _int(job_statistics.get("startTime"))
+    end_ms = _int(job_statistics.get("endTime"))
+    return {
+        "job_id": job_resource.get("jobReference", {}).get("jobId"),
+        "statement_type": query_statistics.get("statementType"),
+        "bytes_processed": _int(query_statistics.get("totalBytesProcessed", job_statistics.get("totalBytesProcessed"))),
+        "bytes_billed": _int(query_statistics.get("totalBytesBilled")),
+        "slot_ms": _int(job_statistics.get("totalSlotMs", query_statistics.get("totalSlotMs"))),
+        "cache_hit": bool(query_statistics.get("cacheHit", False)),
+        "rows_written": rows_written(query_statistics),
+        "queued_ms": start_ms - creation_ms if start_ms is not None and creation_ms is not None else None,
+        "elapsed_ms": end_ms - start_ms if end_ms is not None and start_ms is not None else None,
+        "stages": [_stage_metrics(stage) for stage in query_statistics.get("queryPlan", [])],
+    }
+
+
+@functools.lru_cache(maxsize=None)
+def task_layers(table_specs=specs.TABLE_SPECS):
+    """
+    Returns {task_id: layer} for every task running BigQuery jobs: those the specs plan, the shared loads standing in
+    for several of them, and the micro-batch and lifecycle tasks. Built once per worker process
+    """
+    # Both record their jobs through this module
+    import lifecycle
+    import microbatch
+
+    layers = {step.task_id: spec.layer for spec in table_specs for step in specs.plan_tasks(spec)}
+    layers[specs.BATCHED_LOAD_TASK_ID] = specs.BRONZE
+    layers[gold_scan.SHARED_SCAN_TASK_ID] = specs.GOLD
+    layers.update((microbatch.ingest_task_id(spec), spec.layer) for spec in microbatch.streamed_specs(table_specs))
+    layers.update((microbatch.refresh_task_id(spec), spec.layer) for spec in microbatch.refreshed_specs(table_specs))
+    layers.update((lifecycle.archive_task_id(spec), spec.layer) for spec in lifecycle.archived_specs(table_specs))
+    return layers
+
+
+def record(job_resource, task_id, run_id=None, ds=None, try_number=None, path=common.TELEMETRY_PATH):
+    """
+    Appends the metrics of one finished job to the JSON lines file at `path`, returning the record
+
+    Lines are written with a single append, so concurrent tasks on one worker do not interleave records.
+    """
+    metrics = dict(
+        task_id = task_id,
+        layer = task_layers().get(task_id),
+        run_id = run_id,
+        ds = ds,
+        try_number = try_number,
+        recorded_at = datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        **job_metrics(job_resource)
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "a") as metrics_file:
+        metrics_file.write(json.dumps(metrics, sort_keys=True) + "\n")
+    return metrics
+
+
+def load(path, since=None):
+    """
+    Returns the records of a metrics file, oldest run first, keeping those with `ds` on or after `since`
+    """
+    records = []
+    with open(path) as metrics_file:
+        for line in metrics_file:
+            if line.strip():
+                records.append(json.loads(line))
+    if since:
+        records = [metrics for metrics in records if (metrics.get("ds") or "") >= since.isoformat()]
+    return sorted(records, key=lambda metrics: (metrics.get("ds") or "", metrics.get("recorded_at") or ""))
+
+
+def task_trends(records, baseline_runs=7, threshold=1.5):
+    """
+    Returns one row per task: runs, latest and baseline (median of the `baseline_runs` before it) slot ms and bytes
+    billed, cache hit rate, and whether the latest run used more than `threshold` times its baseline slots
+    """
+    by_task = {}
+    for metrics in records:
+        by_task.setdefault(metrics["task_id"], []).append(metrics)
+
+    trends = []
+    for task_id, runs in by_task.items():
+        latest, previous = runs[-1], runs[:-1][-baseline_runs:]
+        baseline_slot_ms = statistics.median(run["slot_ms"] or 0 for run in previous) if previous else None
+        baseline_billed = statistics.median(run["bytes_billed"] or 0 for run in previous) if previous else None
+        trends.append({
+            "task_id": task_id,
+            "layer": latest.get("layer"),
+            "runs": len(runs),
+            "slot_ms": latest["slot_ms"] or 0,
+            "baseline_slot_ms": baseline_slot_ms,
+            "bytes_billed": latest["bytes_billed"] or 0,
+            "baseline_bytes_billed": baseline_billed,
+            "cache_hit_rate": sum(1 for run in runs if run["cache_hit"]) / len(runs),
+            "regressed": bool(baseline_slot_ms) and (latest["slot_ms"] or 0) > threshold * baseline_slot_ms,
+        })
+    return sorted(trends, key=lambda trend: trend["slot_ms"], reverse=True)
+
+
+def layer_totals(records):
+    """
+    Returns {layer: {"jobs", "slot_ms", "bytes_billed"}} over every record
+    """
+    totals = {}
+    for metrics in records:
+        layer = totals.setdefault(metrics.get("layer") or "other", {"jobs": 0, "slot_ms": 0, "bytes_billed": 0})
+        layer["jobs"] += 1
+        layer["slot_ms"] += metrics["slot_ms"] or 0
+        layer["bytes_billed"] += metrics["bytes_billed"] or 0
+    return totals
+
+
+def heaviest_stages(records, limit=10):
+    """
+    Returns the `limit` query plan stages of the latest run of each task that used the most slots
+    """
+    latest = {}
+    for metrics in records:
+        latest[metrics["task_id"]] = metrics
+    stages = [dict(stage, task_id=task_id, ds=metrics.get("ds")) for task_id, metrics in latest.items() for stage in metrics["stages"]]
+    return sorted(stages, key=lambda stage: stage["slot_ms"] or 0, reverse=True)[:limit]
+
+
+def _ratio(value, baseline):
+    return "{:.2f}x".format(value / baseline) if baseline else "-"
+
+
+def report(records, baseline_runs=7, threshold=1.5):
+    """
+    Prints the per-layer totals, per-task trends and heaviest stages of `records`
+    """
+    totals = layer_totals(records)
+    all_slot_ms = sum(layer["slot_ms"] for layer in totals.values()) or 1
+    print("{:<8} {:>7} {:>12} {:>8} {:>12}".format("layer", "jobs", "slot hours", "share", "GB billed"))
+    for layer, layer_total in sorted(totals.items(), key=lambda item: item[1]["slot_ms"], reverse=True):
+        print("{:<8} {:>7,} {:>12.2f} {:>7.1f}% {:>12,.1f}".format(
+            layer, layer_total["jobs"], layer_total["slot_ms"] / 3.6e6, 100 * layer_total["slot_ms"] / all_slot_ms, layer_total["bytes_billed"] / 1e9))
+
+    print()
+    print("{:<44} {:>5} {:>14} {:>8} {:>12} {:>8} {:>6}".format("task (latest run)", "runs", "slot ms", "trend", "MB billed", "trend", "cache"))
+    for trend in task_trends(records, baseline_runs, threshold):
+        print("{:<44} {:>5} {:>14,} {:>8} {:>12,.1f} {:>8} {:>5.0f}%{}".format(
+            trend["task_id"], trend["runs"], trend["slot_ms"], _ratio(trend["slot_ms"], trend["baseline_slot_ms"]),
+            trend["bytes_billed"] / 1e6, _ratio(trend["bytes_billed"], trend["baseline_bytes_billed"]),
+            100 * trend["cache_hit_rate"], "  REGRESSED" if trend["regressed"] else ""))
+
+    print()
+    print("{:<44} {:<24} {:>14} {:>12} {:>14}".format("heaviest stages (latest run)", "stage", "slot ms", "elapsed ms", "records read"))
+    for stage in heaviest_stages(records):
+        print("{:<44} {:<24} {:>14,} {:>12,} {:>14,}".format(
+            stage["task_id"], stage["name"] or "", stage["slot_ms"] or 0, stage["elapsed_ms"] or 0, stage["records_read"] or 0))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--metrics", default=common.TELEMETRY_PATH, help="JSON lines file written by the instrumented tasks")
+    parser.add_argument("--since", type=datetime.date.fromisoformat, help="only runs on or after this logical date (ds)")
+    parser.add_argument("--baseline-runs", type=int, default=7, help="previous runs a task's latest run is compared with")
+    parser.add_argument("--threshold", type=float, default=1.5, help="slot ms ratio to the baseline flagged as a regression")
+    args = parser.parse_args()
+    report(load(args.metrics, args.since), args.baseline_runs, args.threshold)
+
+
+if __name__ == "__main__":
+    main()